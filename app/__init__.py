@@ -42,6 +42,9 @@ def create_app(config_name=None):
     # Configuración adicional
     app.config['PERMANENT_SESSION_LIFETIME'] = config.PERMANENT_SESSION_LIFETIME
     
+    # Pool de conexiones SQLite
+    init_database(app, config)
+    
     # Inicializar extensiones
     from .extensions import init_extensions
     init_extensions(app)
@@ -73,6 +76,27 @@ def create_app(config_name=None):
     return app
 
 
+def init_database(app, config):
+    """Aplica la configuración del pool SQLite y libera conexiones por request"""
+    from database import configurar_conexiones, liberar_conexion_hilo
+    
+    configurar_conexiones(
+        busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+        cache_size_kib=config.SQLITE_CACHE_SIZE_KIB,
+        mmap_size=config.SQLITE_MMAP_SIZE,
+        synchronous=config.SQLITE_SYNCHRONOUS,
+    )
+    
+    @app.teardown_appcontext
+    def liberar_conexion_db(error=None):
+        liberar_conexion_hilo()
+
+    # Tabla de intentos de login compartida por los workers
+    from db_helpers_login import ensure_intentos_login
+    from .utils.security import LOGIN_ATTEMPTS_FILE
+    ensure_intentos_login(str(LOGIN_ATTEMPTS_FILE))
+
+
 def register_jinja_filters(app):
     """Registra filtros personalizados para Jinja2"""
     from .utils.formatting import formatear_monto, formatear_con_miles
@@ -24,6 +24,12 @@ class Config:
     # ============================================
     DB_PATH = BASE_DIR / 'loansi.db'
     SQLITE_DEBUG = os.environ.get('SQLITE_DEBUG', 'True').lower() == 'true'
+
+    # Pool de conexiones SQLite (ver database.configurar_conexiones)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('LOANSI_SQLITE_BUSY_TIMEOUT', 5000))
+    SQLITE_CACHE_SIZE_KIB = int(os.environ.get('LOANSI_SQLITE_CACHE_KIB', 16384))
+    SQLITE_MMAP_SIZE = int(os.environ.get('LOANSI_SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+    SQLITE_SYNCHRONOUS = os.environ.get('LOANSI_SQLITE_SYNCHRONOUS', 'NORMAL')
     
     # ============================================
     # SESIONES
@@ -19,13 +19,17 @@ if str(BASE_DIR) not in sys.path:
 from db_helpers import (
     cargar_configuracion,
     guardar_configuracion,
+    obtener_snapshot_configuracion,
+    invalidar_snapshot_configuracion,
     cargar_scoring,
     guardar_scoring,
     cargar_evaluaciones,
     guardar_evaluacion,
+    guardar_evaluaciones_lote,
     actualizar_evaluacion,
     cargar_simulaciones,
     guardar_simulacion,
+    guardar_simulaciones_lote,
     obtener_casos_comite,
     contar_casos_nuevos_asesor,
     obtener_usuario,
@@ -33,12 +37,15 @@ from db_helpers import (
     eliminar_linea_credito_db,
     eliminar_usuario_db,
     resolve_visible_usernames,
+    filtro_visibilidad_sql,
     obtener_evaluacion_por_timestamp,
     obtener_usuarios_completos,
     actualizar_usuario,
     ensure_user_assignments_table,
     get_assigned_usernames,
     get_assigned_usernames_recursive,
+    obtener_jerarquia_asignaciones,
+    invalidar_jerarquia_asignaciones,
     get_all_assignments,
     add_assignment,
     remove_assignment,
@@ -47,6 +54,14 @@ from db_helpers import (
     get_members_for_assignments,
     obtener_simulaciones_por_asesores,
     obtener_evaluaciones_por_asesores,
+    obtener_simulaciones_visibles,
+    obtener_evaluaciones_visibles,
+    obtener_historial_evaluaciones,
+    obtener_evaluacion_completa,
+    obtener_casos_comite_asesor,
+    obtener_cola_comite,
+    obtener_decisiones_recientes_comite,
+    marcar_caso_visto_asesor,
 )
 
 # Re-exportar funciones de scoring por línea
@@ -69,6 +84,39 @@ from db_helpers_scoring_linea import (
     crear_config_scoring_linea_defecto,
 )
 
+# Re-exportar modelo de scoring compilado
+from db_helpers_scoring_modelo import (
+    compilar_modelo_scoring,
+    obtener_modelo_scoring,
+)
+
+# Re-exportar scoring en lote
+from db_helpers_scoring_lote import (
+    evaluar_lote,
+    calcular_scoring_lote,
+)
+
+# Re-exportar backtest de configuración de scoring
+from db_helpers_scoring_backtest import (
+    aplicar_borrador_scoring,
+    backtest_config_scoring,
+)
+
+# Re-exportar calibración de umbrales de scoring
+from db_helpers_scoring_calibracion import (
+    ensure_version_evaluaciones,
+    obtener_calibracion_linea,
+)
+
+# Re-exportar sugerencias de mejora de scoring
+from db_helpers_scoring_mejoras import explicar_mejoras_scoring
+
+# Re-exportar scoring contra todas las líneas
+from db_helpers_scoring_multilinea import calcular_scoring_todas_lineas
+
+# Re-exportar motor de reglas de rechazo
+from db_helpers_scoring_reglas import compilar_reglas_rechazo
+
 # Re-exportar funciones de estados
 from db_helpers_estados import (
     marcar_desembolsado,
@@ -84,20 +132,33 @@ from db_helpers_estados import (
 from db_helpers_dashboard import (
     obtener_estadisticas_por_rol,
     obtener_resumen_navbar,
+    invalidar_resumen_navbar,
+    obtener_metricas_cache_navbar,
     obtener_usuarios_asignados_detalle,
     obtener_jerarquia_gerente,
 )
 
+# Re-exportar funciones de auditoría
+from db_helpers_auditoria import (
+    registrar_evento_auditoria,
+    consultar_auditoria,
+    vaciar_auditoria,
+    obtener_metricas_auditoria,
+)
+
 # Re-exportar conexión a DB
-from database import conectar_db, DB_PATH
+from database import conectar_db, DB_PATH, estadisticas_conexiones
 
 __all__ = [
     # Conexión
     'conectar_db',
     'DB_PATH',
+    'estadisticas_conexiones',
     # Configuración
     'cargar_configuracion',
     'guardar_configuracion',
+    'obtener_snapshot_configuracion',
+    'invalidar_snapshot_configuracion',
     # Scoring
     'cargar_scoring',
     'guardar_scoring',
@@ -117,19 +178,47 @@ __all__ = [
     'invalidar_cache_scoring_linea',
     'verificar_tablas_scoring_linea',
     'crear_config_scoring_linea_defecto',
+    # Modelo de scoring compilado
+    'compilar_modelo_scoring',
+    'obtener_modelo_scoring',
+    # Scoring en lote
+    'evaluar_lote',
+    'calcular_scoring_lote',
+    # Backtest de scoring
+    'aplicar_borrador_scoring',
+    'backtest_config_scoring',
+    # Calibración de scoring
+    'ensure_version_evaluaciones',
+    'obtener_calibracion_linea',
+    # Sugerencias de mejora
+    'explicar_mejoras_scoring',
+    # Scoring contra todas las líneas
+    'calcular_scoring_todas_lineas',
+    # Reglas de rechazo
+    'compilar_reglas_rechazo',
     # Evaluaciones
     'cargar_evaluaciones',
     'guardar_evaluacion',
+    'guardar_evaluaciones_lote',
     'actualizar_evaluacion',
     'obtener_evaluacion_por_timestamp',
     'obtener_evaluaciones_por_asesores',
+    'obtener_evaluaciones_visibles',
+    'obtener_historial_evaluaciones',
+    'obtener_evaluacion_completa',
     # Simulaciones
     'cargar_simulaciones',
     'guardar_simulacion',
+    'guardar_simulaciones_lote',
     'obtener_simulaciones_por_asesores',
+    'obtener_simulaciones_visibles',
     # Comité
     'obtener_casos_comite',
     'contar_casos_nuevos_asesor',
+    'obtener_casos_comite_asesor',
+    'obtener_cola_comite',
+    'obtener_decisiones_recientes_comite',
+    'marcar_caso_visto_asesor',
     # Usuarios
     'obtener_usuario',
     'crear_usuario',
@@ -140,6 +229,8 @@ __all__ = [
     'ensure_user_assignments_table',
     'get_assigned_usernames',
     'get_assigned_usernames_recursive',
+    'obtener_jerarquia_asignaciones',
+    'invalidar_jerarquia_asignaciones',
     'get_all_assignments',
     'add_assignment',
     'remove_assignment',
@@ -147,6 +238,7 @@ __all__ = [
     'get_managers_for_assignments',
     'get_members_for_assignments',
     'resolve_visible_usernames',
+    'filtro_visibilidad_sql',
     # Líneas de crédito
     'eliminar_linea_credito_db',
     # Estados
@@ -160,6 +252,13 @@ __all__ = [
     # Dashboard
     'obtener_estadisticas_por_rol',
     'obtener_resumen_navbar',
+    'invalidar_resumen_navbar',
+    'obtener_metricas_cache_navbar',
     'obtener_usuarios_asignados_detalle',
     'obtener_jerarquia_gerente',
+    # Auditoría
+    'registrar_evento_auditoria',
+    'consultar_auditoria',
+    'vaciar_auditoria',
+    'obtener_metricas_auditoria',
 ]
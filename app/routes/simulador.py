@@ -111,7 +111,11 @@ def historial_simulaciones():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
     
-    from db_helpers import cargar_simulaciones, resolve_visible_usernames
+    from db_helpers import (
+        resolve_visible_usernames,
+        filtro_visibilidad_sql,
+        obtener_simulaciones_visibles,
+    )
     from permisos import obtener_permisos_usuario_actual
     
     username = session.get("username")
@@ -120,17 +124,10 @@ def historial_simulaciones():
     # Determinar qué simulaciones puede ver
     visibilidad = resolve_visible_usernames(username, permisos, contexto="simulaciones")
     
-    # Cargar simulaciones según visibilidad
-    todas_simulaciones = cargar_simulaciones()
-    
-    if visibilidad['scope'] == 'todos':
-        simulaciones = todas_simulaciones
-    elif visibilidad['scope'] == 'equipo':
-        usernames_visibles = visibilidad['usernames_visibles'] or []
-        simulaciones = [s for s in todas_simulaciones if s.get('asesor') in usernames_visibles]
-    else:
-        # Solo propias
-        simulaciones = [s for s in todas_simulaciones if s.get('asesor') == username]
+    # El scope se filtra en SQLite (equipo vía CTE de asignaciones)
+    simulaciones = obtener_simulaciones_visibles(
+        filtro_visibilidad_sql(visibilidad, username)
+    )
     
     return render_template(
         "asesor/historial_simulaciones.html",
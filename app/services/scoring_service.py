@@ -7,6 +7,25 @@ import json
 from datetime import datetime
 
 
+def _modulo_modelo():
+    """Importa db_helpers_scoring_modelo (raíz del proyecto)."""
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    import db_helpers_scoring_modelo
+    return db_helpers_scoring_modelo
+
+
+def _modulo_reglas():
+    """Importa db_helpers_scoring_reglas (raíz del proyecto)."""
+    _modulo_modelo()
+    import db_helpers_scoring_reglas
+    return db_helpers_scoring_reglas
+
+
 class ScoringService:
     """
     Servicio para cálculos de scoring de crédito.
@@ -26,32 +45,19 @@ class ScoringService:
         self.factores_rechazo = self.config.get("factores_rechazo_automatico", [])
         self.puntaje_minimo = self.config.get("puntaje_minimo_aprobacion", 17)
         self.escala_max = self.config.get("escala_max", 100)
+        self.modelo = None
+        self.reglas_rechazo = None
     
     def cargar_config(self, linea_credito=None):
         """
-        Carga la configuración de scoring desde la base de datos.
+        Carga la configuración de scoring (compilada y cacheada por versión).
         
         Args:
-            linea_credito: Nombre de la línea de crédito (opcional)
+            linea_credito: Nombre de la línea de crédito (opcional). Sin
+                configuración propia se usa la global.
         """
-        import sys
-        from pathlib import Path
-        BASE_DIR = Path(__file__).parent.parent.parent.resolve()
-        if str(BASE_DIR) not in sys.path:
-            sys.path.insert(0, str(BASE_DIR))
-        
-        from db_helpers import cargar_scoring
-        from db_helpers_scoring_linea import cargar_scoring_por_linea
-        
-        if linea_credito:
-            # Intentar cargar configuración específica de la línea
-            config_linea = cargar_scoring_por_linea(linea_credito)
-            if config_linea:
-                self.config = config_linea
-            else:
-                self.config = cargar_scoring()
-        else:
-            self.config = cargar_scoring()
+        self.modelo = _modulo_modelo().obtener_modelo_scoring(linea_credito)
+        self.config = self.modelo.config
         
         # Actualizar referencias
         self.criterios = self.config.get("criterios", {})
@@ -60,6 +66,18 @@ class ScoringService:
         self.puntaje_minimo = self.config.get("puntaje_minimo_aprobacion", 17)
         self.escala_max = self.config.get("escala_max", 100)
     
+    def _modelo(self):
+        """Modelo compilado de la configuración actual."""
+        if self.modelo is None or self.modelo.config is not self.config:
+            self.modelo = _modulo_modelo().compilar_modelo_scoring(self.config)
+        return self.modelo
+    
+    def _criterio_compilado(self, codigo, criterio_config):
+        criterio = self._modelo().por_codigo.get(codigo)
+        if criterio is None or criterio.config is not criterio_config:
+            criterio = _modulo_modelo().CriterioCompilado(codigo, criterio_config)
+        return criterio
+    
     def evaluar_criterio(self, codigo, valor, criterio_config):
         """
         Evalúa un criterio individual.
@@ -89,15 +107,12 @@ class ScoringService:
             except (ValueError, TypeError):
                 valor_num = 0
             
-            # Buscar rango que aplica
-            for rango in rangos:
-                min_val = rango.get("min", float("-inf"))
-                max_val = rango.get("max", float("inf"))
-                
-                if min_val <= valor_num <= max_val:
-                    puntaje = rango.get("puntaje", 0)
-                    detalle = rango.get("descripcion", "")
-                    break
+            # Buscar rango que aplica (bisect sobre los límites compilados)
+            criterio = self._criterio_compilado(codigo, criterio_config)
+            i = criterio.tramos.buscar(valor_num)
+            if i >= 0:
+                puntaje = criterio.puntajes[i]
+                detalle = criterio.descripciones[i] or ""
         
         elif tipo_campo == "seleccion":
             # Buscar opción seleccionada
@@ -129,7 +144,8 @@ class ScoringService:
     
     def verificar_rechazo_automatico(self, valores):
         """
-        Verifica si hay factores de rechazo automático.
+        Verifica si hay factores de rechazo automático (reglas compiladas
+        con SEMANTICA_SERVICIO, ver db_helpers_scoring_reglas).
         
         Args:
             valores: Dict con valores de los criterios
@@ -137,47 +153,27 @@ class ScoringService:
         Returns:
             dict: {rechazo: bool, razon: str, factor: str}
         """
-        for factor in self.factores_rechazo:
-            criterio = factor.get("criterio")
-            operador = factor.get("operador", "<")
-            umbral = factor.get("valor", 0)
-            mensaje = factor.get("mensaje", "Rechazo automático")
-            
-            if criterio not in valores:
-                continue
-            
-            valor = valores[criterio]
-            
-            # Convertir a número si es posible
-            try:
-                valor_num = float(str(valor).replace(",", "."))
-                umbral_num = float(umbral)
-            except (ValueError, TypeError):
-                continue
-            
-            # Evaluar condición
-            rechazado = False
-            if operador == "<" and valor_num < umbral_num:
-                rechazado = True
-            elif operador == "<=" and valor_num <= umbral_num:
-                rechazado = True
-            elif operador == ">" and valor_num > umbral_num:
-                rechazado = True
-            elif operador == ">=" and valor_num >= umbral_num:
-                rechazado = True
-            elif operador == "==" and valor_num == umbral_num:
-                rechazado = True
-            
-            if rechazado:
-                return {
-                    "rechazo": True,
-                    "razon": mensaje,
-                    "factor": criterio,
-                    "valor": valor,
-                    "umbral": umbral
-                }
+        if self.reglas_rechazo is None or self.reglas_rechazo[0] is not self.factores_rechazo:
+            reglas = _modulo_reglas()
+            self.reglas_rechazo = (
+                self.factores_rechazo,
+                reglas.compilar_reglas_rechazo(
+                    self.factores_rechazo, self.config, reglas.SEMANTICA_SERVICIO
+                ),
+            )
+        
+        regla = self.reglas_rechazo[1].evaluar(valores)
+        if regla is None:
+            return {"rechazo": False, "razon": None, "factor": None}
         
-        return {"rechazo": False, "razon": None, "factor": None}
+        factor = regla.factor
+        return {
+            "rechazo": True,
+            "razon": factor.get("mensaje", "Rechazo automático"),
+            "factor": regla.criterio,
+            "valor": valores[regla.criterio],
+            "umbral": factor.get("valor", 0)
+        }
     
     def determinar_nivel_riesgo(self, score):
         """
@@ -189,20 +185,21 @@ class ScoringService:
         Returns:
             dict: Info del nivel de riesgo
         """
-        for nivel in self.niveles_riesgo:
+        modelo = self._modelo()
+        i = modelo.nivel_indice(score)
+        if i >= 0:
+            nivel = modelo.niveles[i]
             min_score = nivel.get("min", 0)
             max_score = nivel.get("max", 100)
-            
-            if min_score <= score <= max_score:
-                return {
-                    "nombre": nivel.get("nombre", "Sin clasificar"),
-                    "color": nivel.get("color", "#808080"),
-                    "tasa_ea": nivel.get("tasa_ea"),
-                    "tasa_nominal_mensual": nivel.get("tasa_nominal_mensual"),
-                    "aval_porcentaje": nivel.get("aval_porcentaje"),
-                    "min": min_score,
-                    "max": max_score
-                }
+            return {
+                "nombre": nivel.get("nombre", "Sin clasificar"),
+                "color": nivel.get("color", "#808080"),
+                "tasa_ea": nivel.get("tasa_ea"),
+                "tasa_nominal_mensual": nivel.get("tasa_nominal_mensual"),
+                "aval_porcentaje": nivel.get("aval_porcentaje"),
+                "min": min_score,
+                "max": max_score
+            }
         
         return {
             "nombre": "Sin clasificar",
@@ -235,7 +232,10 @@ class ScoringService:
         score_total = 0
         peso_total = 0
         
-        for codigo, config in self.criterios.items():
+        # Criterios del modelo compilado: acepta el formato global (dict) y
+        # el de línea (lista)
+        for criterio in self._modelo().criterios:
+            codigo, config = criterio.codigo, criterio.config
             if not config.get("activo", True):
                 continue
             
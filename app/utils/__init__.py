@@ -18,7 +18,6 @@ from .formatting import (
 
 from .security import (
     cargar_login_attempts,
-    guardar_login_attempts,
     check_rate_limit,
     record_failed_attempt,
     clear_attempts,
@@ -44,7 +43,6 @@ __all__ = [
     'parse_currency_value',
     # Security
     'cargar_login_attempts',
-    'guardar_login_attempts',
     'check_rate_limit',
     'record_failed_attempt',
     'clear_attempts',
@@ -1,90 +1,38 @@
 """
 SECURITY.PY - Utilidades de seguridad y rate limiting
 ======================================================
+
+Los intentos fallidos se llevan en memoria y se comparten entre workers
+vía la tabla intentos_login (ver db_helpers_login).
 """
 
-import os
-import json
-from datetime import datetime, timedelta
+from datetime import timedelta
 from pathlib import Path
 
+from db_helpers_login import LimitadorLogin
+
 # Configuración de rate limiting
 MAX_LOGIN_ATTEMPTS = 3
 LOCKOUT_DURATION = timedelta(minutes=15)
 ATTEMPT_WINDOW = timedelta(minutes=5)
-CLEANUP_THRESHOLD = 30
 
-# Archivo para persistir intentos de login
+# Archivo donde se persistían los intentos de login
+# DEPRECATED: solo se usa para importarlos a SQLite (ensure_intentos_login)
 BASE_DIR = Path(__file__).parent.parent.parent.resolve()
 LOGIN_ATTEMPTS_FILE = BASE_DIR / 'login_attempts.json'
 
+# Fallos contados dentro de ATTEMPT_WINDOW, bloqueo de LOCKOUT_DURATION
+LIMITADOR_LOGIN = LimitadorLogin(MAX_LOGIN_ATTEMPTS, ATTEMPT_WINDOW, LOCKOUT_DURATION)
+
 
 def cargar_login_attempts():
     """
-    Carga intentos de login desde archivo JSON.
-    Limpia automáticamente registros antiguos (> 15 minutos).
+    Intentos de login vigentes en memoria.
 
     Returns:
         dict: {ip_address: [timestamp_str1, timestamp_str2, ...]}
     """
-    try:
-        if os.path.exists(LOGIN_ATTEMPTS_FILE):
-            with open(LOGIN_ATTEMPTS_FILE, "r") as f:
-                attempts = json.load(f)
-
-            # Limpiar registros antiguos
-            now = datetime.now()
-            cleaned = {}
-            for ip, timestamps in attempts.items():
-                # Filtrar solo intentos recientes
-                recent = []
-                for ts_str in timestamps:
-                    try:
-                        ts = datetime.fromisoformat(ts_str)
-                        if now - ts < LOCKOUT_DURATION:
-                            recent.append(ts_str)
-                    except (ValueError, TypeError):
-                        continue
-                if recent:
-                    cleaned[ip] = recent
-
-            # Guardar versión limpia si cambió
-            if cleaned != attempts:
-                with open(LOGIN_ATTEMPTS_FILE, "w") as f:
-                    json.dump(cleaned, f)
-
-            return cleaned
-        return {}
-    except (json.JSONDecodeError, IOError):
-        return {}
-
-
-def guardar_login_attempts(attempts):
-    """
-    Guarda intentos de login en archivo JSON.
-    Realiza limpieza automática si el archivo crece demasiado.
-
-    Args:
-        attempts: Diccionario de intentos
-    """
-    try:
-        # Limpiar si hay muchos registros
-        if len(attempts) > CLEANUP_THRESHOLD:
-            now = datetime.now()
-            cleaned = {}
-            for ip, timestamps in attempts.items():
-                recent = [
-                    ts for ts in timestamps
-                    if (now - datetime.fromisoformat(ts)) < LOCKOUT_DURATION
-                ]
-                if recent:
-                    cleaned[ip] = recent
-            attempts = cleaned
-
-        with open(LOGIN_ATTEMPTS_FILE, "w") as f:
-            json.dump(attempts, f, indent=2)
-    except IOError:
-        pass  # Silenciosamente ignorar errores de escritura
+    return LIMITADOR_LOGIN.resumen()
 
 
 def check_rate_limit(ip_address):
@@ -97,46 +45,12 @@ def check_rate_limit(ip_address):
     Returns:
         dict: {'is_locked': bool, 'remaining_time': int (segundos), 'attempts_left': int}
     """
-    attempts = cargar_login_attempts()
-    
-    if ip_address not in attempts:
-        return {
-            'is_locked': False,
-            'remaining_time': 0,
-            'attempts_left': MAX_LOGIN_ATTEMPTS
-        }
-    
-    ip_attempts = attempts[ip_address]
-    now = datetime.now()
-    
-    # Contar intentos recientes (dentro de la ventana)
-    recent_attempts = []
-    for ts_str in ip_attempts:
-        try:
-            ts = datetime.fromisoformat(ts_str)
-            if now - ts < ATTEMPT_WINDOW:
-                recent_attempts.append(ts)
-        except (ValueError, TypeError):
-            continue
-    
-    # Verificar si está bloqueado
-    if len(recent_attempts) >= MAX_LOGIN_ATTEMPTS:
-        # Calcular tiempo restante de bloqueo
-        oldest_attempt = min(recent_attempts)
-        lockout_end = oldest_attempt + LOCKOUT_DURATION
-        remaining = (lockout_end - now).total_seconds()
-        
-        if remaining > 0:
-            return {
-                'is_locked': True,
-                'remaining_time': int(remaining),
-                'attempts_left': 0
-            }
-    
+    estado = LIMITADOR_LOGIN.estado(ip_address)
+
     return {
-        'is_locked': False,
-        'remaining_time': 0,
-        'attempts_left': MAX_LOGIN_ATTEMPTS - len(recent_attempts)
+        'is_locked': estado['bloqueado'],
+        'remaining_time': estado['segundos_bloqueo'],
+        'attempts_left': estado['restantes']
     }
 
 
@@ -147,13 +61,7 @@ def record_failed_attempt(ip_address):
     Args:
         ip_address: Dirección IP del intento
     """
-    attempts = cargar_login_attempts()
-    
-    if ip_address not in attempts:
-        attempts[ip_address] = []
-    
-    attempts[ip_address].append(datetime.now().isoformat())
-    guardar_login_attempts(attempts)
+    LIMITADOR_LOGIN.registrar_fallo(ip_address)
 
 
 def clear_attempts(ip_address):
@@ -163,33 +71,12 @@ def clear_attempts(ip_address):
     Args:
         ip_address: Dirección IP a limpiar
     """
-    attempts = cargar_login_attempts()
-    
-    if ip_address in attempts:
-        del attempts[ip_address]
-        guardar_login_attempts(attempts)
+    LIMITADOR_LOGIN.limpiar(ip_address)
 
 
 def cleanup_old_attempts():
     """
-    Limpia todos los intentos antiguos del archivo.
-    Llamar periódicamente para mantenimiento.
+    Limpia todos los intentos vencidos (también se hace sola al registrar
+    fallos, cada db_helpers_login.INTERVALO_LIMPIEZA_S).
     """
-    attempts = cargar_login_attempts()
-    now = datetime.now()
-    
-    cleaned = {}
-    for ip, timestamps in attempts.items():
-        recent = []
-        for ts_str in timestamps:
-            try:
-                ts = datetime.fromisoformat(ts_str)
-                if now - ts < LOCKOUT_DURATION:
-                    recent.append(ts_str)
-            except (ValueError, TypeError):
-                continue
-        if recent:
-            cleaned[ip] = recent
-    
-    guardar_login_attempts(cleaned)
-    return len(attempts) - len(cleaned)  # Cantidad de IPs limpiadas
+    return LIMITADOR_LOGIN.limpiar_expirados()  # Cantidad de IPs limpiadas
@@ -5,6 +5,11 @@ DATABASE.PY - Sistema de Base de Datos SQLite para Loansi
 
 import sqlite3
 import json
+import os
+import random
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 import shutil
@@ -176,6 +181,20 @@ CREATE TABLE IF NOT EXISTS evaluaciones (
     puntaje_datacredito INTEGER,
     datacredito INTEGER,  -- Alias de puntaje_datacredito
 
+    -- Derivadas de resultado (mantenidas por trigger)
+    resultado_score REAL,
+    resultado_score_normalizado REAL,
+    resultado_nivel TEXT,
+    resultado_aprobado INTEGER DEFAULT 0,
+    resultado_rechazo_automatico TEXT,
+
+    -- Fecha de negocio precalculada en hora Colombia (mantenida por trigger)
+    creado_epoch INTEGER,
+    creado_dia TEXT,
+    creado_mes TEXT,
+    decision_dia TEXT,
+    decision_mes TEXT,
+
     -- Timestamps
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -195,6 +214,9 @@ CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_comite ON evaluaciones(estado
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_visto ON evaluaciones(visto_por_asesor);
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_cedula ON evaluaciones(cedula);
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_cliente ON evaluaciones(nombre_cliente);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_origen ON evaluaciones(asesor, origen);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_visto ON evaluaciones(asesor, visto_por_asesor, estado_comite);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_comite_fecha ON evaluaciones(estado_comite, fecha_creacion DESC);
 
 
 -- ============================================================================
@@ -221,6 +243,11 @@ CREATE TABLE IF NOT EXISTS simulaciones (
     caso_origen TEXT,  -- timestamp de la evaluación origen
     modalidad_desembolso TEXT DEFAULT 'completo',
 
+    -- Fecha de negocio precalculada en hora Colombia (mantenida por trigger)
+    creado_epoch INTEGER,
+    creado_dia TEXT,
+    creado_mes TEXT,
+
     -- Timestamps
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
@@ -254,16 +281,17 @@ CREATE TABLE IF NOT EXISTS auditoria (
     registro_id INTEGER,
     datos_anteriores TEXT,  -- JSON
     datos_nuevos TEXT,  -- JSON
-    ip_address TEXT,
-
-    -- Foreign Key
-    FOREIGN KEY (usuario) REFERENCES usuarios(username)
+    ip_address TEXT
+    -- Sin FOREIGN KEY a usuarios: registra también 'anónimo'/'sistema' y
+    -- sobrevive al borrado del usuario (ver db_helpers_auditoria)
 );
 
 -- Índices para auditoría
 CREATE INDEX IF NOT EXISTS idx_auditoria_timestamp ON auditoria(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_auditoria_usuario ON auditoria(usuario);
 CREATE INDEX IF NOT EXISTS idx_auditoria_tabla ON auditoria(tabla_afectada);
+CREATE INDEX IF NOT EXISTS idx_auditoria_usuario_ts ON auditoria(usuario, timestamp);
+CREATE INDEX IF NOT EXISTS idx_auditoria_accion_ts ON auditoria(accion, timestamp);
 
 
 -- ============================================================================
@@ -285,8 +313,14 @@ CREATE TABLE IF NOT EXISTS user_assignments (
 CREATE INDEX IF NOT EXISTS idx_assign_manager ON user_assignments(manager_username);
 CREATE INDEX IF NOT EXISTS idx_assign_member ON user_assignments(member_username);
 CREATE INDEX IF NOT EXISTS idx_assign_activo ON user_assignments(activo);
+CREATE INDEX IF NOT EXISTS idx_assign_manager_activo ON user_assignments(manager_username, activo);
 
 
+"""
+
+# Vistas (usan las columnas derivadas de `resultado`; ver
+# db_helpers.ensure_columnas_resultado). Se recrean al migrar.
+SQL_VISTAS = """
 -- ============================================================================
 -- VISTA: casos_comite (facilita queries)
 -- ============================================================================
@@ -299,8 +333,8 @@ SELECT
     e.cedula,
     e.tipo_credito,
     e.monto_solicitado,
-    json_extract(e.resultado, '$.score') as score,
-    json_extract(e.resultado, '$.nivel') as nivel,
+    e.resultado_score as score,
+    e.resultado_nivel as nivel,
     e.estado_comite,
     e.visto_por_asesor,
     json_extract(e.decision_admin, '$.admin') as admin_decisor,
@@ -316,17 +350,18 @@ WHERE e.estado_comite IS NOT NULL;
 CREATE VIEW IF NOT EXISTS vista_metricas_asesores AS
 SELECT
     e.asesor,
-    COUNT(DISTINCT e.id) as total_evaluaciones,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'approved' THEN e.id END) as casos_aprobados,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'rejected' THEN e.id END) as casos_rechazados,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'pending' THEN e.id END) as casos_pendientes,
-    AVG(CAST(json_extract(e.resultado, '$.score') AS REAL)) as score_promedio,
-    COUNT(DISTINCT s.id) as total_simulaciones
+    COUNT(*) as total_evaluaciones,
+    SUM(CASE WHEN e.estado_comite = 'approved' THEN 1 ELSE 0 END) as casos_aprobados,
+    SUM(CASE WHEN e.estado_comite = 'rejected' THEN 1 ELSE 0 END) as casos_rechazados,
+    SUM(CASE WHEN e.estado_comite = 'pending' THEN 1 ELSE 0 END) as casos_pendientes,
+    AVG(e.resultado_score) as score_promedio,
+    (SELECT COUNT(*) FROM simulaciones s WHERE s.asesor = e.asesor) as total_simulaciones
 FROM evaluaciones e
-LEFT JOIN simulaciones s ON e.asesor = s.asesor
 GROUP BY e.asesor;
 """
 
+SCHEMA_SQL += SQL_VISTAS
+
 
 # ============================================================================
 # FUNCIONES HELPER
@@ -357,20 +392,408 @@ def crear_backup_json(ruta_json):
     return True
 
 
+# ============================================================================
+# GESTOR DE CONEXIONES (pool compartido con afinidad por hilo)
+# ============================================================================
+
+
+def _entero_env(nombre, defecto):
+    """Lee un entero de una variable de entorno (usa el defecto si no es válido)."""
+    try:
+        return int(os.environ.get(nombre, defecto))
+    except (TypeError, ValueError):
+        return defecto
+
+
+# Parámetros de las conexiones. Se pueden sobrescribir con variables de
+# entorno o en caliente con configurar_conexiones().
+CONFIG_CONEXIONES = {
+    "busy_timeout_ms": _entero_env("LOANSI_SQLITE_BUSY_TIMEOUT", 5000),
+    "cache_size_kib": _entero_env("LOANSI_SQLITE_CACHE_KIB", 16384),
+    "mmap_size": _entero_env("LOANSI_SQLITE_MMAP_SIZE", 64 * 1024 * 1024),
+    "synchronous": os.environ.get("LOANSI_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "sentencias_cache": _entero_env("LOANSI_SQLITE_STMT_CACHE", 256),
+    "max_ociosas": _entero_env("LOANSI_SQLITE_MAX_OCIOSAS", 8),
+    "max_reintentos": _entero_env("LOANSI_SQLITE_MAX_REINTENTOS", 5),
+    "backoff_base_s": 0.05,
+}
+
+_SYNCHRONOUS_VALIDOS = {"OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3"}
+_MENSAJES_BLOQUEO = ("database is locked", "database table is locked", "database is busy")
+
+
+def _es_error_bloqueo(error):
+    """True si el error de SQLite corresponde a un bloqueo (SQLITE_BUSY/LOCKED)."""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        msg in str(error).lower() for msg in _MENSAJES_BLOQUEO
+    )
+
+
+def _con_reintento(conn, operacion):
+    """
+    Ejecuta una operación reintentando con backoff exponencial si la base
+    de datos está bloqueada por otro proceso/hilo.
+    """
+    gestor = getattr(conn, "_gestor", None)
+    config = gestor.config if gestor else CONFIG_CONEXIONES
+    espera = config["backoff_base_s"]
+
+    for intento in range(config["max_reintentos"] + 1):
+        try:
+            return operacion()
+        except sqlite3.OperationalError as e:
+            if not _es_error_bloqueo(e) or intento >= config["max_reintentos"]:
+                raise
+            if gestor:
+                gestor._contar("reintentos_bloqueo")
+            time.sleep(espera * (1 + random.random() * 0.5))
+            espera *= 2
+
+
+class CursorLoansi(sqlite3.Cursor):
+    """Cursor que reintenta las sentencias cuando la DB está bloqueada."""
+
+    def execute(self, sql, parameters=()):
+        return _con_reintento(
+            self.connection, lambda: sqlite3.Cursor.execute(self, sql, parameters)
+        )
+
+    def executemany(self, sql, seq_of_parameters):
+        # Materializar generadores para poder reintentar
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        return _con_reintento(
+            self.connection,
+            lambda: sqlite3.Cursor.executemany(self, sql, seq_of_parameters),
+        )
+
+
+class ConexionLoansi(sqlite3.Connection):
+    """
+    Conexión administrada por GestorConexiones.
+
+    close() no cierra la conexión física: la devuelve al gestor para que
+    otro llamado (o el mismo hilo más tarde) la reutilice. Así el código
+    existente que hace conn = conectar_db() ... conn.close() sigue igual.
+
+    Un préstamo anidado trabaja dentro de un SAVEPOINT propio: su commit()
+    lo confirma dentro de la transacción del llamador (o en disco si el
+    llamador no tenía una abierta), su rollback() solo deshace lo suyo y
+    su close() descarta lo que no confirmó, como un close() real.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._gestor = None
+        self._nivel = 0  # Préstamos anidados dentro del mismo hilo
+        self._savepoints = []  # Un SAVEPOINT por préstamo anidado abierto
+
+    def _abrir_savepoint(self):
+        nombre = f"loansi_prestamo_{len(self._savepoints) + 1}"
+        super().execute(f"SAVEPOINT {nombre}")
+        self._savepoints.append(nombre)
+
+    def _cerrar_savepoint(self):
+        """Descarta lo no confirmado del préstamo anidado y quita su SAVEPOINT."""
+        nombre = self._savepoints.pop()
+        try:
+            super().execute(f"ROLLBACK TO {nombre}")
+            super().execute(f"RELEASE {nombre}")
+        except sqlite3.OperationalError:
+            pass  # La transacción ya terminó (p. ej. COMMIT explícito en SQL)
+
+    def cursor(self, factory=CursorLoansi):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if self._savepoints:
+            nombre = self._savepoints[-1]
+            try:
+                _con_reintento(self, lambda: super(ConexionLoansi, self).execute(f"RELEASE {nombre}"))
+            except sqlite3.OperationalError:
+                if self.in_transaction:
+                    raise
+            # El préstamo sigue abierto: nuevo SAVEPOINT para lo que siga
+            super().execute(f"SAVEPOINT {nombre}")
+            return None
+        return _con_reintento(self, super().commit)
+
+    def rollback(self):
+        if self._savepoints:
+            nombre = self._savepoints[-1]
+            try:
+                super().execute(f"ROLLBACK TO {nombre}")
+            except sqlite3.OperationalError:
+                super().execute(f"SAVEPOINT {nombre}")
+            return None
+        return super().rollback()
+
+    def close(self):
+        if self._gestor is None:
+            super().close()
+        else:
+            self._gestor.liberar(self)
+
+    def cerrar_definitivamente(self):
+        """Cierra la conexión física (sin devolverla al pool)."""
+        self._gestor = None
+        super().close()
+
+
+class GestorConexiones:
+    """
+    Pool de conexiones SQLite compartido por todos los módulos de datos.
+
+    - Cada hilo tiene como máximo una conexión prestada; los llamados
+      anidados (una función que abre conexión y llama a otra que también
+      la abre) reciben la misma conexión.
+    - Al liberar el último préstamo, la conexión vuelve a una pila LIFO de
+      conexiones ociosas, de modo que el siguiente request (del mismo hilo
+      o de otro) la reutiliza sin abrir el archivo ni repetir los PRAGMAs.
+    - Los PRAGMAs (busy_timeout, cache_size, mmap_size, synchronous,
+      foreign_keys) se aplican una sola vez, al abrir la conexión. El modo
+      WAL queda guardado en el archivo: se activa una vez al iniciar la
+      aplicación (activar_wal), no en cada conexión.
+    """
+
+    def __init__(self, db_path, config=None):
+        self.db_path = Path(db_path)
+        self.config = dict(CONFIG_CONEXIONES)
+        if config:
+            self.config.update(config)
+        self._local = threading.local()
+        self._ociosas = deque()
+        self._lock = threading.Lock()
+        self._stats = {
+            "abiertas": 0,
+            "reutilizadas": 0,
+            "reintentos_bloqueo": 0,
+            "cerradas": 0,
+        }
+
+    def _contar(self, clave, cantidad=1):
+        with self._lock:
+            self._stats[clave] += cantidad
+
+    def _abrir(self):
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.config["busy_timeout_ms"] / 1000.0,
+            factory=ConexionLoansi,
+            cached_statements=self.config["sentencias_cache"],
+            check_same_thread=False,  # El gestor garantiza un solo hilo por préstamo
+        )
+        conn.row_factory = sqlite3.Row  # Para acceder por nombre de columna
+        self._aplicar_pragmas(conn)
+        conn._gestor = self
+        self._contar("abiertas")
+        return conn
+
+    def _aplicar_pragmas(self, conn):
+        synchronous = str(self.config["synchronous"]).upper()
+        if synchronous not in _SYNCHRONOUS_VALIDOS:
+            synchronous = "NORMAL"
+
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+        conn.execute(f"PRAGMA cache_size = {-abs(int(self.config['cache_size_kib']))}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config['mmap_size'])}")
+        # Habilitar foreign keys (deshabilitadas por defecto en SQLite)
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    def activar_wal(self):
+        """
+        Pasa la DB a journal_mode=WAL si es escribible y ya tiene tablas.
+
+        Returns:
+            bool: True si la DB quedó en WAL
+        """
+        if not self.db_path.exists() or not os.access(self.db_path, os.W_OK):
+            return False
+        conn = self.obtener()
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+                return False
+            modo = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if str(modo).lower() != "wal":
+                modo = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            return str(modo).lower() == "wal"
+        except sqlite3.DatabaseError as e:
+            # Sistemas de archivos sin soporte de memoria compartida
+            print(f"⚠️ No se pudo activar WAL: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def obtener(self):
+        """Presta la conexión del hilo actual (abre o reutiliza una)."""
+        conn = getattr(self._local, "conexion", None)
+        if conn is not None:
+            conn._abrir_savepoint()
+            conn._nivel += 1
+            self._contar("reutilizadas")
+            return conn
+
+        with self._lock:
+            conn = self._ociosas.pop() if self._ociosas else None
+            if conn is not None:
+                self._stats["reutilizadas"] += 1
+
+        if conn is None:
+            conn = self._abrir()
+
+        conn._nivel = 1
+        self._local.conexion = conn
+        return conn
+
+    def liberar(self, conn):
+        """Libera un préstamo; al liberar el último, la conexión vuelve al pool."""
+        if getattr(self._local, "conexion", None) is not conn:
+            return  # Ya liberada (doble close) o perteneciente a otro hilo
+
+        conn._nivel -= 1
+        if conn._nivel > 0:
+            if conn._savepoints:
+                conn._cerrar_savepoint()
+            return
+
+        self._local.conexion = None
+        self._devolver(conn)
+
+    def liberar_hilo(self):
+        """
+        Devuelve la conexión del hilo actual aunque queden préstamos sin
+        cerrar. Se llama al final de cada request (teardown de Flask).
+        """
+        conn = getattr(self._local, "conexion", None)
+        if conn is None:
+            return
+        conn._nivel = 0
+        conn._savepoints = []
+        self._local.conexion = None
+        self._devolver(conn)
+
+    def _devolver(self, conn):
+        try:
+            # Igual que un close() real: lo no confirmado se descarta
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+
+        with self._lock:
+            if len(self._ociosas) < self.config["max_ociosas"]:
+                self._ociosas.append(conn)
+                return
+        self._descartar(conn)
+
+    def _descartar(self, conn):
+        try:
+            conn.cerrar_definitivamente()
+        except sqlite3.Error:
+            pass
+        self._contar("cerradas")
+
+    def cerrar_todas(self):
+        """Cierra todas las conexiones ociosas (al apagar o reconfigurar)."""
+        with self._lock:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+        for conn in ociosas:
+            self._descartar(conn)
+
+    def estadisticas(self):
+        """Contadores del pool (para diagnóstico)."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["ociosas"] = len(self._ociosas)
+        stats["db_file"] = str(self.db_path)
+        stats["config"] = dict(self.config)
+        return stats
+
+
+_GESTOR = GestorConexiones(DB_PATH)
+
+
+def configurar_conexiones(**opciones):
+    """
+    Ajusta los parámetros del pool (busy_timeout_ms, cache_size_kib,
+    mmap_size, synchronous, sentencias_cache, max_ociosas, max_reintentos).
+
+    Las conexiones ociosas se cierran para que las nuevas tomen los cambios.
+    """
+    desconocidas = set(opciones) - set(CONFIG_CONEXIONES)
+    if desconocidas:
+        raise ValueError(f"Opciones de conexión desconocidas: {sorted(desconocidas)}")
+
+    _GESTOR.config.update(opciones)
+    _GESTOR.cerrar_todas()
+
+
+def estadisticas_conexiones():
+    """
+    Retorna los contadores del pool de conexiones.
+
+    Returns:
+        dict: {abiertas, reutilizadas, reintentos_bloqueo, cerradas, ociosas, ...}
+    """
+    return _GESTOR.estadisticas()
+
+
+def activar_wal():
+    """
+    Activa journal_mode=WAL en la DB de la aplicación (una vez, al iniciar).
+
+    Returns:
+        bool: True si la DB quedó en WAL
+    """
+    return _GESTOR.activar_wal()
+
+
+def liberar_conexion_hilo():
+    """Devuelve al pool la conexión del hilo actual (fin de request)."""
+    _GESTOR.liberar_hilo()
+
+
 def conectar_db():
     """
-    Conecta a la base de datos SQLite.
+    Obtiene una conexión a la base de datos SQLite desde el pool.
+
+    La conexión ya tiene row_factory = sqlite3.Row y foreign keys activas.
+    Llamar conn.close() la devuelve al pool (no cierra el archivo).
 
     Returns:
         sqlite3.Connection: Conexión a la DB
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Para acceder por nombre de columna
+    return _GESTOR.obtener()
 
-    # Habilitar foreign keys (deshabilitadas por defecto en SQLite)
-    conn.execute("PRAGMA foreign_keys = ON")
 
-    return conn
+def checkpoint_wal():
+    """
+    Vuelca el WAL al archivo principal de la DB.
+    Llamar antes de copiar loansi.db (backups) para no perder cambios recientes.
+
+    Returns:
+        bool: True si el checkpoint se ejecutó
+    """
+    try:
+        conn = conectar_db()
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error as e:
+        print(f"⚠️ Error en checkpoint WAL: {e}")
+        return False
 
 
 def crear_base_datos():
@@ -391,6 +814,7 @@ def crear_base_datos():
 
         conn.commit()
         conn.close()
+        activar_wal()
 
         print(f"✅ Base de datos creada: {DB_PATH}")
         return True
@@ -429,6 +853,41 @@ def verificar_integridad_db():
         return False
 
 
+def _normalizar_sql_trigger(sql):
+    """SQL comparable con el que guarda sqlite_master (sin IF NOT EXISTS)."""
+    sql = " ".join(sql.split())
+    return sql.replace("CREATE TRIGGER IF NOT EXISTS ", "CREATE TRIGGER ", 1)
+
+
+def asegurar_triggers(cursor, triggers):
+    """
+    Crea los triggers que faltan y recrea los que tienen otra definición.
+
+    Compara el SQL guardado en sqlite_master con el esperado: los que ya
+    coinciden no se tocan, así el esquema no se reescribe en cada arranque.
+
+    Args:
+        cursor: Cursor dentro de la transacción del llamador
+        triggers (dict): {nombre: CREATE TRIGGER ...}
+
+    Returns:
+        list: Triggers que existían con otra definición y se recrearon
+    """
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+    actuales = {row[0]: _normalizar_sql_trigger(row[1]) for row in cursor.fetchall()}
+
+    recreados = []
+    for nombre, sentencia in triggers.items():
+        actual = actuales.get(nombre)
+        if actual == _normalizar_sql_trigger(sentencia):
+            continue
+        if actual is not None:
+            cursor.execute(f"DROP TRIGGER {nombre}")
+            recreados.append(nombre)
+        cursor.execute(sentencia)
+    return recreados
+
+
 def listar_tablas():
     """
     Lista todas las tablas en la base de datos.
@@ -7,11 +7,17 @@ en flask_app.py. Mantiene la misma API para minimizar cambios.
 
 """
 
+import copy
 import json
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from database import conectar_db, DB_PATH
+from types import MappingProxyType
+from database import conectar_db, DB_PATH, SQL_VISTAS
+from db_helpers_dashboard import invalidar_resumen_navbar
+from db_helpers_cambios import notificar_cambios
 
 
 # ============================================================================
@@ -349,7 +355,9 @@ def guardar_configuracion(config):
                         f"✅ Usuario '{username}' ({datos.get('nombre_completo', '')}) INSERTADO en SQLite"
                     )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print("✅ Configuración completa guardada en SQLite")
 
     except Exception as e:
@@ -419,7 +427,9 @@ def eliminar_linea_credito_db(nombre_linea):
             (linea_id,),
         )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print(
             f"✅ Línea '{nombre_linea}' marcada como inactiva en SQLite (soft delete)"
         )
@@ -488,7 +498,9 @@ def reactivar_linea_credito_db(nombre_linea):
             (linea_id,),
         )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print(f"✅ Línea '{nombre_linea}' reactivada en SQLite")
         return True
 
@@ -994,7 +1006,9 @@ def guardar_scoring(scoring_data):
             )
             print(f"✅ Secciones guardadas: {len(scoring_data['secciones'])} secciones")
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print("✅ guardar_scoring(): Configuración completa guardada en SQLite")
 
     except Exception as e:
@@ -1008,6 +1022,187 @@ def guardar_scoring(scoring_data):
         conn.close()
 
 
+# ============================================================================
+# REGISTRO DE EVALUACIÓN CON DECODIFICACIÓN PEREZOSA
+# ============================================================================
+
+# Marca "conservar el valor crudo de la columna" en las reglas de JSON
+_CRUDO = object()
+
+# Reglas por columna JSON: (valor si la columna está vacía, valor si el JSON
+# es inválido). Los tipos (dict/list) se instancian para no compartir objetos.
+JSON_EVALUACION_LISTADOS = {
+    "resultado": (dict, dict),
+    "criterios_evaluados": (list, list),
+    "decision_admin": (None, None),
+    "criterios_detalle": (list, list),
+    "valores_criterios": (dict, dict),
+}
+
+# Mismas reglas que tenía leer_evaluaciones_db() en flask_app.py
+JSON_EVALUACION_COMPLETA = {
+    "resultado": (_CRUDO, _CRUDO),
+    "criterios_evaluados": (_CRUDO, list),
+    "criterios_detalle": (_CRUDO, list),
+    "valores_criterios": (_CRUDO, dict),
+    "decision_admin": (_CRUDO, _CRUDO),
+}
+
+# Campos que se "suben" desde decision_admin cuando la columna está vacía
+# (CORRECCIÓN 2025-12-18: el frontend busca ev.monto_aprobado, etc.)
+_CAMPOS_ELEVADOS_DECISION = (
+    "monto_aprobado",
+    "nivel_riesgo_ajustado",
+    "justificacion_modificacion",
+    "tasas_nivel_riesgo",
+)
+
+
+def _valor_por_defecto(regla, crudo):
+    if regla is _CRUDO:
+        return crudo
+    return regla() if callable(regla) else regla
+
+
+class EvaluacionRegistro(dict):
+    """
+    Evaluación que guarda el texto JSON de sus columnas y lo decodifica solo
+    la primera vez que se lee cada una.
+
+    Es un dict (templates, jsonify, dict(ev), {**ev} y .get() siguen
+    funcionando igual); los listados que solo muestran cliente, monto y
+    estado ya no pagan el json.loads de criterios y decisión del comité.
+    """
+
+    __slots__ = ("_pendientes", "_reglas")
+
+    def __init__(self, datos, reglas_json, elevar_decision=False):
+        super().__init__(datos)
+        self._reglas = reglas_json
+        self._pendientes = {k for k in reglas_json if k in datos}
+
+        if elevar_decision and dict.get(self, "decision_admin"):
+            for campo in _CAMPOS_ELEVADOS_DECISION:
+                if not dict.get(self, campo):
+                    self._pendientes.add(campo)
+
+    # -- decodificación ----------------------------------------------------
+
+    def _resolver(self, clave):
+        if clave in self._reglas:
+            self._pendientes.discard(clave)
+            crudo = dict.__getitem__(self, clave)
+            si_vacio, si_invalido = self._reglas[clave]
+            if not crudo:
+                valor = _valor_por_defecto(si_vacio, crudo)
+            else:
+                try:
+                    valor = json.loads(crudo)
+                except (TypeError, ValueError):
+                    valor = _valor_por_defecto(si_invalido, crudo)
+            dict.__setitem__(self, clave, valor)
+        else:
+            self._elevar_decision()
+
+    def _elevar_decision(self):
+        da = self["decision_admin"]
+        pendientes = [c for c in _CAMPOS_ELEVADOS_DECISION if c in self._pendientes]
+        self._pendientes.difference_update(pendientes)
+        if not isinstance(da, dict):
+            return
+
+        candidatos = {
+            "monto_aprobado": da.get("monto_aprobado"),
+            "nivel_riesgo_ajustado": (
+                da.get("nivel_riesgo_ajustado")
+                or da.get("nivel_riesgo_modificado")
+                or da.get("nivel_ajustado")
+            ),
+            "justificacion_modificacion": (
+                da.get("justificacion_modificacion")
+                or da.get("justificacion")
+                or da.get("comentario")
+            ),
+            "tasas_nivel_riesgo": da.get("tasas_aplicadas"),
+        }
+        for campo in pendientes:
+            # monto y tasas solo se elevan si decision_admin los trae
+            if candidatos[campo] or campo in (
+                "nivel_riesgo_ajustado",
+                "justificacion_modificacion",
+            ):
+                dict.__setitem__(self, campo, candidatos[campo])
+
+    def _resolver_todo(self):
+        for clave in list(self._pendientes):
+            if clave in self._pendientes:
+                self._resolver(clave)
+
+    # -- API de dict ---------------------------------------------------------
+
+    def __getitem__(self, clave):
+        if clave in self._pendientes:
+            self._resolver(clave)
+        return dict.__getitem__(self, clave)
+
+    def get(self, clave, defecto=None):
+        if clave in self._pendientes:
+            self._resolver(clave)
+        return dict.get(self, clave, defecto)
+
+    def __setitem__(self, clave, valor):
+        self._pendientes.discard(clave)
+        dict.__setitem__(self, clave, valor)
+
+    def __delitem__(self, clave):
+        self._pendientes.discard(clave)
+        dict.__delitem__(self, clave)
+
+    def pop(self, clave, *defecto):
+        if clave in self._pendientes:
+            self._resolver(clave)
+        return dict.pop(self, clave, *defecto)
+
+    def setdefault(self, clave, defecto=None):
+        if clave in self._pendientes:
+            self._resolver(clave)
+        return dict.setdefault(self, clave, defecto)
+
+    def update(self, *args, **kwargs):
+        otros = dict(*args, **kwargs)
+        self._pendientes.difference_update(otros)
+        dict.update(self, otros)
+
+    def __iter__(self):
+        # Definirlo obliga a dict(ev) y {**ev} a pasar por __getitem__
+        return dict.__iter__(self)
+
+    def values(self):
+        self._resolver_todo()
+        return dict.values(self)
+
+    def items(self):
+        self._resolver_todo()
+        return dict.items(self)
+
+    def copy(self):
+        self._resolver_todo()
+        return dict(dict.items(self))
+
+    def __eq__(self, otro):
+        self._resolver_todo()
+        return dict.__eq__(self, otro)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._resolver_todo()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
 # ============================================================================
 # FUNCIONES DE EVALUACIONES
 # ============================================================================
@@ -1049,21 +1244,21 @@ def cargar_evaluaciones():
             "linea_credito": row[5],
             "estado_desembolso": row[6],
             "origen": row[7],
-            "resultado": json.loads(row[8]) if row[8] else {},
-            "criterios_evaluados": json.loads(row[9]) if row[9] else [],
+            "resultado": row[8],
+            "criterios_evaluados": row[9],
             "monto_solicitado": row[10],
             "estado_comite": row[11],
-            "decision_admin": json.loads(row[12]) if row[12] else None,
+            "decision_admin": row[12],
             "visto_por_asesor": bool(row[13]),
             "fecha_visto_asesor": row[14],
             "fecha_envio_comite": row[15],
             "puntaje_datacredito": row[16],
             "datacredito": row[16],
-            "criterios_detalle": json.loads(row[17]) if row[17] else [],
-            "valores_criterios": json.loads(row[18]) if row[18] else {},
+            "criterios_detalle": row[17],
+            "valores_criterios": row[18],
             "nivel_riesgo": row[19],
         }
-        evaluaciones.append(ev)
+        evaluaciones.append(EvaluacionRegistro(ev, JSON_EVALUACION_LISTADOS))
 
     conn.close()
     return evaluaciones
@@ -1161,68 +1356,956 @@ def guardar_evaluacion(evaluacion):
             ),
         )
 
-        conn.commit()
+        conn.commit()
+        invalidar_resumen_navbar(asesor)
+        notificar_cambios()
+
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+
+# Columnas que escriben guardar_evaluaciones_lote() (las mismas que
+# guardar_evaluacion_db de flask_app.py); timestamp es la clave del upsert
+COLUMNAS_GUARDADO_EVALUACION = (
+    "timestamp",
+    "asesor",
+    "nombre_cliente",
+    "cedula",
+    "tipo_credito",
+    "linea_credito",
+    "estado_desembolso",
+    "origen",
+    "resultado",
+    "criterios_evaluados",
+    "criterios_detalle",
+    "valores_criterios",
+    "nivel_riesgo",
+    "monto_solicitado",
+    "estado_comite",
+    "decision_admin",
+    "visto_por_asesor",
+    "fecha_visto_asesor",
+    "fecha_envio_comite",
+    "puntaje_datacredito",
+    "datacredito",
+    "monto_aprobado",
+    "nivel_riesgo_ajustado",
+    "justificacion_modificacion",
+    "tasas_nivel_riesgo",
+)
+
+# Upsert por timestamp: conserva el id (y las columnas no listadas, como
+# estado_final) de las evaluaciones que ya existen
+SQL_UPSERT_EVALUACION = f"""
+    INSERT INTO evaluaciones ({", ".join(COLUMNAS_GUARDADO_EVALUACION)})
+    VALUES ({", ".join("?" for _ in COLUMNAS_GUARDADO_EVALUACION)})
+    ON CONFLICT(timestamp) DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in COLUMNAS_GUARDADO_EVALUACION[1:])},
+        fecha_modificacion = CURRENT_TIMESTAMP
+"""
+
+
+def _json_opcional(valor):
+    return json.dumps(valor, ensure_ascii=False) if valor else None
+
+
+def _fila_guardado_evaluacion(evaluacion):
+    """
+    Tupla de valores de una evaluación en el orden de
+    COLUMNAS_GUARDADO_EVALUACION, con los campos JSON ya serializados.
+    """
+    return (
+        evaluacion["timestamp"],
+        evaluacion.get("asesor"),
+        evaluacion.get("nombre_cliente"),
+        evaluacion.get("cedula"),
+        evaluacion.get("tipo_credito"),
+        evaluacion.get("linea_credito"),
+        evaluacion.get("estado_desembolso", "Pendiente"),
+        evaluacion.get("origen", "Automático"),
+        json.dumps(evaluacion.get("resultado", {}), ensure_ascii=False),
+        json.dumps(evaluacion.get("criterios_evaluados", []), ensure_ascii=False),
+        json.dumps(evaluacion.get("criterios_detalle", []), ensure_ascii=False),
+        _json_opcional(evaluacion.get("valores_criterios")),
+        evaluacion.get("nivel_riesgo"),
+        evaluacion.get("monto_solicitado"),
+        evaluacion.get("estado_comite"),
+        _json_opcional(evaluacion.get("decision_admin")),
+        1 if evaluacion.get("visto_por_asesor") else 0,
+        evaluacion.get("fecha_visto_asesor"),
+        evaluacion.get("fecha_envio_comite"),
+        evaluacion.get("puntaje_datacredito"),
+        evaluacion.get("datacredito"),
+        evaluacion.get("monto_aprobado"),
+        evaluacion.get("nivel_riesgo_ajustado"),
+        evaluacion.get("justificacion_modificacion"),
+        _json_opcional(evaluacion.get("tasas_nivel_riesgo")),
+    )
+
+
+def guardar_evaluaciones_lote(evaluaciones):
+    """
+    Inserta o actualiza (por timestamp) muchas evaluaciones en una sola
+    transacción, con un único executemany y un único commit.
+
+    Todo o nada: si una fila falla no se guarda ninguna y se propaga el
+    error. Los triggers (rollups, feed de cambios) se disparan por fila
+    igual que en el guardado individual.
+
+    Args:
+        evaluaciones (list): Evaluaciones (dict) con 'timestamp'
+
+    Returns:
+        int: Número de evaluaciones guardadas
+    """
+    # Serializar todo antes de abrir la transacción
+    filas = [_fila_guardado_evaluacion(ev) for ev in evaluaciones]
+    if not filas:
+        return 0
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany(SQL_UPSERT_EVALUACION, filas)
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+    invalidar_resumen_navbar()
+    notificar_cambios()
+    return len(filas)
+
+
+def actualizar_evaluacion(timestamp, datos_actualizar):
+    """
+    Actualiza campos específicos de una evaluación.
+    Útil para actualizar estado_comite, decision_admin, etc.
+
+    Args:
+        timestamp (str): Timestamp de la evaluación
+        datos_actualizar (dict): Campos a actualizar
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        # Construir query dinámicamente
+        campos_set = []
+        valores = []
+
+        for campo, valor in datos_actualizar.items():
+            if campo in [
+                "resultado",
+                "criterios_evaluados",
+                "decision_admin",
+                "criterios_detalle",
+                "valores_criterios",
+            ]:
+                # Campos JSON
+                campos_set.append(f"{campo} = ?")
+                valores.append(json.dumps(valor) if valor else None)
+            elif campo == "visto_por_asesor":
+                campos_set.append(f"{campo} = ?")
+                valores.append(1 if valor else 0)
+            else:
+                campos_set.append(f"{campo} = ?")
+                valores.append(valor)
+
+        if not campos_set:
+            return
+
+        campos_set.append("fecha_modificacion = CURRENT_TIMESTAMP")
+        valores.append(timestamp)
+
+        query = f"""
+            UPDATE evaluaciones
+            SET {', '.join(campos_set)}
+            WHERE timestamp = ?
+        """
+
+        cursor.execute(query, valores)
+        conn.commit()
+
+        # Decisión del comité / caso visto: refrescar el navbar del asesor
+        cursor.execute("SELECT asesor FROM evaluaciones WHERE timestamp = ?", (timestamp,))
+        row = cursor.fetchone()
+        if row:
+            invalidar_resumen_navbar(row[0])
+        notificar_cambios()
+
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# COLUMNAS DERIVADAS DE resultado (score, nivel, aprobado)
+# ============================================================================
+
+# columna -> (tipo, expresión sobre el JSON). {r} es la columna de origen:
+# `resultado` en el backfill y `NEW.resultado` en los triggers.
+COLUMNAS_RESULTADO = {
+    "resultado_score": (
+        "REAL",
+        "CASE WHEN json_valid({r}) THEN json_extract({r}, '$.score') END",
+    ),
+    "resultado_score_normalizado": (
+        "REAL",
+        "CASE WHEN json_valid({r}) THEN json_extract({r}, '$.score_normalizado') END",
+    ),
+    "resultado_nivel": (
+        "TEXT",
+        "CASE WHEN json_valid({r}) THEN json_extract({r}, '$.nivel') END",
+    ),
+    "resultado_aprobado": (
+        "INTEGER DEFAULT 0",
+        "CASE WHEN json_valid({r}) "
+        "THEN COALESCE(json_extract({r}, '$.aprobado'), 0) ELSE 0 END",
+    ),
+    "resultado_rechazo_automatico": (
+        "TEXT",
+        "CASE WHEN json_valid({r}) "
+        "THEN json_extract({r}, '$.rechazo_automatico') END",
+    ),
+}
+
+INDICES_RESULTADO = (
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_res_aprobado "
+    "ON evaluaciones(resultado_aprobado, timestamp DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_res_nivel "
+    "ON evaluaciones(resultado_nivel)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_res_score "
+    "ON evaluaciones(resultado_score)",
+    # Cubre los conteos del historial (asesor + rango de fechas + aprobado)
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_ts_aprobado "
+    "ON evaluaciones(asesor, timestamp, resultado_aprobado)",
+)
+
+
+def _set_columnas_resultado(origen):
+    return ",\n                ".join(
+        f"{col} = {expr.format(r=origen)}"
+        for col, (_tipo, expr) in COLUMNAS_RESULTADO.items()
+    )
+
+
+def ensure_columnas_resultado(rellenar=False):
+    """
+    Asegura las columnas derivadas de `resultado`, sus triggers, índices y
+    las vistas que las usan. Así los filtros y agregados por score, nivel o
+    aprobación usan índices en vez de parsear JSON fila por fila.
+
+    Llamar desde flask_app.py al iniciar. Si las columnas se acaban de crear
+    (o con rellenar=True) recalcula los valores de las filas existentes.
+
+    Args:
+        rellenar (bool): Forzar el backfill de todas las filas
+
+    Returns:
+        int: Filas recalculadas (0 si no hubo backfill, -1 si hubo error)
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(evaluaciones)")
+        existentes = {row[1] for row in cursor.fetchall()}
+
+        nuevas = [c for c in COLUMNAS_RESULTADO if c not in existentes]
+        for col in nuevas:
+            tipo = COLUMNAS_RESULTADO[col][0]
+            cursor.execute(f"ALTER TABLE evaluaciones ADD COLUMN {col} {tipo}")
+
+        # Triggers: mantienen las columnas en cada INSERT / UPDATE de resultado
+        set_new = _set_columnas_resultado("NEW.resultado")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluaciones_resultado_insert
+            AFTER INSERT ON evaluaciones
+            BEGIN
+                UPDATE evaluaciones SET
+                {set_new}
+                WHERE id = NEW.id;
+            END
+        """
+        )
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluaciones_resultado_update
+            AFTER UPDATE OF resultado ON evaluaciones
+            BEGIN
+                UPDATE evaluaciones SET
+                {set_new}
+                WHERE id = NEW.id;
+            END
+        """
+        )
+
+        for sentencia in INDICES_RESULTADO:
+            cursor.execute(sentencia)
+
+        # Backfill de filas existentes
+        recalculadas = 0
+        if nuevas or rellenar:
+            cursor.execute(
+                f"""
+                UPDATE evaluaciones SET
+                {_set_columnas_resultado("resultado")}
+            """
+            )
+            recalculadas = cursor.rowcount
+            print(f"✅ Columnas derivadas de resultado: {recalculadas} filas recalculadas")
+
+        conn.commit()
+
+        # Vistas: se recrean para que usen las columnas
+        cursor.execute("DROP VIEW IF EXISTS vista_casos_comite")
+        cursor.execute("DROP VIEW IF EXISTS vista_metricas_asesores")
+        conn.executescript(SQL_VISTAS)
+
+        return recalculadas
+    except Exception as e:
+        print(f"❌ Error creando columnas derivadas de resultado: {e}")
+        return -1
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# COLUMNAS DE FECHA (epoch + buckets día/mes en hora Colombia)
+# ============================================================================
+
+# Misma regla que app/utils/timezone.parsear_timestamp_naive: un timestamp
+# con zona (-05:00, Z) se convierte; uno sin zona se asume hora Colombia.
+# Se calcula en SQL para que los triggers no dependan de la app Flask.
+_SQL_EPOCH = (
+    "CAST(CASE WHEN {t} LIKE '%Z' OR {t} LIKE '%+__:__' OR {t} LIKE '%-__:__' "
+    "THEN strftime('%s', {t}) ELSE strftime('%s', {t}, '+5 hours') END AS INTEGER)"
+)
+_SQL_DIA = "date(" + _SQL_EPOCH + ", 'unixepoch', '-5 hours')"
+_SQL_MES = "strftime('%Y-%m', " + _SQL_EPOCH + ", 'unixepoch', '-5 hours')"
+
+# tabla -> {columna: (tipo, expresión)}; {t} es la columna de origen
+COLUMNAS_FECHA = {
+    "evaluaciones": {
+        "creado_epoch": ("INTEGER", _SQL_EPOCH.replace("{t}", "{r}.timestamp")),
+        "creado_dia": ("TEXT", _SQL_DIA.replace("{t}", "{r}.timestamp")),
+        "creado_mes": ("TEXT", _SQL_MES.replace("{t}", "{r}.timestamp")),
+        "decision_dia": (
+            "TEXT",
+            _SQL_DIA.replace("{t}", "{r}_decision_ts"),
+        ),
+        "decision_mes": (
+            "TEXT",
+            _SQL_MES.replace("{t}", "{r}_decision_ts"),
+        ),
+    },
+    "simulaciones": {
+        "creado_epoch": ("INTEGER", _SQL_EPOCH.replace("{t}", "{r}.timestamp")),
+        "creado_dia": ("TEXT", _SQL_DIA.replace("{t}", "{r}.timestamp")),
+        "creado_mes": ("TEXT", _SQL_MES.replace("{t}", "{r}.timestamp")),
+    },
+}
+
+# Timestamp de la decisión del comité (dentro del JSON decision_admin)
+_SQL_DECISION_TS = (
+    "(CASE WHEN json_valid({r}.decision_admin) "
+    "THEN json_extract({r}.decision_admin, '$.timestamp') END)"
+)
+
+# Columnas que disparan el recálculo en UPDATE
+_ORIGEN_COLUMNAS_FECHA = {
+    "evaluaciones": "timestamp, decision_admin",
+    "simulaciones": "timestamp",
+}
+
+INDICES_FECHA = (
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_dia ON evaluaciones(creado_dia)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_mes ON evaluaciones(creado_mes)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_dia "
+    "ON evaluaciones(asesor, creado_dia)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_mes "
+    "ON evaluaciones(asesor, creado_mes)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_epoch "
+    "ON evaluaciones(asesor, creado_epoch)",
+    # Cubre la consulta agregada por asesor del dashboard (última actividad
+    # + respuestas del comité no vistas) sin leer la tabla
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_actividad "
+    "ON evaluaciones(asesor, creado_epoch, estado_comite, visto_por_asesor)",
+"CREATE INDEX IF NOT EXISTS idx_evaluaciones_comite_decision_dia "
+    "ON evaluaciones(estado_comite, decision_dia)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_comite_decision_mes "
+    "ON evaluaciones(estado_comite, decision_mes)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_comite_creado "
+    "ON evaluaciones(estado_comite, creado_epoch)",
+    "CREATE INDEX IF NOT EXISTS idx_simulaciones_dia ON simulaciones(creado_dia)",
+    "CREATE INDEX IF NOT EXISTS idx_simulaciones_asesor_dia "
+    "ON simulaciones(asesor, creado_dia)",
+)
+
+
+def _set_columnas_fecha(tabla, fila):
+    """SET de las columnas de fecha leyendo de `fila` (tabla o NEW)."""
+    asignaciones = []
+    for col, (_tipo, expr) in COLUMNAS_FECHA[tabla].items():
+        expr = expr.replace("{r}_decision_ts", _SQL_DECISION_TS)
+        asignaciones.append(f"{col} = {expr.replace('{r}', fila)}")
+    return ",\n                ".join(asignaciones)
+
+
+def ensure_columnas_fecha(rellenar=False):
+    """
+    Asegura las columnas de fecha precalculadas (epoch, día y mes en hora
+    Colombia) de evaluaciones y simulaciones, con sus triggers e índices
+    compuestos. Los contadores del dashboard filtran por igualdad o rango
+    sobre estas columnas en lugar de DATE()/strftime() por fila.
+
+    Llamar desde flask_app.py al iniciar. Si las columnas se acaban de crear
+    (o con rellenar=True) recalcula las filas existentes.
+
+    Args:
+        rellenar (bool): Forzar el backfill de todas las filas
+
+    Returns:
+        int: Filas recalculadas (0 si no hubo backfill, -1 si hubo error)
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        recalculadas = 0
+        for tabla, columnas in COLUMNAS_FECHA.items():
+            cursor.execute(f"PRAGMA table_info({tabla})")
+            existentes = {row[1] for row in cursor.fetchall()}
+
+            nuevas = [c for c in columnas if c not in existentes]
+            for col in nuevas:
+                cursor.execute(
+                    f"ALTER TABLE {tabla} ADD COLUMN {col} {columnas[col][0]}"
+                )
+
+            set_new = _set_columnas_fecha(tabla, "NEW")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_fechas_insert
+                AFTER INSERT ON {tabla}
+                BEGIN
+                    UPDATE {tabla} SET
+                    {set_new}
+                    WHERE id = NEW.id;
+                END
+            """
+            )
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_fechas_update
+                AFTER UPDATE OF {_ORIGEN_COLUMNAS_FECHA[tabla]} ON {tabla}
+                BEGIN
+                    UPDATE {tabla} SET
+                    {set_new}
+                    WHERE id = NEW.id;
+                END
+            """
+            )
+
+            if nuevas or rellenar:
+                cursor.execute(
+                    f"""
+                    UPDATE {tabla} SET
+                    {_set_columnas_fecha(tabla, tabla)}
+                """
+                )
+                recalculadas += cursor.rowcount
+
+        for sentencia in INDICES_FECHA:
+            cursor.execute(sentencia)
+
+        conn.commit()
+        if recalculadas:
+            print(f"✅ Columnas de fecha: {recalculadas} filas recalculadas")
+        return recalculadas
+    except Exception as e:
+        print(f"❌ Error creando columnas de fecha: {e}")
+        return -1
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# HISTORIAL DE EVALUACIONES (filtros y paginación en SQL)
+# ============================================================================
+
+def _dia_siguiente(fecha_iso):
+    """'2025-12-31' -> '2026-01-01' (None si la fecha no es válida)."""
+    try:
+        fecha = datetime.strptime(fecha_iso, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    return (fecha + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _where_historial(usernames_visibles, asesor, desde, hasta, alcance_sql=None):
+    """Construye el WHERE común (alcance RBAC + filtros GET) del historial."""
+    condiciones = []
+    params = []
+
+    if alcance_sql is not None:
+        condiciones.append(f"({alcance_sql[0]})")
+        params.extend(alcance_sql[1])
+    elif usernames_visibles is not None:
+        fragmento, params_lista = _filtro_lista_usernames(usernames_visibles)
+        condiciones.append(fragmento)
+        params.extend(params_lista)
+
+    if asesor:
+        condiciones.append("asesor = ?")
+        params.append(asesor)
+
+    # timestamp es ISO 8601: comparar strings equivale a comparar fechas
+    if desde and _dia_siguiente(desde):
+        condiciones.append("timestamp >= ?")
+        params.append(desde)
+
+    hasta_exclusivo = _dia_siguiente(hasta) if hasta else None
+    if hasta_exclusivo:
+        condiciones.append("timestamp < ?")
+        params.append(hasta_exclusivo)
+
+    where = " AND ".join(condiciones) if condiciones else "1"
+    return where, params
+
+
+def _codificar_cursor_historial(timestamp, ev_id):
+    return f"{timestamp}|{ev_id}"
+
+
+def _decodificar_cursor_historial(cursor_token):
+    try:
+        timestamp, ev_id = cursor_token.rsplit("|", 1)
+        return timestamp, int(ev_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def obtener_historial_evaluaciones(
+    usernames_visibles=None,
+    asesor=None,
+    desde=None,
+    hasta=None,
+    resultado=None,
+    page=1,
+    per_page=50,
+    cursor_token=None,
+    alcance_sql=None,
+):
+    """
+    Obtiene una página del historial de evaluaciones filtrando en SQLite.
+
+    Los filtros, el orden y el LIMIT se resuelven en la consulta y los
+    totales del encabezado salen de un único COUNT agrupado por asesor, de
+    modo que el costo no depende del tamaño del historial. Score, nivel y
+    aprobación salen de las columnas derivadas de `resultado`.
+
+    Args:
+        usernames_visibles (list|None): Asesores visibles (None = todos)
+        asesor (str): Filtrar por un asesor
+        desde (str): Fecha inicial 'YYYY-MM-DD' (inclusive)
+        hasta (str): Fecha final 'YYYY-MM-DD' (inclusive)
+        resultado (str): 'aprobado' | 'rechazado' | None
+        page (int): Página (paginación por offset)
+        per_page (int): Registros por página
+        cursor_token (str): Cursor keyset "timestamp|id" de la última fila
+            de la página anterior (reemplaza a page: no se usa OFFSET)
+        alcance_sql (tuple): (fragmento, params) de filtro_visibilidad_sql;
+            si se pasa, reemplaza a usernames_visibles
+
+    Returns:
+        dict: {
+            'evaluaciones': list, 'stats': dict, 'asesores_disponibles': list,
+            'total_registros': int, 'page': int, 'total_pages': int,
+            'inicio': int (filas antes de esta página),
+            'next_cursor': str|None (None en la última página)
+        }
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        where, params = _where_historial(
+            usernames_visibles, asesor, desde, hasta, alcance_sql
+        )
+
+        # 1. Totales del encabezado (un solo COUNT agrupado)
+        cursor.execute(
+            f"""
+            SELECT asesor, COUNT(*) AS total,
+                   SUM(resultado_aprobado) AS aprobados
+            FROM evaluaciones
+            WHERE {where}
+            GROUP BY asesor
+        """,
+            params,
+        )
+
+        por_asesor = {}
+        total = 0
+        aprobados = 0
+        for row in cursor.fetchall():
+            por_asesor[row[0] or "desconocido"] = row[1]
+            total += row[1]
+            aprobados += row[2] or 0
+        rechazados = total - aprobados
+
+        stats = {
+            "total": total,
+            "aprobados": aprobados,
+            "rechazados": rechazados,
+            "tasa_aprobacion": round((aprobados / total * 100) if total > 0 else 0, 1),
+            "por_asesor": por_asesor,
+        }
+
+        # 2. Filtro por resultado (el total sale del mismo agregado)
+        where_pagina = where
+        params_pagina = list(params)
+        if resultado == "aprobado":
+            where_pagina += " AND resultado_aprobado = 1"
+            total_registros = aprobados
+        elif resultado == "rechazado":
+            where_pagina += " AND resultado_aprobado = 0"
+            total_registros = rechazados
+        else:
+            total_registros = total
+
+        total_pages = (total_registros + per_page - 1) // per_page
+
+        # 3. Página: keyset si viene cursor, si no OFFSET. Se pide una fila
+        # de más para saber si hay página siguiente
+        limite_sql = "LIMIT ?"
+        posicion = _decodificar_cursor_historial(cursor_token) if cursor_token else None
+        if posicion:
+            # Filas antes del cursor (por índice, sin leerlas) para ubicar la página
+            cursor.execute(
+                f"""
+                SELECT COUNT(*) FROM evaluaciones
+                WHERE {where_pagina} AND (timestamp, id) >= (?, ?)
+            """,
+                params_pagina + list(posicion),
+            )
+            inicio = cursor.fetchone()[0]
+            page = inicio // per_page + 1
+            where_pagina += " AND (timestamp, id) < (?, ?)"
+            params_pagina.extend(posicion)
+            params_pagina.append(per_page + 1)
+        else:
+            if page < 1:
+                page = 1
+            elif page > total_pages and total_pages > 0:
+                page = total_pages
+            inicio = (page - 1) * per_page
+            limite_sql += " OFFSET ?"
+            params_pagina.extend([per_page + 1, inicio])
+
+        cursor.execute(
+            f"""
+            SELECT id, timestamp, asesor, nombre_cliente, cedula,
+                   tipo_credito, linea_credito, estado_comite, monto_solicitado,
+                   resultado_score, resultado_score_normalizado, resultado_nivel,
+                   resultado_aprobado, resultado_rechazo_automatico
+            FROM evaluaciones
+            WHERE {where_pagina}
+            ORDER BY timestamp DESC, id DESC
+            {limite_sql}
+        """,
+            params_pagina,
+        )
+
+        filas = cursor.fetchall()
+        hay_siguiente = len(filas) > per_page
+
+        evaluaciones = []
+        for row in filas[:per_page]:
+            # resultado se arma desde las columnas derivadas (sin json.loads)
+            resultado_ev = {
+                "score": row[9],
+                "score_normalizado": row[10],
+                "nivel": row[11],
+                "aprobado": bool(row[12]),
+                "rechazo_automatico": row[13],
+            }
+
+            nombre_cliente = row[3]
+            if nombre_cliente and row[4]:
+                cliente = f"{nombre_cliente} - CC {row[4]}"
+            else:
+                cliente = nombre_cliente or ""
+
+            evaluaciones.append(
+                {
+                    "id": row[0],
+                    "timestamp": row[1],
+                    "asesor": row[2],
+                    "nombre_cliente": nombre_cliente,
+                    "cliente": cliente,
+                    "cedula": row[4],
+                    "tipo_credito": row[5],
+                    "linea_credito": row[6],
+                    "resultado": resultado_ev,
+                    "estado_comite": row[7],
+                    "monto_solicitado": row[8],
+                }
+            )
+
+        next_cursor = None
+        if hay_siguiente:
+            ultima = evaluaciones[-1]
+            next_cursor = _codificar_cursor_historial(ultima["timestamp"], ultima["id"])
+
+        # 4. Asesores del alcance con al menos una evaluación (para el filtro)
+        alcance_where, alcance_params = _where_historial(
+            usernames_visibles, None, None, None, alcance_sql
+        )
+        cursor.execute(
+            f"""
+            SELECT DISTINCT asesor
+            FROM evaluaciones
+            WHERE {alcance_where} AND asesor IS NOT NULL AND asesor != ''
+            ORDER BY asesor
+        """,
+            alcance_params,
+        )
+        asesores_disponibles = [row[0] for row in cursor.fetchall()]
+
+        return {
+            "evaluaciones": evaluaciones,
+            "stats": stats,
+            "asesores_disponibles": asesores_disponibles,
+            "total_registros": total_registros,
+            "page": page,
+            "total_pages": total_pages,
+            "inicio": inicio,
+            "next_cursor": next_cursor,
+        }
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# CONSULTAS PUNTUALES DE EVALUACIONES (endpoints por caso y polling)
+# ============================================================================
+
+# Índices compuestos para las consultas de esta sección.
+# Se crean también en database.SCHEMA_SQL para bases nuevas.
+INDICES_EVALUACIONES = (
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_origen "
+    "ON evaluaciones(asesor, origen)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_visto "
+    "ON evaluaciones(asesor, visto_por_asesor, estado_comite)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_comite_fecha "
+    "ON evaluaciones(estado_comite, fecha_creacion DESC)",
+)
+
+
+def ensure_indices_evaluaciones():
+    """
+    Asegura que existen los índices compuestos de evaluaciones.
+    Llamar desde flask_app.py al iniciar (bases creadas antes de los índices).
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        for sentencia in INDICES_EVALUACIONES:
+            cursor.execute(sentencia)
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"❌ Error creando índices de evaluaciones: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def normalizar_fila_evaluacion(row):
+    """
+    Convierte una fila de `SELECT * FROM evaluaciones` al registro que usan
+    las vistas: JSON perezoso, `cliente` legacy y campos de decision_admin
+    elevados a nivel superior (CORRECCIÓN 2025-12-18).
+    """
+    evaluacion = dict(row)
+
+    # Agregar cliente en formato legacy para compatibilidad
+    if evaluacion.get("nombre_cliente") and evaluacion.get("cedula"):
+        evaluacion["cliente"] = (
+            f"{evaluacion['nombre_cliente']} - CC {evaluacion['cedula']}"
+        )
+    elif evaluacion.get("nombre_cliente"):
+        evaluacion["cliente"] = evaluacion["nombre_cliente"]
+
+    evaluacion["visto_por_asesor"] = bool(evaluacion.get("visto_por_asesor", 0))
+
+    return EvaluacionRegistro(
+        evaluacion, JSON_EVALUACION_COMPLETA, elevar_decision=True
+    )
+
+
+def _consultar_evaluaciones(where, params=(), orden="fecha_creacion DESC", limite=None):
+    """Ejecuta `SELECT * FROM evaluaciones WHERE ...` y normaliza las filas."""
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        query = f"SELECT * FROM evaluaciones WHERE {where} ORDER BY {orden}"
+        if limite is not None:
+            if isinstance(params, dict):
+                query += " LIMIT :_limite"
+                params = dict(params, _limite=limite)
+            else:
+                query += " LIMIT ?"
+                params = list(params) + [limite]
+
+        cursor.execute(query, params)
+        return [normalizar_fila_evaluacion(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def obtener_evaluacion_completa(timestamp):
+    """
+    Obtiene una evaluación por timestamp (índice UNIQUE) con el mismo
+    formato que leer_evaluaciones_db() en flask_app.py.
+
+    Args:
+        timestamp (str): Timestamp de la evaluación
+
+    Returns:
+        dict: Evaluación o None
+    """
+    filas = _consultar_evaluaciones("timestamp = ?", (timestamp,), limite=1)
+    return filas[0] if filas else None
+
+
+def obtener_casos_comite_asesor(username, ids=None):
+    """
+    Bandeja del asesor: sus evaluaciones enviadas a comité.
+
+    Args:
+        username (str): Username del asesor
+        ids (list): Solo estas evaluaciones (polling incremental)
+
+    Returns:
+        list: Evaluaciones (más recientes primero)
+    """
+    if ids is not None:
+        return _consultar_evaluaciones(
+            "id IN (SELECT value FROM json_each(?)) AND asesor = ? AND origen = 'Comité'",
+            (json.dumps(list(ids)), username),
+        )
+    return _consultar_evaluaciones(
+        "asesor = ? AND origen = 'Comité'", (username,)
+    )
+
+
+def obtener_cola_comite():
+    """
+    Casos pendientes de decisión del comité.
+
+    Returns:
+        list: Evaluaciones con estado_comite = 'pending'
+    """
+    return _consultar_evaluaciones("estado_comite = 'pending'")
+
+
+def obtener_decisiones_recientes_comite(limite=20):
+    """
+    Últimas decisiones del comité (aprobadas o rechazadas).
+
+    Args:
+        limite (int): Número máximo de resultados
+
+    Returns:
+        list: Evaluaciones decididas (más recientes primero)
+    """
+    # Un rango de índice por estado (cada uno acotado por el LIMIT) en lugar
+    # de ordenar todas las decisiones históricas
+    return _consultar_evaluaciones(
+        """id IN (
+            SELECT id FROM (
+                SELECT id FROM evaluaciones WHERE estado_comite = 'approved'
+                ORDER BY fecha_creacion DESC LIMIT :limite
+            )
+            UNION ALL
+            SELECT id FROM (
+                SELECT id FROM evaluaciones WHERE estado_comite = 'rejected'
+                ORDER BY fecha_creacion DESC LIMIT :limite
+            )
+        )""",
+        {"limite": limite},
+        limite=limite,
+    )
+
 
-    except Exception as e:
-        conn.rollback()
-        raise e
+def listar_timestamps_pendientes_comite():
+    """
+    Timestamps de los casos pendientes de comité (para el contador que se
+    consulta por polling; no lee ni decodifica el resto de columnas).
+
+    Returns:
+        list: Lista de timestamps
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            "SELECT timestamp FROM evaluaciones WHERE estado_comite = 'pending'"
+        )
+        return [row[0] for row in cursor.fetchall()]
     finally:
         conn.close()
 
 
-def actualizar_evaluacion(timestamp, datos_actualizar):
+def marcar_caso_visto_asesor(timestamp, username, fecha_visto):
     """
-    Actualiza campos específicos de una evaluación.
-    Útil para actualizar estado_comite, decision_admin, etc.
+    Marca un caso como visto por su asesor con un único UPDATE.
 
     Args:
         timestamp (str): Timestamp de la evaluación
-        datos_actualizar (dict): Campos a actualizar
+        username (str): Asesor dueño del caso
+        fecha_visto (str): Fecha ISO en que se vio
+
+    Returns:
+        bool: True si el caso existía y pertenece al asesor
     """
     conn = conectar_db()
     cursor = conn.cursor()
 
     try:
-        # Construir query dinámicamente
-        campos_set = []
-        valores = []
-
-        for campo, valor in datos_actualizar.items():
-            if campo in [
-                "resultado",
-                "criterios_evaluados",
-                "decision_admin",
-                "criterios_detalle",
-                "valores_criterios",
-            ]:
-                # Campos JSON
-                campos_set.append(f"{campo} = ?")
-                valores.append(json.dumps(valor) if valor else None)
-            elif campo == "visto_por_asesor":
-                campos_set.append(f"{campo} = ?")
-                valores.append(1 if valor else 0)
-            else:
-                campos_set.append(f"{campo} = ?")
-                valores.append(valor)
-
-        if not campos_set:
-            return
-
-        campos_set.append("fecha_modificacion = CURRENT_TIMESTAMP")
-        valores.append(timestamp)
-
-        query = f"""
+        cursor.execute(
+            """
             UPDATE evaluaciones
-            SET {', '.join(campos_set)}
-            WHERE timestamp = ?
-        """
-
-        cursor.execute(query, valores)
+            SET visto_por_asesor = 1,
+                fecha_visto_asesor = ?,
+                fecha_modificacion = CURRENT_TIMESTAMP
+            WHERE timestamp = ? AND asesor = ?
+        """,
+            (fecha_visto, timestamp, username),
+        )
         conn.commit()
-
-    except Exception as e:
-        conn.rollback()
-        raise e
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            invalidar_resumen_navbar(username)
+            notificar_cambios()
+        return actualizado
     finally:
         conn.close()
 
@@ -1281,6 +2364,56 @@ def cargar_simulaciones():
     return simulaciones
 
 
+# Columnas que escriben guardar_simulacion() y guardar_simulaciones_lote()
+COLUMNAS_SIMULACION = (
+    "timestamp",
+    "asesor",
+    "cliente",
+    "cedula",
+    "monto",
+    "plazo",
+    "linea_credito",
+    "tasa_ea",
+    "tasa_mensual",
+    "cuota_mensual",
+    "nivel_riesgo",
+    "aval",
+    "seguro",
+    "plataforma",
+    "total_financiar",
+    "caso_origen",
+    "modalidad_desembolso",
+)
+
+SQL_INSERTAR_SIMULACION = f"""
+    INSERT INTO simulaciones ({", ".join(COLUMNAS_SIMULACION)})
+    VALUES ({", ".join("?" for _ in COLUMNAS_SIMULACION)})
+"""
+
+
+def _fila_simulacion(simulacion):
+    """Tupla de valores de una simulación en el orden de COLUMNAS_SIMULACION."""
+    return (
+        simulacion.get("timestamp"),
+        simulacion.get("asesor"),
+        simulacion.get("cliente"),
+        simulacion.get("cedula"),
+        simulacion.get("monto"),
+        simulacion.get("plazo"),
+        simulacion.get("linea_credito"),
+        simulacion.get("tasa_ea"),
+        simulacion.get("tasa_mensual"),
+        simulacion.get("cuota_mensual"),
+        simulacion.get("nivel_riesgo"),
+        simulacion.get("aval", 0),
+        simulacion.get("seguro", 0),
+        simulacion.get("plataforma", 0),
+        simulacion.get("total_financiar"),
+        simulacion.get("caso_origen"),
+        simulacion.get("modalidad_desembolso", "completo"),
+    )
+
+
 def guardar_simulacion(simulacion):
     """
     Guarda una simulación en SQLite.
@@ -1293,38 +2426,39 @@ def guardar_simulacion(simulacion):
     cursor = conn.cursor()
 
     try:
-        cursor.execute(
-            """
-            INSERT INTO simulaciones (
-                timestamp, asesor, cliente, cedula,
-                monto, plazo, linea_credito, tasa_ea, tasa_mensual,
-                cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
-                total_financiar, caso_origen, modalidad_desembolso
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                simulacion.get("timestamp"),
-                simulacion.get("asesor"),
-                simulacion.get("cliente"),
-                simulacion.get("cedula"),
-                simulacion.get("monto"),
-                simulacion.get("plazo"),
-                simulacion.get("linea_credito"),
-                simulacion.get("tasa_ea"),
-                simulacion.get("tasa_mensual"),
-                simulacion.get("cuota_mensual"),
-                simulacion.get("nivel_riesgo"),
-                simulacion.get("aval", 0),
-                simulacion.get("seguro", 0),
-                simulacion.get("plataforma", 0),
-                simulacion.get("total_financiar"),
-                simulacion.get("caso_origen"),
-                simulacion.get("modalidad_desembolso", "completo"),
-            ),
-        )
+        cursor.execute(SQL_INSERTAR_SIMULACION, _fila_simulacion(simulacion))
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+
+def guardar_simulaciones_lote(simulaciones):
+    """
+    Inserta muchas simulaciones en una sola transacción (importaciones,
+    migraciones, procesos batch). Todo o nada: si una fila falla no se
+    guarda ninguna.
+
+    Args:
+        simulaciones (list): Simulaciones (dict) a guardar
+
+    Returns:
+        int: Número de simulaciones insertadas
+    """
+    filas = [_fila_simulacion(sim) for sim in simulaciones]
+    if not filas:
+        return 0
 
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany(SQL_INSERTAR_SIMULACION, filas)
         conn.commit()
+        return len(filas)
 
     except Exception as e:
         conn.rollback()
@@ -1397,18 +2531,18 @@ def obtener_casos_comite(filtros=None):
             "cedula": row[3],
             "tipo_credito": row[4],
             "monto_solicitado": row[5],
-            "resultado": json.loads(row[6]) if row[6] else {},
+            "resultado": row[6],
             "estado_comite": row[7],
-            "decision_admin": json.loads(row[8]) if row[8] else None,
+            "decision_admin": row[8],
             "visto_por_asesor": bool(row[9]),
             "fecha_envio_comite": row[10],
             "puntaje_datacredito": row[11],
             "datacredito": row[11],
-            "criterios_detalle": json.loads(row[12]) if row[12] else [],
-            "valores_criterios": json.loads(row[13]) if row[13] else {},
+            "criterios_detalle": row[12],
+            "valores_criterios": row[13],
             "nivel_riesgo": row[14],
         }
-        casos.append(caso)
+        casos.append(EvaluacionRegistro(caso, JSON_EVALUACION_LISTADOS))
 
     conn.close()
     return casos
@@ -1509,7 +2643,9 @@ def crear_usuario(username, password_hash, rol="asesor", nombre_completo=""):
             (username, password_hash, rol, nombre_completo),
         )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print(f"✅ Usuario '{username}' ({nombre_completo}) creado con rol '{rol}'")
         return True
 
@@ -1568,7 +2704,9 @@ def eliminar_usuario_db(username):
             (username,),
         )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print(f"✅ Usuario '{username}' marcado como inactivo en SQLite (soft delete)")
         return True
 
@@ -1634,7 +2772,9 @@ def guardar_seguros(seguros_data):
                 (json.dumps(seguros_data["SEGURO_VIDA"], ensure_ascii=False),),
             )
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
 
     except Exception as e:
         conn.rollback()
@@ -1809,10 +2949,13 @@ def actualizar_usuario(username, nombre_completo=None, rol=None):
 
         query = f"UPDATE usuarios SET {', '.join(updates)} WHERE username = ?"
         cursor.execute(query, params)
+        actualizado = cursor.rowcount > 0
 
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
+        invalidar_snapshot_configuracion()
         print(f"✅ Usuario '{username}' actualizado")
-        return cursor.rowcount > 0
+        return actualizado
 
     except Exception as e:
         conn.rollback()
@@ -1822,6 +2965,155 @@ def actualizar_usuario(username, nombre_completo=None, rol=None):
         conn.close()
 
 
+# ============================================================================
+# VERSIONES DE DATOS (invalidación de caches entre procesos)
+# ============================================================================
+
+# Cada clave ('asignaciones', ...) tiene un contador que se incrementa en la
+# misma transacción que modifica los datos cacheados. Cada proceso compara
+# el contador con el de su cache para saber si debe reconstruirla.
+SQL_VERSIONES_DATOS = """
+CREATE TABLE IF NOT EXISTS versiones_datos (
+    clave TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def ensure_versiones_datos():
+    """
+    Asegura que la tabla versiones_datos existe.
+    Llamar desde flask_app.py al iniciar.
+    """
+    conn = conectar_db()
+    try:
+        conn.execute(SQL_VERSIONES_DATOS)
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"❌ Error creando tabla versiones_datos: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def obtener_version_datos(clave):
+    """
+    Lee el contador de versión de `clave` (0 si nunca se ha modificado).
+
+    Returns:
+        int: Versión actual
+    """
+    conn = conectar_db()
+    try:
+        row = conn.execute(
+            "SELECT version FROM versiones_datos WHERE clave = ?", (clave,)
+        ).fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        # Tabla aún no creada (base anterior a ensure_versiones_datos)
+        return 0
+    finally:
+        conn.close()
+
+
+def incrementar_version_datos(cursor, clave):
+    """
+    Incrementa el contador de `clave` usando el cursor de la transacción que
+    modifica los datos (el commit lo hace quien llama).
+    """
+    cursor.execute(SQL_VERSIONES_DATOS)
+    cursor.execute(
+        """
+        INSERT INTO versiones_datos (clave, version) VALUES (?, 1)
+        ON CONFLICT(clave) DO UPDATE SET
+            version = version + 1,
+            fecha_modificacion = CURRENT_TIMESTAMP
+    """,
+        (clave,),
+    )
+
+
+# ============================================================================
+# SNAPSHOT DE CONFIGURACIÓN (líneas, costos, usuarios, seguros, scoring)
+# ============================================================================
+
+# Clave de versiones_datos que incrementa todo guardado de configuración
+CLAVE_VERSION_CONFIGURACION = "configuracion"
+
+# Cada cuántos segundos se compara la versión del snapshot con la de la base
+INTERVALO_VERIFICACION_CONFIG_S = 1.0
+
+
+class SnapshotConfiguracion:
+    """
+    Configuración general y scoring global de una versión dada.
+
+    Compartido por todos los requests del proceso: no modificar
+    `configuracion` ni `scoring`. Quien necesite editar (para luego
+    guardar) usa copia_configuracion() / copia_scoring().
+    """
+
+    __slots__ = ("version", "configuracion", "scoring")
+
+    def __init__(self, version, configuracion, scoring):
+        self.version = version
+        self.configuracion = configuracion
+        self.scoring = scoring
+
+    def copia_configuracion(self):
+        return copy.deepcopy(self.configuracion)
+
+    def copia_scoring(self):
+        return copy.deepcopy(self.scoring)
+
+
+_snapshot_config = None
+_snapshot_config_verificado = 0.0
+_snapshot_config_lock = threading.Lock()
+
+
+def obtener_snapshot_configuracion():
+    """
+    Devuelve el snapshot vigente de la configuración, reconstruyéndolo solo
+    si algún guardado (en este u otro proceso) incrementó su versión.
+
+    Returns:
+        SnapshotConfiguracion
+    """
+    global _snapshot_config, _snapshot_config_verificado
+
+    actual = _snapshot_config
+    ahora = time.monotonic()
+    if actual is not None and ahora - _snapshot_config_verificado < INTERVALO_VERIFICACION_CONFIG_S:
+        return actual
+
+    with _snapshot_config_lock:
+        actual = _snapshot_config
+        # La versión se lee ANTES que los datos: si un guardado se cuela en
+        # medio, el snapshot queda con una versión vieja y se rehace después
+        version = obtener_version_datos(CLAVE_VERSION_CONFIGURACION)
+        if actual is None or version != actual.version:
+            try:
+                actual = SnapshotConfiguracion(
+                    version, cargar_configuracion(), cargar_scoring()
+                )
+                _snapshot_config = actual
+            except Exception as e:
+                if actual is None:
+                    raise
+                print(f"⚠️ Usando snapshot de configuración anterior: {e}")
+        _snapshot_config_verificado = time.monotonic()
+    return actual
+
+
+def invalidar_snapshot_configuracion():
+    """Descarta el snapshot local (el próximo acceso lo reconstruye)."""
+    global _snapshot_config
+    _snapshot_config = None
+
+
 # ============================================================================
 # FUNCIONES DE ASIGNACIONES DE EQUIPO (RBAC)
 # ============================================================================
@@ -1857,6 +3149,11 @@ def ensure_user_assignments_table():
         cursor.execute(
             "CREATE INDEX IF NOT EXISTS idx_assign_activo ON user_assignments(activo)"
         )
+        # Recorrido del equipo en SQL (filtro_visibilidad_sql)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_assign_manager_activo "
+            "ON user_assignments(manager_username, activo)"
+        )
         conn.commit()
         print("✅ Tabla user_assignments verificada/creada")
         return True
@@ -1899,6 +3196,106 @@ def get_assigned_usernames(manager_username):
         conn.close()
 
 
+# Profundidad máxima de la expansión jerárquica (evita loops por
+# asignaciones mal hechas)
+PROFUNDIDAD_MAXIMA_EQUIPO = 5
+
+# Equipo transitivo (raíz, miembro) de TODOS los managers, o de uno solo si
+# se filtra la primera parte por raíz
+SQL_EQUIPOS_RECURSIVO = """
+    WITH RECURSIVE equipo(raiz, miembro, profundidad) AS (
+        SELECT manager_username, member_username, 1
+        FROM user_assignments
+        WHERE activo = 1 {filtro_raiz}
+        UNION
+        SELECT e.raiz, ua.member_username, e.profundidad + 1
+        FROM equipo e
+        JOIN user_assignments ua
+          ON ua.manager_username = e.miembro AND ua.activo = 1
+        WHERE e.profundidad < :max_depth
+    )
+    SELECT DISTINCT raiz, miembro FROM equipo WHERE miembro != raiz
+"""
+
+# Cada cuántos segundos se revisa la versión en BD (cambios hechos por
+# otros procesos); los cambios de este proceso invalidan de inmediato
+INTERVALO_VERIFICACION_JERARQUIA_S = 2.0
+
+
+class JerarquiaAsignaciones:
+    """
+    Snapshot inmutable de la jerarquía de asignaciones activas:
+    manager -> tupla ordenada con su equipo transitivo.
+    """
+
+    __slots__ = ("version", "equipos")
+
+    def __init__(self, version, equipos):
+        self.version = version
+        self.equipos = MappingProxyType(
+            {mgr: tuple(sorted(miembros)) for mgr, miembros in equipos.items()}
+        )
+
+    def equipo(self, manager_username):
+        return self.equipos.get(manager_username, ())
+
+
+_jerarquia = None
+_jerarquia_verificada = 0.0
+_jerarquia_lock = threading.Lock()
+
+
+def _construir_jerarquia():
+    version = obtener_version_datos("asignaciones")
+    equipos = {}
+    conn = conectar_db()
+    try:
+        rows = conn.execute(
+            SQL_EQUIPOS_RECURSIVO.format(filtro_raiz=""),
+            {"max_depth": PROFUNDIDAD_MAXIMA_EQUIPO},
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # Tabla aún no creada: jerarquía vacía
+        print(f"⚠️ No se pudo leer user_assignments: {e}")
+        rows = []
+    finally:
+        conn.close()
+
+    for raiz, miembro in rows:
+        equipos.setdefault(raiz, set()).add(miembro)
+    return JerarquiaAsignaciones(version, equipos)
+
+
+def obtener_jerarquia_asignaciones():
+    """
+    Devuelve el snapshot vigente de la jerarquía, reconstruyéndolo si alguna
+    asignación cambió (en este u otro proceso).
+
+    Returns:
+        JerarquiaAsignaciones
+    """
+    global _jerarquia, _jerarquia_verificada
+
+    actual = _jerarquia
+    ahora = time.monotonic()
+    if actual is not None and ahora - _jerarquia_verificada < INTERVALO_VERIFICACION_JERARQUIA_S:
+        return actual
+
+    with _jerarquia_lock:
+        actual = _jerarquia
+        if actual is None or obtener_version_datos("asignaciones") != actual.version:
+            actual = _construir_jerarquia()
+            _jerarquia = actual
+        _jerarquia_verificada = time.monotonic()
+    return actual
+
+
+def invalidar_jerarquia_asignaciones():
+    """Descarta el snapshot local (el próximo acceso lo reconstruye)."""
+    global _jerarquia
+    _jerarquia = None
+
+
 def get_assigned_usernames_recursive(manager_username, max_depth: int = 5):
     """Devuelve TODOS los usuarios asignados de forma directa o indirecta (expansión jerárquica).
 
@@ -1907,49 +3304,25 @@ def get_assigned_usernames_recursive(manager_username, max_depth: int = 5):
       supervisor -> asesor1, asesor2
     Entonces gerente ve: supervisor, asesor1, asesor2
 
-    max_depth evita loops por asignaciones mal hechas.
+    max_depth evita loops por asignaciones mal hechas. Con la profundidad
+    por defecto se responde desde el snapshot en memoria
+    (obtener_jerarquia_asignaciones); con otra se consulta la CTE solo para
+    este manager.
     """
-    ensure_user_assignments_table()
+    if max_depth == PROFUNDIDAD_MAXIMA_EQUIPO:
+        return list(obtener_jerarquia_asignaciones().equipo(manager_username))
 
     conn = conectar_db()
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            """
-            SELECT manager_username, member_username
-            FROM user_assignments
-            WHERE activo = 1
-            """
-        )
-        rows = cursor.fetchall()
+        rows = conn.execute(
+            SQL_EQUIPOS_RECURSIVO.format(filtro_raiz="AND manager_username = :raiz"),
+            {"max_depth": max_depth, "raiz": manager_username},
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
     finally:
         conn.close()
-
-    # Construir mapa manager -> set(miembros)
-    graph = {}
-    for mgr, mem in rows:
-        if mgr not in graph:
-            graph[mgr] = set()
-        graph[mgr].add(mem)
-
-    visited = set([manager_username])
-    result = set()
-    frontier = [manager_username]
-    depth = 0
-
-    while frontier and depth < max_depth:
-        next_frontier = []
-        for mgr in frontier:
-            for mem in graph.get(mgr, set()):
-                if mem in visited:
-                    continue
-                visited.add(mem)
-                result.add(mem)
-                next_frontier.append(mem)
-        frontier = next_frontier
-        depth += 1
-
-    return sorted(result)
+    return sorted({row[1] for row in rows})
 
 
 def get_all_assignments():
@@ -2024,8 +3397,11 @@ def add_assignment(manager_username, member_username):
         """,
             (manager_username, member_username),
         )
+        incrementar_version_datos(cursor, "asignaciones")
 
         conn.commit()
+        invalidar_jerarquia_asignaciones()
+        invalidar_resumen_navbar(manager_username)
         print(f"✅ Asignación creada: {member_username} → {manager_username}")
         return True
     except Exception as e:
@@ -2059,9 +3435,14 @@ def remove_assignment(manager_username, member_username):
         """,
             (manager_username, member_username),
         )
+        eliminadas = cursor.rowcount
+        if eliminadas > 0:
+            incrementar_version_datos(cursor, "asignaciones")
 
         conn.commit()
-        if cursor.rowcount > 0:
+        if eliminadas > 0:
+            invalidar_jerarquia_asignaciones()
+            invalidar_resumen_navbar(manager_username)
             print(f"✅ Asignación eliminada: {member_username} ← {manager_username}")
             return True
         return False
@@ -2095,9 +3476,15 @@ def remove_assignment_by_id(assignment_id):
         """,
             (assignment_id,),
         )
+        eliminadas = cursor.rowcount
+        if eliminadas > 0:
+            incrementar_version_datos(cursor, "asignaciones")
 
         conn.commit()
-        return cursor.rowcount > 0
+        if eliminadas > 0:
+            invalidar_jerarquia_asignaciones()
+            invalidar_resumen_navbar()
+        return eliminadas > 0
     except Exception as e:
         conn.rollback()
         print(f"❌ Error eliminando asignación: {e}")
@@ -2115,7 +3502,7 @@ def resolve_visible_usernames(
     Args:
         username_actual (str): Username del usuario actual
         permisos_actuales (list): Lista de códigos de permisos del usuario
-        contexto (str): 'simulaciones' o 'evaluaciones'
+        contexto (str): 'simulaciones', 'evaluaciones' o 'auditoria'
 
     Returns:
         dict: {
@@ -2132,6 +3519,10 @@ def resolve_visible_usernames(
         perm_todos = "sco_hist_todos"
         perm_equipo = "sco_hist_equipo"
         perm_propio = "sco_hist_propio"
+    elif contexto == "auditoria":
+        perm_todos = "aud_ver_todos"
+        perm_equipo = "aud_ver_equipo"
+        perm_propio = "aud_ver_propio"
     else:
         # Default a propio
         return {"scope": "propio", "usernames_visibles": [username_actual]}
@@ -2154,24 +3545,99 @@ def resolve_visible_usernames(
     return {"scope": "ninguno", "usernames_visibles": []}
 
 
-def obtener_simulaciones_por_asesores(lista_usernames):
+# Equipo transitivo de un manager como subconsulta, para usar dentro de
+# "columna IN (...)". Parámetros: manager, profundidad máxima, manager.
+SQL_SUBCONSULTA_EQUIPO = """
+    WITH RECURSIVE equipo(miembro, profundidad) AS (
+        SELECT member_username, 1
+        FROM user_assignments
+        WHERE manager_username = ? AND activo = 1
+        UNION
+        SELECT ua.member_username, e.profundidad + 1
+        FROM equipo e
+        JOIN user_assignments ua
+          ON ua.manager_username = e.miembro AND ua.activo = 1
+        WHERE e.profundidad < ?
+    )
+    SELECT miembro FROM equipo WHERE miembro != ?
+"""
+
+
+def filtro_visibilidad_sql(
+    visibilidad, username_actual, columna="asesor", incluir_propio=False
+):
     """
-    Obtiene simulaciones filtradas por lista de asesores.
+    Traduce el alcance de resolve_visible_usernames a un fragmento WHERE.
+
+    El equipo se resuelve dentro de SQLite con una CTE recursiva sobre
+    user_assignments, sin armar un IN (?, ?, ...) con un placeholder por
+    usuario ni filtrar listas en Python.
 
     Args:
-        lista_usernames (list): Lista de usernames a filtrar
+        visibilidad (dict): Resultado de resolve_visible_usernames
+        username_actual (str): Usuario que consulta (raíz del equipo)
+        columna (str): Columna con el username del asesor
+        incluir_propio (bool): Agregar siempre los registros del propio usuario
 
     Returns:
-        list: Lista de simulaciones
+        tuple: (fragmento_sql, params)
     """
-    if not lista_usernames:
-        return []
+    scope = visibilidad.get("scope")
+
+    if scope == "todos":
+        return "1", []
+
+    if scope == "equipo":
+        subconsulta = SQL_SUBCONSULTA_EQUIPO
+        params = [username_actual, PROFUNDIDAD_MAXIMA_EQUIPO, username_actual]
+        if incluir_propio:
+            subconsulta += " UNION SELECT ?"
+            params.append(username_actual)
+        return f"{columna} IN ({subconsulta})", params
+
+    if scope == "propio" or (incluir_propio and scope != "ninguno"):
+        return f"{columna} = ?", [username_actual]
+
+    return "0", []
+
+
+def _filtro_lista_usernames(usernames, columna="asesor"):
+    """Fragmento WHERE para una lista explícita de usernames (un solo parámetro JSON)."""
+    usernames = list(usernames)
+    if not usernames:
+        return "0", []
+    return (
+        f"{columna} IN (SELECT value FROM json_each(?))",
+        [json.dumps(usernames)],
+    )
+
+
+def obtener_simulaciones_visibles(alcance_sql, asesor=None, cedula=None):
+    """
+    Obtiene simulaciones dentro de un alcance de visibilidad.
+
+    Args:
+        alcance_sql (tuple): (fragmento, params) de filtro_visibilidad_sql
+        asesor (str): Filtrar además por un asesor
+        cedula (str): Filtrar además por cédula del cliente
+
+    Returns:
+        list: Lista de simulaciones (más recientes primero)
+    """
+    where, params = alcance_sql
+    condiciones = [where]
+    params = list(params)
+    if asesor:
+        condiciones.append("asesor = ?")
+        params.append(asesor)
+    if cedula:
+        condiciones.append("cedula = ?")
+        params.append(cedula)
 
     conn = conectar_db()
     cursor = conn.cursor()
 
     try:
-        placeholders = ",".join(["?" for _ in lista_usernames])
         cursor.execute(
             f"""
             SELECT timestamp, asesor, cliente, cedula,
@@ -2179,10 +3645,10 @@ def obtener_simulaciones_por_asesores(lista_usernames):
                    cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
                    total_financiar, caso_origen, modalidad_desembolso
             FROM simulaciones
-            WHERE asesor IN ({placeholders})
+            WHERE {" AND ".join(condiciones)}
             ORDER BY timestamp DESC
         """,
-            lista_usernames,
+            params,
         )
 
         simulaciones = []
@@ -2210,30 +3676,48 @@ def obtener_simulaciones_por_asesores(lista_usernames):
 
         return simulaciones
     except Exception as e:
-        print(f"❌ Error obteniendo simulaciones por asesores: {e}")
+        print(f"❌ Error obteniendo simulaciones visibles: {e}")
         return []
     finally:
         conn.close()
 
 
-def obtener_evaluaciones_por_asesores(lista_usernames):
+def obtener_simulaciones_por_asesores(lista_usernames):
     """
-    Obtiene evaluaciones filtradas por lista de asesores.
+    Obtiene simulaciones filtradas por lista de asesores.
 
     Args:
         lista_usernames (list): Lista de usernames a filtrar
 
     Returns:
-        list: Lista de evaluaciones
+        list: Lista de simulaciones
     """
     if not lista_usernames:
         return []
+    return obtener_simulaciones_visibles(_filtro_lista_usernames(lista_usernames))
+
+
+def obtener_evaluaciones_visibles(alcance_sql, asesor=None):
+    """
+    Obtiene evaluaciones dentro de un alcance de visibilidad.
+
+    Args:
+        alcance_sql (tuple): (fragmento, params) de filtro_visibilidad_sql
+        asesor (str): Filtrar además por un asesor
+
+    Returns:
+        list: Lista de evaluaciones (más recientes primero)
+    """
+    where, params = alcance_sql
+    params = list(params)
+    if asesor:
+        where = f"({where}) AND asesor = ?"
+        params.append(asesor)
 
     conn = conectar_db()
     cursor = conn.cursor()
 
     try:
-        placeholders = ",".join(["?" for _ in lista_usernames])
         cursor.execute(
             f"""
             SELECT id, timestamp, asesor, nombre_cliente, cedula,
@@ -2243,10 +3727,10 @@ def obtener_evaluaciones_por_asesores(lista_usernames):
                    fecha_visto_asesor, fecha_envio_comite,
                    puntaje_datacredito
             FROM evaluaciones
-            WHERE asesor IN ({placeholders})
+            WHERE {where}
             ORDER BY timestamp DESC
         """,
-            lista_usernames,
+            params,
         )
 
         evaluaciones = []
@@ -2275,7 +3759,7 @@ def obtener_evaluaciones_por_asesores(lista_usernames):
 
         return evaluaciones
     except Exception as e:
-        print(f"❌ Error obteniendo evaluaciones por asesores: {e}")
+        print(f"❌ Error obteniendo evaluaciones visibles: {e}")
         import traceback
 
         traceback.print_exc()
@@ -2284,6 +3768,21 @@ def obtener_evaluaciones_por_asesores(lista_usernames):
         conn.close()
 
 
+def obtener_evaluaciones_por_asesores(lista_usernames):
+    """
+    Obtiene evaluaciones filtradas por lista de asesores.
+
+    Args:
+        lista_usernames (list): Lista de usernames a filtrar
+
+    Returns:
+        list: Lista de evaluaciones
+    """
+    if not lista_usernames:
+        return []
+    return obtener_evaluaciones_visibles(_filtro_lista_usernames(lista_usernames))
+
+
 def get_managers_for_assignments():
     """
     Obtiene usuarios que pueden tener asignaciones (supervisor, auditor, gerente).
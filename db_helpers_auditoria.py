@@ -0,0 +1,385 @@
+"""
+DB_HELPERS_AUDITORIA.PY - Registro de auditoría asíncrono por lotes
+===================================================================
+
+registrar_evento_auditoria() solo encola el registro: un hilo escritor de
+fondo vacía la cola y guarda los eventos en la tabla `auditoria` en lotes
+(un executemany y un commit por lote), así que auditar una acción no le
+suma una ida a la base al request.
+
+- Contrapresión: si la cola está llena, quien registra espera hasta
+  ESPERA_COLA_LLENA_S y, si sigue llena, escribe su registro directamente.
+  Ningún evento se descarta por falta de espacio.
+- Al cerrar el proceso (atexit) se vacía la cola antes de salir;
+  vaciar_auditoria() lo hace a demanda (tests, scripts).
+- consultar_auditoria() pagina por usuario, acción y rango de fechas sobre
+  índices (usuario, timestamp) y (accion, timestamp).
+
+El timestamp se toma al encolar, en UTC y con el mismo formato que
+CURRENT_TIMESTAMP, para que los eventos encolados y los escritos
+directamente (db_helpers_estados, en su misma transacción) se ordenen
+igual.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
+
+from database import conectar_db
+
+
+# Eventos en espera antes de aplicar contrapresión
+MAX_COLA_AUDITORIA = 10000
+
+# Eventos por commit del escritor
+TAMANO_LOTE_AUDITORIA = 200
+
+# Segundos que espera el escritor a que se junte un lote
+INTERVALO_ESCRITURA_S = 1.0
+
+# Segundos que espera quien registra si la cola está llena
+ESPERA_COLA_LLENA_S = 0.5
+
+COLUMNAS_AUDITORIA = (
+    "timestamp",
+    "usuario",
+    "accion",
+    "tabla_afectada",
+    "registro_id",
+    "datos_anteriores",
+    "datos_nuevos",
+    "ip_address",
+)
+
+# Sin FOREIGN KEY a usuarios: la auditoría registra también actores que no
+# son usuarios ('anónimo', 'sistema') y debe sobrevivir al borrado del usuario
+SQL_AUDITORIA = """
+CREATE TABLE IF NOT EXISTS auditoria (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    usuario TEXT NOT NULL,
+    accion TEXT NOT NULL,
+    tabla_afectada TEXT,
+    registro_id INTEGER,
+    datos_anteriores TEXT,  -- JSON
+    datos_nuevos TEXT,  -- JSON
+    ip_address TEXT
+)
+"""
+
+INDICES_AUDITORIA = (
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_timestamp ON auditoria(timestamp DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_usuario ON auditoria(usuario)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_tabla ON auditoria(tabla_afectada)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_usuario_ts ON auditoria(usuario, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_accion_ts ON auditoria(accion, timestamp)",
+)
+
+SQL_INSERTAR_AUDITORIA = f"""
+    INSERT INTO auditoria ({", ".join(COLUMNAS_AUDITORIA)})
+    VALUES ({", ".join("?" for _ in COLUMNAS_AUDITORIA)})
+"""
+
+
+def ensure_auditoria():
+    """
+    Asegura la tabla de auditoría y sus índices.
+    Las bases antiguas tenían una FOREIGN KEY a usuarios que hacía fallar
+    los registros de actores sin usuario; se reconstruye sin ella.
+    Llamar desde flask_app.py al iniciar.
+
+    Returns:
+        bool: True si quedó lista
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(SQL_AUDITORIA)
+        cursor.execute("PRAGMA foreign_key_list(auditoria)")
+        if cursor.fetchall():
+            columnas = ", ".join(("id",) + COLUMNAS_AUDITORIA)
+            cursor.execute(SQL_AUDITORIA.replace("auditoria", "auditoria_nueva", 1))
+            cursor.execute(
+                f"INSERT INTO auditoria_nueva ({columnas}) SELECT {columnas} FROM auditoria"
+            )
+            cursor.execute("DROP TABLE auditoria")
+            cursor.execute("ALTER TABLE auditoria_nueva RENAME TO auditoria")
+            print("✅ Tabla auditoria reconstruida sin FOREIGN KEY a usuarios")
+        for sentencia in INDICES_AUDITORIA:
+            cursor.execute(sentencia)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error creando tabla auditoria: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# ESCRITOR EN SEGUNDO PLANO
+# ============================================================================
+
+_cola = queue.Queue(maxsize=MAX_COLA_AUDITORIA)
+_hilo = None
+_hilo_lock = threading.Lock()
+_metricas = {"encolados": 0, "escritos": 0, "lotes": 0, "directos": 0, "errores": 0}
+_metricas_lock = threading.Lock()
+
+# Marca que el escritor devuelve al terminar (ver detener_escritor_auditoria)
+_FIN = object()
+
+
+def _contar(clave, n=1):
+    with _metricas_lock:
+        _metricas[clave] += n
+
+
+def _escribir(filas):
+    """Guarda filas en una transacción; si el lote falla, fila por fila."""
+    conn = conectar_db()
+    try:
+        try:
+            conn.executemany(SQL_INSERTAR_AUDITORIA, filas)
+            conn.commit()
+            return len(filas)
+        except Exception as e:
+            conn.rollback()
+            if len(filas) == 1:
+                raise
+            print(f"⚠️ Lote de auditoría falló ({e}), reintentando por fila")
+
+        escritas = 0
+        for fila in filas:
+            try:
+                conn.execute(SQL_INSERTAR_AUDITORIA, fila)
+                conn.commit()
+                escritas += 1
+            except Exception as e:
+                conn.rollback()
+                _contar("errores")
+                print(f"❌ Registro de auditoría descartado ({fila[2]}): {e}")
+        return escritas
+    finally:
+        conn.close()
+
+
+def _bucle_escritor():
+    while True:
+        try:
+            primero = _cola.get(timeout=INTERVALO_ESCRITURA_S)
+        except queue.Empty:
+            continue
+
+        pendientes = [primero]
+        while len(pendientes) < TAMANO_LOTE_AUDITORIA:
+            try:
+                pendientes.append(_cola.get_nowait())
+            except queue.Empty:
+                break
+
+        filas = [p for p in pendientes if isinstance(p, tuple)]
+        if filas:
+            try:
+                _contar("escritos", _escribir(filas))
+                _contar("lotes")
+            except Exception as e:
+                _contar("errores", len(filas))
+                print(f"❌ Error escribiendo auditoría: {e}")
+
+        # Las marcas (threading.Event) avisan que todo lo anterior ya se guardó
+        terminar = False
+        for p in pendientes:
+            if isinstance(p, threading.Event):
+                p.set()
+            elif p is _FIN:
+                terminar = True
+        if terminar:
+            return
+
+
+def _asegurar_escritor():
+    global _hilo
+    if _hilo is not None and _hilo.is_alive():
+        return
+    with _hilo_lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(
+                target=_bucle_escritor, name="auditoria-escritor", daemon=True
+            )
+            _hilo.start()
+
+
+def registrar_evento_auditoria(
+    usuario,
+    accion,
+    tabla_afectada=None,
+    registro_id=None,
+    datos_anteriores=None,
+    datos_nuevos=None,
+    ip_address=None,
+):
+    """
+    Encola un evento de auditoría; el escritor de fondo lo guarda.
+
+    Args:
+        usuario (str): Quién hizo la acción ('sistema', 'anónimo' si no hay sesión)
+        accion (str): Tipo de acción (ej: 'SCORING_CONFIG_UPDATE')
+        tabla_afectada (str): Tabla o área afectada
+        registro_id (int): Id del registro afectado
+        datos_anteriores (str): JSON con el estado previo
+        datos_nuevos (str): JSON con el estado nuevo o los detalles
+        ip_address (str): IP del cliente
+    """
+    fila = (
+        datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        usuario or "sistema",
+        accion,
+        tabla_afectada,
+        registro_id,
+        datos_anteriores,
+        datos_nuevos,
+        ip_address,
+    )
+    _asegurar_escritor()
+    try:
+        _cola.put(fila, timeout=ESPERA_COLA_LLENA_S)
+        _contar("encolados")
+    except queue.Full:
+        # Contrapresión: el escritor no da abasto, se guarda en este hilo
+        try:
+            _contar("escritos", _escribir([fila]))
+            _contar("directos")
+        except Exception as e:
+            _contar("errores")
+            print(f"❌ Error guardando auditoría ({accion}): {e}")
+
+
+def vaciar_auditoria(timeout=5.0):
+    """
+    Espera a que el escritor guarde todo lo encolado hasta ahora.
+
+    Returns:
+        bool: True si la cola se vació dentro del timeout
+    """
+    if _hilo is None or not _hilo.is_alive():
+        return _cola.empty()
+    marca = threading.Event()
+    try:
+        _cola.put(marca, timeout=timeout)
+    except queue.Full:
+        return False
+    return marca.wait(timeout)
+
+
+def detener_escritor_auditoria(timeout=5.0):
+    """Vacía la cola y detiene el escritor (al cerrar el proceso)."""
+    global _hilo
+    hilo = _hilo
+    if hilo is None or not hilo.is_alive():
+        return
+    try:
+        _cola.put(_FIN, timeout=timeout)
+    except queue.Full:
+        print("⚠️ Cola de auditoría llena al cerrar; algunos eventos pueden perderse")
+        return
+    hilo.join(timeout)
+    _hilo = None
+
+
+atexit.register(detener_escritor_auditoria)
+
+
+def obtener_metricas_auditoria():
+    """Returns: dict con contadores del escritor y eventos en cola."""
+    with _metricas_lock:
+        return dict(_metricas, en_cola=_cola.qsize())
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+
+def consultar_auditoria(
+    alcance_sql=None,
+    usuario=None,
+    accion=None,
+    desde=None,
+    hasta=None,
+    pagina=1,
+    por_pagina=50,
+):
+    """
+    Consulta paginada de la auditoría, más recientes primero.
+
+    Args:
+        alcance_sql (tuple): (fragmento, params) de
+            db_helpers.filtro_visibilidad_sql(..., columna="usuario");
+            None = sin restricción
+        usuario (str): Filtrar por usuario
+        accion (str): Filtrar por acción
+        desde (str): Timestamp mínimo inclusive ('YYYY-MM-DD[ HH:MM:SS]', UTC)
+        hasta (str): Timestamp máximo exclusivo
+        pagina (int): Página (desde 1)
+        por_pagina (int): Registros por página (máximo 500)
+
+    Returns:
+        dict: {'registros': list, 'total': int, 'pagina': int, 'por_pagina': int}
+    """
+    pagina = max(int(pagina or 1), 1)
+    por_pagina = min(max(int(por_pagina or 50), 1), 500)
+
+    condiciones = []
+    params = []
+    if alcance_sql is not None:
+        condiciones.append(alcance_sql[0])
+        params.extend(alcance_sql[1])
+    if usuario:
+        condiciones.append("usuario = ?")
+        params.append(usuario)
+    if accion:
+        condiciones.append("accion = ?")
+        params.append(accion)
+    if desde:
+        condiciones.append("timestamp >= ?")
+        params.append(desde)
+    if hasta:
+        condiciones.append("timestamp < ?")
+        params.append(hasta)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM auditoria {where}", params)
+        total = cursor.fetchone()[0]
+
+        cursor.execute(
+            f"""
+            SELECT id, timestamp, usuario, accion, tabla_afectada, registro_id,
+                   datos_anteriores, datos_nuevos, ip_address
+            FROM auditoria
+            {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ? OFFSET ?
+        """,
+            params + [por_pagina, (pagina - 1) * por_pagina],
+        )
+        registros = [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    return {
+        "registros": registros,
+        "total": total,
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+    }
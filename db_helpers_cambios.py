@@ -0,0 +1,371 @@
+"""
+DB_HELPERS_CAMBIOS.PY - Feed incremental de cambios de evaluaciones
+===================================================================
+
+Cada alta, cambio relevante (estado del comité, decisión, visto por el
+asesor, estado final, envío a comité) o borrado de una evaluación deja una
+fila en `cambios_evaluaciones` mediante triggers, con una secuencia `seq`
+monótona compartida por todos los procesos.
+
+Los endpoints de polling reciben el último `seq` que vio el cliente
+(cursor) y devuelven solo lo que cambió desde entonces. Si nada cambió
+responden 304 comparando contra el cursor vigente, que sale del anillo en
+memoria de eventos recientes sin tocar la tabla evaluaciones.
+
+El canal SSE (/api/eventos/stream) espera sobre el mismo anillo con
+esperar_cambios(); las escrituras de este proceso lo despiertan de
+inmediato con notificar_cambios() y las de otros procesos llegan en la
+siguiente sincronización. Está desactivado por defecto (SSE_HABILITADO):
+el polling con cursor y ETag/304 es el camino principal.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from database import asegurar_triggers, conectar_db
+
+
+# Filas que conserva la tabla (las más antiguas se podan en el trigger)
+MAX_FILAS_FEED = 20000
+
+# Eventos recientes que se guardan en memoria por proceso
+TAMANO_ANILLO = 1000
+
+# Cada cuántos segundos se revisa la tabla por eventos nuevos; entre
+# revisiones todas las peticiones se responden desde memoria
+INTERVALO_SINCRONIZACION_S = 0.5
+
+# Columnas cuyo cambio genera un evento
+COLUMNAS_VIGILADAS = (
+    "asesor",
+    "origen",
+    "estado_comite",
+    "decision_admin",
+    "visto_por_asesor",
+    "estado_final",
+    "fecha_envio_comite",
+)
+
+SQL_FEED_CAMBIOS = """
+CREATE TABLE IF NOT EXISTS cambios_evaluaciones (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    evaluacion_id INTEGER NOT NULL,
+    timestamp TEXT,
+    asesor TEXT,
+    origen TEXT,
+    estado_comite TEXT,
+    operacion TEXT NOT NULL,  -- 'insert' | 'update' | 'delete'
+    tipo TEXT,                -- evento para SSE (ver SQL_TIPO_EVENTO)
+    fecha_cambio TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+# Tipo de evento publicado por SSE según la operación
+SQL_TIPO_EVENTO = {
+    "insert": (
+        "CASE WHEN NEW.estado_comite = 'pending' THEN 'caso_enviado' "
+        "ELSE 'evaluacion_nueva' END"
+    ),
+    "update": (
+        "CASE "
+        "WHEN NEW.estado_comite IS NOT OLD.estado_comite "
+        "AND NEW.estado_comite = 'approved' THEN 'caso_aprobado' "
+        "WHEN NEW.estado_comite IS NOT OLD.estado_comite "
+        "AND NEW.estado_comite = 'rejected' THEN 'caso_rechazado' "
+        "WHEN NEW.estado_comite IS NOT OLD.estado_comite "
+        "AND NEW.estado_comite = 'pending' THEN 'caso_enviado' "
+        "WHEN NEW.estado_final IS NOT OLD.estado_final "
+        "AND NEW.estado_final = 'desembolsado' THEN 'caso_desembolsado' "
+        "ELSE 'caso_actualizado' END"
+    ),
+    "delete": "'caso_eliminado'",
+}
+
+
+def _sql_registrar(fila, operacion):
+    return f"""
+                INSERT INTO cambios_evaluaciones
+                    (evaluacion_id, timestamp, asesor, origen, estado_comite,
+                     operacion, tipo)
+                VALUES ({fila}.id, {fila}.timestamp, {fila}.asesor, {fila}.origen,
+                        {fila}.estado_comite, '{operacion}',
+                        {SQL_TIPO_EVENTO[operacion]});
+                DELETE FROM cambios_evaluaciones
+                WHERE seq <= (SELECT MAX(seq) FROM cambios_evaluaciones) - {MAX_FILAS_FEED};"""
+
+
+def _sql_triggers():
+    """Returns: dict nombre -> CREATE TRIGGER de cada operación."""
+    columnas = ", ".join(COLUMNAS_VIGILADAS)
+    # El UPDATE completo de guardar_evaluacion_db reescribe todas las
+    # columnas: solo se registra si alguna vigilada cambió de verdad
+    hubo_cambio = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in COLUMNAS_VIGILADAS)
+    return {
+        "trg_cambios_evaluaciones_insert": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cambios_evaluaciones_insert
+            AFTER INSERT ON evaluaciones
+            BEGIN{_sql_registrar("NEW", "insert")}
+            END
+        """,
+        "trg_cambios_evaluaciones_update": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cambios_evaluaciones_update
+            AFTER UPDATE OF {columnas} ON evaluaciones
+            WHEN {hubo_cambio}
+            BEGIN{_sql_registrar("NEW", "update")}
+            END
+        """,
+        "trg_cambios_evaluaciones_delete": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_cambios_evaluaciones_delete
+            AFTER DELETE ON evaluaciones
+            BEGIN{_sql_registrar("OLD", "delete")}
+            END
+        """,
+    }
+
+
+def ensure_feed_cambios():
+    """
+    Asegura la tabla del feed de cambios y sus triggers.
+    Llamar desde flask_app.py al iniciar.
+
+    Returns:
+        bool: True si quedó lista
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(SQL_FEED_CAMBIOS)
+        cursor.execute("PRAGMA table_info(cambios_evaluaciones)")
+        if "tipo" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE cambios_evaluaciones ADD COLUMN tipo TEXT")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cambios_evaluaciones_asesor "
+            "ON cambios_evaluaciones(asesor, seq)"
+        )
+        # Los que faltan o cambiaron (p. ej. anteriores a la columna tipo)
+        if asegurar_triggers(cursor, _sql_triggers()):
+            # Eventos registrados sin tipo por los triggers anteriores
+            cursor.execute(
+                f"""
+                UPDATE cambios_evaluaciones SET tipo = CASE operacion
+                    WHEN 'delete' THEN 'caso_eliminado'
+                    WHEN 'insert' THEN {SQL_TIPO_EVENTO["insert"].replace("NEW.", "")}
+                    ELSE 'caso_actualizado' END
+                WHERE tipo IS NULL
+            """
+            )
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error creando feed de cambios: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# ANILLO EN MEMORIA
+# ============================================================================
+
+_anillo = deque(maxlen=TAMANO_ANILLO)
+_ultimo_seq = 0
+_sincronizado = 0.0
+_lock = threading.Lock()
+_hay_cambios = threading.Condition()
+
+
+def _sincronizar():
+    """Trae al anillo los eventos nuevos de la tabla (como mucho cada INTERVALO)."""
+    global _ultimo_seq, _sincronizado
+
+    if time.monotonic() - _sincronizado < INTERVALO_SINCRONIZACION_S:
+        return
+
+    with _lock:
+        conn = conectar_db()
+        try:
+            # Los más recientes primero: si hay más de los que caben, el
+            # anillo queda con los últimos y se marca el hueco
+            rows = conn.execute(
+                """
+                SELECT seq, evaluacion_id, timestamp, asesor, origen,
+                       estado_comite, operacion, tipo
+                FROM cambios_evaluaciones
+                WHERE seq > ?
+                ORDER BY seq DESC
+                LIMIT ?
+            """,
+                (_ultimo_seq, TAMANO_ANILLO),
+            ).fetchall()
+            if not rows:
+                # La base pudo reiniciarse (restauración de backup)
+                maximo = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM cambios_evaluaciones"
+                ).fetchone()[0]
+                if maximo < _ultimo_seq:
+                    _anillo.clear()
+                    _ultimo_seq = maximo
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el feed de cambios: {e}")
+            rows = []
+        finally:
+            conn.close()
+
+        if rows:
+            if rows[-1][0] > _ultimo_seq + 1:
+                _anillo.clear()
+            for row in reversed(rows):
+                _anillo.append(
+                    {
+                        "seq": row[0],
+                        "evaluacion_id": row[1],
+                        "timestamp": row[2],
+                        "asesor": row[3],
+                        "origen": row[4],
+                        "estado_comite": row[5],
+                        "operacion": row[6],
+                        "tipo": row[7],
+                    }
+                )
+            _ultimo_seq = rows[0][0]
+        _sincronizado = time.monotonic()
+
+
+def cursor_actual_feed():
+    """
+    Último `seq` conocido del feed (para ETag y para el cliente).
+
+    Returns:
+        int
+    """
+    _sincronizar()
+    return _ultimo_seq
+
+
+def obtener_cambios_desde(desde, asesor=None):
+    """
+    Eventos posteriores a un cursor, servidos desde el anillo en memoria.
+
+    Args:
+        desde (int): Último seq que vio el cliente
+        asesor (str): Solo eventos de casos de este asesor
+
+    Returns:
+        dict: {'cursor': int, 'eventos': list | None}. 'eventos' es None si
+        el cursor es más antiguo que el anillo (o de otra base) y el
+        cliente debe recargar la lista completa.
+    """
+    _sincronizar()
+    with _lock:
+        ultimo = _ultimo_seq
+        if desde > ultimo:
+            return {"cursor": ultimo, "eventos": None}
+        if desde < ultimo and (not _anillo or _anillo[0]["seq"] > desde + 1):
+            return {"cursor": ultimo, "eventos": None}
+        eventos = [
+            ev for ev in _anillo
+            if ev["seq"] > desde and (asesor is None or ev["asesor"] == asesor)
+        ]
+    return {"cursor": ultimo, "eventos": eventos}
+
+
+# ============================================================================
+# SUSCRIPTORES (canal SSE)
+# ============================================================================
+
+# Segundos máximos de espera antes de mandar un latido al cliente
+LATIDO_SSE_S = 15
+
+# Segundos que dura una conexión SSE: al cerrarla EventSource reconecta y
+# permisos y visibilidad se vuelven a resolver
+DURACION_MAX_SSE_S = 300
+
+# Cada conexión SSE ocupa un hilo del servidor WSGI mientras dura. Con
+# workers síncronos (PythonAnywhere) unas pocas pestañas abiertas bloquean
+# el resto de peticiones, así que el canal solo se activa con LOANSI_SSE=1
+SSE_HABILITADO = os.environ.get("LOANSI_SSE", "0") == "1"
+
+# Hilos que atienden peticiones en cada proceso (threads del worker WSGI)
+try:
+    HILOS_POR_PROCESO = max(1, int(os.environ.get("LOANSI_HILOS_POR_PROCESO", 1)))
+except ValueError:
+    HILOS_POR_PROCESO = 1
+
+# Conexiones SSE abiertas por proceso: como mucho la mitad de los hilos, el
+# resto queda para las demás peticiones (con un solo hilo, ninguna). Por
+# encima se responde 503 y el cliente sigue con polling
+MAX_SUSCRIPTORES_SSE = HILOS_POR_PROCESO // 2
+
+# Registro por proceso: id -> {'username'}
+_suscriptores = {}
+_suscriptores_lock = threading.Lock()
+_siguiente_suscriptor = 0
+
+
+def notificar_cambios():
+    """
+    Despierta a los suscriptores de este proceso tras una escritura
+    (llamar después del commit). Los de otros procesos se enteran en su
+    próxima sincronización.
+    """
+    global _sincronizado
+    _sincronizado = 0.0
+    with _hay_cambios:
+        _hay_cambios.notify_all()
+
+
+def suscribir(username):
+    """
+    Registra un suscriptor SSE.
+
+    Returns:
+        int | None: id para desuscribir, o None si ya hay
+        MAX_SUSCRIPTORES_SSE conexiones abiertas en este proceso
+    """
+    global _siguiente_suscriptor
+    with _suscriptores_lock:
+        if len(_suscriptores) >= MAX_SUSCRIPTORES_SSE:
+            return None
+        _siguiente_suscriptor += 1
+        _suscriptores[_siguiente_suscriptor] = {"username": username}
+        return _siguiente_suscriptor
+
+
+def desuscribir(id_suscriptor):
+    with _suscriptores_lock:
+        _suscriptores.pop(id_suscriptor, None)
+
+
+def contar_suscriptores():
+    """Returns: dict username -> conexiones SSE abiertas en este proceso."""
+    with _suscriptores_lock:
+        conteo = {}
+        for sub in _suscriptores.values():
+            conteo[sub["username"]] = conteo.get(sub["username"], 0) + 1
+        return conteo
+
+
+def esperar_cambios(desde, timeout=LATIDO_SSE_S):
+    """
+    Bloquea hasta que haya eventos posteriores a `desde` o venza el timeout.
+
+    Returns:
+        dict: Igual que obtener_cambios_desde(); 'eventos' vacío si venció
+        el timeout sin cambios (momento de mandar un latido).
+    """
+    limite = time.monotonic() + timeout
+    while True:
+        cambios = obtener_cambios_desde(desde)
+        restante = limite - time.monotonic()
+        if cambios["eventos"] is None or cambios["eventos"] or restante <= 0:
+            return cambios
+        with _hay_cambios:
+            _hay_cambios.wait(min(restante, max(INTERVALO_SINCRONIZACION_S, 0.05)))
@@ -10,61 +10,128 @@ VERSIÓN MEJORADA con:
 """
 
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 from database import conectar_db
 
 
+# Periodos en hora Colombia (UTC-5, como app/utils/timezone). Son expresiones
+# constantes: SQLite las evalúa una vez y compara contra las columnas
+# creado_dia / creado_mes / decision_dia indexadas (ver
+# db_helpers.ensure_columnas_fecha), sin DATE()/strftime() por fila.
+SQL_HOY = "date('now', '-5 hours')"
+SQL_INICIO_SEMANA = "date('now', '-5 hours', '-6 days', 'weekday 1')"
+SQL_MES_ACTUAL = "strftime('%Y-%m', 'now', '-5 hours')"
+SQL_MES_ANTERIOR = "strftime('%Y-%m', 'now', '-5 hours', 'start of month', '-1 month')"
+SQL_HACE_28_DIAS = "date('now', '-5 hours', '-28 days')"
+SQL_HACE_6_MESES = "date('now', '-5 hours', '-6 months')"
+SQL_INICIO_MES = "date('now', '-5 hours', 'start of month')"
+SQL_INICIO_MES_ANTERIOR = "date('now', '-5 hours', 'start of month', '-1 month')"
+SQL_INICIO_MES_SIGUIENTE = "date('now', '-5 hours', 'start of month', '+1 month')"
+
+# Los conteos salen de los rollups diarios (db_helpers_rollups): se suma
+# `total` sobre filas (día, asesor, ...) en lugar de contar evaluaciones.
+SQL_DIAS_MES_ACTUAL = f"dia >= {SQL_INICIO_MES} AND dia < {SQL_INICIO_MES_SIGUIENTE}"
+SQL_DIAS_MES_ANTERIOR = f"dia >= {SQL_INICIO_MES_ANTERIOR} AND dia < {SQL_INICIO_MES}"
+
+# Última actividad (hora Colombia) a partir del epoch indexado por asesor
+SQL_ULTIMA_ACTIVIDAD = (
+    "strftime('%Y-%m-%d %H:%M:%S', MAX(creado_epoch), 'unixepoch', '-5 hours')"
+)
+
+
 # ============================================================================
 # FUNCIONES AUXILIARES PARA OBTENER USUARIOS ASIGNADOS
 # ============================================================================
 
+def obtener_estructura_equipo(cursor, manager_username):
+    """
+    Resuelve en UNA consulta los miembros activos asignados a un manager y,
+    para cada uno, sus propios miembros activos (gerente -> supervisores ->
+    asesores). No incluye estadísticas: se agregan en lote con
+    obtener_stats_asesores().
+
+    Args:
+        cursor: Cursor de SQLite activo
+        manager_username (str): Username del manager
+
+    Returns:
+        list: [{'username', 'nombre_completo', 'rol', 'activo',
+                'fecha_asignacion', 'miembros': [ ...mismas claves... ]}]
+    """
+    cursor.execute("""
+        SELECT
+            ua.member_username, u.nombre_completo, u.rol, u.activo,
+            ua.fecha_creacion,
+            ua2.member_username, u2.nombre_completo, u2.rol, u2.activo,
+            ua2.fecha_creacion
+        FROM user_assignments ua
+        LEFT JOIN usuarios u ON ua.member_username = u.username
+        LEFT JOIN user_assignments ua2
+               ON ua2.manager_username = ua.member_username AND ua2.activo = 1
+        LEFT JOIN usuarios u2 ON ua2.member_username = u2.username
+        WHERE ua.manager_username = ? AND ua.activo = 1
+        ORDER BY u.nombre_completo, ua.member_username,
+                 u2.nombre_completo, ua2.member_username
+    """, (manager_username,))
+
+    def _miembro(username, nombre, rol, activo, fecha):
+        return {
+            'username': username,
+            'nombre_completo': nombre or username,
+            'rol': rol,
+            'activo': bool(activo) if activo is not None else True,
+            'fecha_asignacion': fecha,
+        }
+
+    equipo = []
+    por_username = {}
+    for row in cursor.fetchall():
+        directo = por_username.get(row[0])
+        if directo is None:
+            directo = _miembro(*row[0:5])
+            directo['miembros'] = []
+            por_username[row[0]] = directo
+            equipo.append(directo)
+        if row[5] is not None:
+            directo['miembros'].append(_miembro(*row[5:10]))
+
+    return equipo
+
+
 def obtener_usuarios_asignados_detalle(manager_username):
     """
     Obtiene lista detallada de usuarios asignados a un manager (supervisor/gerente/auditor).
     Incluye información del usuario y estadísticas básicas.
-    
+
     Args:
         manager_username (str): Username del manager
-        
+
     Returns:
         list: Lista de dicts con info de cada usuario asignado
     """
     conn = conectar_db()
     cursor = conn.cursor()
-    
+
     try:
-        # Obtener usuarios directamente asignados con su información
-        cursor.execute("""
-            SELECT 
-                ua.member_username,
-                u.nombre_completo,
-                u.rol,
-                u.activo,
-                ua.fecha_creacion as fecha_asignacion
-            FROM user_assignments ua
-            LEFT JOIN usuarios u ON ua.member_username = u.username
-            WHERE ua.manager_username = ? AND ua.activo = 1
-            ORDER BY u.nombre_completo, ua.member_username
-        """, (manager_username,))
-        
+        # Usuarios directamente asignados + estadísticas de todos en lote
+        equipo = obtener_estructura_equipo(cursor, manager_username)
+        stats = obtener_stats_asesores(cursor, [m['username'] for m in equipo])
+
         usuarios = []
-        for row in cursor.fetchall():
-            username = row[0]
-            
-            # Obtener estadísticas del usuario
-            stats = obtener_stats_usuario_rapido(cursor, username)
-            
+        for miembro in equipo:
             usuarios.append({
-                'username': username,
-                'nombre_completo': row[1] or username,
-                'rol': row[2] or 'asesor',
-                'activo': bool(row[3]) if row[3] is not None else True,
-                'fecha_asignacion': row[4],
-                'stats': stats
+                'username': miembro['username'],
+                'nombre_completo': miembro['nombre_completo'],
+                'rol': miembro['rol'] or 'asesor',
+                'activo': miembro['activo'],
+                'fecha_asignacion': miembro['fecha_asignacion'],
+                'stats': stats[miembro['username']]
             })
-        
+
         return usuarios
-        
+
     except Exception as e:
         print(f"❌ Error obteniendo usuarios asignados detalle: {e}")
         return []
@@ -72,79 +139,117 @@ def obtener_usuarios_asignados_detalle(manager_username):
         conn.close()
 
 
+def _stats_asesor_vacias():
+    return {
+        'evaluaciones_hoy': 0,
+        'evaluaciones_semana': 0,
+        'evaluaciones_mes': 0,
+        'evaluaciones_total': 0,
+        'casos_pendientes': 0,
+        'casos_aprobados': 0,
+        'casos_rechazados': 0,
+        'casos_nuevos': 0,
+        'simulaciones_hoy': 0,
+        'simulaciones_semana': 0,
+        'simulaciones_total': 0,
+        'ultima_actividad': None,
+        'activo_hoy': False
+    }
+
+
+def obtener_stats_asesores(cursor, usernames):
+    """
+    Obtiene las estadísticas de varios asesores en una consulta agregada por
+    tabla (SUM(CASE ...) ... GROUP BY asesor), sin importar cuántos sean.
+
+    Args:
+        cursor: Cursor de SQLite activo
+        usernames (list): Usernames a consultar
+
+    Returns:
+        dict: {username: stats} con las claves de _stats_asesor_vacias()
+    """
+    usernames = list(dict.fromkeys(usernames))
+    resultado = {u: _stats_asesor_vacias() for u in usernames}
+    if not usernames:
+        return resultado
+
+    ph = ','.join('?' * len(usernames))
+
+    # Evaluaciones: periodos y estados del comité (rollup diario)
+    cursor.execute(f"""
+        SELECT asesor,
+               SUM(CASE WHEN dia = {SQL_HOY} THEN total ELSE 0 END),
+               SUM(CASE WHEN dia >= {SQL_INICIO_SEMANA} THEN total ELSE 0 END),
+               SUM(CASE WHEN {SQL_DIAS_MES_ACTUAL} THEN total ELSE 0 END),
+               SUM(total),
+               SUM(CASE WHEN estado_comite = 'pending' THEN total ELSE 0 END),
+               SUM(CASE WHEN estado_comite = 'approved' THEN total ELSE 0 END),
+               SUM(CASE WHEN estado_comite = 'rejected' THEN total ELSE 0 END)
+        FROM rollup_evaluaciones_dia
+        WHERE asesor IN ({ph})
+        GROUP BY asesor
+    """, usernames)
+    for row in cursor.fetchall():
+        stats = resultado[row[0]]
+        (stats['evaluaciones_hoy'], stats['evaluaciones_semana'],
+         stats['evaluaciones_mes'], stats['evaluaciones_total'],
+         stats['casos_pendientes'], stats['casos_aprobados'],
+         stats['casos_rechazados']) = row[1:]
+
+    # Simulaciones (rollup diario)
+    cursor.execute(f"""
+        SELECT asesor,
+               SUM(CASE WHEN dia = {SQL_HOY} THEN total ELSE 0 END),
+               SUM(CASE WHEN dia >= {SQL_INICIO_SEMANA} THEN total ELSE 0 END),
+               SUM(total)
+        FROM rollup_simulaciones_dia
+        WHERE asesor IN ({ph})
+        GROUP BY asesor
+    """, usernames)
+    for row in cursor.fetchall():
+        stats = resultado[row[0]]
+        (stats['simulaciones_hoy'], stats['simulaciones_semana'],
+         stats['simulaciones_total']) = row[1:]
+
+    # Última actividad y respuestas no vistas (índice asesor_actividad)
+    cursor.execute(f"""
+        SELECT asesor,
+               {SQL_ULTIMA_ACTIVIDAD},
+               SUM(CASE WHEN estado_comite IN ('approved', 'rejected')
+                         AND (visto_por_asesor = 0 OR visto_por_asesor IS NULL)
+                        THEN 1 ELSE 0 END)
+        FROM evaluaciones
+        WHERE asesor IN ({ph})
+        GROUP BY asesor
+    """, usernames)
+    for row in cursor.fetchall():
+        stats = resultado[row[0]]
+        stats['ultima_actividad'] = row[1] or None
+        stats['casos_nuevos'] = row[2] or 0
+
+    for stats in resultado.values():
+        stats['activo_hoy'] = stats['evaluaciones_hoy'] > 0 or stats['simulaciones_hoy'] > 0
+
+    return resultado
+
+
 def obtener_stats_usuario_rapido(cursor, username):
     """
     Obtiene estadísticas rápidas de un usuario (usa cursor existente).
-    
+
     Args:
         cursor: Cursor de SQLite activo
         username (str): Username del usuario
-        
+
     Returns:
-        dict: Estadísticas básicas del usuario
+        dict: Estadísticas básicas del usuario (ver obtener_stats_asesores)
     """
-    stats = {
-        'evaluaciones_hoy': 0,
-        'evaluaciones_semana': 0,
-        'evaluaciones_mes': 0,
-        'simulaciones_hoy': 0,
-        'casos_pendientes': 0,
-        'ultima_actividad': None,
-        'activo_hoy': False
-    }
-    
     try:
-        inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-        
-        # Evaluaciones hoy
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
-        """, (username,))
-        stats['evaluaciones_hoy'] = cursor.fetchone()[0]
-        
-        # Evaluaciones semana
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND DATE(fecha_creacion) >= ?
-        """, (username, inicio_semana))
-        stats['evaluaciones_semana'] = cursor.fetchone()[0]
-        
-        # Evaluaciones mes
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-        """, (username,))
-        stats['evaluaciones_mes'] = cursor.fetchone()[0]
-        
-        # Simulaciones hoy
-        cursor.execute("""
-            SELECT COUNT(*) FROM simulaciones
-            WHERE asesor = ? AND DATE(timestamp) = DATE('now', 'localtime')
-        """, (username,))
-        stats['simulaciones_hoy'] = cursor.fetchone()[0]
-        
-        # Casos pendientes comité
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND estado_comite = 'pending'
-        """, (username,))
-        stats['casos_pendientes'] = cursor.fetchone()[0]
-        
-        # Última actividad
-        cursor.execute("""
-            SELECT MAX(fecha_creacion) FROM evaluaciones WHERE asesor = ?
-        """, (username,))
-        row = cursor.fetchone()
-        stats['ultima_actividad'] = row[0] if row and row[0] else None
-        
-        # Activo hoy
-        stats['activo_hoy'] = stats['evaluaciones_hoy'] > 0 or stats['simulaciones_hoy'] > 0
-        
+        return obtener_stats_asesores(cursor, [username])[username]
     except Exception as e:
         print(f"⚠️ Error obteniendo stats rápidos para {username}: {e}")
-    
-    return stats
+        return _stats_asesor_vacias()
 
 
 def obtener_jerarquia_gerente(gerente_username):
@@ -179,56 +284,38 @@ def obtener_jerarquia_gerente(gerente_username):
             'total_asesores': 0
         }
         
-        # Obtener supervisores asignados al gerente
-        cursor.execute("""
-            SELECT 
-                ua.member_username,
-                u.nombre_completo,
-                u.rol
-            FROM user_assignments ua
-            LEFT JOIN usuarios u ON ua.member_username = u.username
-            WHERE ua.manager_username = ? AND ua.activo = 1
-            ORDER BY u.nombre_completo
-        """, (gerente_username,))
-        
-        supervisores = cursor.fetchall()
-        resultado['total_supervisores'] = len(supervisores)
-        
-        for sup in supervisores:
-            sup_username = sup[0]
+        # Jerarquía completa en una consulta y estadísticas de todos sus
+        # miembros en lote (número fijo de consultas, sin importar el tamaño)
+        equipo = obtener_estructura_equipo(cursor, gerente_username)
+        usernames = []
+        for sup in equipo:
+            usernames.append(sup['username'])
+            usernames.extend(a['username'] for a in sup['miembros'])
+        stats = obtener_stats_asesores(cursor, usernames)
+
+        resultado['total_supervisores'] = len(equipo)
+
+        for sup in equipo:
             sup_data = {
-                'username': sup_username,
-                'nombre_completo': sup[1] or sup_username,
-                'rol': sup[2] or 'supervisor',
+                'username': sup['username'],
+                'nombre_completo': sup['nombre_completo'],
+                'rol': sup['rol'] or 'supervisor',
                 'asesores': [],
-                'stats': obtener_stats_usuario_rapido(cursor, sup_username)
+                'stats': stats[sup['username']]
             }
-            
-            # Obtener asesores de este supervisor
-            cursor.execute("""
-                SELECT 
-                    ua.member_username,
-                    u.nombre_completo,
-                    u.rol
-                FROM user_assignments ua
-                LEFT JOIN usuarios u ON ua.member_username = u.username
-                WHERE ua.manager_username = ? AND ua.activo = 1
-                ORDER BY u.nombre_completo
-            """, (sup_username,))
-            
-            asesores = cursor.fetchall()
-            for asesor in asesores:
+
+            for asesor in sup['miembros']:
                 asesor_data = {
-                    'username': asesor[0],
-                    'nombre_completo': asesor[1] or asesor[0],
-                    'rol': asesor[2] or 'asesor',
-                    'stats': obtener_stats_usuario_rapido(cursor, asesor[0])
+                    'username': asesor['username'],
+                    'nombre_completo': asesor['nombre_completo'],
+                    'rol': asesor['rol'] or 'asesor',
+                    'stats': stats[asesor['username']]
                 }
                 sup_data['asesores'].append(asesor_data)
                 resultado['total_asesores'] += 1
-            
+
             resultado['supervisores'].append(sup_data)
-        
+
         return resultado
         
     except Exception as e:
@@ -255,8 +342,6 @@ def obtener_estadisticas_asesor(username):
     conn = conectar_db()
     cursor = conn.cursor()
 
-    inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-
     stats = {
         'rol': 'asesor',
         'titulo': 'Mi Panel',
@@ -264,82 +349,14 @@ def obtener_estadisticas_asesor(username):
         'color': 'primary'
     }
 
-    # Simulaciones de hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE asesor = ? AND DATE(timestamp) = DATE('now', 'localtime')
-    """, (username,))
-    stats['simulaciones_hoy'] = cursor.fetchone()[0]
-
-    # Simulaciones esta semana
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE asesor = ? AND DATE(timestamp) >= ?
-    """, (username, inicio_semana))
-    stats['simulaciones_semana'] = cursor.fetchone()[0]
-
-    # Total simulaciones
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones WHERE asesor = ?
-    """, (username,))
-    stats['simulaciones_total'] = cursor.fetchone()[0]
-
-    # Evaluaciones de hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
-    """, (username,))
-    stats['evaluaciones_hoy'] = cursor.fetchone()[0]
-
-    # Evaluaciones esta semana
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND DATE(fecha_creacion) >= ?
-    """, (username, inicio_semana))
-    stats['evaluaciones_semana'] = cursor.fetchone()[0]
-
-    # Total evaluaciones
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones WHERE asesor = ?
-    """, (username,))
-    stats['evaluaciones_total'] = cursor.fetchone()[0]
-
-    # Casos enviados a comité (pendientes)
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'pending'
-    """, (username,))
-    stats['casos_pendientes_comite'] = cursor.fetchone()[0]
-
-    # Casos aprobados por comité
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'approved'
-    """, (username,))
-    stats['casos_aprobados'] = cursor.fetchone()[0]
-
-    # Casos rechazados por comité
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'rejected'
-    """, (username,))
-    stats['casos_rechazados'] = cursor.fetchone()[0]
-
-    # Casos con respuesta no vistos
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ?
-          AND estado_comite IN ('approved', 'rejected')
-          AND (visto_por_asesor = 0 OR visto_por_asesor IS NULL)
-    """, (username,))
-    stats['casos_nuevos'] = cursor.fetchone()[0]
-
-    # Última actividad
-    cursor.execute("""
-        SELECT MAX(fecha_creacion) FROM evaluaciones WHERE asesor = ?
-    """, (username,))
-    row = cursor.fetchone()
-    stats['ultima_actividad'] = row[0] if row and row[0] else None
+    # Simulaciones, evaluaciones, casos de comité y última actividad
+    propias = obtener_stats_asesores(cursor, [username])[username]
+    for clave in ('simulaciones_hoy', 'simulaciones_semana', 'simulaciones_total',
+                  'evaluaciones_hoy', 'evaluaciones_semana', 'evaluaciones_total',
+                  'casos_aprobados', 'casos_rechazados', 'casos_nuevos',
+                  'ultima_actividad'):
+        stats[clave] = propias[clave]
+    stats['casos_pendientes_comite'] = propias['casos_pendientes']
 
     conn.close()
     return stats
@@ -359,8 +376,6 @@ def obtener_estadisticas_supervisor(username=None):
     conn = conectar_db()
     cursor = conn.cursor()
 
-    inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-
     stats = {
         'rol': 'supervisor',
         'titulo': 'Panel de Supervisión',
@@ -415,56 +430,56 @@ def obtener_estadisticas_supervisor(username=None):
     # Asesores activos (de los asignados)
     stats['asesores_activos'] = len(asesores)
 
-    # Agregar estadísticas a cada asesor
+    # Agregar estadísticas a cada asesor (todas en lote)
+    stats_asesores = obtener_stats_asesores(cursor, asesores)
     for asesor_info in asesores_data:
-        asesor_stats = obtener_stats_usuario_rapido(cursor, asesor_info['username'])
-        asesor_info['stats'] = asesor_stats
-    
+        asesor_info['stats'] = stats_asesores[asesor_info['username']]
+
     stats['lista_asesores'] = asesores_data
 
     # Asesores que han trabajado hoy (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(DISTINCT asesor) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+        SELECT COUNT(DISTINCT asesor) FROM rollup_evaluaciones_dia
+        WHERE dia = {SQL_HOY}
           AND asesor IN ({ph})
     """, asesores)
     stats['asesores_activos_hoy'] = cursor.fetchone()[0]
 
     # Simulaciones del equipo hoy (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) = DATE('now', 'localtime')
+        SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia
+        WHERE dia = {SQL_HOY}
           AND asesor IN ({ph})
     """, asesores)
     stats['simulaciones_equipo_hoy'] = cursor.fetchone()[0]
 
     # Simulaciones del equipo esta semana (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) >= ?
+        SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia
+        WHERE dia >= {SQL_INICIO_SEMANA}
           AND asesor IN ({ph})
-    """, [inicio_semana] + asesores)
+    """, asesores)
     stats['simulaciones_equipo_semana'] = cursor.fetchone()[0]
 
     # Evaluaciones del equipo hoy (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
+        WHERE dia = {SQL_HOY}
           AND asesor IN ({ph})
     """, asesores)
     stats['evaluaciones_equipo_hoy'] = cursor.fetchone()[0]
 
     # Evaluaciones del equipo esta semana (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) >= ?
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
+        WHERE dia >= {SQL_INICIO_SEMANA}
           AND asesor IN ({ph})
-    """, [inicio_semana] + asesores)
+    """, asesores)
     stats['evaluaciones_equipo_semana'] = cursor.fetchone()[0]
 
     # Total casos pendientes de comité (DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
         WHERE estado_comite = 'pending'
           AND asesor IN ({ph})
     """, asesores)
@@ -472,17 +487,17 @@ def obtener_estadisticas_supervisor(username=None):
 
     # Top asesores de la semana (SOLO DE LOS ASIGNADOS)
     cursor.execute(f"""
-        SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, 
-               e.asesor as username,
-               COUNT(*) as total
-        FROM evaluaciones e
-        LEFT JOIN usuarios u ON e.asesor = u.username
-        WHERE DATE(e.fecha_creacion) >= ?
-          AND e.asesor IN ({ph})
-        GROUP BY e.asesor
+        SELECT COALESCE(u.nombre_completo, r.asesor) as nombre, 
+               r.asesor as username,
+               SUM(r.total) as total
+        FROM rollup_evaluaciones_dia r
+        LEFT JOIN usuarios u ON r.asesor = u.username
+        WHERE r.dia >= {SQL_INICIO_SEMANA}
+          AND r.asesor IN ({ph})
+        GROUP BY r.asesor
         ORDER BY total DESC
         LIMIT 5
-    """, [inicio_semana] + asesores)
+    """, asesores)
     stats['top_asesores'] = [
         {'nombre': row[0] or 'Sin nombre', 'username': row[1], 'total': row[2]} 
         for row in cursor.fetchall()
@@ -511,35 +526,32 @@ def obtener_estadisticas_comite():
 
     # Casos pendientes de decisión
     cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
         WHERE estado_comite = 'pending'
     """)
     stats['casos_pendientes'] = cursor.fetchone()[0]
 
-    # Casos aprobados hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
+    # Casos aprobados hoy (día de la decisión, hora Colombia)
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) FROM rollup_decisiones_dia
         WHERE estado_comite = 'approved'
-          AND DATE(fecha_modificacion) = DATE('now', 'localtime')
-          AND decision_admin IS NOT NULL
+          AND dia = {SQL_HOY}
     """)
     stats['aprobados_hoy'] = cursor.fetchone()[0]
 
     # Casos rechazados hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) FROM rollup_decisiones_dia
         WHERE estado_comite = 'rejected'
-          AND DATE(fecha_modificacion) = DATE('now', 'localtime')
-          AND decision_admin IS NOT NULL
+          AND dia = {SQL_HOY}
     """)
     stats['rechazados_hoy'] = cursor.fetchone()[0]
 
     # Total decisiones del mes
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) FROM rollup_decisiones_dia
         WHERE estado_comite IN ('approved', 'rejected')
-          AND decision_admin IS NOT NULL
-          AND strftime('%Y-%m', fecha_modificacion) = strftime('%Y-%m', 'now')
+          AND {SQL_DIAS_MES_ACTUAL}
     """)
     stats['decisiones_mes'] = cursor.fetchone()[0]
 
@@ -556,10 +568,10 @@ def obtener_estadisticas_comite():
 
     # Casos más antiguos pendientes
     cursor.execute("""
-        SELECT nombre_cliente, fecha_creacion, asesor
+        SELECT nombre_cliente, creado_dia, asesor
         FROM evaluaciones
         WHERE estado_comite = 'pending'
-        ORDER BY fecha_creacion ASC
+        ORDER BY creado_epoch ASC
         LIMIT 5
     """)
     stats['casos_antiguos'] = [
@@ -624,33 +636,33 @@ def obtener_estadisticas_auditor(username=None):
 
     # Total evaluaciones
     if usar_filtro:
-        cursor.execute(f"SELECT COUNT(*) FROM evaluaciones WHERE asesor IN ({ph})", asesores_asignados)
+        cursor.execute(f"SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia WHERE asesor IN ({ph})", asesores_asignados)
     else:
-        cursor.execute("SELECT COUNT(*) FROM evaluaciones")
+        cursor.execute("SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia")
     stats['total_evaluaciones'] = cursor.fetchone()[0]
 
     # Total simulaciones
     if usar_filtro:
-        cursor.execute(f"SELECT COUNT(*) FROM simulaciones WHERE asesor IN ({ph})", asesores_asignados)
+        cursor.execute(f"SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia WHERE asesor IN ({ph})", asesores_asignados)
     else:
-        cursor.execute("SELECT COUNT(*) FROM simulaciones")
+        cursor.execute("SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia")
     stats['total_simulaciones'] = cursor.fetchone()[0]
 
     # Evaluaciones por mes (últimos 6 meses)
     if usar_filtro:
         cursor.execute(f"""
-            SELECT strftime('%Y-%m', fecha_creacion) as mes, COUNT(*) as total
-            FROM evaluaciones
-            WHERE fecha_creacion >= date('now', '-6 months')
+            SELECT substr(dia, 1, 7) as mes, SUM(total) as total
+            FROM rollup_evaluaciones_dia
+            WHERE dia >= {SQL_HACE_6_MESES}
               AND asesor IN ({ph})
             GROUP BY mes
             ORDER BY mes DESC
         """, asesores_asignados)
     else:
-        cursor.execute("""
-            SELECT strftime('%Y-%m', fecha_creacion) as mes, COUNT(*) as total
-            FROM evaluaciones
-            WHERE fecha_creacion >= date('now', '-6 months')
+        cursor.execute(f"""
+            SELECT substr(dia, 1, 7) as mes, SUM(total) as total
+            FROM rollup_evaluaciones_dia
+            WHERE dia >= {SQL_HACE_6_MESES}
             GROUP BY mes
             ORDER BY mes DESC
         """)
@@ -660,18 +672,18 @@ def obtener_estadisticas_auditor(username=None):
     if usar_filtro:
         cursor.execute(f"""
             SELECT
-                SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-                SUM(CASE WHEN estado_comite = 'rejected' THEN 1 ELSE 0 END) as rechazados
-            FROM evaluaciones
+                SUM(CASE WHEN estado_comite = 'approved' THEN total ELSE 0 END) as aprobados,
+                SUM(CASE WHEN estado_comite = 'rejected' THEN total ELSE 0 END) as rechazados
+            FROM rollup_evaluaciones_dia
             WHERE estado_comite IN ('approved', 'rejected')
               AND asesor IN ({ph})
         """, asesores_asignados)
     else:
         cursor.execute("""
             SELECT
-                SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-                SUM(CASE WHEN estado_comite = 'rejected' THEN 1 ELSE 0 END) as rechazados
-            FROM evaluaciones
+                SUM(CASE WHEN estado_comite = 'approved' THEN total ELSE 0 END) as aprobados,
+                SUM(CASE WHEN estado_comite = 'rejected' THEN total ELSE 0 END) as rechazados
+            FROM rollup_evaluaciones_dia
             WHERE estado_comite IN ('approved', 'rejected')
         """)
     row = cursor.fetchone()
@@ -685,20 +697,20 @@ def obtener_estadisticas_auditor(username=None):
     # Distribución por asesor (top 10)
     if usar_filtro:
         cursor.execute(f"""
-            SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, COUNT(*) as total
-            FROM evaluaciones e
-            LEFT JOIN usuarios u ON e.asesor = u.username
-            WHERE e.asesor IN ({ph})
-            GROUP BY e.asesor
+            SELECT COALESCE(u.nombre_completo, r.asesor) as nombre, SUM(r.total) as total
+            FROM rollup_evaluaciones_dia r
+            LEFT JOIN usuarios u ON r.asesor = u.username
+            WHERE r.asesor IN ({ph})
+            GROUP BY r.asesor
             ORDER BY total DESC
             LIMIT 10
         """, asesores_asignados)
     else:
         cursor.execute("""
-            SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, COUNT(*) as total
-            FROM evaluaciones e
-            LEFT JOIN usuarios u ON e.asesor = u.username
-            GROUP BY e.asesor
+            SELECT COALESCE(u.nombre_completo, r.asesor) as nombre, SUM(r.total) as total
+            FROM rollup_evaluaciones_dia r
+            LEFT JOIN usuarios u ON r.asesor = u.username
+            GROUP BY r.asesor
             ORDER BY total DESC
             LIMIT 10
         """)
@@ -735,27 +747,15 @@ def obtener_estadisticas_gerente(username=None):
     }
 
     # === OBTENER JERARQUÍA COMPLETA ===
-    if username:
-        stats['jerarquia'] = obtener_jerarquia_gerente(username)
-    
-    # Obtener supervisores asignados
+    # Supervisores asignados y asesores de esos supervisores salen de la
+    # misma jerarquía (sin consultas adicionales)
     supervisores_asignados = []
-    if username:
-        cursor.execute("""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username = ? AND activo = 1
-        """, (username,))
-        supervisores_asignados = [row[0] for row in cursor.fetchall()]
-
-    # Obtener asesores de esos supervisores
     asesores_asignados = []
-    if supervisores_asignados:
-        ph_supervisores = ','.join('?' * len(supervisores_asignados))
-        cursor.execute(f"""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username IN ({ph_supervisores}) AND activo = 1
-        """, supervisores_asignados)
-        asesores_asignados = [row[0] for row in cursor.fetchall()]
+    if username:
+        stats['jerarquia'] = obtener_jerarquia_gerente(username)
+        for sup in stats['jerarquia']['supervisores']:
+            supervisores_asignados.append(sup['username'])
+            asesores_asignados.extend(a['username'] for a in sup['asesores'])
 
     # Si no hay asignaciones, retornar stats vacías
     if not asesores_asignados:
@@ -782,10 +782,10 @@ def obtener_estadisticas_gerente(username=None):
     stats['asesores_en_jerarquia'] = len(asesores_asignados)
 
     # Métricas generales (del equipo jerárquico)
-    cursor.execute(f"SELECT COUNT(*) FROM simulaciones WHERE asesor IN ({ph})", asesores_asignados)
+    cursor.execute(f"SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia WHERE asesor IN ({ph})", asesores_asignados)
     stats['total_simulaciones'] = cursor.fetchone()[0]
 
-    cursor.execute(f"SELECT COUNT(*) FROM evaluaciones WHERE asesor IN ({ph})", asesores_asignados)
+    cursor.execute(f"SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia WHERE asesor IN ({ph})", asesores_asignados)
     stats['total_evaluaciones'] = cursor.fetchone()[0]
 
     cursor.execute(f"SELECT COUNT(*) FROM usuarios WHERE activo = 1 AND username IN ({ph})", asesores_asignados)
@@ -793,16 +793,16 @@ def obtener_estadisticas_gerente(username=None):
 
     # Actividad del mes actual
     cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
+        WHERE {SQL_DIAS_MES_ACTUAL}
           AND asesor IN ({ph})
     """, asesores_asignados)
     stats['evaluaciones_mes'] = cursor.fetchone()[0]
 
     # Comparativa con mes anterior
     cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', date('now', '-1 month'))
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
+        WHERE {SQL_DIAS_MES_ANTERIOR}
           AND asesor IN ({ph})
     """, asesores_asignados)
     stats['evaluaciones_mes_anterior'] = cursor.fetchone()[0]
@@ -819,10 +819,10 @@ def obtener_estadisticas_gerente(username=None):
     # Métricas de conversión comité
     cursor.execute(f"""
         SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-            SUM(CASE WHEN estado_comite = 'pending' THEN 1 ELSE 0 END) as pendientes
-        FROM evaluaciones
+            SUM(total) as total,
+            SUM(CASE WHEN estado_comite = 'approved' THEN total ELSE 0 END) as aprobados,
+            SUM(CASE WHEN estado_comite = 'pending' THEN total ELSE 0 END) as pendientes
+        FROM rollup_evaluaciones_dia
         WHERE asesor IN ({ph})
     """, asesores_asignados)
     row = cursor.fetchone()
@@ -833,7 +833,7 @@ def obtener_estadisticas_gerente(username=None):
     # Actividad por día de la semana (últimas 4 semanas)
     cursor.execute(f"""
         SELECT
-            CASE strftime('%w', fecha_creacion)
+            CASE strftime('%w', dia)
                 WHEN '0' THEN 'Dom'
                 WHEN '1' THEN 'Lun'
                 WHEN '2' THEN 'Mar'
@@ -842,12 +842,12 @@ def obtener_estadisticas_gerente(username=None):
                 WHEN '5' THEN 'Vie'
                 WHEN '6' THEN 'Sáb'
             END as dia,
-            COUNT(*) as total
-        FROM evaluaciones
-        WHERE fecha_creacion >= date('now', '-28 days')
+            SUM(total) as total
+        FROM rollup_evaluaciones_dia
+        WHERE dia >= {SQL_HACE_28_DIAS}
           AND asesor IN ({ph})
-        GROUP BY strftime('%w', fecha_creacion)
-        ORDER BY strftime('%w', fecha_creacion)
+        GROUP BY strftime('%w', dia)
+        ORDER BY strftime('%w', dia)
     """, asesores_asignados)
     stats['actividad_semanal'] = [{'dia': row[0], 'total': row[1]} for row in cursor.fetchall()]
 
@@ -876,10 +876,10 @@ def obtener_estadisticas_admin():
     cursor.execute("SELECT COUNT(*) FROM usuarios WHERE activo = 1")
     stats['total_usuarios'] = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM simulaciones")
+    cursor.execute("SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia")
     stats['total_simulaciones'] = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM evaluaciones")
+    cursor.execute("SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia")
     stats['total_evaluaciones'] = cursor.fetchone()[0]
 
     cursor.execute("SELECT COUNT(*) FROM lineas_credito WHERE activo = 1")
@@ -894,29 +894,29 @@ def obtener_estadisticas_admin():
     stats['usuarios_por_rol'] = {row[0]: row[1] for row in cursor.fetchall()}
 
     # Actividad hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) = DATE('now', 'localtime')
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) FROM rollup_simulaciones_dia
+        WHERE dia = {SQL_HOY}
     """)
     stats['simulaciones_hoy'] = cursor.fetchone()[0]
 
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia
+        WHERE dia = {SQL_HOY}
     """)
     stats['evaluaciones_hoy'] = cursor.fetchone()[0]
 
     # Casos de comité
     cursor.execute("""
-        SELECT estado_comite, COUNT(*) FROM evaluaciones
-        WHERE estado_comite IS NOT NULL AND estado_comite != ''
+        SELECT estado_comite, SUM(total) FROM rollup_evaluaciones_dia
+        WHERE estado_comite != ''
         GROUP BY estado_comite
     """)
     stats['casos_comite'] = {row[0]: row[1] for row in cursor.fetchall()}
 
     # Pendientes comité
     cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones WHERE estado_comite = 'pending'
+        SELECT COALESCE(SUM(total), 0) FROM rollup_evaluaciones_dia WHERE estado_comite = 'pending'
     """)
     stats['pendientes_comite'] = cursor.fetchone()[0]
 
@@ -995,10 +995,34 @@ def obtener_estadisticas_por_rol(rol, username=None):
         }
 
 
+# ============================================================================
+# RESUMEN DEL NAVBAR (con caché por usuario)
+# ============================================================================
+
+# Segundos que vale una entrada. Las escrituras de este proceso invalidan
+# de inmediato; el TTL acota lo desactualizado frente a otros workers y al
+# cambio de día.
+NAVBAR_CACHE_TTL_S = 30
+
+# (rol, username) -> (expira, alcance, resumen). alcance es el conjunto de
+# usernames que cuenta el resumen, o None si son todos.
+_navbar_cache = {}
+_navbar_lock = threading.Lock()
+_navbar_metricas = {'hits': 0, 'misses': 0, 'invalidaciones': 0}
+
+# Sube en cada invalidación. El resumen se calcula fuera del lock: si la
+# generación cambió mientras tanto, el resultado puede ser anterior al
+# cambio y no se guarda.
+_navbar_generacion = 0
+
+
 def obtener_resumen_navbar(rol, username=None):
     """
     Obtiene un resumen compacto para mostrar en el navbar.
 
+    Se sirve desde caché mientras no venza NAVBAR_CACHE_TTL_S ni se
+    invalide con invalidar_resumen_navbar().
+
     Args:
         rol (str): Rol del usuario
         username (str): Username
@@ -1006,11 +1030,77 @@ def obtener_resumen_navbar(rol, username=None):
     Returns:
         dict: Resumen compacto con lista 'items'
     """
+    clave = (rol, username)
+    ahora = time.monotonic()
+    with _navbar_lock:
+        entrada = _navbar_cache.get(clave)
+        if entrada is not None and entrada[0] > ahora:
+            _navbar_metricas['hits'] += 1
+            return entrada[2]
+        _navbar_metricas['misses'] += 1
+        generacion = _navbar_generacion
+
+    resumen, alcance = _calcular_resumen_navbar(rol, username)
+    if alcance is not False:
+        with _navbar_lock:
+            if generacion == _navbar_generacion:
+                _navbar_cache[clave] = (ahora + NAVBAR_CACHE_TTL_S, alcance, resumen)
+    return resumen
+
+
+def invalidar_resumen_navbar(username=None):
+    """
+    Descarta los resúmenes cacheados afectados por un cambio.
+
+    Llamar después del commit de una escritura que cambie los contadores:
+    evaluación nueva o actualizada, decisión del comité, caso visto por el
+    asesor o cambio de asignaciones.
+
+    Args:
+        username (str): Asesor (o manager) tocado por el cambio. Se
+            invalidan su propio resumen, los de roles globales y los de
+            managers cuyo equipo lo incluye. None invalida todo.
+    """
+    global _navbar_generacion
+    with _navbar_lock:
+        _navbar_generacion += 1
+        if username is None:
+            claves = list(_navbar_cache)
+        else:
+            claves = [
+                clave for clave, (_, alcance, _) in _navbar_cache.items()
+                if alcance is None or username in alcance or clave[1] == username
+            ]
+        for clave in claves:
+            del _navbar_cache[clave]
+        _navbar_metricas['invalidaciones'] += len(claves)
+
+
+def obtener_metricas_cache_navbar():
+    """
+    Returns:
+        dict: hits, misses, invalidaciones y entradas actuales del caché
+    """
+    with _navbar_lock:
+        metricas = dict(_navbar_metricas)
+        metricas['entradas'] = len(_navbar_cache)
+    return metricas
+
+
+def _calcular_resumen_navbar(rol, username=None):
+    """
+    Calcula el resumen del navbar contra la base.
+
+    Returns:
+        tuple: (resumen, alcance). alcance es el conjunto de usernames que
+        cuenta el resumen (None = todos, False = error, no cachear).
+    """
     try:
         conn = conectar_db()
         cursor = conn.cursor()
 
         resumen = {'items': []}
+        alcance = None
 
         if rol in ['admin', 'admin_tecnico']:
             # Pendientes de comité
@@ -1028,9 +1118,9 @@ def obtener_resumen_navbar(rol, username=None):
                 })
 
             # Evaluaciones hoy
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM evaluaciones
-                WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+                WHERE creado_dia = {SQL_HOY}
             """)
             evals_hoy = cursor.fetchone()[0]
             resumen['items'].append({
@@ -1049,13 +1139,14 @@ def obtener_resumen_navbar(rol, username=None):
                     WHERE manager_username = ? AND activo = 1
                 """, (username,))
                 asesores = [r[0] for r in cursor.fetchall()]
+            alcance = {username, *asesores}
 
             if asesores:
                 ph = ','.join('?' * len(asesores))
                 # Asesores que han trabajado hoy (del equipo)
                 cursor.execute(f"""
                     SELECT COUNT(DISTINCT asesor) FROM evaluaciones
-                    WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+                    WHERE creado_dia = {SQL_HOY}
                       AND asesor IN ({ph})
                 """, asesores)
                 activos = cursor.fetchone()[0]
@@ -1063,7 +1154,7 @@ def obtener_resumen_navbar(rol, username=None):
                 # Evaluaciones equipo hoy
                 cursor.execute(f"""
                     SELECT COUNT(*) FROM evaluaciones
-                    WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
+                    WHERE creado_dia = {SQL_HOY}
                       AND asesor IN ({ph})
                 """, asesores)
                 evals = cursor.fetchone()[0]
@@ -1103,6 +1194,7 @@ def obtener_resumen_navbar(rol, username=None):
                         WHERE manager_username IN ({ph_sup}) AND activo = 1
                     """, supervisores)
                     asesores = [r[0] for r in cursor.fetchall()]
+            alcance = {username, *supervisores, *asesores}
 
             # Mostrar cantidad de supervisores
             resumen['items'].append({
@@ -1117,7 +1209,7 @@ def obtener_resumen_navbar(rol, username=None):
                 # Evaluaciones del mes
                 cursor.execute(f"""
                     SELECT COUNT(*) FROM evaluaciones
-                    WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
+                    WHERE creado_mes = {SQL_MES_ACTUAL}
                       AND asesor IN ({ph})
                 """, asesores)
                 evals_mes = cursor.fetchone()[0]
@@ -1145,9 +1237,9 @@ def obtener_resumen_navbar(rol, username=None):
 
         elif rol == 'auditor':
             # Total evaluaciones mes
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM evaluaciones
-                WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
+                WHERE creado_mes = {SQL_MES_ACTUAL}
             """)
             mes = cursor.fetchone()[0]
             resumen['items'].append({
@@ -1159,11 +1251,12 @@ def obtener_resumen_navbar(rol, username=None):
 
         else:
             # Asesor
+            alcance = {username}
             if username:
                 # Mis evaluaciones hoy
-                cursor.execute("""
+                cursor.execute(f"""
                     SELECT COUNT(*) FROM evaluaciones
-                    WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
+                    WHERE asesor = ? AND creado_dia = {SQL_HOY}
                 """, (username,))
                 evals_hoy = cursor.fetchone()[0]
                 resumen['items'].append({
@@ -1190,8 +1283,8 @@ def obtener_resumen_navbar(rol, username=None):
                     })
 
         conn.close()
-        return resumen
+        return resumen, alcance
 
     except Exception as e:
         print(f"❌ Error en obtener_resumen_navbar: {e}")
-        return {'items': []}
+        return {'items': []}, False
@@ -17,6 +17,8 @@ Version: 1.0
 import json
 from datetime import datetime
 from database import conectar_db
+from db_helpers_cambios import notificar_cambios
+from db_helpers import EvaluacionRegistro, JSON_EVALUACION_LISTADOS
 
 
 # ============================================================================
@@ -110,6 +112,7 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
         ))
         
         conn.commit()
+        notificar_cambios()
         
         return {
             'success': True, 
@@ -218,6 +221,7 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
         ))
         
         conn.commit()
+        notificar_cambios()
         
         return {
             'success': True, 
@@ -304,6 +308,7 @@ def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
         ))
         
         conn.commit()
+        notificar_cambios()
         
         return {
             'success': True, 
@@ -383,16 +388,16 @@ def obtener_casos_por_estado_final(estado_final, filtros=None):
             'cedula': row[3],
             'tipo_credito': row[4],
             'monto_solicitado': row[5],
-            'resultado': json.loads(row[6]) if row[6] else {},
+            'resultado': row[6],
             'estado_comite': row[7],
-            'decision_admin': json.loads(row[8]) if row[8] else None,
+            'decision_admin': row[8],
             'estado_final': row[9],
             'fecha_desembolso': row[10],
             'fecha_desistimiento': row[11],
             'motivo_desistimiento': row[12],
             'registrado_por': row[13]
         }
-        casos.append(caso)
+        casos.append(EvaluacionRegistro(caso, JSON_EVALUACION_LISTADOS))
     
     conn.close()
     return casos
@@ -410,13 +415,13 @@ def obtener_estadisticas_estados():
     
     estadisticas = {}
     
-    # Total por estado final
+    # Total por estado final (desde el rollup diario, ver db_helpers_rollups)
     cursor.execute("""
         SELECT 
-            COALESCE(estado_final, 'sin_estado') as estado,
-            COUNT(*) as total,
-            SUM(monto_solicitado) as monto_total
-        FROM evaluaciones
+            CASE WHEN estado_final = '' THEN 'sin_estado' ELSE estado_final END as estado,
+            SUM(total) as total,
+            SUM(monto_total) as monto_total
+        FROM rollup_evaluaciones_dia
         WHERE estado_comite = 'approved'
         GROUP BY estado_final
     """)
@@ -429,10 +434,10 @@ def obtener_estadisticas_estados():
     
     # Pendientes de desembolso (aprobados sin estado final)
     cursor.execute("""
-        SELECT COUNT(*), SUM(monto_solicitado)
-        FROM evaluaciones
+        SELECT SUM(total), SUM(monto_total)
+        FROM rollup_evaluaciones_dia
         WHERE estado_comite = 'approved' 
-        AND (estado_final IS NULL OR estado_final = 'pendiente_desembolso')
+        AND estado_final IN ('', 'pendiente_desembolso')
     """)
     
     row = cursor.fetchone()
@@ -443,8 +448,8 @@ def obtener_estadisticas_estados():
     
     # Total desembolsados
     cursor.execute("""
-        SELECT COUNT(*), SUM(monto_solicitado)
-        FROM evaluaciones
+        SELECT SUM(total), SUM(monto_total)
+        FROM rollup_evaluaciones_dia
         WHERE estado_final = 'desembolsado'
     """)
     
@@ -456,8 +461,8 @@ def obtener_estadisticas_estados():
     
     # Total desistidos
     cursor.execute("""
-        SELECT COUNT(*), SUM(monto_solicitado)
-        FROM evaluaciones
+        SELECT SUM(total), SUM(monto_total)
+        FROM rollup_evaluaciones_dia
         WHERE estado_final = 'desistido'
     """)
     
@@ -0,0 +1,303 @@
+"""
+DB_HELPERS_LOGIN.PY - Limitador de intentos de login
+====================================================
+
+Reemplaza login_attempts.json: los intentos fallidos por IP viven en
+memoria (una lista ordenada de instantes por IP, protegida con un lock) y
+se persisten en la tabla `intentos_login` para que todos los workers
+compartan el mismo conteo.
+
+- Registrar un fallo agrega el instante en memoria e inserta una fila.
+- Consultar el estado de una IP lee la tabla como mucho una vez cada
+  INTERVALO_SINCRONIZACION_S por IP; entre lecturas responde desde memoria.
+- Los intentos vencidos se borran cada INTERVALO_LIMPIEZA_S, no en cada
+  lectura.
+
+Con persistir=False el limitador funciona solo en memoria (tests, scripts).
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from database import conectar_db
+
+
+# Cada cuántos segundos se relee de la tabla el conteo de una IP
+INTERVALO_SINCRONIZACION_S = 2.0
+
+# Cada cuántos segundos se borran de la tabla los intentos vencidos
+INTERVALO_LIMPIEZA_S = 300
+
+SQL_INTENTOS_LOGIN = """
+CREATE TABLE IF NOT EXISTS intentos_login (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ip TEXT NOT NULL,
+    momento REAL NOT NULL  -- epoch en segundos
+)
+"""
+
+
+def _ahora():
+    return time.time()
+
+
+def ensure_intentos_login(archivo_json=None):
+    """
+    Asegura la tabla de intentos de login. Si la tabla está vacía y existe
+    el archivo JSON antiguo ({ip: [iso, ...]}), importa sus intentos.
+    Llamar desde flask_app.py al iniciar.
+
+    Args:
+        archivo_json (str): Ruta de login_attempts.json (opcional)
+
+    Returns:
+        bool: True si quedó lista
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(SQL_INTENTOS_LOGIN)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_intentos_login_ip "
+            "ON intentos_login(ip, momento)"
+        )
+        cursor.execute("SELECT 1 FROM intentos_login LIMIT 1")
+        if archivo_json and os.path.exists(archivo_json) and not cursor.fetchone():
+            try:
+                with open(archivo_json, "r") as f:
+                    anteriores = json.load(f)
+                filas = [
+                    (ip, datetime.fromisoformat(ts).timestamp())
+                    for ip, timestamps in anteriores.items()
+                    for ts in timestamps
+                ]
+            except (ValueError, TypeError, AttributeError, IOError) as e:
+                print(f"⚠️ No se pudo importar {archivo_json}: {e}")
+                filas = []
+            if filas:
+                cursor.executemany(
+                    "INSERT INTO intentos_login (ip, momento) VALUES (?, ?)", filas
+                )
+                print(f"✅ {len(filas)} intentos de login importados desde JSON")
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error creando tabla intentos_login: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+_ultima_limpieza = 0.0
+_limpieza_lock = threading.Lock()
+
+
+class LimitadorLogin:
+    """
+    Limitador de intentos fallidos por IP con ventana deslizante.
+
+    Una IP queda bloqueada cuando acumula `max_intentos` fallos dentro de
+    `ventana`; el bloqueo dura hasta `bloqueo` después del más antiguo de
+    esos fallos.
+
+    Con ventana_fija=True (comportamiento de login_attempts.json) la ventana
+    empieza en el primer fallo y dura `bloqueo`: al terminar se borran todos
+    los intentos de la IP, y el siguiente fallo cuenta desde cero.
+    """
+
+    def __init__(self, max_intentos, ventana, bloqueo, persistir=True, ventana_fija=False):
+        """
+        Args:
+            max_intentos (int): Fallos que disparan el bloqueo
+            ventana (timedelta): Ventana en la que se cuentan los fallos
+            bloqueo (timedelta): Duración del bloqueo
+            persistir (bool): Compartir los intentos vía SQLite
+            ventana_fija (bool): Contar desde el primer fallo y limpiar todo
+                al expirar (ignora `ventana`)
+        """
+        self.max_intentos = max_intentos
+        self.ventana_fija = ventana_fija
+        self.bloqueo_s = bloqueo.total_seconds()
+        self.ventana_s = self.bloqueo_s if ventana_fija else ventana.total_seconds()
+        # En ventana fija se retiene el doble: si el primer fallo ya salió de
+        # la retención, el resto de su ventana también expiró y se detecta
+        self.retencion_s = (
+            2 * self.bloqueo_s if ventana_fija else max(self.ventana_s, self.bloqueo_s)
+        )
+        self.persistir = persistir
+        self._intentos = {}  # ip -> [epoch, ...] ordenados
+        self._sincronizado = {}  # ip -> time.monotonic() de la última lectura
+        self._lock = threading.Lock()
+
+    def _vigentes(self, ip, ahora):
+        """Intentos de la IP dentro de la retención (lee la tabla si toca)."""
+        desde = ahora - self.retencion_s
+        if self.persistir:
+            reloj = time.monotonic()
+            if reloj - self._sincronizado.get(ip, float("-inf")) >= INTERVALO_SINCRONIZACION_S:
+                try:
+                    conn = conectar_db()
+                    try:
+                        filas = conn.execute(
+                            "SELECT momento FROM intentos_login "
+                            "WHERE ip = ? AND momento >= ? ORDER BY momento",
+                            (ip, desde),
+                        ).fetchall()
+                    finally:
+                        conn.close()
+                    self._intentos[ip] = [f[0] for f in filas]
+                    self._sincronizado[ip] = reloj
+                except Exception as e:
+                    print(f"⚠️ No se pudieron leer intentos de login: {e}")
+
+        intentos = [t for t in self._intentos.get(ip, ()) if t >= desde]
+        if intentos:
+            self._intentos[ip] = intentos
+        else:
+            self._intentos.pop(ip, None)
+        return intentos
+
+    def estado(self, ip):
+        """
+        Estado de una IP.
+
+        Returns:
+            dict: {'bloqueado': bool, 'restantes': int, 'intentos': int,
+                   'bloqueado_hasta': float | None (epoch),
+                   'segundos_bloqueo': int (0 si no está bloqueada)}
+        """
+        ahora = _ahora()
+        with self._lock:
+            vigentes = self._vigentes(ip, ahora)
+        if self._ventana_expirada(vigentes, ahora):
+            self.limpiar(ip)
+            vigentes = []
+        recientes = [t for t in vigentes if ahora - t < self.ventana_s]
+
+        if len(recientes) >= self.max_intentos:
+            hasta = recientes[0] + self.bloqueo_s
+            if ahora < hasta:
+                return {
+                    "bloqueado": True,
+                    "restantes": 0,
+                    "bloqueado_hasta": hasta,
+                    "segundos_bloqueo": int(hasta - ahora),
+                    "intentos": len(recientes),
+                }
+        return {
+            "bloqueado": False,
+            "restantes": max(self.max_intentos - len(recientes), 0),
+            "bloqueado_hasta": None,
+            "segundos_bloqueo": 0,
+            "intentos": len(recientes),
+        }
+
+    def registrar_fallo(self, ip):
+        """
+        Registra un intento fallido.
+
+        Returns:
+            int: Intentos de la IP dentro de la retención
+        """
+        ahora = _ahora()
+        with self._lock:
+            vigentes = self._vigentes(ip, ahora)
+        if self._ventana_expirada(vigentes, ahora):
+            self.limpiar(ip)
+        with self._lock:
+            intentos = self._intentos.get(ip, [])
+            intentos.append(ahora)
+            self._intentos[ip] = intentos
+            total = len(intentos)
+
+        if self.persistir:
+            try:
+                conn = conectar_db()
+                try:
+                    conn.execute(
+                        "INSERT INTO intentos_login (ip, momento) VALUES (?, ?)", (ip, ahora)
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar intento de login: {e}")
+            self._limpiar_si_toca()
+        return total
+
+    def _ventana_expirada(self, intentos, ahora):
+        """En ventana fija: True si ya pasó `bloqueo` desde el primer fallo."""
+        return self.ventana_fija and bool(intentos) and ahora >= intentos[0] + self.bloqueo_s
+
+    def limpiar(self, ip):
+        """Olvida los intentos de una IP (login exitoso)."""
+        with self._lock:
+            self._intentos.pop(ip, None)
+            self._sincronizado.pop(ip, None)
+
+        if self.persistir:
+            try:
+                conn = conectar_db()
+                try:
+                    conn.execute("DELETE FROM intentos_login WHERE ip = ?", (ip,))
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"⚠️ No se pudieron limpiar intentos de login: {e}")
+
+    def limpiar_expirados(self):
+        """
+        Borra de memoria y de la tabla los intentos fuera de la retención.
+
+        Returns:
+            int: IPs que quedaron sin intentos en memoria
+        """
+        limite = _ahora() - self.retencion_s
+        with self._lock:
+            antes = len(self._intentos)
+            for ip in list(self._intentos):
+                vigentes = [t for t in self._intentos[ip] if t >= limite]
+                if vigentes:
+                    self._intentos[ip] = vigentes
+                else:
+                    del self._intentos[ip]
+                    self._sincronizado.pop(ip, None)
+            eliminadas = antes - len(self._intentos)
+
+        if self.persistir:
+            try:
+                conn = conectar_db()
+                try:
+                    conn.execute("DELETE FROM intentos_login WHERE momento < ?", (limite,))
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"⚠️ No se pudieron borrar intentos vencidos: {e}")
+        return eliminadas
+
+    def _limpiar_si_toca(self):
+        global _ultima_limpieza
+        reloj = time.monotonic()
+        with _limpieza_lock:
+            if reloj - _ultima_limpieza < INTERVALO_LIMPIEZA_S:
+                return
+            _ultima_limpieza = reloj
+        self.limpiar_expirados()
+
+    def resumen(self):
+        """Returns: dict {ip: [iso, ...]} con los intentos en memoria."""
+        with self._lock:
+            return {
+                ip: [datetime.fromtimestamp(t).isoformat() for t in intentos]
+                for ip, intentos in self._intentos.items()
+            }
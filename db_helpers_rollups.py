@@ -0,0 +1,313 @@
+"""
+DB_HELPERS_ROLLUPS.PY - Agregados diarios para dashboards y reportes
+====================================================================
+
+Tablas de resumen por día que se mantienen con triggers en la MISMA
+transacción que cada escritura sobre evaluaciones y simulaciones
+(evaluación nueva, decisión del comité, desembolso/desistimiento,
+simulación). Los dashboards leen de aquí en O(días × asesores) en lugar de
+contar filas crudas en cada visita.
+
+- rollup_evaluaciones_dia: (día, asesor, línea, estado_comite, estado_final)
+  -> total, monto_total (monto_solicitado)
+- rollup_simulaciones_dia: (día, asesor, línea) -> total, monto_total
+- rollup_decisiones_dia: (día de la decisión, asesor, estado_comite) -> total
+
+El día es el bucket en hora Colombia de db_helpers.ensure_columnas_fecha,
+que debe ejecutarse antes de ensure_rollups().
+
+Los NULL de las dimensiones se guardan como '' para que la clave primaria
+sea única. Una evaluación o simulación sin día calculable queda con dia = ''
+y cuenta en los totales, pero en ningún rango de fechas.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+from database import asegurar_triggers, conectar_db
+
+
+# ============================================================================
+# DEFINICIÓN DE LOS ROLLUPS
+# ============================================================================
+
+# nombre -> definición. En las expresiones, {f} es la fila de origen
+# (NEW, OLD o el alias de la tabla al reconstruir).
+ROLLUPS = {
+    "rollup_evaluaciones_dia": {
+        "tabla": "evaluaciones",
+        "claves": {
+            "dia": "COALESCE({f}.creado_dia, '')",
+            "asesor": "{f}.asesor",
+            "linea_credito": "COALESCE({f}.linea_credito, '')",
+            "estado_comite": "COALESCE({f}.estado_comite, '')",
+            "estado_final": "COALESCE({f}.estado_final, '')",
+        },
+        "medidas": {
+            "total": "1",
+            "monto_total": "COALESCE({f}.monto_solicitado, 0)",
+        },
+        "columnas_origen": (
+            "creado_dia, asesor, linea_credito, estado_comite, "
+            "estado_final, monto_solicitado"
+        ),
+    },
+    "rollup_simulaciones_dia": {
+        "tabla": "simulaciones",
+        "claves": {
+            "dia": "COALESCE({f}.creado_dia, '')",
+            "asesor": "{f}.asesor",
+            "linea_credito": "COALESCE({f}.linea_credito, '')",
+        },
+        "medidas": {
+            "total": "1",
+            "monto_total": "COALESCE({f}.monto, 0)",
+        },
+        "columnas_origen": "creado_dia, asesor, linea_credito, monto",
+    },
+    "rollup_decisiones_dia": {
+        "tabla": "evaluaciones",
+        "claves": {
+            "dia": "{f}.decision_dia",
+            "asesor": "{f}.asesor",
+            "estado_comite": "COALESCE({f}.estado_comite, '')",
+        },
+        "medidas": {
+            "total": "1",
+        },
+        "condicion": "{f}.decision_dia IS NOT NULL",
+        "columnas_origen": "decision_dia, asesor, estado_comite",
+    },
+}
+
+# Índices secundarios (la PK empieza por día)
+INDICES_ROLLUPS = (
+    "CREATE INDEX IF NOT EXISTS idx_rollup_evaluaciones_asesor "
+    "ON rollup_evaluaciones_dia(asesor, dia)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_evaluaciones_estado "
+    "ON rollup_evaluaciones_dia(estado_comite, estado_final)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_simulaciones_asesor "
+    "ON rollup_simulaciones_dia(asesor, dia)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_decisiones_estado "
+    "ON rollup_decisiones_dia(estado_comite, dia)",
+)
+
+
+def _expr(plantilla, fila):
+    return plantilla.replace("{f}", fila)
+
+
+def _sql_crear_tabla(nombre, definicion):
+    claves = ",\n    ".join(
+        f"{col} TEXT NOT NULL DEFAULT ''" for col in definicion["claves"]
+    )
+    medidas = ",\n    ".join(
+        f"{col} INTEGER NOT NULL DEFAULT 0" for col in definicion["medidas"]
+    )
+    pk = ", ".join(definicion["claves"])
+    return f"""
+CREATE TABLE IF NOT EXISTS {nombre} (
+    {claves},
+    {medidas},
+    PRIMARY KEY ({pk})
+) WITHOUT ROWID
+"""
+
+
+def _sql_delta(nombre, definicion, fila, signo):
+    """INSERT ... ON CONFLICT que suma (signo '+') o resta ('-') una fila."""
+    claves = list(definicion["claves"])
+    medidas = list(definicion["medidas"])
+    valores = [_expr(e, fila) for e in definicion["claves"].values()]
+    valores += [
+        f"{signo}({_expr(e, fila)})" for e in definicion["medidas"].values()
+    ]
+    acumular = ", ".join(f"{m} = {m} + excluded.{m}" for m in medidas)
+    sql = (
+        f"INSERT INTO {nombre} ({', '.join(claves + medidas)}) "
+        f"SELECT {', '.join(valores)} "
+        f"WHERE {_expr(definicion.get('condicion', '1'), fila)} "
+        f"ON CONFLICT ({', '.join(claves)}) DO UPDATE SET {acumular};"
+    )
+    if signo == "-":
+        # Las combinaciones que quedan en cero se eliminan
+        filtro = " AND ".join(
+            f"{col} = {_expr(e, fila)}" for col, e in definicion["claves"].items()
+        )
+        sql += f"\n                DELETE FROM {nombre} WHERE {filtro} AND total = 0;"
+    return sql
+
+
+def _sql_triggers(nombre, definicion):
+    """Triggers del rollup: {nombre_trigger: CREATE TRIGGER ...}."""
+    tabla = definicion["tabla"]
+    sumar = _sql_delta(nombre, definicion, "NEW", "+")
+    restar = _sql_delta(nombre, definicion, "OLD", "-")
+    return {
+        f"trg_{nombre}_insert": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{nombre}_insert
+            AFTER INSERT ON {tabla}
+            BEGIN
+                {sumar}
+            END
+        """,
+        f"trg_{nombre}_delete": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{nombre}_delete
+            AFTER DELETE ON {tabla}
+            BEGIN
+                {restar}
+            END
+        """,
+        f"trg_{nombre}_update": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{nombre}_update
+            AFTER UPDATE OF {definicion['columnas_origen']} ON {tabla}
+            BEGIN
+                {restar}
+                {sumar}
+            END
+        """,
+    }
+
+
+def _sql_agregado_crudo(definicion):
+    """SELECT que calcula el rollup desde la tabla cruda."""
+    claves = [_expr(e, "t") for e in definicion["claves"].values()]
+    medidas = [f"SUM({_expr(e, 't')})" for e in definicion["medidas"].values()]
+    return (
+        f"SELECT {', '.join(claves + medidas)} "
+        f"FROM {definicion['tabla']} t "
+        f"WHERE {_expr(definicion.get('condicion', '1'), 't')} "
+        f"GROUP BY {', '.join(claves)}"
+    )
+
+
+# ============================================================================
+# CREACIÓN, RECONSTRUCCIÓN Y VERIFICACIÓN
+# ============================================================================
+
+def _reconstruir(cursor):
+    filas = {}
+    for nombre, definicion in ROLLUPS.items():
+        columnas = list(definicion["claves"]) + list(definicion["medidas"])
+        cursor.execute(f"DELETE FROM {nombre}")
+        cursor.execute(
+            f"INSERT INTO {nombre} ({', '.join(columnas)}) "
+            f"{_sql_agregado_crudo(definicion)}"
+        )
+        filas[nombre] = cursor.rowcount
+    return filas
+
+
+def ensure_rollups():
+    """
+    Asegura las tablas de rollup, sus triggers e índices.
+
+    Llamar desde flask_app.py al iniciar, después de
+    ensure_columnas_fecha(). Si alguna tabla de rollup se acaba de crear o
+    la definición de algún trigger cambió (se recrea), se reconstruyen
+    todas desde las tablas crudas.
+
+    Returns:
+        bool: True si quedaron listas
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        # estado_final lo usa db_helpers_estados; bases antiguas pueden no tenerla
+        cursor.execute("PRAGMA table_info(evaluaciones)")
+        if "estado_final" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE evaluaciones ADD COLUMN estado_final TEXT")
+
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'rollup_%'"
+        )
+        existentes = {row[0] for row in cursor.fetchall()}
+        reconstruir = not set(ROLLUPS) <= existentes
+
+        for nombre, definicion in ROLLUPS.items():
+            cursor.execute(_sql_crear_tabla(nombre, definicion))
+            # Un trigger con la definición anterior calculó los rollups con
+            # otra regla: se reconstruyen
+            if asegurar_triggers(cursor, _sql_triggers(nombre, definicion)):
+                reconstruir = True
+
+        for sentencia in INDICES_ROLLUPS:
+            cursor.execute(sentencia)
+
+        if reconstruir:
+            filas = _reconstruir(cursor)
+            print(f"✅ Rollups diarios construidos: {filas}")
+
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error creando rollups diarios: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def reconstruir_rollups():
+    """
+    Recalcula todos los rollups desde las tablas crudas en una sola
+    transacción (backfill o reparación tras una inconsistencia).
+
+    Returns:
+        dict: Filas generadas por rollup, o None si hubo error
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        filas = _reconstruir(cursor)
+        conn.commit()
+        return filas
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error reconstruyendo rollups: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def verificar_rollups():
+    """
+    Compara cada rollup contra el agregado calculado desde las tablas crudas.
+
+    Returns:
+        dict: {
+            'consistente': bool,
+            'rollups': {nombre: {'solo_en_crudo': int, 'solo_en_rollup': int}}
+        }
+        'solo_en_crudo' cuenta combinaciones cuyo agregado real no coincide
+        con el rollup; 'solo_en_rollup' las filas del rollup que sobran o
+        tienen otro valor.
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        resultado = {"consistente": True, "rollups": {}}
+        for nombre, definicion in ROLLUPS.items():
+            columnas = ", ".join(
+                list(definicion["claves"]) + list(definicion["medidas"])
+            )
+            crudo = _sql_agregado_crudo(definicion)
+            guardado = f"SELECT {columnas} FROM {nombre}"
+
+            cursor.execute(f"SELECT COUNT(*) FROM ({crudo} EXCEPT {guardado})")
+            solo_crudo = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM ({guardado} EXCEPT {crudo})")
+            solo_rollup = cursor.fetchone()[0]
+
+            resultado["rollups"][nombre] = {
+                "solo_en_crudo": solo_crudo,
+                "solo_en_rollup": solo_rollup,
+            }
+            if solo_crudo or solo_rollup:
+                resultado["consistente"] = False
+        return resultado
+    finally:
+        conn.close()
@@ -0,0 +1,370 @@
+"""
+DB_HELPERS_SCORING_BACKTEST.PY - Backtest de una configuración de scoring
+=========================================================================
+
+Antes de guardar cambios de criterios, niveles o factores de rechazo, el
+borrador se aplica a las evaluaciones ya registradas. Cada evaluación
+guardada en `evaluaciones.valores_criterios` se evalúa con el modelo
+vigente de su línea y con el borrador, ambos sobre los mismos valores.
+Por línea se reporta:
+
+- tasa de aprobación vigente vs borrador
+- distribución por nivel de riesgo
+- rechazos automáticos (y qué factor del borrador los produce)
+- los casos que cambian de decisión (aprobado <-> no aprobado)
+
+El historial se lee por bloques (fetchmany) y cada bloque se evalúa en lote
+(db_helpers_scoring_lote). Cuando el historial supera
+UMBRAL_PROCESOS_BACKTEST filas, los bloques se reparten en un pool de hasta
+MAX_PROCESOS_BACKTEST procesos. Los workers se crean con "spawn" (no con
+fork del worker de Flask, que arrastraría sus hilos, locks y conexiones
+SQLite) y cada uno compila los modelos una sola vez al iniciar.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from database import conectar_db
+from db_helpers_scoring_modelo import compilar_modelo_scoring, obtener_modelo_scoring
+from db_helpers_scoring_lote import evaluar_lote, filas_a_columnas, vectorizar_modelo
+
+
+# Filas leídas y evaluadas por bloque
+BLOQUE_BACKTEST = 5000
+
+# Desde cuántas evaluaciones se usa un pool de procesos
+UMBRAL_PROCESOS_BACKTEST = 50000
+
+# Máximo de procesos por backtest (cada request HTTP crea su propio pool)
+MAX_PROCESOS_BACKTEST = 4
+
+# Casos que cambian de decisión devueltos por línea (los conteos son totales)
+MAX_CASOS_BACKTEST = 500
+
+# Línea de la evaluación: linea_credito si existe, si no tipo_credito
+SQL_LINEA_EVALUACION = "COALESCE(NULLIF(linea_credito, ''), tipo_credito)"
+
+# Claves de config_general (formato de la API por línea) -> clave del modelo
+_CLAVES_CONFIG_GENERAL = {
+    "puntaje_minimo_aprobacion": "puntaje_minimo_aprobacion",
+    "umbral_mora_telcos": "umbral_mora_telcos_rechazo",
+    "umbral_mora_telcos_rechazo": "umbral_mora_telcos_rechazo",
+    "escala_max": "escala_max",
+}
+
+
+def aplicar_borrador_scoring(config, borrador):
+    """
+    Aplica un borrador sobre una configuración de scoring, con la misma
+    semántica que los guardados por línea: `criterios`, `niveles_riesgo` y
+    `factores_rechazo` reemplazan la sección completa; `config_general`
+    solo cambia las claves que trae.
+
+    Args:
+        config (dict): Configuración vigente (global o de línea)
+        borrador (dict): Secciones a reemplazar
+
+    Returns:
+        dict: Configuración nueva (no modifica `config`)
+    """
+    nueva = dict(config or {})
+    borrador = borrador or {}
+
+    if "criterios" in borrador:
+        criterios = borrador["criterios"] or []
+        if isinstance(criterios, list):
+            criterios = [c for c in criterios if c.get("activo", True)]
+        nueva["criterios"] = criterios
+
+    if "niveles_riesgo" in borrador:
+        # Mismo orden que obtener_config_scoring_linea: orden, score_min DESC
+        niveles = [
+            (n.get("orden", i), -float(n.get("min", 0) or 0), i, n)
+            for i, n in enumerate(borrador["niveles_riesgo"] or [])
+            if n.get("activo", True)
+        ]
+        nueva["niveles_riesgo"] = [n for *_, n in sorted(niveles, key=lambda t: t[:3])]
+
+    factores = borrador.get("factores_rechazo", borrador.get("factores_rechazo_automatico"))
+    if factores is not None:
+        nueva["factores_rechazo_automatico"] = [f for f in factores if f.get("activo", True)]
+
+    generales = dict(borrador.get("config_general") or {})
+    generales.update({k: v for k, v in borrador.items() if k in _CLAVES_CONFIG_GENERAL})
+    for clave, valor in generales.items():
+        if clave in _CLAVES_CONFIG_GENERAL and valor is not None:
+            nueva[_CLAVES_CONFIG_GENERAL[clave]] = valor
+
+    return nueva
+
+
+# ============================================================================
+# EVALUACIÓN DE BLOQUES (en el proceso principal o en un worker)
+# ============================================================================
+
+# linea -> (ModeloVectorizado vigente, ModeloVectorizado borrador)
+_modelos_bloque = {}
+
+
+def _inicializar_modelos(configs):
+    """configs: {linea: (config_vigente, config_borrador)}"""
+    _modelos_bloque.clear()
+    for linea, (vigente, borrador) in configs.items():
+        _modelos_bloque[linea] = (
+            vectorizar_modelo(compilar_modelo_scoring(vigente)),
+            vectorizar_modelo(compilar_modelo_scoring(borrador)),
+        )
+
+
+def _resumen_vacio():
+    return {
+        "total": 0,
+        "aprobados_vigente": 0,
+        "aprobados_borrador": 0,
+        "rechazos_vigente": 0,
+        "rechazos_borrador": 0,
+        "pasan_a_aprobado": 0,
+        "pasan_a_no_aprobado": 0,
+        "cambian_nivel": 0,
+        "niveles_vigente": Counter(),
+        "niveles_borrador": Counter(),
+        "factores_borrador": Counter(),
+        "casos": [],
+    }
+
+
+def _nombre_nivel(modelo, indice):
+    return modelo.niveles[indice].get("nombre") if indice >= 0 else "Sin clasificar"
+
+
+def _evaluar_bloque(filas, max_casos=MAX_CASOS_BACKTEST):
+    """
+    Args:
+        filas (list): [(id, timestamp, linea, valores_criterios_json), ...]
+
+    Returns:
+        tuple: ({linea: resumen parcial}, filas omitidas)
+    """
+    por_linea = {}
+    omitidas = 0
+    for ev_id, timestamp, linea, valores_json in filas:
+        try:
+            valores = json.loads(valores_json)
+        except (ValueError, TypeError):
+            valores = None
+        if not isinstance(valores, dict) or linea not in _modelos_bloque:
+            omitidas += 1
+            continue
+        por_linea.setdefault(linea, []).append((ev_id, timestamp, valores))
+
+    resumenes = {}
+    for linea, evaluaciones in por_linea.items():
+        vigente, borrador = _modelos_bloque[linea]
+        columnas = filas_a_columnas([v for _, _, v in evaluaciones])
+        antes = evaluar_lote(vigente, columnas, registrar=False)
+        despues = evaluar_lote(borrador, columnas, registrar=False)
+        resumen = resumenes[linea] = _resumen_vacio()
+
+        for fila, (ev_id, timestamp, _) in enumerate(evaluaciones):
+            aprobado_antes = bool(antes["aprobado"][fila])
+            aprobado_despues = bool(despues["aprobado"][fila])
+            nivel_antes = _nombre_nivel(vigente.modelo, int(antes["nivel"][fila]))
+            nivel_despues = _nombre_nivel(borrador.modelo, int(despues["nivel"][fila]))
+            rechazo_despues = int(despues["rechazo"][fila])
+
+            resumen["total"] += 1
+            resumen["aprobados_vigente"] += aprobado_antes
+            resumen["aprobados_borrador"] += aprobado_despues
+            resumen["rechazos_vigente"] += int(antes["rechazo"][fila]) >= 0
+            resumen["niveles_vigente"][nivel_antes] += 1
+            resumen["niveles_borrador"][nivel_despues] += 1
+            resumen["cambian_nivel"] += nivel_antes != nivel_despues
+            if rechazo_despues >= 0:
+                resumen["rechazos_borrador"] += 1
+                resumen["factores_borrador"][borrador.factores[rechazo_despues].criterio] += 1
+
+            if aprobado_antes == aprobado_despues:
+                continue
+            resumen["pasan_a_aprobado" if aprobado_despues else "pasan_a_no_aprobado"] += 1
+            if len(resumen["casos"]) < max_casos:
+                resumen["casos"].append({
+                    "id": ev_id,
+                    "timestamp": timestamp,
+                    "aprobado_vigente": aprobado_antes,
+                    "aprobado_borrador": aprobado_despues,
+                    "score_vigente": round(float(antes["score"][fila]), 2),
+                    "score_borrador": round(float(despues["score"][fila]), 2),
+                    "nivel_vigente": nivel_antes,
+                    "nivel_borrador": nivel_despues,
+                    "rechazo_borrador": (
+                        borrador.factores[rechazo_despues].criterio if rechazo_despues >= 0 else None
+                    ),
+                })
+    return resumenes, omitidas
+
+
+def _acumular(total, parcial, max_casos):
+    for clave, valor in parcial.items():
+        if clave == "casos":
+            total["casos"].extend(valor[: max_casos - len(total["casos"])])
+        else:
+            total[clave] += valor
+
+
+def _porcentaje(parte, total):
+    return round(parte / total * 100, 2) if total else 0.0
+
+
+def _formatear_resumen(resumen):
+    total = resumen["total"]
+    cambios = resumen["pasan_a_aprobado"] + resumen["pasan_a_no_aprobado"]
+    return {
+        "total": total,
+        "aprobados_vigente": resumen["aprobados_vigente"],
+        "aprobados_borrador": resumen["aprobados_borrador"],
+        "tasa_aprobacion_vigente": _porcentaje(resumen["aprobados_vigente"], total),
+        "tasa_aprobacion_borrador": _porcentaje(resumen["aprobados_borrador"], total),
+        "rechazos_automaticos_vigente": resumen["rechazos_vigente"],
+        "rechazos_automaticos_borrador": resumen["rechazos_borrador"],
+        "rechazos_por_factor_borrador": dict(resumen["factores_borrador"]),
+        "niveles_vigente": dict(resumen["niveles_vigente"]),
+        "niveles_borrador": dict(resumen["niveles_borrador"]),
+        "cambian_nivel": resumen["cambian_nivel"],
+        "pasan_a_aprobado": resumen["pasan_a_aprobado"],
+        "pasan_a_no_aprobado": resumen["pasan_a_no_aprobado"],
+        "casos_cambiados": resumen["casos"],
+        "casos_truncados": cambios > len(resumen["casos"]),
+    }
+
+
+# ============================================================================
+# BACKTEST
+# ============================================================================
+
+
+def backtest_config_scoring(borrador, linea_credito=None, procesos=None,
+                            tamano_bloque=BLOQUE_BACKTEST, max_casos=MAX_CASOS_BACKTEST):
+    """
+    Reproduce el historial de evaluaciones con un borrador de configuración.
+
+    Args:
+        borrador (dict): Cambios propuestos (ver aplicar_borrador_scoring)
+        linea_credito (str): Solo evaluaciones de esta línea; None = todas,
+            aplicando el borrador sobre la configuración de cada línea
+        procesos (int): Workers del pool; None = automático según el volumen,
+            1 = siempre en este proceso (tope MAX_PROCESOS_BACKTEST)
+        tamano_bloque (int): Filas por bloque
+        max_casos (int): Casos que cambian de decisión devueltos por línea
+
+    Returns:
+        dict: {'linea_credito', 'evaluaciones', 'omitidas', 'procesos',
+               'duracion_ms', 'lineas': {linea: resumen}}
+    """
+    inicio = time.perf_counter()
+    where = "valores_criterios IS NOT NULL AND valores_criterios != ''"
+    params = ()
+    if linea_credito:
+        where += f" AND {SQL_LINEA_EVALUACION} = ?"
+        params = (linea_credito,)
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            f"SELECT DISTINCT {SQL_LINEA_EVALUACION} FROM evaluaciones WHERE {where}", params
+        )
+        lineas = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT COUNT(*) FROM evaluaciones WHERE {where}", params)
+        total_filas = cursor.fetchone()[0]
+
+        configs = {}
+        for linea in lineas:
+            vigente = obtener_modelo_scoring(linea).config
+            configs[linea] = (vigente, aplicar_borrador_scoring(vigente, borrador))
+
+        if procesos is None:
+            procesos = (os.cpu_count() or 1) if total_filas >= UMBRAL_PROCESOS_BACKTEST else 1
+        procesos = max(
+            1, min(procesos, MAX_PROCESOS_BACKTEST, -(-total_filas // tamano_bloque) or 1)
+        )
+
+        cursor.execute(
+            f"""
+            SELECT id, timestamp, {SQL_LINEA_EVALUACION}, valores_criterios
+            FROM evaluaciones
+            WHERE {where}
+            ORDER BY id
+        """,
+            params,
+        )
+
+        def bloques():
+            while True:
+                filas = cursor.fetchmany(tamano_bloque)
+                if not filas:
+                    return
+                yield [tuple(fila) for fila in filas]
+
+        resumenes = {linea: _resumen_vacio() for linea in lineas}
+        omitidas = 0
+
+        def sumar(resultado_bloque):
+            nonlocal omitidas
+            parcial, omitidas_bloque = resultado_bloque
+            omitidas += omitidas_bloque
+            for linea, resumen in parcial.items():
+                _acumular(resumenes[linea], resumen, max_casos)
+
+        if procesos == 1:
+            _inicializar_modelos(configs)
+            for bloque in bloques():
+                sumar(_evaluar_bloque(bloque, max_casos))
+        else:
+            print(f"⏱️ Backtest de {total_filas} evaluaciones en {procesos} procesos")
+            with ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_modelos,
+                initargs=(configs,),
+            ) as pool:
+                # Pocos bloques en vuelo: el historial no se carga entero en memoria
+                pendientes = []
+                for bloque in bloques():
+                    pendientes.append(pool.submit(_evaluar_bloque, bloque, max_casos))
+                    if len(pendientes) >= 2 * procesos:
+                        sumar(pendientes.pop(0).result())
+                for futuro in pendientes:
+                    sumar(futuro.result())
+
+        return {
+            "linea_credito": linea_credito,
+            "evaluaciones": total_filas - omitidas,
+            "omitidas": omitidas,
+            "procesos": procesos,
+            "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "lineas": {
+                linea: _formatear_resumen(resumen)
+                for linea, resumen in resumenes.items()
+                if resumen["total"]
+            },
+        }
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "BLOQUE_BACKTEST",
+    "UMBRAL_PROCESOS_BACKTEST",
+    "MAX_PROCESOS_BACKTEST",
+    "MAX_CASOS_BACKTEST",
+    "aplicar_borrador_scoring",
+    "backtest_config_scoring",
+]
@@ -0,0 +1,317 @@
+"""
+DB_HELPERS_SCORING_CALIBRACION.PY - Calibración de umbrales de scoring
+======================================================================
+
+Curvas para ajustar puntaje_minimo_aprobacion y los límites de los niveles
+de riesgo de una línea a partir de las evaluaciones ya registradas. Se lee
+una vez el score guardado de cada evaluación (columnas derivadas de
+`resultado`, ver db_helpers.ensure_columnas_resultado) y se ordena; cada
+punto de las curvas sale de búsquedas binarias sobre esos arrays:
+
+- umbral: para cada umbral candidato, cuántos casos se aprobarían y cuántos
+  caerían en la franja de comité (COMITE_CREDITO.score_minimo/maximo). La
+  franja se desplaza con el umbral y conserva su distancia actual al
+  puntaje mínimo, igual que en /scoring, con el puntaje sin normalizar.
+- niveles: distribución acumulada del score normalizado (0-100), para
+  mover cualquier límite de nivel y ver cuántos casos quedan de cada lado.
+
+Los casos con rechazo automático por factor (no por puntaje) no cambian con
+el umbral y se reportan aparte.
+
+El resultado se guarda por línea y se reutiliza mientras no cambien las
+evaluaciones ni la configuración. Un trigger incrementa la versión
+'evaluaciones' de versiones_datos en cada alta, baja o cambio de resultado.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+from bisect import bisect_left, bisect_right
+
+from database import conectar_db
+from db_helpers import obtener_snapshot_configuracion, obtener_version_datos
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_backtest import SQL_LINEA_EVALUACION
+
+
+# Clave de versiones_datos que incrementan los triggers de evaluaciones
+CLAVE_VERSION_EVALUACIONES = "evaluaciones"
+
+# Prefijo del rechazo que /scoring registra cuando solo falta puntaje
+PREFIJO_RECHAZO_PUNTAJE = "Puntaje total insuficiente"
+
+# Columnas cuyo cambio invalida la calibración
+COLUMNAS_CALIBRACION = ("resultado", "linea_credito", "tipo_credito")
+
+
+def _sql_triggers():
+    incremento = f"""
+                INSERT INTO versiones_datos (clave, version)
+                VALUES ('{CLAVE_VERSION_EVALUACIONES}', 1)
+                ON CONFLICT(clave) DO UPDATE SET
+                    version = version + 1,
+                    fecha_modificacion = CURRENT_TIMESTAMP;"""
+    columnas = ", ".join(COLUMNAS_CALIBRACION)
+    hubo_cambio = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in COLUMNAS_CALIBRACION)
+    return (
+        f"""
+            CREATE TRIGGER IF NOT EXISTS trg_version_evaluaciones_insert
+            AFTER INSERT ON evaluaciones
+            BEGIN{incremento}
+            END
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS trg_version_evaluaciones_update
+            AFTER UPDATE OF {columnas} ON evaluaciones
+            WHEN {hubo_cambio}
+            BEGIN{incremento}
+            END
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS trg_version_evaluaciones_delete
+            AFTER DELETE ON evaluaciones
+            BEGIN{incremento}
+            END
+        """,
+    )
+
+
+def ensure_version_evaluaciones():
+    """
+    Asegura los triggers que versionan las evaluaciones. Requiere la tabla
+    versiones_datos (db_helpers.ensure_versiones_datos).
+    Llamar desde flask_app.py al iniciar.
+
+    Returns:
+        bool: True si quedaron listos
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        for sentencia in _sql_triggers():
+            cursor.execute(sentencia)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error creando triggers de versión de evaluaciones: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def _porcentaje(parte, total):
+    return round(parte / total * 100, 2) if total else 0.0
+
+
+class CalibracionLinea:
+    """Scores ordenados de una línea y las curvas que salen de ellos."""
+
+    __slots__ = (
+        "linea_credito",
+        "clave",
+        "puntajes",
+        "normalizados",
+        "rechazos_factor",
+        "total",
+        "puntaje_minimo",
+        "comite_min",
+        "comite_max",
+        "niveles",
+        "curvas",
+    )
+
+    def __init__(self, linea_credito, clave, filas, modelo, comite):
+        """
+        Args:
+            filas (list): [(score, score_normalizado, rechazo_automatico), ...]
+            modelo (ModeloScoring): Modelo vigente de la línea
+            comite (dict): COMITE_CREDITO de la configuración
+        """
+        puntajes, normalizados, rechazos_factor = [], [], 0
+        for score, normalizado, rechazo in filas:
+            if rechazo and not str(rechazo).startswith(PREFIJO_RECHAZO_PUNTAJE):
+                rechazos_factor += 1
+                continue
+            puntajes.append(float(score))
+            if normalizado is not None:
+                normalizados.append(float(normalizado))
+
+        self.linea_credito = linea_credito
+        self.clave = clave
+        self.puntajes = sorted(puntajes)
+        self.normalizados = sorted(normalizados)
+        self.rechazos_factor = rechazos_factor
+        self.total = len(puntajes) + rechazos_factor
+        self.puntaje_minimo = float(modelo.puntaje_minimo)
+        self.comite_min = float(comite.get("score_minimo", 15))
+        self.comite_max = float(comite.get("score_maximo", 17))
+        self.niveles = modelo.niveles
+        self.curvas = {
+            "umbral": self._curva_umbral(),
+            "niveles": self._curva_niveles(),
+        }
+
+    # --------------------------------------------------------------
+    # Conteos sobre los arrays ordenados
+    # --------------------------------------------------------------
+
+    @staticmethod
+    def _en_rango(valores, minimo, maximo):
+        """Casos con minimo <= valor <= maximo."""
+        if minimo > maximo:
+            return 0
+        return bisect_right(valores, maximo) - bisect_left(valores, minimo)
+
+    def _franja_comite(self, umbral):
+        desplazamiento = umbral - self.puntaje_minimo
+        return self.comite_min + desplazamiento, self.comite_max + desplazamiento
+
+    def punto_umbral(self, umbral):
+        """
+        Args:
+            umbral (float): puntaje_minimo_aprobacion candidato
+
+        Returns:
+            dict: aprobados, en comité y no aprobados con ese umbral
+        """
+        umbral = float(umbral)
+        franja_min, franja_max = self._franja_comite(umbral)
+        en_comite = self._en_rango(self.puntajes, franja_min, franja_max)
+        aprobados = (
+            len(self.puntajes) - bisect_left(self.puntajes, umbral)
+            - self._en_rango(self.puntajes, max(umbral, franja_min), franja_max)
+        )
+        return {
+            "umbral": umbral,
+            "aprobados": aprobados,
+            "en_comite": en_comite,
+            "no_aprobados": self.total - aprobados - en_comite,
+            "tasa_aprobacion": _porcentaje(aprobados, self.total),
+            "carga_comite": _porcentaje(en_comite, self.total),
+        }
+
+    def casos_nivel(self, minimo, maximo):
+        """Casos con score normalizado dentro de [minimo, maximo]."""
+        return self._en_rango(self.normalizados, float(minimo), float(maximo))
+
+    # --------------------------------------------------------------
+    # Curvas
+    # --------------------------------------------------------------
+
+    def _curva_umbral(self):
+        # Las curvas solo cambian donde un score cruza el umbral o un borde
+        # de la franja: esos son los candidatos
+        distancia_min = self.puntaje_minimo - self.comite_min
+        distancia_max = self.puntaje_minimo - self.comite_max
+        candidatos = sorted(
+            set(self.puntajes)
+            | {p + distancia_min for p in self.puntajes}
+            | {p + distancia_max for p in self.puntajes}
+            | {self.puntaje_minimo}
+        )
+        curva = {"umbral": [], "tasa_aprobacion": [], "carga_comite": []}
+        for umbral in candidatos:
+            punto = self.punto_umbral(umbral)
+            curva["umbral"].append(round(umbral, 4))
+            curva["tasa_aprobacion"].append(punto["tasa_aprobacion"])
+            curva["carga_comite"].append(punto["carga_comite"])
+        return curva
+
+    def _curva_niveles(self):
+        """Casos con score normalizado >= cada valor distinto."""
+        curva = {"score": [], "casos_desde": [], "porcentaje_desde": []}
+        n = len(self.normalizados)
+        for i, valor in enumerate(self.normalizados):
+            if i and valor == self.normalizados[i - 1]:
+                continue
+            curva["score"].append(valor)
+            curva["casos_desde"].append(n - i)
+            curva["porcentaje_desde"].append(_porcentaje(n - i, n))
+        return curva
+
+    def resumen(self, umbral=None):
+        """
+        Args:
+            umbral (float): Umbral a evaluar además del vigente (opcional)
+
+        Returns:
+            dict: Estado actual, curvas y, si se pidió, el punto del umbral
+        """
+        resultado = {
+            "linea_credito": self.linea_credito,
+            "total": self.total,
+            "rechazos_por_factor": self.rechazos_factor,
+            "puntaje_minimo_aprobacion": self.puntaje_minimo,
+            "comite": {"score_minimo": self.comite_min, "score_maximo": self.comite_max},
+            "actual": self.punto_umbral(self.puntaje_minimo),
+            "niveles_actuales": [
+                {
+                    "nombre": nivel.get("nombre"),
+                    "min": nivel.get("min"),
+                    "max": nivel.get("max"),
+                    "casos": self.casos_nivel(nivel.get("min", 0), nivel.get("max", 100)),
+                }
+                for nivel in self.niveles
+            ],
+            "curvas": self.curvas,
+        }
+        if umbral is not None:
+            resultado["punto"] = self.punto_umbral(umbral)
+        return resultado
+
+
+# linea_credito -> CalibracionLinea de los últimos datos vistos
+_calibraciones = {}
+
+
+def obtener_calibracion_linea(linea_credito):
+    """
+    Calibración de una línea, recalculada solo si cambiaron las evaluaciones
+    o la configuración desde la última vez.
+
+    Args:
+        linea_credito (str): Nombre de la línea
+
+    Returns:
+        CalibracionLinea
+    """
+    # Versiones leídas antes que los datos (ver obtener_snapshot_configuracion)
+    snapshot = obtener_snapshot_configuracion()
+    clave = (obtener_version_datos(CLAVE_VERSION_EVALUACIONES), snapshot.version)
+    calibracion = _calibraciones.get(linea_credito)
+    if calibracion is not None and calibracion.clave == clave:
+        return calibracion
+
+    conn = conectar_db()
+    try:
+        filas = conn.execute(
+            f"""
+            SELECT resultado_score, resultado_score_normalizado,
+                   resultado_rechazo_automatico
+            FROM evaluaciones
+            WHERE {SQL_LINEA_EVALUACION} = ? AND resultado_score IS NOT NULL
+        """,
+            (linea_credito,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    calibracion = CalibracionLinea(
+        linea_credito,
+        clave,
+        filas,
+        obtener_modelo_scoring(linea_credito),
+        snapshot.configuracion.get("COMITE_CREDITO") or {},
+    )
+    _calibraciones[linea_credito] = calibracion
+    return calibracion
+
+
+__all__ = [
+    "CLAVE_VERSION_EVALUACIONES",
+    "ensure_version_evaluaciones",
+    "CalibracionLinea",
+    "obtener_calibracion_linea",
+]
@@ -11,29 +11,26 @@ Version: 1.0
 """
 
 import json
-import sqlite3
 from datetime import datetime
-from pathlib import Path
 
-# Importar conexión desde database.py
-try:
-    from database import conectar_db, DB_PATH
-except ImportError:
-    DB_PATH = Path(__file__).parent / 'loansi.db'
-    
-    def conectar_db():
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+# Importar conexión desde database.py (pool compartido)
+from database import conectar_db
+from db_helpers import (
+    CLAVE_VERSION_CONFIGURACION,
+    incrementar_version_datos,
+    invalidar_snapshot_configuracion,
+    obtener_snapshot_configuracion,
+)
 
 
 # ============================================================================
 # CACHE PARA OPTIMIZACIÓN
 # ============================================================================
 
+# cache_key -> (config, versión de configuración con la que se leyó).
+# Todo guardado de scoring incrementa la versión (versiones_datos), así que
+# una entrada vale mientras la versión no cambie, en cualquier worker.
 _SCORING_LINEA_CACHE = {}
-_CACHE_TTL = 300  # 5 minutos
 
 
 def invalidar_cache_scoring_linea(linea_id=None):
@@ -53,6 +50,7 @@ def invalidar_cache_scoring_linea(linea_id=None):
     else:
         _SCORING_LINEA_CACHE = {}
         print("🔄 Cache de scoring completamente invalidado")
+    invalidar_snapshot_configuracion()
 
 
 # ============================================================================
@@ -223,14 +221,14 @@ def obtener_config_scoring_linea(linea_id):
     Returns:
         dict: Configuración completa de scoring para la línea
     """
-    import time
     cache_key = f"config_{linea_id}"
-    now = time.time()
+    # Versión leída antes que los datos (ver obtener_snapshot_configuracion)
+    version = obtener_snapshot_configuracion().version
     
     # Verificar cache
     if cache_key in _SCORING_LINEA_CACHE:
-        cached_data, timestamp = _SCORING_LINEA_CACHE[cache_key]
-        if now - timestamp < _CACHE_TTL:
+        cached_data, cached_version = _SCORING_LINEA_CACHE[cache_key]
+        if cached_version == version:
             return cached_data
     
     conn = conectar_db()
@@ -372,7 +370,7 @@ def obtener_config_scoring_linea(linea_id):
             })
         
         # Guardar en cache
-        _SCORING_LINEA_CACHE[cache_key] = (config, now)
+        _SCORING_LINEA_CACHE[cache_key] = (config, version)
         
         return config
         
@@ -424,6 +422,7 @@ def guardar_config_scoring_linea(linea_id, config):
             ))
             print(f"✅ Configuración general guardada para línea {linea_id}")
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         
         # Invalidar cache
@@ -571,6 +570,7 @@ def crear_config_scoring_linea_defecto(linea_id, tasa_anual=25.0, copiar_de_line
             """, (linea_id, criterio, nombre, operador, valor, mensaje, i + 1))
         print(f"  ✅ {len(factores_defecto)} factores de rechazo creados")
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         
         # Invalidar cache
@@ -682,6 +682,7 @@ def guardar_niveles_riesgo_linea(linea_id, niveles):
                 nivel.get("orden", i)
             ))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         invalidar_cache_scoring_linea(linea_id)
         
@@ -782,6 +783,7 @@ def guardar_factores_rechazo_linea(linea_id, factores):
                 factor.get("orden", i)
             ))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         invalidar_cache_scoring_linea(linea_id)
         
@@ -834,6 +836,7 @@ def agregar_factor_rechazo_linea(linea_id, factor):
         ))
         
         factor_id = cursor.lastrowid
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         invalidar_cache_scoring_linea(linea_id)
         
@@ -872,6 +875,7 @@ def eliminar_factor_rechazo(factor_id):
             DELETE FROM factores_rechazo_linea WHERE id = ?
         """, (factor_id,))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         
         if linea_id:
@@ -997,6 +1001,7 @@ def guardar_criterio_linea(linea_id, criterio_codigo, config):
             rangos_json
         ))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         invalidar_cache_scoring_linea(linea_id)
         
@@ -1070,6 +1075,7 @@ def guardar_criterios_completos_linea(linea_id, criterios):
                 rangos_json
             ))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         invalidar_cache_scoring_linea(linea_id)
         
@@ -1164,6 +1170,7 @@ def copiar_config_scoring(linea_origen_id, linea_destino_id, incluir_criterios=T
                 WHERE linea_credito_id = ?
             """, (linea_destino_id, linea_origen_id))
         
+        incrementar_version_datos(cursor, CLAVE_VERSION_CONFIGURACION)
         conn.commit()
         
         # Invalidar cache de ambas líneas
@@ -0,0 +1,316 @@
+"""
+DB_HELPERS_SCORING_LOTE.PY - Scoring en lote (muchos solicitantes por llamada)
+==============================================================================
+
+Evalúa N solicitantes de una vez sobre el modelo compilado
+(db_helpers_scoring_modelo). La entrada es columnar, una lista de N valores
+por código de criterio:
+
+    {"puntaje_datacredito": [720, 580, ...], "mora_reciente": [0, 45, ...]}
+
+Con NumPy cada criterio se resuelve con un searchsorted sobre los límites
+compilados. Después se aplican los pesos, se normaliza a escala 0-100 y se
+asigna el nivel de riesgo, todo sobre arrays. Los factores de rechazo
+automático se evalúan como máscaras con las reglas compiladas del modelo
+(db_helpers_scoring_reglas). NumPy está en requirements.txt; si falta se
+usa el mismo modelo fila por fila (bisect), con resultados idénticos.
+
+Mismas reglas que /scoring: puntos del primer rango que contiene el valor,
+score = puntaje ponderado / máximo posible * 100 (tope 100), nivel del
+primer rango que contiene el score (si ninguno, el primero) y aprobado si no
+hay rechazo y el puntaje ponderado alcanza puntaje_minimo_aprobacion.
+Los valores deben venir ya normalizados, como valores_criterios en
+/scoring. Un valor vacío o no numérico no suma puntos. Un criterio sin
+columna no se evalúa. No incluye la derivación a comité ni la reducción de
+mora por Telcos, que dependen del formulario.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+try:
+    import numpy as np
+except ImportError:  # Está en requirements.txt; sin él se evalúa fila por fila
+    np = None
+
+from db_helpers_scoring_modelo import ModeloScoring, obtener_modelo_scoring
+from db_helpers_scoring_reglas import CRITERIO_MORA_TELCOS, formato_pesos
+
+
+# Máximo de solicitantes por llamada
+MAX_LOTE_SCORING = 100000
+
+_NAN = float("nan")
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (ValueError, TypeError):
+        return _NAN
+
+
+class ModeloVectorizado:
+    """Arrays de NumPy de un ModeloScoring, listos para searchsorted."""
+
+    __slots__ = ("modelo", "criterios", "niveles", "factores")
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        # Reglas de rechazo en el orden configurado (índices de 'rechazo')
+        self.factores = modelo.reglas_rechazo.reglas
+        if np is None:
+            self.criterios = self.niveles = None
+            return
+        # puntos lleva un 0 al final: el índice -1 (sin rango) suma 0
+        self.criterios = [
+            (
+                c,
+                np.asarray(c.tramos.limites, dtype=float),
+                np.asarray(c.tramos.ganadores, dtype=np.intp),
+                np.asarray(c.puntos + (0,), dtype=float),
+            )
+            for c in modelo.criterios
+        ]
+        self.niveles = (
+            np.asarray(modelo.tramos_niveles.limites, dtype=float),
+            np.asarray(modelo.tramos_niveles.ganadores, dtype=np.intp),
+        )
+
+
+def vectorizar_modelo(modelo):
+    """
+    Args:
+        modelo (ModeloScoring): Modelo compilado
+
+    Returns:
+        ModeloVectorizado
+    """
+    return ModeloVectorizado(modelo)
+
+
+# linea_credito -> ModeloVectorizado del último modelo visto
+_vectorizados = {}
+
+
+def _vectorizado_de(modelo):
+    if isinstance(modelo, ModeloVectorizado):
+        return modelo
+    vectorizado = _vectorizados.get(modelo.linea_credito)
+    if vectorizado is None or vectorizado.modelo is not modelo:
+        vectorizado = ModeloVectorizado(modelo)
+        _vectorizados[modelo.linea_credito] = vectorizado
+    return vectorizado
+
+
+def _buscar(limites, ganadores, x):
+    """TramosCompilados.buscar sobre un array (NaN queda sin rango)."""
+    i = np.searchsorted(limites, x, side="left")
+    if len(limites):
+        exacto = limites[np.minimum(i, len(limites) - 1)] == x
+    else:
+        exacto = np.zeros(len(x), dtype=bool)
+    return ganadores[2 * i + exacto]
+
+
+def _tamano(columnas):
+    tamanos = {len(v) for v in columnas.values()}
+    if len(tamanos) > 1:
+        raise ValueError("Todas las columnas del lote deben tener el mismo largo")
+    n = tamanos.pop() if tamanos else 0
+    if n > MAX_LOTE_SCORING:
+        raise ValueError(f"El lote supera el máximo de {MAX_LOTE_SCORING} solicitantes")
+    return n
+
+
+def evaluar_lote(modelo, columnas, registrar=True):
+    """
+    Evalúa un lote columnar.
+
+    Args:
+        modelo (ModeloScoring | ModeloVectorizado): Modelo a aplicar
+        columnas (dict): {codigo_criterio: [valor, ...]} (todas de largo N)
+        registrar (bool): Sumar el lote a los contadores de las reglas de
+            rechazo (False para casos hipotéticos o históricos)
+
+    Returns:
+        dict: {'n', 'puntaje', 'score', 'nivel', 'rechazo', 'aprobado'}, con
+              arrays de NumPy (o listas sin NumPy) de largo N. 'nivel' y
+              'rechazo' son índices en modelo.niveles / factores (-1 = ninguno).
+    """
+    vectorizado = _vectorizado_de(modelo)
+    modelo = vectorizado.modelo
+    n = _tamano(columnas)
+    if np is None:
+        return _evaluar_filas(vectorizado, columnas, n, registrar)
+
+    convertidas = {}
+
+    def columna(codigo):
+        if codigo not in convertidas:
+            valores = columnas[codigo]
+            try:
+                convertidas[codigo] = np.asarray(valores, dtype=float).reshape(n)
+            except (ValueError, TypeError):
+                convertidas[codigo] = np.fromiter(
+                    (_numero(v) for v in valores), dtype=float, count=n
+                )
+        return convertidas[codigo]
+
+    puntaje = np.zeros(n)
+    for criterio, limites, ganadores, puntos in vectorizado.criterios:
+        if criterio.codigo not in columnas:
+            continue
+        x = columna(criterio.codigo)
+        if criterio.compuesto:
+            indice = np.where(np.isnan(x), -1, 0 if criterio.puntos else -1)
+        else:
+            indice = _buscar(limites, ganadores, x)
+        puntaje += puntos[indice] * criterio.factor
+
+    if modelo.max_puntuacion_posible > 0:
+        score = puntaje / modelo.max_puntuacion_posible * 100
+    else:
+        score = puntaje / modelo.escala_max * 100
+    score = np.minimum(score, 100)
+
+    nivel = _buscar(*vectorizado.niveles, score)
+    if modelo.niveles:
+        nivel[nivel < 0] = 0
+
+    rechazo = modelo.reglas_rechazo.rechazos_lote(
+        lambda codigo: columna(codigo) if codigo in columnas else None, n, registrar
+    )
+
+    aprobado = (rechazo < 0) & (puntaje >= float(modelo.puntaje_minimo))
+
+    return {
+        "n": n,
+        "puntaje": puntaje,
+        "score": score,
+        "nivel": nivel,
+        "rechazo": rechazo,
+        "aprobado": aprobado,
+    }
+
+
+def _evaluar_filas(vectorizado, columnas, n, registrar=True):
+    """evaluar_lote sin NumPy: el mismo modelo, una fila a la vez."""
+    modelo = vectorizado.modelo
+    evaluados = [
+        (c, [_numero(v) for v in columnas[c.codigo]])
+        for c in modelo.criterios
+        if c.codigo in columnas
+    ]
+
+    resultado = {"n": n, "puntaje": [], "score": [], "nivel": [], "rechazo": [], "aprobado": []}
+    for fila in range(n):
+        puntaje = 0.0
+        for criterio, valores in evaluados:
+            x = valores[fila]
+            i = -1 if x != x else criterio.indice(x)
+            if i >= 0:
+                puntaje += criterio.puntos[i] * criterio.factor
+
+        score = modelo.escala_100(puntaje)
+        nivel = modelo.nivel_indice(score)
+        if nivel < 0 and modelo.niveles:
+            nivel = 0
+
+        # Vacío o no numérico cuenta como faltante, igual que NaN en las máscaras
+        numeros = {}
+        for codigo, valores in columnas.items():
+            x = _numero(valores[fila])
+            if x == x:
+                numeros[codigo] = x
+        regla = modelo.reglas_rechazo.evaluar(numeros, registrar=registrar)
+        rechazo = regla.posicion if regla is not None else -1
+
+        resultado["puntaje"].append(puntaje)
+        resultado["score"].append(score)
+        resultado["nivel"].append(nivel)
+        resultado["rechazo"].append(rechazo)
+        resultado["aprobado"].append(rechazo < 0 and puntaje >= float(modelo.puntaje_minimo))
+    return resultado
+
+
+def mensaje_rechazo(vectorizado, indice, valor):
+    """
+    Mensaje del factor de rechazo `indice` (de evaluar_lote), como lo arma
+    /scoring.
+    """
+    regla = vectorizado.factores[indice]
+    if regla.criterio == CRITERIO_MORA_TELCOS:
+        return regla.mensaje_para(formato_pesos(valor), formato_pesos(regla.limite))
+    return regla.mensaje_para(_numero(valor))
+
+
+def filas_a_columnas(filas):
+    """
+    Convierte [{codigo: valor, ...}, ...] al formato columnar. Los códigos
+    ausentes en una fila quedan como None (sin puntos).
+    """
+    codigos = {codigo for fila in filas for codigo in fila}
+    return {codigo: [fila.get(codigo) for fila in filas] for codigo in codigos}
+
+
+def calcular_scoring_lote(columnas, linea_credito=None, modelo=None):
+    """
+    Scoring de un lote con el modelo vigente de la línea.
+
+    Args:
+        columnas (dict): {codigo_criterio: [valor, ...]}
+        linea_credito (str): Línea (sin configuración propia usa la global)
+        modelo (ModeloScoring): Modelo a usar en lugar del de la línea
+
+    Returns:
+        dict: {'linea_credito', 'version', 'total', 'aprobados', 'vectorizado',
+               'resultados': {'puntaje', 'score', 'nivel', 'aprobado',
+                              'rechazo_automatico', 'razon_rechazo'}}
+              con una lista de largo N por campo
+    """
+    if modelo is None:
+        modelo = obtener_modelo_scoring(linea_credito)
+    vectorizado = _vectorizado_de(modelo)
+    modelo = vectorizado.modelo
+    lote = evaluar_lote(vectorizado, columnas)
+
+    nombres = [n.get("nombre") for n in modelo.niveles] or [None]
+    # int() para que el resultado sea serializable a JSON también con NumPy
+    rechazos = [int(k) for k in lote["rechazo"]]
+    razones = []
+    for fila, k in enumerate(rechazos):
+        if k < 0:
+            razones.append(None)
+            continue
+        valores = columnas.get(vectorizado.factores[k].criterio) or [None] * lote["n"]
+        razones.append(mensaje_rechazo(vectorizado, k, valores[fila]))
+
+    aprobado = [bool(a) for a in lote["aprobado"]]
+    return {
+        "linea_credito": modelo.linea_credito,
+        "version": modelo.version,
+        "total": lote["n"],
+        "aprobados": sum(aprobado),
+        "vectorizado": np is not None,
+        "resultados": {
+            "puntaje": [round(float(p), 2) for p in lote["puntaje"]],
+            "score": [round(float(s), 2) for s in lote["score"]],
+            "nivel": [nombres[int(i)] if i >= 0 else None for i in lote["nivel"]],
+            "aprobado": aprobado,
+            "rechazo_automatico": [k >= 0 for k in rechazos],
+            "razon_rechazo": razones,
+        },
+    }
+
+
+__all__ = [
+    "MAX_LOTE_SCORING",
+    "ModeloScoring",
+    "ModeloVectorizado",
+    "vectorizar_modelo",
+    "evaluar_lote",
+    "mensaje_rechazo",
+    "filas_a_columnas",
+    "calcular_scoring_lote",
+]
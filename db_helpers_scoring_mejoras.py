@@ -0,0 +1,256 @@
+"""
+DB_HELPERS_SCORING_MEJORAS.PY - Qué tendría que cambiar para mejorar el scoring
+==============================================================================
+
+Para un solicitante ya evaluado calcula los cambios mínimos (de uno o dos
+criterios) que lo llevan al siguiente umbral:
+
+- aprobación: alcanzar puntaje_minimo_aprobacion (si hoy no lo alcanza)
+- nivel: entrar al siguiente nivel de riesgo con mejor score
+
+Las opciones salen de los rangos compilados del modelo
+(db_helpers_scoring_modelo). Por cada criterio y cada rango que da más
+puntos se toma el límite de ese rango más cercano al valor actual. Todas
+las opciones sueltas y los pares de criterios distintos se arman como
+filas de un lote y se evalúan en una sola pasada con evaluar_lote, así que
+el resultado incluye puntaje, nivel, tasa y rechazo automático reales.
+
+Por cada meta solo se sugieren conjuntos mínimos: un par solo se sugiere
+si ninguno de sus dos criterios alcanza la meta por sí solo. El orden es
+cantidad de cambios, luego esfuerzo (cambio relativo al rango del
+criterio) y luego mayor score resultante.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import time
+from itertools import combinations
+
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_lote import evaluar_lote
+
+
+# Sugerencias devueltas por meta
+MAX_SUGERENCIAS_MEJORA = 5
+
+
+class _Opcion:
+    """Cambio de un criterio a un valor que cae en un rango con más puntos."""
+
+    __slots__ = ("criterio", "valor_actual", "valor", "rango", "delta", "esfuerzo")
+
+    def __init__(self, criterio, valor_actual, valor, rango, delta, esfuerzo):
+        self.criterio = criterio
+        self.valor_actual = valor_actual
+        self.valor = valor
+        self.rango = rango
+        self.delta = delta
+        self.esfuerzo = esfuerzo
+
+
+def _numero(valor):
+    try:
+        numero = float(valor)
+    except (ValueError, TypeError):
+        return None
+    return numero if numero == numero else None
+
+
+def _valores_de_rango(criterio, rango):
+    """Valores que caen en `rango` (primero los límites, luego puntos medios)."""
+    limites = criterio.tramos.limites
+    ganadores = criterio.tramos.ganadores
+    puntos = [limites[t // 2] for t in range(1, len(ganadores), 2) if ganadores[t] == rango]
+    if puntos:
+        return puntos
+    return [
+        (limites[t // 2 - 1] + limites[t // 2]) / 2
+        for t in range(2, len(ganadores) - 1, 2)
+        if ganadores[t] == rango
+    ]
+
+
+def _opciones(modelo, valores):
+    """Por criterio, una opción por cada rango que suma más puntos que el actual."""
+    opciones = []
+    for criterio in modelo.criterios:
+        if criterio.compuesto or not criterio.factor or not criterio.activo:
+            continue
+        actual = _numero(valores.get(criterio.codigo))
+        indice = criterio.indice(actual) if actual is not None else -1
+        puntos_actuales = criterio.puntos[indice] if indice >= 0 else 0
+        limites = criterio.tramos.limites
+        amplitud = (limites[-1] - limites[0]) if len(limites) > 1 else 1.0
+
+        for rango, puntos in enumerate(criterio.puntos):
+            delta = (puntos - puntos_actuales) * criterio.factor
+            if delta <= 0:
+                continue
+            candidatos = _valores_de_rango(criterio, rango)
+            if not candidatos:
+                continue
+            if actual is None:
+                valor, esfuerzo = candidatos[0], 1.0
+            else:
+                valor = min(candidatos, key=lambda v: abs(v - actual))
+                esfuerzo = abs(valor - actual) / amplitud
+            opciones.append(
+                _Opcion(criterio, valores.get(criterio.codigo), valor, rango, delta, esfuerzo)
+            )
+    return opciones
+
+
+def _metas(modelo, puntaje, score, nivel_actual, aprobado, rechazado):
+    """[(tipo, nombre, puntaje requerido)] de los umbrales siguientes."""
+    metas = []
+    if not aprobado and not rechazado:
+        metas.append(("aprobacion", None, float(modelo.puntaje_minimo)))
+
+    # Siguiente nivel: el de menor score mínimo por encima del score actual
+    # (sin contar el nivel asignado por defecto cuando ninguno contiene el score)
+    siguiente = None
+    for indice, nivel in enumerate(modelo.niveles):
+        minimo = _numero(nivel.get("min", 0))
+        if indice != nivel_actual and minimo is not None and minimo > score and (
+            siguiente is None or minimo < siguiente[1]
+        ):
+            siguiente = (nivel.get("nombre"), minimo)
+    if siguiente and siguiente[1] <= 100:
+        nombre, minimo = siguiente
+        if modelo.max_puntuacion_posible > 0:
+            requerido = minimo * modelo.max_puntuacion_posible / 100
+        else:
+            requerido = minimo * modelo.escala_max / 100
+        metas.append(("nivel", nombre, requerido))
+    return [m for m in metas if m[2] > puntaje]
+
+
+def _describir_cambio(opcion):
+    criterio = opcion.criterio
+    indice_actual = criterio.indice(opcion.valor_actual)
+    return {
+        "criterio": criterio.codigo,
+        "nombre": criterio.nombre,
+        "valor_actual": opcion.valor_actual,
+        "valor_sugerido": opcion.valor,
+        "puntos_actuales": criterio.puntos[indice_actual] if indice_actual >= 0 else 0,
+        "puntos_sugeridos": criterio.puntos[opcion.rango],
+        "descripcion": criterio.descripciones[opcion.rango] or f"Valor: {opcion.valor}",
+    }
+
+
+def explicar_mejoras_scoring(valores, linea_credito=None, modelo=None,
+                             max_sugerencias=MAX_SUGERENCIAS_MEJORA):
+    """
+    Cambios mínimos de uno o dos criterios que llevan al solicitante a la
+    aprobación o al siguiente nivel de riesgo.
+
+    Args:
+        valores (dict): {codigo_criterio: valor} (como valores_criterios)
+        linea_credito (str): Línea cuyo modelo se usa
+        modelo (ModeloScoring): Modelo a usar en lugar del de la línea
+        max_sugerencias (int): Sugerencias por meta
+
+    Returns:
+        dict: {'puntaje', 'score', 'nivel', 'aprobado', 'rechazo_automatico',
+               'metas': [{'tipo', 'nivel', 'puntaje_requerido', 'faltan',
+                          'sugerencias': [...]}],
+               'candidatos_evaluados', 'duracion_ms'}
+    """
+    inicio = time.perf_counter()
+    if modelo is None:
+        modelo = obtener_modelo_scoring(linea_credito)
+
+    actual = evaluar_lote(
+        modelo, {codigo: [valor] for codigo, valor in valores.items()}, registrar=False
+    )
+    puntaje = float(actual["puntaje"][0])
+    score = float(actual["score"][0])
+    nivel = int(actual["nivel"][0])
+    rechazado = int(actual["rechazo"][0]) >= 0
+    aprobado = bool(actual["aprobado"][0])
+
+    resultado = {
+        "puntaje": round(puntaje, 2),
+        "score": round(score, 2),
+        "nivel": modelo.niveles[nivel].get("nombre") if nivel >= 0 else None,
+        "aprobado": aprobado,
+        "rechazo_automatico": rechazado,
+        "metas": [],
+        "candidatos_evaluados": 0,
+    }
+
+    metas = _metas(modelo, puntaje, score, nivel, aprobado, rechazado)
+    if metas:
+        # Pares: solo los que alcanzan al menos la meta más cercana
+        menor_requerido = min(requerido for _, _, requerido in metas)
+        opciones = _opciones(modelo, valores)
+        candidatos = [(o,) for o in opciones] + [
+            (a, b)
+            for a, b in combinations(opciones, 2)
+            if a.criterio is not b.criterio
+            and puntaje + a.delta + b.delta >= menor_requerido
+        ]
+
+        n = len(candidatos)
+        columnas = {codigo: [valor] * n for codigo, valor in valores.items()}
+        for fila, cambios in enumerate(candidatos):
+            for opcion in cambios:
+                columnas.setdefault(opcion.criterio.codigo, [None] * n)[fila] = opcion.valor
+        lote = evaluar_lote(modelo, columnas, registrar=False)
+        resultado["candidatos_evaluados"] = n
+
+        for tipo, nombre_nivel, requerido in metas:
+            alcanza = [
+                fila for fila in range(n)
+                if float(lote["puntaje"][fila]) >= requerido - 1e-9
+                and (tipo != "aprobacion" or bool(lote["aprobado"][fila]))
+            ]
+            # Un par no es mínimo si uno de sus criterios alcanza la meta solo
+            solos = {candidatos[f][0].criterio.codigo for f in alcanza if len(candidatos[f]) == 1}
+            mejores = {}
+            for fila in alcanza:
+                cambios = candidatos[fila]
+                if len(cambios) == 2 and any(o.criterio.codigo in solos for o in cambios):
+                    continue
+                # Por combinación de criterios, solo la de menor esfuerzo
+                clave = tuple(o.criterio.codigo for o in cambios)
+                orden = (
+                    len(cambios),
+                    sum(o.esfuerzo for o in cambios),
+                    -float(lote["score"][fila]),
+                )
+                if clave not in mejores or orden < mejores[clave][0]:
+                    mejores[clave] = (orden, fila)
+
+            sugerencias = []
+            for _, fila in sorted(mejores.values())[:max_sugerencias]:
+                indice_nivel = int(lote["nivel"][fila])
+                sugerencias.append({
+                    "cambios": [_describir_cambio(o) for o in candidatos[fila]],
+                    "puntaje": round(float(lote["puntaje"][fila]), 2),
+                    "score": round(float(lote["score"][fila]), 2),
+                    "nivel": (
+                        modelo.niveles[indice_nivel].get("nombre") if indice_nivel >= 0 else None
+                    ),
+                    "tasa_ea": modelo.tasa_anual(indice_nivel, linea_credito),
+                    "aprobado": bool(lote["aprobado"][fila]),
+                })
+
+            resultado["metas"].append({
+                "tipo": tipo,
+                "nivel": nombre_nivel,
+                "puntaje_requerido": round(requerido, 2),
+                "faltan": round(requerido - puntaje, 2),
+                "sugerencias": sugerencias,
+            })
+
+    resultado["duracion_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    return resultado
+
+
+__all__ = [
+    "MAX_SUGERENCIAS_MEJORA",
+    "explicar_mejoras_scoring",
+]
@@ -0,0 +1,321 @@
+"""
+DB_HELPERS_SCORING_MODELO.PY - Modelo de scoring compilado
+==========================================================
+
+Convierte una configuración de scoring (la global o la que devuelve
+cargar_scoring_por_linea) en un modelo inmutable que evalúa sin volver a
+recorrer la configuración en cada request:
+
+- Por criterio, los límites min/max de todos sus rangos quedan convertidos
+  a float, ordenados y sin repetir, con el rango ganador de cada tramo ya
+  resuelto. Un valor se ubica con bisect en O(log n) y se conserva la regla
+  actual: si varios rangos contienen el valor, gana el primero de la lista.
+- Puntos, descripciones y peso (ya dividido por 100) resueltos por rango.
+- Los niveles de riesgo se compilan igual, sobre el score en escala 0-100.
+- Los factores de rechazo quedan como reglas con predicados ya armados
+  (db_helpers_scoring_reglas).
+
+obtener_modelo_scoring() guarda un modelo por línea y lo reutiliza mientras
+no cambie la versión de configuración (ver
+db_helpers.obtener_snapshot_configuracion).
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+from bisect import bisect_left
+from types import MappingProxyType
+
+from db_helpers import obtener_snapshot_configuracion
+from db_helpers_scoring_linea import cargar_scoring_por_linea
+from db_helpers_scoring_reglas import UMBRAL_MORA_TELCOS_DEFECTO, compilar_reglas_rechazo
+
+
+# Puntaje mínimo de aprobación si la configuración no lo define (como en /scoring)
+PUNTAJE_MINIMO_DEFECTO = 20
+
+# Límites por defecto de un rango de criterio sin min/max (como en /scoring)
+RANGO_MIN_DEFECTO = 0
+RANGO_MAX_DEFECTO = 999999
+
+# Límites por defecto de un nivel de riesgo sin min/max
+NIVEL_MIN_DEFECTO = 0
+NIVEL_MAX_DEFECTO = 100
+
+
+class TramosCompilados:
+    """
+    Búsqueda del primer intervalo cerrado [min, max] que contiene un valor.
+
+    `limites` son los extremos de todos los intervalos, ordenados. Dividen la
+    recta en tramos: el tramo 2*i es el abierto entre limites[i-1] y
+    limites[i], y el tramo 2*i + 1 es el punto limites[i]. `ganadores[t]` es
+    el índice del primer intervalo (en el orden original) que cubre el
+    tramo t, o -1.
+    """
+
+    __slots__ = ("limites", "ganadores")
+
+    def __init__(self, intervalos):
+        """
+        Args:
+            intervalos (list): [(min, max) | None, ...]; None = rango inválido
+        """
+        limites = sorted({x for par in intervalos if par for x in par})
+        ganadores = [-1] * (2 * len(limites) + 1)
+
+        for t in range(1, 2 * len(limites)):
+            i = t // 2
+            if t % 2:
+                bajo = alto = limites[i]
+            else:
+                bajo, alto = limites[i - 1], limites[i]
+            for indice, par in enumerate(intervalos):
+                if par and par[0] <= bajo and alto <= par[1]:
+                    ganadores[t] = indice
+                    break
+
+        self.limites = tuple(limites)
+        self.ganadores = tuple(ganadores)
+
+    def buscar(self, valor):
+        """Returns: int índice del intervalo que contiene `valor`, o -1."""
+        if valor != valor:  # NaN no cae en ningún rango
+            return -1
+        i = bisect_left(self.limites, valor)
+        if i < len(self.limites) and self.limites[i] == valor:
+            return self.ganadores[2 * i + 1]
+        return self.ganadores[2 * i]
+
+
+def _intervalo(rango, minimo, maximo):
+    try:
+        return (float(rango.get("min", minimo)), float(rango.get("max", maximo)))
+    except (ValueError, TypeError):
+        return None
+
+
+class CriterioCompilado:
+    """Un criterio de scoring con sus rangos listos para evaluar."""
+
+    __slots__ = (
+        "codigo",
+        "nombre",
+        "tipo_campo",
+        "activo",
+        "peso",
+        "factor",
+        "compuesto",
+        "tramos",
+        "puntos",
+        "puntajes",
+        "descripciones",
+        "puntos_maximos",
+        "puntos_minimos",
+        "config",
+    )
+
+    def __init__(self, codigo, config):
+        rangos = config.get("rangos") or []
+
+        self.codigo = codigo
+        self.nombre = config.get("nombre", codigo)
+        self.tipo_campo = config.get("tipo_campo")
+        self.activo = config.get("activo", True)
+        self.peso = config.get("peso", 0) or 0
+        self.factor = self.peso / 100
+        self.compuesto = self.tipo_campo == "composite"
+        self.tramos = TramosCompilados(
+            [_intervalo(r, RANGO_MIN_DEFECTO, RANGO_MAX_DEFECTO) for r in rangos]
+        )
+        self.puntos = tuple(r.get("puntos", 0) for r in rangos)
+        # ScoringService lee los puntos de la clave "puntaje"
+        self.puntajes = tuple(r.get("puntaje", 0) for r in rangos)
+        self.descripciones = tuple(r.get("descripcion") for r in rangos)
+        self.puntos_maximos = max(self.puntos) if rangos else 0
+        self.puntos_minimos = min(self.puntos) if rangos else 0
+        self.config = config
+
+    def indice(self, valor):
+        """
+        Returns:
+            int: Índice del rango que aplica a `valor`, o -1 si ninguno
+                 (o si el valor no es numérico)
+        """
+        try:
+            valor_numerico = float(valor)
+        except (ValueError, TypeError):
+            return -1
+        if self.compuesto:
+            # Composite: por ahora aplica el primer rango
+            return 0 if self.puntos else -1
+        return self.tramos.buscar(valor_numerico)
+
+    def puntos_de(self, valor):
+        """Returns: puntos (sin ponderar) del rango que aplica; 0 si ninguno."""
+        i = self.indice(valor)
+        return self.puntos[i] if i >= 0 else 0
+
+    def descripcion_de(self, valor):
+        """Returns: str descripción del rango que aplica."""
+        try:
+            valor_numerico = float(valor)
+        except (ValueError, TypeError):
+            return f"Valor: {valor}"
+        i = self.indice(valor_numerico)
+        if i >= 0 and self.descripciones[i] is not None:
+            return self.descripciones[i]
+        return f"Valor: {valor_numerico}"
+
+
+def _criterios_de(config):
+    """Acepta criterios como dict {codigo: config} o como lista (por línea)."""
+    criterios = config.get("criterios") or {}
+    if isinstance(criterios, dict):
+        return list(criterios.items())
+    return [(c.get("codigo"), c) for c in criterios if c.get("codigo")]
+
+
+class ModeloScoring:
+    """
+    Configuración de scoring compilada. Compartida entre requests: no
+    modificar `config` ni los dicts de `niveles`.
+    """
+
+    __slots__ = (
+        "config",
+        "version",
+        "linea_credito",
+        "criterios",
+        "por_codigo",
+        "niveles",
+        "tramos_niveles",
+        "factores_rechazo",
+        "reglas_rechazo",
+        "puntaje_minimo",
+        "escala_max",
+        "umbral_mora_telcos",
+        "max_puntuacion_posible",
+    )
+
+    def __init__(self, config, version=None):
+        self.config = config
+        self.version = version
+        self.linea_credito = config.get("linea_credito_nombre")
+        self.criterios = tuple(
+            CriterioCompilado(codigo, c) for codigo, c in _criterios_de(config)
+        )
+        self.por_codigo = MappingProxyType({c.codigo: c for c in self.criterios})
+
+        self.niveles = tuple(config.get("niveles_riesgo") or ())
+        self.tramos_niveles = TramosCompilados(
+            [_intervalo(n, NIVEL_MIN_DEFECTO, NIVEL_MAX_DEFECTO) for n in self.niveles]
+        )
+
+        self.factores_rechazo = tuple(config.get("factores_rechazo_automatico") or ())
+        self.puntaje_minimo = config.get("puntaje_minimo_aprobacion", PUNTAJE_MINIMO_DEFECTO)
+        self.escala_max = config.get("escala_max", 100)
+        self.umbral_mora_telcos = config.get("umbral_mora_telcos_rechazo", UMBRAL_MORA_TELCOS_DEFECTO)
+        self.reglas_rechazo = compilar_reglas_rechazo(self.factores_rechazo, config)
+        self.max_puntuacion_posible = sum(
+            max(c.puntos_maximos, 0) * c.factor for c in self.criterios
+        )
+
+    def nivel_indice(self, score):
+        """Returns: int índice del primer nivel que contiene `score`, o -1."""
+        try:
+            return self.tramos_niveles.buscar(float(score))
+        except (ValueError, TypeError):
+            return -1
+
+    def tasa_anual(self, indice, linea_credito=None):
+        """
+        Tasa efectiva anual del nivel `indice`: tasa_ea en la configuración
+        por línea, tasas_por_producto en la global.
+
+        Returns:
+            float | None
+        """
+        if not 0 <= indice < len(self.niveles):
+            return None
+        nivel = self.niveles[indice]
+        if nivel.get("tasa_ea") is not None:
+            return nivel["tasa_ea"]
+        linea = linea_credito or self.linea_credito
+        return (nivel.get("tasas_por_producto") or {}).get(linea, {}).get("tasa_anual")
+
+    def puntaje_total(self, valores):
+        """
+        Suma ponderada de puntos de los valores que tienen criterio.
+
+        Args:
+            valores (dict): {codigo_criterio: valor}
+
+        Returns:
+            float
+        """
+        total = 0.0
+        for codigo, valor in valores.items():
+            criterio = self.por_codigo.get(codigo)
+            if criterio is not None:
+                total += criterio.puntos_de(valor) * criterio.factor
+        return total
+
+    def escala_100(self, puntaje_total):
+        """Lleva el puntaje ponderado a escala 0-100 (tope 100)."""
+        if self.max_puntuacion_posible > 0:
+            score = (puntaje_total / self.max_puntuacion_posible) * 100
+        else:
+            score = (puntaje_total / self.escala_max) * 100
+        return min(score, 100)
+
+
+def compilar_modelo_scoring(config, version=None):
+    """
+    Compila una configuración de scoring.
+
+    Args:
+        config (dict): Configuración global (cargar_scoring) o de línea
+            (cargar_scoring_por_linea)
+        version (int): Versión de configuración de la que salió (opcional)
+
+    Returns:
+        ModeloScoring
+    """
+    return ModeloScoring(config or {}, version)
+
+
+# linea_credito (None = global) -> ModeloScoring de la última versión vista
+_modelos = {}
+
+
+def obtener_modelo_scoring(linea_credito=None):
+    """
+    Modelo compilado de una línea (o el global si la línea no tiene
+    configuración propia). Se recompila solo cuando cambia la versión de
+    configuración.
+
+    Args:
+        linea_credito (str): Nombre de la línea (opcional)
+
+    Returns:
+        ModeloScoring
+    """
+    # Versión leída antes que la configuración (ver obtener_snapshot_configuracion)
+    snapshot = obtener_snapshot_configuracion()
+    modelo = _modelos.get(linea_credito)
+    if modelo is not None and modelo.version == snapshot.version:
+        return modelo
+
+    config = None
+    if linea_credito:
+        try:
+            config = cargar_scoring_por_linea(linea_credito)
+        except Exception as e:
+            print(f"⚠️ Error cargando scoring de {linea_credito}, usando global: {e}")
+    if not config:
+        config = snapshot.scoring
+
+    modelo = compilar_modelo_scoring(config, snapshot.version)
+    _modelos[linea_credito] = modelo
+    return modelo
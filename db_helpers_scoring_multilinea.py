@@ -0,0 +1,153 @@
+"""
+DB_HELPERS_SCORING_MULTILINEA.PY - Un solicitante contra todas las líneas
+=========================================================================
+
+Evalúa un solicitante contra el modelo compilado de cada línea de crédito
+activa en una sola llamada, para ver en qué líneas aprueba, con qué nivel
+y con qué tasa, y recomendar la mejor oferta.
+
+Los modelos de todas las líneas activas se arman una vez por versión de
+configuración (obtener_lineas_credito_scoring + obtener_modelo_scoring) y
+se guardan ya vectorizados. Cada llamada solo recorre ese conjunto con
+evaluar_lote. Una línea sin configuración propia usa el modelo global, igual
+que /scoring.
+
+Orden de las ofertas: primero las aprobadas, luego las no aprobadas sin
+rechazo automático, luego las rechazadas. Dentro de cada grupo, menor tasa
+y después mayor score. Si se indica el monto solicitado, las líneas cuyo
+rango de montos no lo admite van después de las que sí.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import time
+
+from db_helpers import obtener_snapshot_configuracion
+from db_helpers_scoring_linea import obtener_lineas_credito_scoring
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_lote import evaluar_lote, mensaje_rechazo, vectorizar_modelo
+
+
+class _ConjuntoLineas:
+    """Líneas activas con su modelo vectorizado, para una versión de configuración."""
+
+    __slots__ = ("version", "lineas")
+
+    def __init__(self, version, lineas):
+        self.version = version
+        # [(linea dict, ModeloVectorizado)]
+        self.lineas = lineas
+
+
+_conjunto = None
+
+
+def _conjunto_lineas():
+    """Conjunto vigente, rearmado solo cuando cambia la versión de configuración."""
+    global _conjunto
+    # Versión leída antes que los datos (ver obtener_snapshot_configuracion)
+    version = obtener_snapshot_configuracion().version
+    if _conjunto is not None and _conjunto.version == version:
+        return _conjunto
+
+    lineas = []
+    for linea in obtener_lineas_credito_scoring():
+        modelo = obtener_modelo_scoring(linea["nombre"])
+        lineas.append((linea, vectorizar_modelo(modelo)))
+    _conjunto = _ConjuntoLineas(version, lineas)
+    return _conjunto
+
+
+def _monto_en_rango(linea, monto):
+    if monto is None:
+        return None
+    minimo = linea.get("monto_min")
+    maximo = linea.get("monto_max")
+    return (minimo is None or monto >= minimo) and (maximo is None or monto <= maximo)
+
+
+def _orden_oferta(oferta):
+    if oferta["aprobado"]:
+        grupo = 0
+    elif not oferta["rechazo_automatico"]:
+        grupo = 1
+    else:
+        grupo = 2
+    tasa = oferta["tasa_ea"]
+    return (
+        oferta["monto_en_rango"] is False,
+        grupo,
+        tasa is None,
+        tasa if tasa is not None else 0,
+        -oferta["score"],
+        oferta["linea_credito"],
+    )
+
+
+def calcular_scoring_todas_lineas(valores, monto_solicitado=None):
+    """
+    Evalúa un solicitante contra todas las líneas de crédito activas.
+
+    Args:
+        valores (dict): {codigo_criterio: valor} (como valores_criterios)
+        monto_solicitado (float): Monto pedido, para marcar las líneas que
+            no lo admiten (opcional)
+
+    Returns:
+        dict: {'lineas': [ofertas ordenadas de mejor a peor],
+               'recomendada': nombre de la mejor línea aprobada o None,
+               'duracion_ms'}
+    """
+    inicio = time.perf_counter()
+    try:
+        monto = float(monto_solicitado) if monto_solicitado not in (None, "") else None
+    except (ValueError, TypeError):
+        monto = None
+
+    columnas = {codigo: [valor] for codigo, valor in valores.items()}
+    ofertas = []
+    for linea, vectorizado in _conjunto_lineas().lineas:
+        modelo = vectorizado.modelo
+        resultado = evaluar_lote(vectorizado, columnas)
+        nivel = int(resultado["nivel"][0])
+        rechazo = int(resultado["rechazo"][0])
+        razon = None
+        if rechazo >= 0:
+            criterio = vectorizado.factores[rechazo].criterio
+            razon = mensaje_rechazo(vectorizado, rechazo, valores.get(criterio))
+
+        ofertas.append({
+            "linea_id": linea["id"],
+            "linea_credito": linea["nombre"],
+            "config_propia": linea["tiene_config_scoring"],
+            "aprobado": bool(resultado["aprobado"][0]),
+            "rechazo_automatico": rechazo >= 0,
+            "razon_rechazo": razon,
+            "puntaje": round(float(resultado["puntaje"][0]), 2),
+            "puntaje_minimo": modelo.puntaje_minimo,
+            "score": round(float(resultado["score"][0]), 2),
+            "nivel": modelo.niveles[nivel].get("nombre") if nivel >= 0 else None,
+            "tasa_ea": modelo.tasa_anual(nivel, linea["nombre"]),
+            "monto_min": linea["monto_min"],
+            "monto_max": linea["monto_max"],
+            "plazo_min": linea["plazo_min"],
+            "plazo_max": linea["plazo_max"],
+            "monto_en_rango": _monto_en_rango(linea, monto),
+        })
+
+    ofertas.sort(key=_orden_oferta)
+    recomendada = next(
+        (o["linea_credito"] for o in ofertas if o["aprobado"] and o["monto_en_rango"] is not False),
+        None,
+    )
+    return {
+        "lineas": ofertas,
+        "recomendada": recomendada,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }
+
+
+__all__ = [
+    "calcular_scoring_todas_lineas",
+]
@@ -0,0 +1,431 @@
+"""
+DB_HELPERS_SCORING_REGLAS.PY - Motor compilado de factores de rechazo
+=====================================================================
+
+Convierte los factores de rechazo automático de una configuración
+(factores_rechazo_automatico de la global o las filas de
+factores_rechazo_linea) en reglas con predicados ya armados. Umbrales y
+operadores se resuelven una sola vez al compilar y cada valor del
+solicitante se convierte a número una sola vez por evaluación.
+
+Formato de una condición:
+
+    {"criterio": "mora_reciente", "operador": ">", "valor_limite": 30}
+    {"todas": [condición, ...]}     (Y)
+    {"alguna": [condición, ...]}    (O)
+
+"defecto" es el valor que se usa cuando el criterio no viene (en lote,
+también cuando la celda es NaN); sin él la condición no se cumple. Un valor
+que viene pero no es numérico nunca cumple la condición. Un factor es una condición más "mensaje" (con
+{valor_actual} y {valor_limite}) y, si es compuesto, el "criterio" que se
+informa.
+
+Cómo se leen operador y umbral es la semántica de cada evaluador y no
+cambia al compilar:
+
+- SEMANTICA_SCORING (/scoring, lote, backtest, todas las líneas): operador
+  por defecto ">=", solo <, <=, >, >=; umbral de "valor_limite" o
+  "valor_minimo" (0 si no hay). La mora en Telcos no se toma de los
+  factores: se rechaza si comportamiento_sectorial = 1 y el monto supera
+  umbral_mora_telcos_rechazo (regla agregada al final). Cero créditos
+  cerrados no rechaza si el cliente tiene cupo vigente, 10 o más meses de
+  historial al día y sin mora.
+- SEMANTICA_SERVICIO (ScoringService): operador por defecto "<", también
+  "=="; umbral de "valor" (0 si no hay); acepta coma decimal en el valor.
+
+Por solicitante, las reglas se recorren de mayor a menor tasa de disparo
+observada, así la que más rechaza se evalúa primero. El resultado es el
+mismo que en el orden configurado: gana el primer factor de la lista que se
+cumple, y tras un disparo solo se evalúan las reglas anteriores a él. Por
+lote, cada regla da una máscara sobre el array de la columna (NumPy, de
+requirements.txt).
+
+Los contadores de evaluaciones y disparos viven en el modelo compilado
+(db_helpers_scoring_modelo), así que son por proceso y vuelven a cero
+cuando cambia la configuración. Se actualizan sin lock: son aproximados.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # Está en requirements.txt; sin él solo se evalúa por solicitante
+    np = None
+
+
+OPERADORES_RECHAZO = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
+# Lectura de los factores en /scoring (y en todo lo que usa el modelo compilado)
+SEMANTICA_SCORING = {
+    "operador_defecto": ">=",
+    "operadores": ("<", "<=", ">", ">="),
+    "claves_limite": ("valor_limite", "valor_minimo"),
+    "limite_defecto": 0,
+    "coma_decimal": False,
+    "reglas_integradas": True,
+}
+
+# Lectura de los factores en ScoringService
+SEMANTICA_SERVICIO = {
+    "operador_defecto": "<",
+    "operadores": ("<", "<=", ">", ">=", "=="),
+    "claves_limite": ("valor",),
+    "limite_defecto": 0,
+    "coma_decimal": True,
+    "reglas_integradas": False,
+}
+
+# Criterio de la mora en Telcos (campo condicional del formulario)
+CRITERIO_MORA_TELCOS = "monto_mora_telcos"
+
+# Umbral de mora en Telcos si la configuración no define umbral_mora_telcos_rechazo
+UMBRAL_MORA_TELCOS_DEFECTO = 200000
+
+# Condiciones que se agregan (Y) a los factores de estos criterios
+CONDICIONES_INTEGRADAS = {
+    # Excepción: sin créditos cerrados pero con buen comportamiento en vigentes
+    "creditos_cerrados_exitosos": [
+        # Si uno de estos viene pero no es numérico /scoring no rechaza
+        {"criterio": "cupo_total_aprobado", "operador": ">=", "valor_limite": float("-inf"), "defecto": 0},
+        {"criterio": "historial_pagos", "operador": ">=", "valor_limite": float("-inf"), "defecto": 0},
+        {"criterio": "mora_reciente", "operador": ">=", "valor_limite": float("-inf"), "defecto": 0},
+        {"alguna": [
+            {"criterio": "creditos_cerrados_exitosos", "operador": "<", "valor_limite": 0},
+            {"criterio": "creditos_cerrados_exitosos", "operador": ">", "valor_limite": 0},
+            {"criterio": "cupo_total_aprobado", "operador": "<=", "valor_limite": 0, "defecto": 0},
+            {"criterio": "historial_pagos", "operador": "<", "valor_limite": 10, "defecto": 0},
+            {"criterio": "mora_reciente", "operador": "<", "valor_limite": 0, "defecto": 0},
+            {"criterio": "mora_reciente", "operador": ">", "valor_limite": 0, "defecto": 0},
+        ]},
+    ],
+}
+
+# Evaluaciones por solicitante entre cada reordenamiento por tasa de disparo
+REORDENAR_CADA = 256
+
+_NAN = float("nan")
+
+
+def _numero(valor, coma_decimal=False):
+    """Número de un valor; NaN si no lo es."""
+    try:
+        if coma_decimal:
+            return float(str(valor).replace(",", "."))
+        return float(valor)
+    except (ValueError, TypeError):
+        return _NAN
+
+
+def formato_pesos(valor):
+    """Monto como lo muestra /scoring en los mensajes: $210.000"""
+    return f"${float(valor):,.0f}".replace(",", ".")
+
+
+def _factor_mora_telcos(config):
+    """Rechazo por mora en Telcos: solo Telcos Y monto > umbral_mora_telcos_rechazo."""
+    umbral = config.get("umbral_mora_telcos_rechazo", UMBRAL_MORA_TELCOS_DEFECTO)
+    return {
+        "criterio": CRITERIO_MORA_TELCOS,
+        "nombre": "Mora Telcos crítica",
+        "mensaje": "Mora en Telcos superior al límite: {valor_actual} (máximo permitido: {valor_limite})",
+        "todas": [
+            {"criterio": CRITERIO_MORA_TELCOS, "operador": ">", "valor_limite": umbral},
+            # int(comportamiento_sectorial) == 1
+            {"criterio": "comportamiento_sectorial", "operador": ">=", "valor_limite": 1},
+            {"criterio": "comportamiento_sectorial", "operador": "<", "valor_limite": 2},
+        ],
+    }
+
+
+def _limite(condicion, semantica):
+    limite = semantica["limite_defecto"]
+    for clave in semantica["claves_limite"]:
+        if clave in condicion:
+            limite = condicion[clave]
+            break
+    return _numero(limite)
+
+
+class _Condicion:
+    """Predicado compilado: por solicitante y como máscara de lote."""
+
+    __slots__ = ("predicado", "mascara", "criterio", "limite")
+
+    def __init__(self, predicado, mascara, criterio, limite):
+        self.predicado = predicado
+        self.mascara = mascara
+        self.criterio = criterio
+        self.limite = limite
+
+
+def _condicion_simple(condicion, semantica):
+    criterio = condicion.get("criterio")
+    operador = condicion.get("operador", semantica["operador_defecto"])
+    op = OPERADORES_RECHAZO.get(operador) if operador in semantica["operadores"] else None
+    limite = _limite(condicion, semantica)
+    if not criterio or op is None or limite != limite:
+        return None
+    defecto = condicion.get("defecto")
+    defecto = _numero(defecto) if defecto is not None else _NAN
+
+    def predicado(valor):
+        x = valor(criterio)
+        if x is None:
+            x = defecto
+        return x == x and op(x, limite)
+
+    def mascara(columna, n):
+        x = columna(criterio)
+        if x is None:
+            x = np.full(n, defecto)
+        elif defecto == defecto:
+            x = np.where(np.isnan(x), defecto, x)
+        return ~np.isnan(x) & op(x, limite)
+
+    return _Condicion(predicado, mascara, criterio, limite)
+
+
+def _condicion_compuesta(partes, todas):
+    predicados = tuple(p.predicado for p in partes)
+    mascaras = tuple(p.mascara for p in partes)
+
+    if todas:
+        def predicado(valor):
+            return all(p(valor) for p in predicados)
+    else:
+        def predicado(valor):
+            return any(p(valor) for p in predicados)
+
+    def mascara(columna, n):
+        reducir = np.logical_and if todas else np.logical_or
+        resultado = mascaras[0](columna, n)
+        for m in mascaras[1:]:
+            resultado = reducir(resultado, m(columna, n))
+        return resultado
+
+    principal = partes[0]
+    return _Condicion(predicado, mascara, principal.criterio, principal.limite)
+
+
+def compilar_condicion(condicion, semantica=SEMANTICA_SCORING):
+    """
+    Args:
+        condicion (dict): Condición simple o compuesta ("todas"/"alguna")
+        semantica (dict): Lectura de operador y umbral (SEMANTICA_*)
+
+    Returns:
+        _Condicion | None: None si la condición no es evaluable
+    """
+    for clave in ("todas", "alguna"):
+        if isinstance(condicion.get(clave), list):
+            partes = [compilar_condicion(c, semantica) for c in condicion[clave]]
+            # Sin una parte de un Y la regla sería más amplia: no se evalúa
+            if clave == "todas" and None in partes:
+                return None
+            partes = [p for p in partes if p is not None]
+            if not partes:
+                return None
+            return _condicion_compuesta(partes, clave == "todas")
+    return _condicion_simple(condicion, semantica)
+
+
+class ReglaRechazo:
+    """Un factor de rechazo compilado, con sus contadores de uso."""
+
+    __slots__ = (
+        "posicion",
+        "factor",
+        "criterio",
+        "nombre",
+        "limite",
+        "plantilla",
+        "condicion",
+        "evaluaciones",
+        "disparos",
+    )
+
+    def __init__(self, posicion, factor, condicion):
+        self.posicion = posicion
+        self.factor = factor
+        self.criterio = factor.get("criterio") or condicion.criterio
+        self.nombre = factor.get("nombre") or factor.get("criterio_nombre") or self.criterio
+        self.limite = condicion.limite
+        self.plantilla = factor.get("mensaje", f"Factor de rechazo: {self.criterio}")
+        self.condicion = condicion
+        self.evaluaciones = 0
+        self.disparos = 0
+
+    @property
+    def tasa_disparo(self):
+        return self.disparos / self.evaluaciones if self.evaluaciones else 0.0
+
+    def mensaje_para(self, valor_actual, valor_limite=None):
+        """Mensaje con {valor_actual} (y {valor_limite} si se indica) reemplazados."""
+        mensaje = self.plantilla.replace("{valor_actual}", str(valor_actual))
+        if valor_limite is not None:
+            mensaje = mensaje.replace("{valor_limite}", str(valor_limite))
+        return mensaje
+
+
+class MotorReglasRechazo:
+    """Reglas de rechazo de un modelo, en el orden configurado."""
+
+    __slots__ = ("reglas", "coma_decimal", "_orden", "_pendientes")
+
+    def __init__(self, reglas, coma_decimal=False):
+        self.reglas = tuple(reglas)
+        self.coma_decimal = coma_decimal
+        self._orden = self.reglas
+        self._pendientes = REORDENAR_CADA
+
+    def __len__(self):
+        return len(self.reglas)
+
+    def reordenar(self):
+        """Mayor tasa de disparo primero; a igual tasa, el orden configurado."""
+        self._orden = tuple(sorted(self.reglas, key=lambda r: (-r.tasa_disparo, r.posicion)))
+        self._pendientes = REORDENAR_CADA
+
+    def evaluar(self, valores, solo=None, excluir=None, registrar=True):
+        """
+        Primer factor (en el orden configurado) que rechaza al solicitante.
+
+        Args:
+            valores (dict): {codigo_criterio: valor}
+            solo (set): Evaluar solo los factores de estos criterios
+            excluir (set): No evaluar los factores de estos criterios
+            registrar (bool): Actualizar los contadores de las reglas
+
+        Returns:
+            ReglaRechazo | None
+        """
+        numeros = {}
+        coma_decimal = self.coma_decimal
+
+        def valor(criterio):
+            if criterio not in numeros:
+                numeros[criterio] = (
+                    _numero(valores[criterio], coma_decimal) if criterio in valores else None
+                )
+            return numeros[criterio]
+
+        primera = None
+        for regla in self._orden:
+            if primera is not None and regla.posicion > primera.posicion:
+                continue
+            if (solo is not None and regla.criterio not in solo) or (
+                excluir is not None and regla.criterio in excluir
+            ):
+                continue
+            cumple = regla.condicion.predicado(valor)
+            if registrar:
+                regla.evaluaciones += 1
+                regla.disparos += cumple
+            if cumple:
+                primera = regla
+
+        if registrar:
+            self._pendientes -= 1
+            if self._pendientes <= 0:
+                self.reordenar()
+        return primera
+
+    def mascaras(self, columna, n, registrar=True):
+        """
+        Una máscara booleana de n filas por regla (requiere NumPy).
+
+        Args:
+            columna (callable): codigo_criterio -> array float de n filas
+                (NaN si falta el valor) o None si no hay columna
+            n (int): Filas del lote
+            registrar (bool): Actualizar los contadores de las reglas
+
+        Returns:
+            list: [np.ndarray bool] en el orden de `reglas`
+        """
+        mascaras = []
+        for regla in self.reglas:
+            mascara = regla.condicion.mascara(columna, n)
+            if registrar:
+                regla.evaluaciones += n
+                regla.disparos += int(mascara.sum())
+            mascaras.append(mascara)
+        return mascaras
+
+    def rechazos_lote(self, columna, n, registrar=True):
+        """Índice de la primera regla que rechaza cada fila (-1 si ninguna)."""
+        rechazo = np.full(n, -1, dtype=np.intp)
+        # Se recorren al revés para que gane el primer factor que aplica
+        mascaras = self.mascaras(columna, n, registrar)
+        for k in range(len(mascaras) - 1, -1, -1):
+            rechazo[mascaras[k]] = k
+        return rechazo
+
+    def estadisticas(self):
+        """Contadores por regla, en el orden en que se evalúan."""
+        return [
+            {
+                "posicion": regla.posicion,
+                "criterio": regla.criterio,
+                "nombre": regla.nombre,
+                "limite": regla.limite,
+                "mensaje": regla.plantilla,
+                "evaluaciones": regla.evaluaciones,
+                "disparos": regla.disparos,
+                "tasa_disparo": round(regla.tasa_disparo * 100, 2),
+            }
+            for regla in self._orden
+        ]
+
+
+def compilar_reglas_rechazo(factores, config=None, semantica=SEMANTICA_SCORING):
+    """
+    Args:
+        factores (list): factores_rechazo_automatico de la configuración
+        config (dict): Configuración (umbral_mora_telcos_rechazo)
+        semantica (dict): SEMANTICA_SCORING o SEMANTICA_SERVICIO
+
+    Returns:
+        MotorReglasRechazo
+    """
+    config = config or {}
+    factores = list(factores)
+    if semantica["reglas_integradas"]:
+        # La mora en Telcos no sale de los factores: regla propia, al final
+        factores = [f for f in factores if f.get("criterio") != CRITERIO_MORA_TELCOS]
+        factores.append(_factor_mora_telcos(config))
+
+    reglas = []
+    for factor in factores:
+        condicion = factor
+        extra = CONDICIONES_INTEGRADAS.get(factor.get("criterio"))
+        if semantica["reglas_integradas"] and extra and not any(
+            clave in factor for clave in ("todas", "alguna")
+        ):
+            condicion = {"todas": [factor] + extra}
+        compilada = compilar_condicion(condicion, semantica)
+        if compilada is not None:
+            reglas.append(ReglaRechazo(len(reglas), factor, compilada))
+    return MotorReglasRechazo(reglas, semantica["coma_decimal"])
+
+
+__all__ = [
+    "OPERADORES_RECHAZO",
+    "SEMANTICA_SCORING",
+    "SEMANTICA_SERVICIO",
+    "CRITERIO_MORA_TELCOS",
+    "ReglaRechazo",
+    "MotorReglasRechazo",
+    "compilar_condicion",
+    "compilar_reglas_rechazo",
+    "formato_pesos",
+]
@@ -12,6 +12,7 @@ from flask import (
     jsonify,
     abort,
     make_response,
+    Response,
 )
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from datetime import datetime, timedelta, timezone
@@ -19,11 +20,11 @@ from dateutil.relativedelta import relativedelta
 import math
 import hashlib
 from werkzeug.security import generate_password_hash, check_password_hash
+import copy
 import json
 import traceback
 import time
 import shutil
-import sqlite3
 
 # ============================================
 # IMPORTS PARA SQLite (reemplazan JSON)
@@ -38,6 +39,8 @@ from db_helpers import (
     actualizar_evaluacion as actualizar_evaluacion_db,
     cargar_simulaciones as cargar_simulaciones_db,
     guardar_simulacion as guardar_simulacion_db,
+    guardar_evaluaciones_lote,
+    obtener_snapshot_configuracion,
     obtener_casos_comite,
     contar_casos_nuevos_asesor,
     obtener_usuario,
@@ -45,6 +48,19 @@ from db_helpers import (
     eliminar_linea_credito_db,
     eliminar_usuario_db,
     resolve_visible_usernames,
+    filtro_visibilidad_sql,
+    ensure_indices_evaluaciones,
+    ensure_user_assignments_table,
+    ensure_versiones_datos,
+    ensure_columnas_resultado,
+    ensure_columnas_fecha,
+    normalizar_fila_evaluacion,
+    obtener_evaluacion_completa,
+    obtener_casos_comite_asesor,
+    obtener_cola_comite,
+    obtener_decisiones_recientes_comite,
+    listar_timestamps_pendientes_comite,
+    marcar_caso_visto_asesor,
 )
 
 from db_helpers_scoring_linea import (
@@ -65,6 +81,24 @@ from db_helpers_scoring_linea import (
     verificar_tablas_scoring_linea,
     crear_config_scoring_linea_defecto,
 )
+from db_helpers_scoring_modelo import (
+    PUNTAJE_MINIMO_DEFECTO,
+    compilar_modelo_scoring,
+    obtener_modelo_scoring,
+)
+from db_helpers_scoring_lote import (
+    calcular_scoring_lote,
+    filas_a_columnas,
+)
+from db_helpers_scoring_backtest import backtest_config_scoring
+from db_helpers_scoring_calibracion import (
+    PREFIJO_RECHAZO_PUNTAJE,
+    ensure_version_evaluaciones,
+    obtener_calibracion_linea,
+)
+from db_helpers_scoring_mejoras import explicar_mejoras_scoring
+from db_helpers_scoring_multilinea import calcular_scoring_todas_lineas
+from db_helpers_scoring_reglas import CRITERIO_MORA_TELCOS, formato_pesos
 
 # ============================================
 # SISTEMA DE PERMISOS GRANULARES
@@ -93,7 +127,34 @@ from db_helpers_estados import (
 )
 
 # FUNCIONES PARA DASHBOARD
-from db_helpers_dashboard import obtener_estadisticas_por_rol, obtener_resumen_navbar
+from db_helpers_dashboard import (
+    obtener_estadisticas_por_rol,
+    obtener_resumen_navbar,
+    invalidar_resumen_navbar,
+)
+from db_helpers_rollups import ensure_rollups
+from db_helpers_login import ensure_intentos_login, LimitadorLogin
+from db_helpers_auditoria import (
+    ensure_auditoria,
+    registrar_evento_auditoria,
+    consultar_auditoria,
+    obtener_metricas_auditoria,
+)
+from db_helpers_cambios import (
+    ensure_feed_cambios,
+    cursor_actual_feed,
+    obtener_cambios_desde,
+    esperar_cambios,
+    notificar_cambios,
+    suscribir,
+    desuscribir,
+    DURACION_MAX_SSE_S,
+    LATIDO_SSE_S,
+    SSE_HABILITADO,
+)
+
+# POOL DE CONEXIONES SQLite (compartido por todos los módulos de datos)
+from database import conectar_db, liberar_conexion_hilo, checkpoint_wal, activar_wal
 import logging
 
 # ============================================
@@ -145,8 +206,9 @@ def log_db_operation(operation, details="", level="INFO"):
 def registrar_auditoria(usuario, accion, descripcion, detalles=None):
     """
     Registra una acción de auditoría en el sistema.
-    Por ahora hace logging, pero puede extenderse para guardar en BD.
-    
+    Se encola para el escritor de fondo (db_helpers_auditoria): no agrega
+    una escritura a la base dentro del request.
+
     Args:
         usuario (str): Usuario que realizó la acción
         accion (str): Tipo de acción (ej: "SCORING_CONFIG_UPDATE")
@@ -159,26 +221,21 @@ def registrar_auditoria(usuario, accion, descripcion, detalles=None):
         if detalles:
             log_message += f" | Detalles: {detalles}"
         print(log_message)
-        
-        # Opcionalmente, guardar en tabla de auditoría si existe
+
         try:
-            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Verificar si existe la tabla de auditoría
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='auditoria'")
-            if cursor.fetchone():
-                cursor.execute("""
-                    INSERT INTO auditoria (usuario, accion, descripcion, detalles, fecha)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (usuario, accion, descripcion, detalles, timestamp))
-                conn.commit()
-            conn.close()
-        except Exception as e:
-            # Si falla guardar en BD, solo loggeamos (no es crítico)
+            detalles = json.loads(detalles) if detalles else None
+        except (TypeError, ValueError):
             pass
-            
+
+        registrar_evento_auditoria(
+            usuario,
+            accion,
+            datos_nuevos=json.dumps(
+                {"descripcion": descripcion, "detalles": detalles}, ensure_ascii=False
+            ),
+            ip_address=request.remote_addr if request else None,
+        )
+
     except Exception as e:
         print(f"⚠️ Error en auditoría: {e}")
 
@@ -189,9 +246,7 @@ def leer_evaluaciones_db():
     Retorna lista de diccionarios con las evaluaciones.
     """
     try:
-        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = conectar_db()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -204,96 +259,8 @@ def leer_evaluaciones_db():
         rows = cursor.fetchall()
         conn.close()
 
-        evaluaciones = []
-        for row in rows:
-            evaluacion = dict(row)
-
-            # Deserializar campos JSON
-            if evaluacion.get("resultado"):
-                try:
-                    evaluacion["resultado"] = json.loads(evaluacion["resultado"])
-                except:
-                    pass
-
-            if evaluacion.get("criterios_evaluados"):
-                try:
-                    evaluacion["criterios_evaluados"] = json.loads(
-                        evaluacion["criterios_evaluados"]
-                    )
-                except:
-                    evaluacion["criterios_evaluados"] = []
-
-            if evaluacion.get("criterios_detalle"):
-                try:
-                    evaluacion["criterios_detalle"] = json.loads(
-                        evaluacion["criterios_detalle"]
-                    )
-                except:
-                    evaluacion["criterios_detalle"] = []
-
-            if evaluacion.get("valores_criterios"):
-                try:
-                    evaluacion["valores_criterios"] = json.loads(
-                        evaluacion["valores_criterios"]
-                    )
-                except:
-                    evaluacion["valores_criterios"] = {}
-
-            if evaluacion.get("decision_admin"):
-                try:
-                    evaluacion["decision_admin"] = json.loads(
-                        evaluacion["decision_admin"]
-                    )
-                except:
-                    pass
-
-            # Agregar cliente en formato legacy para compatibilidad
-            if evaluacion.get("nombre_cliente") and evaluacion.get("cedula"):
-                evaluacion["cliente"] = (
-                    f"{evaluacion['nombre_cliente']} - CC {evaluacion['cedula']}"
-                )
-            elif evaluacion.get("nombre_cliente"):
-                evaluacion["cliente"] = evaluacion["nombre_cliente"]
-
-            # Convertir visto_por_asesor a bool
-            evaluacion["visto_por_asesor"] = bool(evaluacion.get("visto_por_asesor", 0))
-
-            # =====================================================================
-            # CORRECCIÓN 2025-12-18: Extraer campos de decision_admin a nivel superior
-            # Esto permite compatibilidad con frontend que busca ev.monto_aprobado
-            # =====================================================================
-            if evaluacion.get("decision_admin") and isinstance(
-                evaluacion["decision_admin"], dict
-            ):
-                da = evaluacion["decision_admin"]
-
-                # Extraer monto_aprobado si no existe en columna directa
-                if da.get("monto_aprobado") and not evaluacion.get("monto_aprobado"):
-                    evaluacion["monto_aprobado"] = da["monto_aprobado"]
-
-                # Extraer nivel_riesgo_ajustado (puede venir con diferentes nombres)
-                if not evaluacion.get("nivel_riesgo_ajustado"):
-                    evaluacion["nivel_riesgo_ajustado"] = (
-                        da.get("nivel_riesgo_ajustado")
-                        or da.get("nivel_riesgo_modificado")
-                        or da.get("nivel_ajustado")
-                    )
-
-                # Extraer justificación
-                if not evaluacion.get("justificacion_modificacion"):
-                    evaluacion["justificacion_modificacion"] = (
-                        da.get("justificacion_modificacion")
-                        or da.get("justificacion")
-                        or da.get("comentario")
-                    )
-
-                # Extraer tasas
-                if da.get("tasas_aplicadas") and not evaluacion.get(
-                    "tasas_nivel_riesgo"
-                ):
-                    evaluacion["tasas_nivel_riesgo"] = da["tasas_aplicadas"]
-
-            evaluaciones.append(evaluacion)
+        # Deserialización JSON + campos legacy (compartido con db_helpers)
+        evaluaciones = [normalizar_fila_evaluacion(row) for row in rows]
 
         log_db_operation(
             "LEER_EVALUACIONES", f"✅ Cargadas {len(evaluaciones)} evaluaciones"
@@ -314,8 +281,7 @@ def guardar_evaluacion_db(evaluacion):
     Si ya existe (mismo timestamp), la actualiza.
     """
     try:
-        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
-        conn = sqlite3.connect(db_path)
+        conn = conectar_db()
         cursor = conn.cursor()
 
         # Verificar si ya existe
@@ -464,6 +430,8 @@ def guardar_evaluacion_db(evaluacion):
 
         conn.commit()
         conn.close()
+        invalidar_resumen_navbar(evaluacion.get("asesor"))
+        notificar_cambios()
         return True
 
     except Exception as e:
@@ -568,7 +536,9 @@ def parsear_timestamp_naive(timestamp_str):
 # ============================================
 # RATE LIMITING PARA LOGIN CON PERSISTENCIA
 # ============================================
-# Archivo para persistir intentos de login (evita pérdida al recargar app)
+# Archivo donde se persistían los intentos de login.
+# DEPRECATED: ahora viven en memoria + tabla intentos_login (db_helpers_login);
+# solo se usa para importar los intentos vigentes al iniciar.
 LOGIN_ATTEMPTS_FILE = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "login_attempts.json"
 )
@@ -581,71 +551,12 @@ SEMANAS_POR_MES = 52.0 / 12.0  # 4.333333... (valor exacto)
 MAX_LOGIN_ATTEMPTS = 3  # Máximo 3 intentos
 LOCKOUT_DURATION = timedelta(minutes=15)  # Bloqueo por 15 minutos
 ATTEMPT_WINDOW = timedelta(minutes=5)  # Ventana de 5 minutos para contar intentos
-CLEANUP_THRESHOLD = 30  # Limpiar archivo si supera 30 registros
 
-
-def cargar_login_attempts():
-    """
-    Carga intentos de login desde archivo JSON.
-    Limpia automáticamente registros antiguos (> 15 minutos).
-
-    Returns:
-        dict: {ip_address: [timestamp_str1, timestamp_str2, ...]}
-    """
-    try:
-        if os.path.exists(LOGIN_ATTEMPTS_FILE):
-            with open(LOGIN_ATTEMPTS_FILE, "r") as f:
-                attempts = json.load(f)
-
-            # Limpiar registros antiguos automáticamente
-            now = datetime.now()
-            cleaned_attempts = {}
-
-            for ip, timestamps in attempts.items():
-                # Filtrar solo timestamps recientes (dentro de LOCKOUT_DURATION)
-                recent_timestamps = [
-                    ts
-                    for ts in timestamps
-                    if (now - datetime.fromisoformat(ts)) < LOCKOUT_DURATION
-                ]
-                if recent_timestamps:
-                    cleaned_attempts[ip] = recent_timestamps
-
-            # Si se limpiaron registros, guardar archivo limpio
-            if len(cleaned_attempts) < len(attempts):
-                guardar_login_attempts(cleaned_attempts)
-                print(
-                    f"🧹 Limpieza automática: {len(attempts) - len(cleaned_attempts)} registros antiguos eliminados"
-                )
-
-            return cleaned_attempts
-        else:
-            return {}
-    except Exception as e:
-        print(f"⚠️ Error cargando login_attempts: {e}")
-        return {}
-
-
-def guardar_login_attempts(attempts):
-    """
-    Guarda intentos de login en archivo JSON.
-
-    Args:
-        attempts: dict {ip_address: [timestamp_str1, ...]}
-    """
-    try:
-        # Limitar tamaño del archivo (free tier tiene límites de disco)
-        if len(attempts) > CLEANUP_THRESHOLD:
-            # Ordenar por timestamp más reciente y mantener solo los últimos 50
-            sorted_attempts = {}
-            for ip, timestamps in attempts.items():
-                sorted_attempts[ip] = sorted(timestamps, reverse=True)[:10]
-            attempts = sorted_attempts
-
-        with open(LOGIN_ATTEMPTS_FILE, "w") as f:
-            json.dump(attempts, f, indent=2)
-    except Exception as e:
-        print(f"⚠️ Error guardando login_attempts: {e}")
+# Bloqueo basado en el PRIMER intento fallido: 15 minutos después se
+# limpian todos los intentos (no es ventana móvil)
+LIMITADOR_LOGIN = LimitadorLogin(
+    MAX_LOGIN_ATTEMPTS, LOCKOUT_DURATION, LOCKOUT_DURATION, ventana_fija=True
+)
 
 
 def check_rate_limit(ip_address):
@@ -655,52 +566,17 @@ def check_rate_limit(ip_address):
     Returns:
         tuple: (is_blocked: bool, remaining_attempts: int, lockout_until: datetime or None)
     """
-    now = datetime.now()
-    attempts = cargar_login_attempts()
-
-    if ip_address not in attempts:
-        return (False, MAX_LOGIN_ATTEMPTS, None)
+    estado = LIMITADOR_LOGIN.estado(ip_address)
 
-    # Convertir timestamps de string a datetime
-    timestamps = [datetime.fromisoformat(ts) for ts in attempts[ip_address]]
-
-    if not timestamps:
-        return (False, MAX_LOGIN_ATTEMPTS, None)
-
-    # loqueo basado en PRIMER intento, no en ventana móvil
-    # Obtener el PRIMER intento fallido (el más antiguo)
-    primer_intento = min(timestamps)
-
-    # Calcular cuándo expira el bloqueo (15 minutos desde PRIMER intento)
-    lockout_expiry = primer_intento + LOCKOUT_DURATION
-
-    # Contar TODOS los intentos (no solo los de la ventana de 5 min)
-    total_attempts = len(timestamps)
-
-    # Si hay 5+ intentos Y aún no expira el bloqueo → BLOQUEADO
-    if total_attempts >= MAX_LOGIN_ATTEMPTS:
-        if now < lockout_expiry:
-            # Aún está bloqueado
-            minutes_remaining = int((lockout_expiry - now).total_seconds() / 60)
-            logger.warning(
-                f"🔒 IP {ip_address} bloqueada: {total_attempts} intentos, {minutes_remaining} min restantes"
-            )
-            return (True, 0, lockout_expiry)
-        else:
-            # Bloqueo expiró (pasaron 15 min desde primer intento) → limpiar todo
-            clear_attempts(ip_address)
-            logger.info(f"✅ Bloqueo expirado para IP {ip_address}, intentos limpiados")
-            return (False, MAX_LOGIN_ATTEMPTS, None)
-
-    # Si hay < 5 intentos, verificar si el primer intento ya expiró (limpieza automática)
-    if now >= primer_intento + LOCKOUT_DURATION:
-        # Han pasado 15+ minutos desde el primer intento → limpiar
-        clear_attempts(ip_address)
-        return (False, MAX_LOGIN_ATTEMPTS, None)
+    if estado["bloqueado"]:
+        lockout_expiry = datetime.fromtimestamp(estado["bloqueado_hasta"])
+        minutes_remaining = int((lockout_expiry - datetime.now()).total_seconds() / 60)
+        logger.warning(
+            f"🔒 IP {ip_address} bloqueada: {estado['intentos']} intentos, {minutes_remaining} min restantes"
+        )
+        return (True, 0, lockout_expiry)
 
-    # Aún no bloqueado, calcular intentos restantes
-    remaining = MAX_LOGIN_ATTEMPTS - total_attempts
-    return (False, remaining, None)
+    return (False, estado["restantes"], None)
 
 
 def es_ruta_publica(path=None):
@@ -733,50 +609,25 @@ def es_ruta_publica(path=None):
 
 
 def record_failed_attempt(ip_address):
-    """Registra un intento de login fallido con persistencia."""
-    attempts = cargar_login_attempts()
-
-    if ip_address not in attempts:
-        attempts[ip_address] = []
+    """Registra un intento de login fallido (memoria + SQLite)."""
+    total = LIMITADOR_LOGIN.registrar_fallo(ip_address)
 
-    attempts[ip_address].append(datetime.now().isoformat())
-    guardar_login_attempts(attempts)
-
-    print(
-        f"🔒 Intento fallido registrado para IP: {ip_address} (Total: {len(attempts[ip_address])})"
-    )
+    print(f"🔒 Intento fallido registrado para IP: {ip_address} (Total: {total})")
 
 
 def clear_attempts(ip_address):
     """Limpia los intentos de login de una IP específica."""
-    attempts = cargar_login_attempts()
-
-    if ip_address in attempts:
-        del attempts[ip_address]
-        guardar_login_attempts(attempts)
-        print(f"✅ Intentos limpiados para IP: {ip_address}")
+    LIMITADOR_LOGIN.limpiar(ip_address)
+    print(f"✅ Intentos limpiados para IP: {ip_address}")
 
 
 def cleanup_old_attempts():
     """
-    Limpieza manual de registros antiguos (opcional, se llama automáticamente).
-    Útil para ejecutar periódicamente si el archivo crece mucho.
+    Limpieza manual de intentos vencidos (también se hace sola cada
+    db_helpers_login.INTERVALO_LIMPIEZA_S al registrar fallos).
     """
-    attempts = cargar_login_attempts()
-    now = datetime.now()
-    cleaned = {}
-
-    for ip, timestamps in attempts.items():
-        recent = [
-            ts
-            for ts in timestamps
-            if (now - datetime.fromisoformat(ts)) < LOCKOUT_DURATION
-        ]
-        if recent:
-            cleaned[ip] = recent
-
-    guardar_login_attempts(cleaned)
-    print(f"🧹 Limpieza completa: {len(attempts) - len(cleaned)} IPs eliminadas")
+    eliminadas = LIMITADOR_LOGIN.limpiar_expirados()
+    print(f"🧹 Limpieza completa: {eliminadas} IPs eliminadas")
 
 
 # ============================================
@@ -933,6 +784,35 @@ except Exception as e:
     print("   Ejecuta primero: python migracion_permisos.py")
 
 
+def preparar_base_datos():
+    """
+    Migraciones de arranque, idempotentes: modo WAL (queda guardado en el
+    archivo de la DB), tablas auxiliares, índices compuestos, columnas
+    derivadas, rollups diarios y feed de cambios de evaluaciones (bases
+    creadas antes de agregarlos).
+    """
+    activar_wal()
+    ensure_indices_evaluaciones()
+    ensure_user_assignments_table()
+    ensure_versiones_datos()
+    ensure_columnas_resultado()
+    ensure_columnas_fecha()
+    ensure_rollups()
+    ensure_feed_cambios()
+    ensure_version_evaluaciones()
+    ensure_auditoria()
+    ensure_intentos_login(LOGIN_ATTEMPTS_FILE)
+
+
+preparar_base_datos()
+
+
+@app.teardown_appcontext
+def liberar_conexion_db(error=None):
+    """Devuelve al pool la conexión SQLite usada durante el request."""
+    liberar_conexion_hilo()
+
+
 # Context processor para inyectar resumen_navbar en todas las vistas
 @app.context_processor
 def inject_navbar_stats():
@@ -952,6 +832,12 @@ def inject_navbar_stats():
     return {"resumen_navbar": {"items": []}}
 
 
+@app.context_processor
+def inject_sse():
+    """Indica a las plantillas si el canal de eventos (SSE) está activo."""
+    return {"sse_habilitado": SSE_HABILITADO}
+
+
 @app.context_processor
 def inject_permissions():
     """Inyectar funciones de permisos en todos los templates."""
@@ -1065,7 +951,8 @@ def guardar_evaluaciones(evaluaciones):
     Guarda evaluaciones en SQLite (reemplaza guardado en JSON).
     MIGRADO A SQLite - Wrapper para mantener compatibilidad.
 
-    NOTA: Esta función recibe lista completa pero SQLite guarda una por una.
+    Usa guardar_evaluaciones_lote(): un solo executemany y un solo commit
+    para toda la lista. Es todo o nada; si falla no se guarda ninguna.
     Se recomienda usar guardar_evaluacion_db() directamente para nuevas evaluaciones.
     """
     try:
@@ -1073,9 +960,7 @@ def guardar_evaluaciones(evaluaciones):
             "GUARDAR_EVALUACIONES", f"Guardando {len(evaluaciones)} evaluaciones"
         )
 
-        # Por compatibilidad, guardar cada evaluación
-        for ev in evaluaciones:
-            guardar_evaluacion_db(ev)
+        guardar_evaluaciones_lote(evaluaciones)
 
         log_db_operation("GUARDAR_EVALUACIONES", "✅ Guardadas exitosamente")
         return True
@@ -1169,23 +1054,56 @@ def obtener_simulaciones_cliente(cedula):
 
 
 #  SISTEMA DE CACHÉ COMPLETO
+# Las variables globales apuntan al snapshot de configuración vigente
+# (db_helpers.obtener_snapshot_configuracion). Cada guardado de configuración
+# o scoring incrementa su versión en SQLite, y sincronizar_configuracion()
+# las reemplaza en cuanto cambia, en este u otro worker. Ya no hay TTL.
 config_cache = None
-last_config_load_time = 0
-CACHE_DURATION = 300  # 5 minutos en segundos
-
-# Variables globales de caché para scoring (SQLite)
 scoring_cache = None
-last_scoring_load_time = 0
 
 LINEAS_CREDITO_CACHE = None
 COSTOS_ASOCIADOS_CACHE = None
 USUARIOS_CACHE = None
 
 SEGUROS_CONFIG_CACHE = None
-last_seguros_load_time = 0
 
 SCORING_CONFIG_CACHE = None
-last_scoring_load_time = 0
+
+_snapshot_sincronizado = None
+_version_seguros_validada = None
+
+
+@app.before_request
+def sincronizar_configuracion():
+    """
+    Reemplaza las variables globales de configuración si el snapshot cambió
+    de versión. Costo normal: una comparación (la versión se consulta en
+    SQLite como mucho una vez por segundo).
+    """
+    global _snapshot_sincronizado, config_cache, scoring_cache
+    global LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, USUARIOS_CACHE
+    global LINEAS_CREDITO, COSTOS_ASOCIADOS, USUARIOS
+    global SEGUROS_CONFIG, SEGUROS_CONFIG_CACHE
+
+    try:
+        snapshot = obtener_snapshot_configuracion()
+    except Exception as e:
+        logger.error(f"❌ Error al obtener snapshot de configuración: {e}")
+        return None
+
+    if snapshot is _snapshot_sincronizado:
+        return None
+
+    config = snapshot.configuracion
+    config_cache = config
+    scoring_cache = snapshot.scoring
+    LINEAS_CREDITO = LINEAS_CREDITO_CACHE = config.get("LINEAS_CREDITO", {}).copy()
+    COSTOS_ASOCIADOS = COSTOS_ASOCIADOS_CACHE = config.get("COSTOS_ASOCIADOS", {}).copy()
+    USUARIOS = USUARIOS_CACHE = config.get("USUARIOS", {}).copy()
+    if config.get("SEGUROS"):
+        SEGUROS_CONFIG = SEGUROS_CONFIG_CACHE = config["SEGUROS"]
+    _snapshot_sincronizado = snapshot
+    return None
 
 
 # Cargar configuración de seguros CON CACHÉ
@@ -1197,30 +1115,24 @@ def cargar_configuracion_seguros():
     MIGRADO A SQLite 2025-12-19: Los seguros ahora se guardan como parte de
     la configuración general en la clave 'SEGUROS'.
     """
-    global SEGUROS_CONFIG_CACHE, last_seguros_load_time
+    global SEGUROS_CONFIG_CACHE, _version_seguros_validada
 
     try:
-        current_time = time.time()
-
-        # Usar caché si es válido
-        if (
-            SEGUROS_CONFIG_CACHE
-            and (current_time - last_seguros_load_time) < CACHE_DURATION
-        ):
-            return SEGUROS_CONFIG_CACHE
+        # MIGRADO A SQLite - Tomar del snapshot de la config general
+        snapshot = obtener_snapshot_configuracion()
 
-        # MIGRADO A SQLite - Cargar desde config general
-        config = cargar_config_db()
-
-        if config and "SEGUROS" in config:
-            seguros_config = config["SEGUROS"]
+        if "SEGUROS" in snapshot.configuracion:
+            seguros_config = snapshot.configuracion["SEGUROS"]
         else:
             # Si no existe en SQLite, intentar migrar desde JSON
             seguros_config = _migrar_seguros_json_a_sqlite()
 
-        # Actualizar caché
         SEGUROS_CONFIG_CACHE = seguros_config
-        last_seguros_load_time = current_time
+
+        # Los rangos se validan una vez por versión, no en cada lectura
+        if _version_seguros_validada == snapshot.version:
+            return seguros_config
+        _version_seguros_validada = snapshot.version
 
         #  VALIDAR RANGOS DE SEGURO
         advertencias = validar_rangos_seguros(
@@ -1288,8 +1200,7 @@ def _migrar_seguros_json_a_sqlite():
     """
     # PRIMERO verificar si ya existe en SQLite (verificación directa)
     try:
-        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
-        conn = sqlite3.connect(db_path)
+        conn = conectar_db()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT valor FROM configuracion_sistema WHERE clave = 'SEGUROS'"
@@ -1408,16 +1319,14 @@ def guardar_configuracion_seguros(seguros_config):
     MIGRADO A SQLite 2025-12-19: Los seguros ahora se guardan como parte de
     la configuración general en la clave 'SEGUROS'.
     """
-    global SEGUROS_CONFIG_CACHE, last_seguros_load_time
     try:
         # MIGRADO A SQLite - Guardar en config general
         config = cargar_config_db() or {}
         config["SEGUROS"] = seguros_config
         guardar_config_db(config)
 
-        # Invalidar caché para forzar recarga
-        SEGUROS_CONFIG_CACHE = None
-        last_seguros_load_time = 0
+        # El guardado incrementó la versión: tomar el snapshot nuevo
+        sincronizar_configuracion()
 
         print("✅ Configuración de seguros guardada en SQLite")
         return True
@@ -1590,7 +1499,7 @@ def cargar_configuracion_scoring(linea_credito=None):
     Returns:
         dict: Configuración de scoring
     """
-    global scoring_cache, last_scoring_load_time
+    global scoring_cache
 
     # Si se especifica línea, intentar cargar configuración específica
     if linea_credito:
@@ -1610,29 +1519,19 @@ def cargar_configuracion_scoring(linea_credito=None):
         except Exception as e:
             logger.warning(f"Error cargando scoring por línea: {e}, usando global")
 
-    # Fallback: configuración global (código existente)
-    current_time = time.time()
-
+    # Fallback: configuración global desde el snapshot versionado.
+    # Se devuelve una copia: varios llamadores la modifican y la guardan.
     try:
-        # Verificar caché (5 minutos)
-        if scoring_cache and (current_time - last_scoring_load_time) < CACHE_DURATION:
-            return scoring_cache
-
-        # Cargar desde SQLite
-        scoring = cargar_scoring_db()
-
-        # Actualizar caché
-        scoring_cache = scoring
-        last_scoring_load_time = current_time
-
-        return scoring
+        snapshot = obtener_snapshot_configuracion()
+        scoring_cache = snapshot.scoring
+        return snapshot.copia_scoring()
 
     except Exception as e:
         logger.error(f"❌ Error al cargar scoring desde SQLite: {e}")
 
         # Usar caché si existe
         if scoring_cache:
-            return scoring_cache
+            return copy.deepcopy(scoring_cache)
 
         # Configuración predeterminada mínima
         return {"configuracion_por_linea": {}, "criterios": {}}
@@ -1640,23 +1539,21 @@ def cargar_configuracion_scoring(linea_credito=None):
 
 #  Guardar configuración de scoring CON INVALIDACIÓN DE CACHÉ
 def guardar_configuracion_scoring(scoring_config):
-    global scoring_cache, last_scoring_load_time, SCORING_CONFIG_CACHE
     """
     Guarda configuración de scoring en SQLite.
 
     MIGRADO A SQLite: Ya no guarda en scoring.json.
     CORREGIDO 2025-12-20: Ahora también invalida SCORING_CONFIG_CACHE
     """
-    global scoring_cache, last_scoring_load_time, SCORING_CONFIG_CACHE
+    global SCORING_CONFIG_CACHE
 
     try:
-        # Guardar en SQLite
+        # Guardar en SQLite (incrementa la versión de configuración)
         guardar_scoring_db(scoring_config)
 
         # Actualizar AMBOS cachés (CORREGIDO 2025-12-20)
-        scoring_cache = scoring_config
+        sincronizar_configuracion()
         SCORING_CONFIG_CACHE = scoring_config  # LÍNEA CRÍTICA AGREGADA
-        last_scoring_load_time = time.time()
 
         print(f"✅ Scoring guardado y cachés actualizados")
 
@@ -1850,31 +1747,14 @@ SEGUROS_CONFIG = cargar_configuracion_seguros()
 #  Cargar configuración CON CACHÉ
 def cargar_configuracion():
     """
-    Carga configuración desde SQLite con sistema de caché.
+    Carga configuración desde el snapshot versionado de SQLite.
 
     MIGRADO A SQLite: Ya no usa config.json, ahora usa base de datos.
-    Mantiene el mismo comportamiento y API para compatibilidad.
+    Mantiene el mismo comportamiento y API para compatibilidad. Devuelve
+    una copia: las rutas de administración la modifican antes de guardarla.
     """
-    global config_cache, last_config_load_time, LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, USUARIOS_CACHE
-
     try:
-        current_time = time.time()
-
-        # Verificar si existe caché válido (5 minutos)
-        if config_cache and (current_time - last_config_load_time) < CACHE_DURATION:
-            return config_cache
-
-        # Cargar desde SQLite usando db_helpers
-        config = cargar_config_db()
-
-        # Actualizar caché
-        config_cache = config
-        last_config_load_time = current_time
-        LINEAS_CREDITO_CACHE = config.get("LINEAS_CREDITO", {}).copy()
-        COSTOS_ASOCIADOS_CACHE = config.get("COSTOS_ASOCIADOS", {}).copy()
-        USUARIOS_CACHE = config.get("USUARIOS", {}).copy()
-
-        return config
+        return obtener_snapshot_configuracion().copia_configuracion()
 
     except Exception as e:
         logger.error(f"❌ Error al cargar configuración desde SQLite: {e}")
@@ -1882,7 +1762,7 @@ def cargar_configuracion():
         # Si hay caché viejo, usarlo
         if config_cache:
             logger.warning("⚠️ Usando caché antiguo de configuración")
-            return config_cache
+            return copy.deepcopy(config_cache)
 
         # Si no hay caché, crear configuración predeterminada
         logger.warning("⚠️ Creando configuración predeterminada")
@@ -1896,18 +1776,12 @@ def guardar_configuracion(config):
 
     MIGRADO A SQLite: Ya no guarda en config.json.
     """
-    global config_cache, last_config_load_time, LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, USUARIOS_CACHE
-
     try:
-        # Guardar en SQLite usando db_helpers
+        # Guardar en SQLite usando db_helpers (incrementa la versión)
         guardar_config_db(config)
 
-        # Actualizar caché
-        config_cache = config
-        last_config_load_time = time.time()
-        LINEAS_CREDITO_CACHE = config.get("LINEAS_CREDITO", {}).copy()
-        COSTOS_ASOCIADOS_CACHE = config.get("COSTOS_ASOCIADOS", {}).copy()
-        USUARIOS_CACHE = config.get("USUARIOS", {}).copy()
+        # Actualizar caché con el snapshot nuevo
+        sincronizar_configuracion()
 
         return True
 
@@ -3098,7 +2972,8 @@ def historial_simulaciones():
     try:
         from db_helpers import (
             resolve_visible_usernames,
-            obtener_simulaciones_por_asesores,
+            filtro_visibilidad_sql,
+            obtener_simulaciones_visibles,
         )
 
         username = session.get("username")
@@ -3107,23 +2982,15 @@ def historial_simulaciones():
         # Resolver qué usuarios puede ver
         scope_info = resolve_visible_usernames(username, permisos, "simulaciones")
         scope = scope_info["scope"]
-        usernames_visibles = scope_info.get("usernames_visibles")
-
-        # Obtener simulaciones según scope
-        if scope == "todos":
-            # Sin filtro - obtener todas
-            simulaciones = leer_simulaciones()  # Función correcta que carga todas
-        elif usernames_visibles:
-            # Filtrar por lista de usuarios
-            simulaciones = obtener_simulaciones_por_asesores(usernames_visibles)
-        else:
-            # Lista vacía = 0 resultados
-            simulaciones = []
 
         # Filtro por asesor específico (desde query string)
         filtro_asesor = request.args.get("asesor", "").strip()
-        if filtro_asesor and simulaciones:
-            simulaciones = [s for s in simulaciones if s.get("asesor") == filtro_asesor]
+
+        # Scope y asesor se filtran en SQLite (equipo vía CTE de asignaciones)
+        simulaciones = obtener_simulaciones_visibles(
+            filtro_visibilidad_sql(scope_info, username),
+            asesor=filtro_asesor or None,
+        )
 
         # Agrupar por cliente para estadísticas
         clientes_simulados = {}
@@ -3163,23 +3030,22 @@ def api_simulaciones_cliente(cedula):
     Respeta el scope del usuario.
     """
     try:
-        from db_helpers import resolve_visible_usernames
+        from db_helpers import (
+            resolve_visible_usernames,
+            filtro_visibilidad_sql,
+            obtener_simulaciones_visibles,
+        )
 
         username = session.get("username")
         permisos = obtener_permisos_usuario_actual()
 
         # Resolver scope
         scope_info = resolve_visible_usernames(username, permisos, "simulaciones")
-        usernames_visibles = scope_info.get("usernames_visibles")
-
-        # Obtener simulaciones del cliente
-        simulaciones = obtener_simulaciones_cliente(cedula)
 
-        # Filtrar si no tiene acceso a todos
-        if usernames_visibles is not None:
-            simulaciones = [
-                s for s in simulaciones if s.get("asesor") in usernames_visibles
-            ]
+        # Simulaciones del cliente dentro del scope (filtrado en SQLite)
+        simulaciones = obtener_simulaciones_visibles(
+            filtro_visibilidad_sql(scope_info, username), cedula=cedula
+        )
 
         return jsonify({"simulaciones": simulaciones, "total": len(simulaciones)}), 200
     except Exception as e:
@@ -3874,19 +3740,11 @@ def admin():
         return redirigir_a_pagina_permitida()
 
     try:
-        global LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, USUARIOS_CACHE, SEGUROS_CONFIG_CACHE, SCORING_CONFIG_CACHE
+        global SEGUROS_CONFIG_CACHE, SCORING_CONFIG_CACHE
 
-        # CORRECCIÓN 2025-12-23: SIEMPRE recargar desde DB para reflejar cambios
-        # Antes usaba "if not CACHE" que causaba datos desactualizados
-        config = cargar_configuracion()
-        LINEAS_CREDITO_CACHE = config["LINEAS_CREDITO"]
-        COSTOS_ASOCIADOS_CACHE = config["COSTOS_ASOCIADOS"]
-        USUARIOS_CACHE = config["USUARIOS"]
-
-        # SIEMPRE recargar seguros desde DB
+        # Las cachés ya reflejan la versión vigente (sincronizar_configuracion
+        # corre antes de cada request): no hace falta recargar desde DB
         SEGUROS_CONFIG_CACHE = cargar_configuracion_seguros()
-
-        # SIEMPRE recargar scoring desde DB
         SCORING_CONFIG_CACHE = cargar_configuracion_scoring()
 
         # Formatear costos
@@ -4095,12 +3953,6 @@ def actualizar_costos():
         config["COSTOS_ASOCIADOS"][tipo_credito] = nuevos_costos
 
         if guardar_configuracion(config):
-            # Invalidar cachés
-            global LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, config_cache, last_config_load_time
-            LINEAS_CREDITO_CACHE = None
-            COSTOS_ASOCIADOS_CACHE = None
-            config_cache = None
-            last_config_load_time = 0
             flash("Costos y aval actualizados correctamente")
         else:
             flash("Error al guardar configuración. Verifica permisos de escritura.")
@@ -4259,9 +4111,6 @@ def crear_usuario():
         }
 
         if guardar_configuracion(config):
-            # Invalidar caché para que el nuevo usuario sea visible
-            global USUARIOS_CACHE
-            USUARIOS_CACHE = config["USUARIOS"].copy()
             flash(
                 f"Usuario '{nombre_completo}' (@{username}) creado correctamente",
                 "success",
@@ -4456,8 +4305,7 @@ def crear_nueva_linea_credito():
         # ============================================
         try:
             # Obtener el ID de la línea recién creada
-            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
-            conn = sqlite3.connect(db_path)
+            conn = conectar_db()
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM lineas_credito WHERE nombre = ?", (nombre_linea,))
             linea_row = cursor.fetchone()
@@ -4680,13 +4528,6 @@ def editar_linea_credito():
         if guardar_configuracion(config):
             print("✅ Configuración guardada exitosamente")
 
-            # Invalidar caché para reflejar cambios inmediatamente
-            global config_cache, last_config_load_time, LINEAS_CREDITO_CACHE
-            config_cache = None
-            last_config_load_time = 0
-            LINEAS_CREDITO_CACHE = None
-            print("✅ Caché invalidado - próximas cargas verán cambios")
-
             flash(f"Línea de crédito actualizada exitosamente")
         else:
             print("❌ Error al guardar la configuración")
@@ -4757,13 +4598,8 @@ def eliminar_linea_credito():
         except Exception as e:
             print(f"⚠️ Error al actualizar scoring en eliminación: {str(e)}")
 
-        # Invalidar cachés para forzar recarga desde DB (CRÍTICO)
-        global LINEAS_CREDITO_CACHE, COSTOS_ASOCIADOS_CACHE, config_cache, last_config_load_time
-        LINEAS_CREDITO_CACHE = None
-        COSTOS_ASOCIADOS_CACHE = None
-        config_cache = None
-        last_config_load_time = 0
-        print("✅ Cachés invalidados")
+        # La eliminación incrementó la versión: tomar el snapshot nuevo (CRÍTICO)
+        sincronizar_configuracion()
 
         flash(f"Línea de crédito '{nombre_linea}' eliminada exitosamente")
         return redirect(url_for("admin") + "#TasasCredito")
@@ -4897,7 +4733,9 @@ def calcular_scoring():
         # Cargar configuración (global o por línea)
         SCORING_CONFIG_CACHE = cargar_configuracion_scoring(tipo_credito)
 
-        puntaje_minimo = SCORING_CONFIG_CACHE.get("puntaje_minimo_aprobacion", 20)
+        puntaje_minimo = SCORING_CONFIG_CACHE.get(
+            "puntaje_minimo_aprobacion", PUNTAJE_MINIMO_DEFECTO
+        )
 
         if SCORING_CONFIG_CACHE.get("escala_max") != 100:
             SCORING_CONFIG_CACHE["escala_max"] = 100
@@ -4916,80 +4754,16 @@ def calcular_scoring():
                 lineas_credito=LINEAS_CREDITO_CACHE,
             )
 
-        factores_rechazo = SCORING_CONFIG_CACHE.get("factores_rechazo_automatico", [])
-
         # ============================================================
-        # FUNCIONES HELPER PARA CÁLCULO DE PUNTOS
-        # (Movidas aquí para poder usarlas en pre-cálculo de score borderline)
+        # MODELO COMPILADO (rangos con bisect, pesos y niveles resueltos)
+        # Se reutiliza entre requests mientras no cambie la configuración
         # ============================================================
-        def obtener_puntos(criterio, valor):
-            """
-            Obtiene puntos de un criterio según su valor.
-            Soporta criterios normales (min/max) y composite (condicion).
-            """
-            try:
-                valor_numerico = float(valor)
-                rangos = criterio.get("rangos", [])
-
-                if not rangos:
-                    return 0
-
-                # Detectar si es criterio composite
-                es_composite = criterio.get("tipo_campo") == "composite"
-
-                if es_composite:
-                    # Criterios composite: buscar por condición
-                    # Por ahora, devolver puntos del primer rango
-                    # (La lógica completa de composite se implementará en BLOQUE 21)
-                    if rangos:
-                        return rangos[0].get("puntos", 0)
-                    return 0
-                else:
-                    # Criterios normales: buscar por min/max
-                    for rango in rangos:
-                        try:
-                            rango_min = float(rango.get("min", 0))
-                            rango_max = float(rango.get("max", 999999))
-                            puntos = rango.get("puntos", 0)
-
-                            if rango_min <= valor_numerico <= rango_max:
-                                return puntos
-                        except (ValueError, TypeError):
-                            continue
-
-                    return 0
-
-            except (ValueError, TypeError):
-                return 0
-
-        def obtener_descripcion(criterio, valor):
-            """
-            Obtiene descripción de un criterio según su valor.
-            Soporta criterios normales y composite.
-            """
-            try:
-                valor_numerico = float(valor)
-                es_composite = criterio.get("tipo_campo") == "composite"
-
-                if es_composite:
-                    # Composite: devolver primera descripción por ahora
-                    rangos = criterio.get("rangos", [])
-                    if rangos:
-                        return rangos[0].get("descripcion", f"Valor: {valor_numerico}")
-                    return f"Valor: {valor_numerico}"
-                else:
-                    # Normal: buscar por min/max
-                    for rango in criterio.get("rangos", []):
-                        rango_min = float(rango.get("min", 0))
-                        rango_max = float(rango.get("max", 999999))
-
-                        if rango_min <= valor_numerico <= rango_max:
-                            return rango.get("descripcion", f"Valor: {valor_numerico}")
-
-                    return f"Valor: {valor_numerico}"
-
-            except (ValueError, TypeError):
-                return f"Valor: {valor}"
+        modelo = obtener_modelo_scoring(tipo_credito)
+        if set(modelo.por_codigo) != set(criterios) or len(modelo.niveles) != len(
+            SCORING_CONFIG_CACHE.get("niveles_riesgo", [])
+        ):
+            # La configuración cambió entre ambas lecturas: compilar la cargada
+            modelo = compilar_modelo_scoring(SCORING_CONFIG_CACHE)
 
         # tipo_credito ya se obtuvo arriba en la línea 4790
         #  VALIDACIÓN DE EDAD DEL CLIENTE - ROBUSTA
@@ -5164,17 +4938,16 @@ def calcular_scoring():
         # Guardar en valores_criterios para evaluación de rechazo automático
         valores_criterios["monto_mora_telcos"] = monto_mora_telcos_num
 
-        # Obtener umbral de rechazo de scoring.json
-        umbral_mora_telcos = SCORING_CONFIG_CACHE.get(
-            "umbral_mora_telcos_rechazo", 200000
-        )
-
         # Verificar si supera el umbral → RECHAZO AUTOMÁTICO
+        # (regla compilada: solo Telcos Y monto > umbral_mora_telcos_rechazo)
         rechazo_automatico = None
-        if int(sector_mora) == 1 and monto_mora_telcos_num > umbral_mora_telcos:
-            monto_formateado = f"${monto_mora_telcos_num:,.0f}".replace(",", ".")
-            umbral_formateado = f"${umbral_mora_telcos:,.0f}".replace(",", ".")
-            rechazo_automatico = f"Mora en Telcos superior al límite: {monto_formateado} (máximo permitido: {umbral_formateado})"
+        regla_telcos = modelo.reglas_rechazo.evaluar(
+            valores_criterios, solo={CRITERIO_MORA_TELCOS}
+        )
+        if regla_telcos is not None:
+            rechazo_automatico = regla_telcos.mensaje_para(
+                formato_pesos(monto_mora_telcos_num), formato_pesos(regla_telcos.limite)
+            )
             print(f"🚫 RECHAZO AUTOMÁTICO: {rechazo_automatico}")
 
         # Si NO supera umbral: aplicar ajuste automático 50%
@@ -5278,15 +5051,8 @@ def calcular_scoring():
             print(f"🎯 PRE-CÁLCULO BORDERLINE: Iniciando cálculo preliminar de score")
 
             try:
-                # Calcular puntaje preliminar usando las funciones helper
-                puntaje_preliminar = 0.0
-
-                for criterio_id, valor in valores_criterios.items():
-                    if criterio_id in criterios:
-                        criterio = criterios[criterio_id]
-                        puntos = obtener_puntos(criterio, valor)
-                        peso_decimal = criterio["peso"] / 100
-                        puntaje_preliminar += puntos * peso_decimal
+                # Calcular puntaje preliminar con el modelo compilado
+                puntaje_preliminar = modelo.puntaje_total(valores_criterios)
 
                 print(
                     f"🎯 PRE-CÁLCULO BORDERLINE: puntaje_preliminar = {round(puntaje_preliminar, 2)}"
@@ -5330,94 +5096,30 @@ def calcular_scoring():
             f"🎯 DEBUG: Terminó evaluación DataCrédito comité, empezando factores rechazo"
         )
 
-        if not requiere_comite and factores_rechazo:
-            for factor in factores_rechazo:
-                criterio_config = factor.get("criterio", "")
-
-                # SALTAR evaluación de mora telcos (ya se maneja arriba con código personalizado)
-                if criterio_config == "monto_mora_telcos":
-                    continue
-
-                operador = factor.get("operador", ">=")
-                valor_limite = factor.get("valor_limite", factor.get("valor_minimo", 0))
-                mensaje_template = factor.get(
-                    "mensaje", f"Factor de rechazo: {criterio_config}"
-                )
-
-                if criterio_config in valores_criterios:
-                    valor_actual = valores_criterios[criterio_config]
-                    criterio_nombre = criterios.get(criterio_config, {}).get(
-                        "nombre", criterio_config
-                    )
-
-                    try:
-                        valor_actual_num = float(valor_actual)
-                        valor_limite_num = float(valor_limite)
-
-                        rechazar = False
-                        if operador == "<":
-                            rechazar = valor_actual_num < valor_limite_num
-                        elif operador == "<=":
-                            rechazar = valor_actual_num <= valor_limite_num
-                        elif operador == ">":
-                            rechazar = valor_actual_num > valor_limite_num
-                        elif operador == ">=":
-                            rechazar = valor_actual_num >= valor_limite_num
-
-                        # Excepción para créditos cerrados = 0
-                        if rechazar and criterio_config == "creditos_cerrados_exitosos":
-                            # Obtener otros indicadores de comportamiento crediticio
-                            cupo_total = float(
-                                valores_criterios.get("cupo_total_aprobado", 0)
-                            )
-                            historial_pagos = float(
-                                valores_criterios.get("historial_pagos", 0)
-                            )
-                            mora_reciente = float(
-                                valores_criterios.get("mora_reciente", 0)
-                            )
-
-                            # CASO ESPECIAL: Sin créditos cerrados PERO buen comportamiento en vigentes
-                            if (
-                                valor_actual_num == 0
-                                and cupo_total > 0
-                                and historial_pagos >= 10
-                                and mora_reciente == 0
-                            ):
-                                # NO rechazar automáticamente
-                                rechazar = False
-                                print(
-                                    f"⚠️ EXCEPCIÓN APLICADA: Cliente sin créditos cerrados pero con buen comportamiento"
-                                )
-                                print(f"   - Créditos vigentes: ${cupo_total:,.0f}")
-                                print(
-                                    f"   - Historial pagos: {historial_pagos} meses normales"
-                                )
-                                print(f"   - Mora reciente: {mora_reciente} días")
-
-                        if rechazar:
-                            rechazo_automatico = mensaje_template.replace(
-                                "{valor_actual}", str(valor_actual_num)
-                            )
-                            break
-
-                    except (ValueError, TypeError) as e:
-                        continue
-                else:
-                    continue
-
-        # (Funciones obtener_puntos y obtener_descripcion ya definidas al principio)
+        # Reglas compiladas del modelo (la mora en Telcos ya se evaluó arriba)
+        if not requiere_comite:
+            regla = modelo.reglas_rechazo.evaluar(
+                valores_criterios, excluir={CRITERIO_MORA_TELCOS}
+            )
+            if regla is not None:
+                valor_actual = valores_criterios.get(regla.criterio)
+                try:
+                    valor_actual = float(valor_actual)
+                except (ValueError, TypeError):
+                    pass
+                rechazo_automatico = regla.mensaje_para(valor_actual)
+                print(f"🚫 RECHAZO AUTOMÁTICO: {rechazo_automatico}")
 
         puntaje_total = 0.0
 
         for criterio_id, valor in valores_criterios.items():
             if criterio_id in criterios:
                 criterio = criterios[criterio_id]
+                criterio_compilado = modelo.por_codigo[criterio_id]
 
-                puntos = obtener_puntos(criterio, valor)
+                puntos = criterio_compilado.puntos_de(valor)
 
-                peso_decimal = criterio["peso"] / 100
-                puntaje_ponderado = puntos * peso_decimal
+                puntaje_ponderado = puntos * criterio_compilado.factor
                 puntaje_total += puntaje_ponderado
 
                 # FORMATEO AUTOMÁTICO POR tipo_campo DEL ADMIN
@@ -5480,57 +5182,32 @@ def calcular_scoring():
                     except:
                         valor_mostrar = str(valor)
 
-                # Calcular puntos máximos y mínimos ponderados para este criterio
-                rangos = criterio.get("rangos", [])
-                if rangos:
-                    max_puntos_for_criterion = max([r.get("puntos", 0) for r in rangos])
-                    min_puntos_for_criterion = min([r.get("puntos", 0) for r in rangos])
-                else:
-                    max_puntos_for_criterion = 0
-                    min_puntos_for_criterion = 0
-
+                # Puntos máximos y mínimos ponderados (precalculados en el modelo)
                 puntos_maximos_ponderados = (
-                    criterio["peso"] / 100
-                ) * max_puntos_for_criterion
+                    criterio_compilado.factor * criterio_compilado.puntos_maximos
+                )
                 puntos_minimos_ponderados = (
-                    criterio["peso"] / 100
-                ) * min_puntos_for_criterion
+                    criterio_compilado.factor * criterio_compilado.puntos_minimos
+                )
 
                 resultados[criterio_id] = {
                     "nombre": criterio.get("nombre", criterio_id),
                     "peso": criterio["peso"],
                     "valor": valor_mostrar,
-                    "descripcion": obtener_descripcion(criterio, valor),
+                    "descripcion": criterio_compilado.descripcion_de(valor),
                     "puntos_originales": puntos,
                     "puntos_ponderados": round(puntaje_ponderado, 1),
                     "puntos_maximos": round(puntos_maximos_ponderados, 1),
                     "puntos_minimos": round(puntos_minimos_ponderados, 1),
                 }
 
-        max_puntuacion_posible = 0
-        for criterio_id, criterio in criterios.items():
-            max_puntos = 0
-            for rango in criterio.get("rangos", []):
-                if rango.get("puntos", 0) > max_puntos:
-                    max_puntos = rango.get("puntos", 0)
-            max_puntuacion_posible += max_puntos * (criterio["peso"] / 100)
-
-        if max_puntuacion_posible > 0:
-            puntaje_escala_100 = (puntaje_total / max_puntuacion_posible) * 100
-        else:
-            puntaje_escala_100 = (
-                puntaje_total / SCORING_CONFIG_CACHE.get("escala_max", 100)
-            ) * 100
-
-        if puntaje_escala_100 > 100:
-            puntaje_escala_100 = 100
+        puntaje_escala_100 = modelo.escala_100(puntaje_total)
 
         niveles_riesgo = SCORING_CONFIG_CACHE.get("niveles_riesgo", [])
 
-        for nivel in niveles_riesgo:
-            if nivel["min"] <= puntaje_escala_100 <= nivel["max"]:
-                nivel_riesgo = nivel
-                break
+        indice_nivel = modelo.nivel_indice(puntaje_escala_100)
+        if indice_nivel >= 0:
+            nivel_riesgo = niveles_riesgo[indice_nivel]
 
         if nivel_riesgo is None and niveles_riesgo:
             nivel_riesgo = niveles_riesgo[0]
@@ -5652,6 +5329,21 @@ def calcular_scoring():
             "estado_comite": estado_comite,
             "timestamp": obtener_hora_colombia().isoformat(),
         }
+        # Cambios mínimos que llevarían a la aprobación o a un mejor nivel
+        try:
+            metas_mejora = explicar_mejoras_scoring(
+                valores_criterios, tipo_credito, modelo=modelo
+            )["metas"]
+            if rechazo_automatico and not rechazo_automatico.startswith(
+                PREFIJO_RECHAZO_PUNTAJE
+            ):
+                # Rechazo por factor: subir el puntaje no basta para aprobar
+                metas_mejora = [m for m in metas_mejora if m["tipo"] != "aprobacion"]
+            scoring_result["sugerencias_mejora"] = metas_mejora
+        except Exception as e:
+            logger.warning(f"No se pudieron calcular sugerencias de mejora: {e}")
+            scoring_result["sugerencias_mejora"] = []
+
         # Validaciones cruzadas automáticas
         alertas_sistema = []
 
@@ -5798,15 +5490,8 @@ def mis_casos_comite():
     username = session.get("username")
 
     try:
-        # MIGRADO A SQLite - Ya no usa evaluaciones_log.json
-        evaluaciones = leer_evaluaciones_db()
-
-        # Filtrar solo casos del asesor actual que fueron a comité
-        mis_casos = []
-        for ev in evaluaciones:
-            # Solo casos de este asesor que requieren/requirieron comité
-            if ev.get("asesor") == username and ev.get("origen") == "Comité":
-                mis_casos.append(ev)
+        # Solo casos de este asesor que requieren/requirieron comité
+        mis_casos = obtener_casos_comite_asesor(username)
 
         # Ordenar: Nuevos primero, luego pendientes, luego vistos (más recientes primero)
         def ordenar_casos(caso):
@@ -5880,15 +5565,71 @@ def mis_casos_comite():
         return redirect(url_for("simulador_asesor"))
 
 
+def _respuesta_sin_cambios(etag):
+    """304 para un polling cuyo ETag sigue vigente."""
+    response = make_response("", 304)
+    response.headers["ETag"] = etag
+    return response
+
+
+def _formatear_caso_asesor(ev):
+    """Fila de la bandeja del asesor con los datos que usa el polling."""
+    estado_comite = ev.get("estado_comite", "pending")
+    visto = ev.get("visto_por_asesor", False)
+
+    # Determinar estado visual
+    if estado_comite in ["approved", "rejected"] and not visto:
+        estado_visual = "nuevos"
+    elif estado_comite == "approved":
+        estado_visual = "aprobados"
+    elif estado_comite == "rejected":
+        estado_visual = "rechazados"
+    else:
+        estado_visual = "pendientes"
+
+    # Obtener admin que tomó la decisión
+    decision_admin = ev.get("decision_admin", {})
+    admin_nombre = decision_admin.get("admin", "-") if decision_admin else "-"
+
+    # Obtener score
+    resultado = ev.get("resultado", {})
+    score = resultado.get("score", "N/A") if isinstance(resultado, dict) else "N/A"
+
+    # CORREGIDO: Incluir TODOS los datos necesarios para crear fila nueva
+    return {
+        "timestamp": ev.get("timestamp"),
+        "estado_comite": estado_comite,
+        "estado_visual": estado_visual,
+        "visto": visto,
+        # Datos adicionales para crear fila nueva en polling
+        "cliente": ev.get("cliente") or ev.get("nombre_cliente") or "Sin nombre",
+        "cedula": ev.get("cedula", ""),
+        "monto": ev.get("monto_solicitado", 0),
+        "score": score,
+        "admin": admin_nombre,
+        "fecha_envio": ev.get("fecha_envio_comite") or ev.get("timestamp"),
+        "fecha_decision": (
+            decision_admin.get("timestamp") if decision_admin else None
+        ),
+        "nivel_riesgo": ev.get("nivel_riesgo", "N/A"),
+    }
+
+
 @app.route("/asesor/api/casos-comite/cambios")
 @no_cache_and_check_session
 def verificar_cambios_casos():
     """
     FASE 3C: Endpoint para polling - verifica si hay cambios en los casos del asesor
-    Retorna { casos: [...], badge_count: N }
+    Retorna { casos: [...], eliminados: [timestamps], badge_count: N, cursor: seq }
 
     CORREGIDO 2025-12-18: Ahora devuelve datos completos para crear filas nuevas
     cuando el polling detecta casos que no existen en la tabla.
+
+    Con ?cursor=<seq> (el último recibido) solo devuelve los casos que
+    cambiaron desde entonces, y 304 si no cambió nada (feed de cambios en
+    db_helpers_cambios). Sin cursor, o si es demasiado antiguo, devuelve la
+    lista completa con incremental=False. Los casos borrados desde el cursor
+    llegan en `eliminados` (ya no están en la tabla).
     """
     if not session.get("autorizado"):
         return jsonify({"error": "No autorizado"}), 401
@@ -5896,72 +5637,62 @@ def verificar_cambios_casos():
     username = session.get("username")
 
     try:
-        # MIGRADO A SQLite - usa leer_evaluaciones_db()
-        evaluaciones = leer_evaluaciones_db()
-
-        # Retornar lista de casos con su estado actual Y datos completos
-        casos_actualizados = []
-        nuevos_sin_revisar = 0
-
-        for ev in evaluaciones:
-            if ev.get("asesor") == username and ev.get("origen") == "Comité":
-                # Calcular estado
-                estado_comite = ev.get("estado_comite", "pending")
-                visto = ev.get("visto_por_asesor", False)
-
-                # Contar nuevos sin revisar
-                if estado_comite in ["approved", "rejected"] and not visto:
-                    nuevos_sin_revisar += 1
-
-                # Determinar estado visual
-                if estado_comite in ["approved", "rejected"] and not visto:
-                    estado_visual = "nuevos"
-                elif estado_comite == "approved":
-                    estado_visual = "aprobados"
-                elif estado_comite == "rejected":
-                    estado_visual = "rechazados"
-                else:
-                    estado_visual = "pendientes"
-
-                # Obtener admin que tomó la decisión
-                decision_admin = ev.get("decision_admin", {})
-                admin_nombre = (
-                    decision_admin.get("admin", "-") if decision_admin else "-"
-                )
-
-                # Obtener score
-                resultado = ev.get("resultado", {})
-                score = (
-                    resultado.get("score", "N/A")
-                    if isinstance(resultado, dict)
-                    else "N/A"
-                )
+        desde = request.args.get("cursor", type=int)
+        cursor_feed = cursor_actual_feed()
+        etag = f'W/"casos-{username}-{cursor_feed}"'
+        if desde == cursor_feed or request.headers.get("If-None-Match") == etag:
+            return _respuesta_sin_cambios(etag)
+
+        cambios = (
+            obtener_cambios_desde(desde, asesor=username)
+            if desde is not None
+            else {"eventos": None}
+        )
 
-                # CORREGIDO: Incluir TODOS los datos necesarios para crear fila nueva
-                casos_actualizados.append(
-                    {
-                        "timestamp": ev.get("timestamp"),
-                        "estado_comite": estado_comite,
-                        "estado_visual": estado_visual,
-                        "visto": visto,
-                        # Datos adicionales para crear fila nueva en polling
-                        "cliente": ev.get("cliente")
-                        or ev.get("nombre_cliente")
-                        or "Sin nombre",
-                        "cedula": ev.get("cedula", ""),
-                        "monto": ev.get("monto_solicitado", 0),
-                        "score": score,
-                        "admin": admin_nombre,
-                        "fecha_envio": ev.get("fecha_envio_comite")
-                        or ev.get("timestamp"),
-                        "fecha_decision": (
-                            decision_admin.get("timestamp") if decision_admin else None
-                        ),
-                        "nivel_riesgo": ev.get("nivel_riesgo", "N/A"),
-                    }
-                )
+        if cambios["eventos"] is None:
+            # Lista completa (primera carga o cursor fuera del anillo)
+            casos_actualizados = [
+                _formatear_caso_asesor(ev)
+                for ev in obtener_casos_comite_asesor(username)
+            ]
+            nuevos_sin_revisar = sum(
+                1 for c in casos_actualizados if c["estado_visual"] == "nuevos"
+            )
+            eliminados = []
+            incremental = False
+        else:
+            eliminados = [
+                ev["timestamp"]
+                for ev in cambios["eventos"]
+                if ev["operacion"] == "delete"
+            ]
+            ids = {
+                ev["evaluacion_id"]
+                for ev in cambios["eventos"]
+                if ev["operacion"] != "delete"
+            }
+            casos_actualizados = (
+                [
+                    _formatear_caso_asesor(ev)
+                    for ev in obtener_casos_comite_asesor(username, ids=ids)
+                ]
+                if ids
+                else []
+            )
+            nuevos_sin_revisar = contar_casos_nuevos_asesor(username)
+            incremental = True
 
-        return jsonify({"casos": casos_actualizados, "badge_count": nuevos_sin_revisar})
+        response = jsonify(
+            {
+                "casos": casos_actualizados,
+                "eliminados": eliminados,
+                "badge_count": nuevos_sin_revisar,
+                "cursor": cursor_feed,
+                "incremental": incremental,
+            }
+        )
+        response.headers["ETag"] = etag
+        return response
 
     except Exception as e:
         print(f"❌ Error en verificar_cambios_casos: {str(e)}")
@@ -5971,6 +5702,129 @@ def verificar_cambios_casos():
         return jsonify({"error": str(e)}), 500
 
 
+# Eventos SSE que ve el comité aunque el caso no sea de su equipo
+EVENTOS_SSE_COMITE = (
+    "caso_enviado",
+    "caso_aprobado",
+    "caso_rechazado",
+    "caso_desembolsado",
+    "caso_eliminado",
+)
+
+# Milisegundos que espera EventSource antes de reconectar
+SSE_RETRY_MS = 3000
+
+
+def _evento_sse(seq, tipo, datos):
+    return f"id: {seq}\nevent: {tipo}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+@app.route("/api/eventos/stream")
+@no_cache_and_check_session
+def stream_eventos():
+    """
+    Canal Server-Sent Events con los cambios de casos (enviado a comité,
+    aprobado, rechazado, desembolsado, eliminado) y el contador de casos nuevos del
+    asesor. Reemplaza el polling cada 10-15 segundos.
+
+    Los eventos salen del feed de cambios (db_helpers_cambios) y se
+    filtran con las mismas reglas que resolve_visible_usernames: casos
+    propios, del equipo o todos; el comité recibe además los de comité.
+    Al reconectar, EventSource manda Last-Event-ID y se reenvía lo
+    pendiente desde el anillo; si ya no está, llega un evento 'recargar'.
+
+    Cada conexión se cierra tras DURACION_MAX_SSE_S para que al reconectar
+    se vuelvan a resolver permisos y visibilidad. Con MAX_SUSCRIPTORES_SSE
+    conexiones abiertas (la mitad de los hilos del proceso) se responde 503
+    y el cliente sigue con polling.
+
+    Desactivado salvo con LOANSI_SSE=1 (SSE_HABILITADO): responde 204, que
+    EventSource toma como definitivo (no reconecta).
+    """
+    if not SSE_HABILITADO:
+        return "", 204
+
+    from db_helpers import resolve_visible_usernames, obtener_jerarquia_asignaciones
+
+    username = session.get("username")
+    permisos = obtener_permisos_usuario_actual()
+    visibilidad = resolve_visible_usernames(username, permisos, "evaluaciones")
+    es_comite = any(
+        p in permisos
+        for p in ["com_ver_pendientes", "com_ver_todos", "com_aprobar", "com_rechazar"]
+    )
+    ultimo = request.headers.get("Last-Event-ID", type=int)
+    if ultimo is None:
+        ultimo = request.args.get("ultimo", type=int)
+
+    def es_visible(ev, equipo):
+        if ev["asesor"] == username or visibilidad["scope"] == "todos":
+            return True
+        if es_comite and ev["tipo"] in EVENTOS_SSE_COMITE:
+            return True
+        return ev["asesor"] in equipo
+
+    id_suscriptor = suscribir(username)
+    if id_suscriptor is None:
+        print(f"⚠️ SSE: límite de conexiones alcanzado, {username} sigue con polling")
+        return (
+            jsonify({"error": "Demasiadas conexiones de eventos"}),
+            503,
+            {"Retry-After": str(DURACION_MAX_SSE_S)},
+        )
+
+    def generar():
+        fin = time.monotonic() + DURACION_MAX_SSE_S
+        desde = ultimo if ultimo is not None else cursor_actual_feed()
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                # EventSource reconecta con Last-Event-ID tras SSE_RETRY_MS
+                return
+            cambios = esperar_cambios(desde, timeout=min(LATIDO_SSE_S, restante))
+            if cambios["eventos"] is None:
+                # Last-Event-ID fuera del anillo: el cliente recarga todo
+                yield _evento_sse(cambios["cursor"], "recargar", {})
+            elif not cambios["eventos"]:
+                yield ": latido\n\n"
+            else:
+                equipo = (
+                    set(obtener_jerarquia_asignaciones().equipo(username))
+                    if visibilidad["scope"] == "equipo"
+                    else set()
+                )
+                propios = False
+                for ev in cambios["eventos"]:
+                    propios = propios or ev["asesor"] == username
+                    if es_visible(ev, equipo):
+                        yield _evento_sse(
+                            ev["seq"],
+                            ev["tipo"],
+                            {
+                                "timestamp": ev["timestamp"],
+                                "asesor": ev["asesor"],
+                                "estado_comite": ev["estado_comite"],
+                            },
+                        )
+                if propios:
+                    yield _evento_sse(
+                        cambios["cursor"],
+                        "badge",
+                        {"count": contar_casos_nuevos_asesor(username)},
+                    )
+            desde = cambios["cursor"]
+
+    respuesta = Response(
+        generar(),
+        mimetype="text/event-stream",
+        headers={"X-Accel-Buffering": "no"},
+    )
+    # También si el cliente se va antes de que arranque el generador
+    respuesta.call_on_close(lambda: desuscribir(id_suscriptor))
+    return respuesta
+
+
 @app.route("/asesor/marcar-caso-visto/<timestamp>", methods=["POST"])
 @no_cache_and_check_session
 def marcar_caso_visto(timestamp):
@@ -5983,32 +5837,15 @@ def marcar_caso_visto(timestamp):
     username = session.get("username")
 
     try:
-        # MIGRADO A SQLite - Ya no usa evaluaciones_log.json
-        evaluaciones = leer_evaluaciones_db()
-
-        # Buscar el caso y marcarlo como visto
-        caso_encontrado = None
-        for ev in evaluaciones:
-            if ev.get("timestamp") == timestamp and ev.get("asesor") == username:
-                ev["visto_por_asesor"] = True
-                ev["fecha_visto_asesor"] = obtener_hora_colombia().isoformat()
-                caso_encontrado = ev
-                break
-
-        if not caso_encontrado:
+        # Un solo UPDATE (filtra también por asesor dueño del caso)
+        actualizado = marcar_caso_visto_asesor(
+            timestamp, username, obtener_hora_colombia().isoformat()
+        )
+        if not actualizado:
             return jsonify({"error": "Caso no encontrado"}), 404
 
-        # MIGRADO A SQLite - Guardar solo el caso modificado
-        actualizar_evaluacion_db(caso_encontrado)
-
         # Calcular nuevo badge count
-        nuevos_sin_revisar = sum(
-            1
-            for c in evaluaciones
-            if c.get("asesor") == username
-            and c.get("estado_comite") in ["approved", "rejected"]
-            and not c.get("visto_por_asesor")
-        )
+        nuevos_sin_revisar = contar_casos_nuevos_asesor(username)
 
         return jsonify({"success": True, "nuevos_sin_revisar": nuevos_sin_revisar})
 
@@ -6029,19 +5866,17 @@ def badge_count():
     username = session.get("username")
 
     try:
-        # MIGRADO A SQLite - Ya no usa evaluaciones_log.json
-        evaluaciones = leer_evaluaciones_db()
+        # Sin cambios en el feed desde la última consulta: 304
+        etag = f'W/"badge-{username}-{cursor_actual_feed()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return _respuesta_sin_cambios(etag)
 
-        # Contar casos nuevos sin revisar
-        count = sum(
-            1
-            for c in evaluaciones
-            if c.get("asesor") == username
-            and c.get("estado_comite") in ["approved", "rejected"]
-            and not c.get("visto_por_asesor")
-        )
+        # Contar casos nuevos sin revisar (COUNT sobre índice por asesor)
+        count = contar_casos_nuevos_asesor(username)
 
-        return jsonify({"count": count})
+        response = jsonify({"count": count})
+        response.headers["ETag"] = etag
+        return response
 
     except:
         return jsonify({"count": 0})
@@ -6133,10 +5968,12 @@ def historial_evaluaciones():
         per_page = 50
 
     try:
-        logs = leer_evaluaciones_db()
-
         # RBAC: propio / equipo / todos + asignaciones
-        from db_helpers import resolve_visible_usernames
+        from db_helpers import (
+            resolve_visible_usernames,
+            filtro_visibilidad_sql,
+            obtener_historial_evaluaciones,
+        )
 
         username_actual = session.get("username")
         permisos_actuales = obtener_permisos_usuario_actual()
@@ -6148,35 +5985,14 @@ def historial_evaluaciones():
             flash("No tienes permiso para ver historial de evaluaciones", "warning")
             return redirect(url_for("dashboard"))
 
-        logs_scope = logs
-        if vis.get("scope") != "todos":
-            visibles = set(vis.get("usernames_visibles", []) or [])
-            # Incluir también las propias evaluaciones del usuario
-            visibles.add(username_actual)
-            logs_scope = [log for log in logs if log.get("asesor") in visibles]
+        # Alcance como subconsulta SQL; incluye también las propias evaluaciones
+        alcance_sql = filtro_visibilidad_sql(vis, username_actual, incluir_propio=True)
 
-        # Filtros (GET): asesor + fechas
+        # Filtros (GET): asesor + fechas + resultado
         filtro_asesor = (request.args.get("asesor") or "").strip()
         filtro_desde = (request.args.get("desde") or "").strip()
         filtro_hasta = (request.args.get("hasta") or "").strip()
 
-        # Lista de asesores disponibles para el filtro (solo los que puede ver)
-        asesores_disponibles = sorted(
-            {log.get("asesor") for log in logs_scope if log.get("asesor")}
-        )
-
-        logs = logs_scope
-        if filtro_asesor:
-            logs = [log for log in logs if log.get("asesor") == filtro_asesor]
-        if filtro_desde:
-            logs = [
-                log for log in logs if (log.get("timestamp", "")[:10] >= filtro_desde)
-            ]
-        if filtro_hasta:
-            logs = [
-                log for log in logs if (log.get("timestamp", "")[:10] <= filtro_hasta)
-            ]
-
         filtros = {
             "asesor": filtro_asesor,
             "desde": filtro_desde,
@@ -6184,37 +6000,27 @@ def historial_evaluaciones():
             "resultado": request.args.get("resultado", ""),
         }
 
-        # Calcular paginación
-        total_logs = len(logs)
-        total_pages = (total_logs + per_page - 1) // per_page
-
-        if page < 1:
-            page = 1
-        elif page > total_pages and total_pages > 0:
-            page = total_pages
-
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        logs_pagina = logs[start_idx:end_idx]
+        # Filtrado, conteos y paginación se resuelven en SQLite
+        historial = obtener_historial_evaluaciones(
+            alcance_sql=alcance_sql,
+            asesor=filtro_asesor or None,
+            desde=filtro_desde or None,
+            hasta=filtro_hasta or None,
+            resultado=filtros["resultado"] or None,
+            page=page,
+            per_page=per_page,
+            cursor_token=request.args.get("cursor") or None,
+        )
 
-        # Estadísticas
-        total = len(logs)
-        aprobados = sum(1 for log in logs if log.get("resultado", {}).get("aprobado"))
-        rechazados = total - aprobados
-        tasa_aprobacion = (aprobados / total * 100) if total > 0 else 0
+        logs_pagina = historial["evaluaciones"]
+        stats = historial["stats"]
+        asesores_disponibles = historial["asesores_disponibles"]
+        total_logs = historial["total_registros"]
+        total_pages = historial["total_pages"]
+        page = historial["page"]
 
-        por_asesor = {}
-        for log in logs:
-            asesor = log.get("asesor", "desconocido")
-            por_asesor[asesor] = por_asesor.get(asesor, 0) + 1
-
-        stats = {
-            "total": total,
-            "aprobados": aprobados,
-            "rechazados": rechazados,
-            "tasa_aprobacion": round(tasa_aprobacion, 1),
-            "por_asesor": por_asesor,
-        }
+        # Con cursor la posición la calcula la consulta (no hay OFFSET)
+        start_idx = historial["inicio"]
 
         pagination = {
             "page": page,
@@ -6222,24 +6028,12 @@ def historial_evaluaciones():
             "total_logs": total_logs,
             "total_pages": total_pages,
             "start_idx": start_idx + 1,
-            "end_idx": min(end_idx, total_logs),
+            "end_idx": start_idx + len(logs_pagina),
             "has_prev": page > 1,
-            "has_next": page < total_pages,
+            "has_next": historial["next_cursor"] is not None,
+            "next_cursor": historial["next_cursor"],
         }
 
-        # Filtrar por resultado si se especifica
-        filtro_resultado = filtros.get("resultado", "")
-        if filtro_resultado == "aprobado":
-            logs_pagina = [
-                l for l in logs_pagina if l.get("resultado", {}).get("aprobado") == True
-            ]
-        elif filtro_resultado == "rechazado":
-            logs_pagina = [
-                l
-                for l in logs_pagina
-                if l.get("resultado", {}).get("aprobado") == False
-            ]
-
         # Determinar URL de volver según rol
         rol_actual = session.get("rol", "asesor")
         if rol_actual in ["admin", "admin_tecnico"]:
@@ -6368,16 +6162,21 @@ def limpiar_historial():
         # Crear backup de la base de datos antes de eliminar
         db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loansi.db")
         if os.path.exists(db_path):
+            # Volcar el WAL para que la copia incluya los cambios recientes
+            checkpoint_wal()
             backup_result = crear_backup_con_rotacion(db_path, prefijo="db_backup")
             print(f"📦 Backup de DB creado: {backup_result}")
 
         # Eliminar todos los registros de evaluaciones
-        conn = sqlite3.connect(db_path)
+        conn = conectar_db()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM evaluaciones")
         registros_eliminados = cursor.rowcount
         conn.commit()
         conn.close()
+        invalidar_resumen_navbar()
+        # Los triggers dejaron un 'caso_eliminado' por fila en el feed
+        notificar_cambios()
 
         print(
             f"✅ Historial limpiado exitosamente ({registros_eliminados} registros eliminados)"
@@ -6433,31 +6232,22 @@ def comite_credito():
         comite_config = config.get("COMITE_CREDITO", {})
 
         casos_pendientes = []
-        decisiones_recientes = []
 
-        # Leer desde SQLite
-        logs = leer_evaluaciones_db()
+        # Casos pendientes de comité
+        for log in obtener_cola_comite():
+            timestamp = parsear_timestamp_naive(log["timestamp"])
+            tiempo_espera_horas = (
+                obtener_hora_colombia_naive() - timestamp
+            ).total_seconds() / 3600
 
-        # Filtrar casos pendientes de comité
-        for log in logs:
-            if log.get("estado_comite") == "pending":
-                timestamp = parsear_timestamp_naive(log["timestamp"])
-                tiempo_espera_horas = (
-                    obtener_hora_colombia_naive() - timestamp
-                ).total_seconds() / 3600
-
-                log["tiempo_espera_horas"] = int(tiempo_espera_horas)
-                log["alerta_tiempo"] = tiempo_espera_horas > comite_config.get(
-                    "alertar_sin_decision_horas", 24
-                )
-                casos_pendientes.append(log)
+            log["tiempo_espera_horas"] = int(tiempo_espera_horas)
+            log["alerta_tiempo"] = tiempo_espera_horas > comite_config.get(
+                "alertar_sin_decision_horas", 24
+            )
+            casos_pendientes.append(log)
 
-        # Filtrar decisiones recientes (últimas 20)
-        for log in logs:
-            if log.get("estado_comite") in ["approved", "rejected"]:
-                decisiones_recientes.append(log)
-                if len(decisiones_recientes) >= 20:
-                    break
+        # Decisiones recientes (últimas 20)
+        decisiones_recientes = obtener_decisiones_recientes_comite(20)
 
         stats = {
             "pendientes": len(casos_pendientes),
@@ -6588,6 +6378,9 @@ def api_comite_pendientes():
     """
     API endpoint para obtener contador de casos pendientes
     Usado por JavaScript para auto-actualización cada 10 segundos
+
+    Con ?cursor=<seq> (el último recibido) devuelve en `eliminados` los
+    pendientes borrados desde entonces (feed de cambios en db_helpers_cambios).
     """
     try:
         # Permitir acceso a roles con permisos de comité
@@ -6596,26 +6389,40 @@ def api_comite_pendientes():
         ):
             return jsonify({"success": False, "error": "No autorizado"}), 403
 
-        # MIGRADO A SQLite - Ya no usa evaluaciones_log.json
-        evaluaciones = leer_evaluaciones_db()
+        # Sin cambios en el feed (ni cambio de hora, que mueve las alertas
+        # de 24 h) desde la última consulta: 304
+        ahora = obtener_hora_colombia_naive()
+        cursor_feed = cursor_actual_feed()
+        etag = f'W/"pendientes-{cursor_feed}-{ahora:%Y%m%d%H}"'
+        if request.headers.get("If-None-Match") == etag:
+            return _respuesta_sin_cambios(etag)
+
+        # Pendientes borrados desde el cursor que envía el cliente
+        eliminados = []
+        desde = request.args.get("cursor", type=int)
+        if desde is not None:
+            cambios = obtener_cambios_desde(desde)
+            eliminados = [
+                ev["timestamp"]
+                for ev in cambios["eventos"] or []
+                if ev["operacion"] == "delete" and ev["estado_comite"] == "pending"
+            ]
+
+        # Solo timestamps de pendientes (endpoint consultado cada 10 segundos)
+        timestamps_pendientes = listar_timestamps_pendientes_comite()
 
         # Calcular estadísticas
-        ahora = obtener_hora_colombia_naive()
-        casos_pendientes = []
         con_alerta = 0
 
-        for eval in evaluaciones:
-            if eval.get("estado_comite") == "pending":
-                casos_pendientes.append(eval)
-
-                # Verificar si tiene más de 24 horas
-                fecha_eval = parsear_timestamp_naive(eval["timestamp"])
-                horas_espera = (ahora - fecha_eval).total_seconds() / 3600
-                if horas_espera > 24:
-                    con_alerta += 1
+        for timestamp_caso in timestamps_pendientes:
+            # Verificar si tiene más de 24 horas
+            fecha_eval = parsear_timestamp_naive(timestamp_caso)
+            horas_espera = (ahora - fecha_eval).total_seconds() / 3600
+            if horas_espera > 24:
+                con_alerta += 1
 
         # Detectar si hay nuevos casos comparando con sesión
-        casos_pendientes_actuales = len(casos_pendientes)
+        casos_pendientes_actuales = len(timestamps_pendientes)
         casos_pendientes_previos = session.get("casos_pendientes_count", 0)
 
         hay_nuevos = casos_pendientes_actuales > casos_pendientes_previos
@@ -6623,14 +6430,18 @@ def api_comite_pendientes():
         # Actualizar contador en sesión
         session["casos_pendientes_count"] = casos_pendientes_actuales
 
-        return jsonify(
+        response = jsonify(
             {
                 "success": True,
                 "pendientes": casos_pendientes_actuales,
                 "con_alerta": con_alerta,
                 "hay_nuevos": hay_nuevos,
+                "eliminados": eliminados,
+                "cursor": cursor_feed,
             }
         )
+        response.headers["ETag"] = etag
+        return response
 
     except Exception as e:
         print(f"❌ Error en API pendientes: {str(e)}")
@@ -6670,14 +6481,8 @@ def detalle_evaluacion(timestamp):
         )
 
     try:
-        evaluaciones = leer_evaluaciones()
-        evaluacion = None
-
-        # Buscar el caso
-        for ev in evaluaciones:
-            if ev.get("timestamp") == timestamp:
-                evaluacion = ev
-                break
+        # Buscar el caso (lookup por índice UNIQUE de timestamp)
+        evaluacion = obtener_evaluacion_completa(timestamp)
 
         if not evaluacion:
             print(f"❌ CASO NO ENCONTRADO: {timestamp}")
@@ -6846,20 +6651,9 @@ def aprobar_comite():
                 400,
             )
 
-        # MIGRADO A SQLite - Ya no usa evaluaciones_log.json
+        # MIGRADO A SQLite - Lookup puntual del caso por timestamp
         try:
-            evaluaciones = leer_evaluaciones_db()
-            if not evaluaciones:
-                print("❌ aprobar_comite(): No se pudieron cargar evaluaciones")
-                return (
-                    jsonify(
-                        {
-                            "success": False,
-                            "error": "No se pudieron cargar evaluaciones",
-                        }
-                    ),
-                    500,
-                )
+            caso = obtener_evaluacion_completa(str(timestamp))
         except Exception as e:
             print(f"❌ aprobar_comite(): Error al cargar desde SQLite: {e}")
             return (
@@ -6867,13 +6661,6 @@ def aprobar_comite():
                 500,
             )
 
-        # Buscar el caso por timestamp
-        caso = None
-        for eval_data in evaluaciones:
-            if str(eval_data.get("timestamp")) == str(timestamp):
-                caso = eval_data
-                break
-
         if not caso:
             print(f"❌ aprobar_comite(): Caso con timestamp {timestamp} no encontrado")
             return jsonify({"success": False, "error": "Caso no encontrado"}), 404
@@ -7422,9 +7209,8 @@ def actualizar_umbral_mora_telcos():
         guardar_scoring_db(scoring_data)
 
         # CORRECCIÓN 2025-12-23: Limpiar TODOS los cachés de scoring
-        global scoring_cache, last_scoring_load_time, SCORING_CONFIG_CACHE
-        scoring_cache = None
-        last_scoring_load_time = 0
+        global SCORING_CONFIG_CACHE
+        sincronizar_configuracion()
         SCORING_CONFIG_CACHE = None  # ← LÍNEA CRÍTICA AGREGADA
 
         print(f"✅ Umbral mora telcos actualizado: {nuevo_umbral}")
@@ -7900,9 +7686,9 @@ def api_db_diagnostics():
 
     try:
         from database import (
-            conectar_db,
             contar_registros_tabla,
             verificar_integridad_db,
+            estadisticas_conexiones,
             DB_PATH,
         )
 
@@ -7921,7 +7707,12 @@ def api_db_diagnostics():
             },
             "cache_config": config_cache is not None,
             "cache_scoring": scoring_cache is not None,
+            "version_configuracion": (
+                _snapshot_sincronizado.version if _snapshot_sincronizado else None
+            ),
             "sqlite_debug": SQLITE_DEBUG,
+            "pool_conexiones": estadisticas_conexiones(),
+            "auditoria": obtener_metricas_auditoria(),
         }
 
         conn.close()
@@ -7933,6 +7724,36 @@ def api_db_diagnostics():
         return jsonify({"error": str(e), "timestamp": datetime.now().isoformat()}), 500
 
 
+@app.route("/api/auditoria", methods=["GET"])
+@no_cache_and_check_session
+@requiere_alguno_de("aud_ver_propio", "aud_ver_equipo", "aud_ver_todos")
+def api_auditoria():
+    """
+    Consulta paginada de la auditoría según el alcance del usuario
+    (aud_ver_propio / aud_ver_equipo / aud_ver_todos).
+
+    Query params: usuario, accion, desde, hasta (UTC), page, per_page
+    """
+    try:
+        username = session.get("username")
+        vis = resolve_visible_usernames(
+            username, obtener_permisos_usuario_actual(), "auditoria"
+        )
+        resultado = consultar_auditoria(
+            filtro_visibilidad_sql(vis, username, columna="usuario", incluir_propio=True),
+            usuario=request.args.get("usuario", "").strip() or None,
+            accion=request.args.get("accion", "").strip() or None,
+            desde=request.args.get("desde", "").strip() or None,
+            hasta=request.args.get("hasta", "").strip() or None,
+            pagina=request.args.get("page", 1, type=int),
+            por_pagina=request.args.get("per_page", 50, type=int),
+        )
+        return jsonify({"success": True, **resultado})
+    except Exception as e:
+        logger.error(f"Error consultando auditoría: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 # -----------------------------------------------------------
 # API: Obtener líneas de crédito con info de scoring
 # -----------------------------------------------------------
@@ -8414,6 +8235,199 @@ def api_scoring_invalidar_cache():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# -----------------------------------------------------------
+# API: Scoring en lote (muchos solicitantes por llamada)
+# -----------------------------------------------------------
+@app.route("/api/scoring/lote", methods=["POST"])
+@no_cache_and_check_session
+@requiere_permiso("sco_ejecutar")
+def api_scoring_lote():
+    """
+    Evalúa un lote de solicitantes con el modelo de una línea.
+
+    JSON: {"linea_credito": "LoansiFlex",
+           "columnas": {"codigo_criterio": [valor, ...], ...}}
+    o, por filas, {"linea_credito": ..., "solicitantes": [{codigo: valor}, ...]}
+    """
+    try:
+        # Validar CSRF
+        csrf_token = request.headers.get("X-CSRFToken") or request.form.get(
+            "csrf_token"
+        )
+        if not csrf_token:
+            return jsonify({"success": False, "error": "Token CSRF requerido"}), 403
+
+        data = request.get_json(silent=True) or {}
+        columnas = data.get("columnas")
+        if columnas is None and isinstance(data.get("solicitantes"), list):
+            columnas = filas_a_columnas(data["solicitantes"])
+        if not isinstance(columnas, dict) or not all(
+            isinstance(v, list) for v in columnas.values()
+        ):
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": "Debe enviar 'columnas' (listas por criterio) o 'solicitantes'",
+                    }
+                ),
+                400,
+            )
+
+        try:
+            resultado = calcular_scoring_lote(columnas, data.get("linea_credito"))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify({"success": True, **resultado})
+    except Exception as e:
+        logger.error(f"Error en scoring en lote: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# -----------------------------------------------------------
+# API: Un solicitante contra todas las líneas de crédito
+# -----------------------------------------------------------
+@app.route("/api/scoring/todas-lineas", methods=["POST"])
+@no_cache_and_check_session
+@requiere_permiso("sco_ejecutar")
+def api_scoring_todas_lineas():
+    """
+    Evalúa un solicitante con el modelo de cada línea activa y devuelve las
+    ofertas ordenadas de mejor a peor.
+
+    JSON: {"valores": {"codigo_criterio": valor, ...},
+           "monto_solicitado": 3000000}  (monto opcional)
+    """
+    try:
+        # Validar CSRF
+        csrf_token = request.headers.get("X-CSRFToken") or request.form.get(
+            "csrf_token"
+        )
+        if not csrf_token:
+            return jsonify({"success": False, "error": "Token CSRF requerido"}), 403
+
+        data = request.get_json(silent=True) or {}
+        valores = data.get("valores")
+        if not isinstance(valores, dict):
+            return (
+                jsonify({"success": False, "error": "Debe enviar 'valores' por criterio"}),
+                400,
+            )
+
+        resultado = calcular_scoring_todas_lineas(valores, data.get("monto_solicitado"))
+        return jsonify({"success": True, **resultado})
+    except Exception as e:
+        logger.error(f"Error en scoring contra todas las líneas: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# -----------------------------------------------------------
+# API: Backtest de un borrador de configuración sobre el historial
+# -----------------------------------------------------------
+@app.route("/api/scoring/linea/<int:linea_id>/backtest", methods=["POST"])
+@no_cache_and_check_session
+@requiere_permiso("cfg_sco_editar")
+def api_scoring_backtest_linea(linea_id):
+    """
+    Reproduce las evaluaciones registradas de la línea con un borrador de
+    configuración, sin guardarlo.
+
+    JSON (todas las secciones son opcionales, mismo formato que los
+    guardados): {"criterios": [...], "niveles_riesgo": [...],
+                 "factores_rechazo": [...], "config_general": {...}}
+    """
+    try:
+        # Validar CSRF
+        csrf_token = request.headers.get("X-CSRFToken") or request.form.get(
+            "csrf_token"
+        )
+        if not csrf_token:
+            return jsonify({"success": False, "error": "Token CSRF requerido"}), 403
+
+        borrador = request.get_json(silent=True)
+        if not isinstance(borrador, dict):
+            return jsonify({"success": False, "error": "Datos inválidos"}), 400
+
+        config = obtener_config_scoring_linea(linea_id)
+        linea_nombre = (config.get("config_general") or {}).get("linea_nombre")
+        if not linea_nombre or linea_nombre == "Sin nombre":
+            return (
+                jsonify({"success": False, "error": f"Línea {linea_id} no encontrada"}),
+                404,
+            )
+
+        resultado = backtest_config_scoring(borrador, linea_nombre)
+        return jsonify({"success": True, **resultado})
+    except Exception as e:
+        logger.error(f"Error en backtest de scoring línea {linea_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# -----------------------------------------------------------
+# API: Calibración de umbral de aprobación y niveles de riesgo
+# -----------------------------------------------------------
+@app.route("/api/scoring/linea/<int:linea_id>/calibracion", methods=["GET"])
+@no_cache_and_check_session
+@requiere_permiso("cfg_sco_ver")
+def api_scoring_calibracion_linea(linea_id):
+    """
+    Curvas de tasa de aprobación y carga de comité según el umbral, y
+    distribución del score normalizado para los límites de nivel.
+    ?umbral=N agrega la evaluación de ese umbral (para el slider).
+    """
+    try:
+        config = obtener_config_scoring_linea(linea_id)
+        linea_nombre = (config.get("config_general") or {}).get("linea_nombre")
+        if not linea_nombre or linea_nombre == "Sin nombre":
+            return (
+                jsonify({"success": False, "error": f"Línea {linea_id} no encontrada"}),
+                404,
+            )
+
+        umbral = request.args.get("umbral", type=float)
+        calibracion = obtener_calibracion_linea(linea_nombre)
+        return jsonify({"success": True, **calibracion.resumen(umbral)})
+    except Exception as e:
+        logger.error(f"Error en calibración de scoring línea {linea_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# -----------------------------------------------------------
+# API: Contadores de disparo de los factores de rechazo
+# -----------------------------------------------------------
+@app.route("/api/scoring/linea/<int:linea_id>/reglas-rechazo", methods=["GET"])
+@no_cache_and_check_session
+@requiere_permiso("cfg_sco_ver")
+def api_scoring_reglas_rechazo_linea(linea_id):
+    """
+    Factores de rechazo compilados de la línea, en el orden en que se
+    evalúan, con cuántas veces se evaluó y disparó cada uno desde el último
+    cambio de configuración (en este proceso).
+    """
+    try:
+        config = obtener_config_scoring_linea(linea_id)
+        linea_nombre = (config.get("config_general") or {}).get("linea_nombre")
+        if not linea_nombre or linea_nombre == "Sin nombre":
+            return (
+                jsonify({"success": False, "error": f"Línea {linea_id} no encontrada"}),
+                404,
+            )
+
+        modelo = obtener_modelo_scoring(linea_nombre)
+        return jsonify(
+            {
+                "success": True,
+                "linea_credito": linea_nombre,
+                "version": modelo.version,
+                "reglas": modelo.reglas_rechazo.estadisticas(),
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error en reglas de rechazo línea {linea_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 # ============================================================================
 # VERIFICACIÓN DE MIGRACIÓN
 # ============================================================================
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+MIGRATION_COLUMNAS_RESULTADO.PY
+===============================
+
+Crea (si faltan) las columnas derivadas del JSON `resultado` de evaluaciones
+(score, score normalizado, nivel, aprobado, rechazo automático), sus
+triggers e índices, y recalcula los valores de todas las filas existentes.
+
+flask_app.py ya crea las columnas al iniciar; este script sirve para forzar
+el backfill completo (p. ej. tras restaurar un backup).
+
+Uso:
+    python3 migration_columnas_resultado.py
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+from datetime import datetime
+
+from database import DB_PATH
+from db_helpers import ensure_columnas_resultado
+
+
+def main():
+    print("=" * 60)
+    print("MIGRACIÓN: Columnas derivadas de resultado")
+    print("=" * 60)
+    print(f"Base de datos: {DB_PATH}")
+    print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    filas = ensure_columnas_resultado(rellenar=True)
+    if filas < 0:
+        print("\n❌ La migración falló (ver error arriba)")
+        return False
+
+    print(f"\n✅ Migración completada: {filas} evaluaciones recalculadas")
+    return True
+
+
+if __name__ == "__main__":
+    main()
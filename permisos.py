@@ -23,6 +23,9 @@ import json
 import time
 from pathlib import Path
 
+from database import conectar_db
+from db_helpers_auditoria import registrar_evento_auditoria
+
 # Ruta de la base de datos
 DB_PATH = Path(__file__).parent / 'loansi.db'
 
@@ -51,11 +54,8 @@ PERMISOS_PROTEGIDOS_ADMIN = {
 # ============================================================================
 
 def _conectar_db():
-    """Conecta a la base de datos SQLite"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    """Obtiene una conexión del pool compartido (ver database.conectar_db)"""
+    return conectar_db()
 
 
 # ============================================================================
@@ -462,49 +462,34 @@ def requiere_rol(*roles_permitidos):
 # ============================================================================
 
 def _registrar_acceso_denegado(permiso_requerido):
-    """Registra intentos de acceso denegado para auditoría"""
+    """Registra intentos de acceso denegado para auditoría (encolado)"""
     try:
-        conn = _conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO auditoria (usuario, accion, tabla_afectada, datos_nuevos, ip_address)
-            VALUES (?, 'ACCESO_DENEGADO', 'permisos', ?, ?)
-        """, (
+        registrar_evento_auditoria(
             session.get('username', 'anónimo'),
-            json.dumps({
+            'ACCESO_DENEGADO',
+            tabla_afectada='permisos',
+            datos_nuevos=json.dumps({
                 'permiso_requerido': str(permiso_requerido),
                 'ruta': request.path,
                 'metodo': request.method,
                 'rol_usuario': session.get('rol', 'sin_rol')
             }),
-            request.remote_addr
-        ))
-
-        conn.commit()
-        conn.close()
+            ip_address=request.remote_addr
+        )
     except Exception as e:
         print(f"⚠️ Error registrando acceso denegado: {e}")
 
 
 def registrar_accion_permiso(accion, detalles):
-    """Registra acciones relacionadas con permisos para auditoría"""
+    """Registra acciones relacionadas con permisos para auditoría (encolado)"""
     try:
-        conn = _conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO auditoria (usuario, accion, tabla_afectada, datos_nuevos, ip_address)
-            VALUES (?, ?, 'permisos', ?, ?)
-        """, (
+        registrar_evento_auditoria(
             session.get('username', 'sistema'),
             accion,
-            json.dumps(detalles),
-            request.remote_addr if request else None
-        ))
-
-        conn.commit()
-        conn.close()
+            tabla_afectada='permisos',
+            datos_nuevos=json.dumps(detalles),
+            ip_address=request.remote_addr if request else None
+        )
     except Exception as e:
         print(f"⚠️ Error registrando acción: {e}")
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+RECONSTRUIR_ROLLUPS.PY
+======================
+
+Reconstruye los rollups diarios de dashboards (db_helpers_rollups) desde las
+tablas crudas y/o verifica que coincidan con ellas.
+
+Los rollups se mantienen solos con triggers; este script sirve para el
+backfill inicial, tras restaurar un backup o si la verificación reporta
+diferencias.
+
+Uso:
+    python3 reconstruir_rollups.py              # verificar y reconstruir
+    python3 reconstruir_rollups.py --verificar  # solo verificar
+
+Author: Sistema Loansi
+Date: 2026-10-17
+"""
+
+import sys
+from datetime import datetime
+
+from database import DB_PATH
+from db_helpers import ensure_columnas_fecha
+from db_helpers_rollups import ensure_rollups, reconstruir_rollups, verificar_rollups
+
+
+def imprimir_verificacion(resultado):
+    for nombre, diferencias in resultado["rollups"].items():
+        ok = not (diferencias["solo_en_crudo"] or diferencias["solo_en_rollup"])
+        icono = "✅" if ok else "❌"
+        print(
+            f"   {icono} {nombre}: {diferencias['solo_en_crudo']} solo en tablas, "
+            f"{diferencias['solo_en_rollup']} solo en rollup"
+        )
+
+
+def main():
+    solo_verificar = "--verificar" in sys.argv[1:]
+
+    print("=" * 60)
+    print("ROLLUPS DIARIOS DE DASHBOARDS")
+    print("=" * 60)
+    print(f"Base de datos: {DB_PATH}")
+    print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    if ensure_columnas_fecha() < 0 or not ensure_rollups():
+        print("\n❌ No se pudieron crear las tablas de rollup")
+        return False
+
+    print("\n🔍 Verificando contra tablas crudas...")
+    resultado = verificar_rollups()
+    imprimir_verificacion(resultado)
+
+    if solo_verificar:
+        return resultado["consistente"]
+
+    print("\n🔄 Reconstruyendo...")
+    filas = reconstruir_rollups()
+    if filas is None:
+        print("\n❌ La reconstrucción falló (ver error arriba)")
+        return False
+    for nombre, total in filas.items():
+        print(f"   {nombre}: {total} filas")
+
+    resultado = verificar_rollups()
+    imprimir_verificacion(resultado)
+    print("\n✅ Rollups reconstruidos" if resultado["consistente"] else "\n❌ Siguen existiendo diferencias")
+    return resultado["consistente"]
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
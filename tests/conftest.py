@@ -0,0 +1,140 @@
+"""
+Fixtures compartidas de los tests.
+
+Cada test corre contra una copia de loansi.db en tmp_path: el pool de
+conexiones (database._GESTOR) apunta a la copia y las cachés por proceso de
+configuración, jerarquía, dashboard y scoring arrancan vacías. El archivo
+versionado solo se abre en modo lectura para copiarlo.
+
+Las migraciones que flask_app.py ejecuta al iniciar (ensure_*) no se aplican
+a la copia: cada módulo pide las que necesita con los fixtures `versiones`,
+`columnas_resultado`, `rollups` y `feed`. Los tests de rutas usan `cliente`,
+que importa flask_app y aplica todas.
+"""
+
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database
+from database import DB_PATH, GestorConexiones
+import db_helpers
+import db_helpers_cambios
+import db_helpers_dashboard
+import db_helpers_scoring_linea
+import db_helpers_scoring_modelo
+import db_helpers_scoring_lote
+import db_helpers_scoring_calibracion
+import db_helpers_scoring_multilinea
+from db_helpers import (
+    ensure_columnas_fecha,
+    ensure_columnas_resultado,
+    ensure_versiones_datos,
+)
+from db_helpers_cambios import ensure_feed_cambios
+from db_helpers_rollups import ensure_rollups
+import permisos
+
+
+@pytest.fixture(autouse=True)
+def db_copia(tmp_path, monkeypatch):
+    """
+    Copia loansi.db a tmp_path y apunta el pool a la copia.
+
+    Returns:
+        Path: Ruta de la copia (para abrirla desde "otro proceso")
+    """
+    destino = tmp_path / "loansi.db"
+    origen = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    copia = sqlite3.connect(str(destino))
+    origen.backup(copia)
+    origen.close()
+    copia.close()
+
+    monkeypatch.setattr(database, "_GESTOR", GestorConexiones(destino))
+    monkeypatch.setattr(db_helpers, "_snapshot_config", None)
+    monkeypatch.setattr(db_helpers, "_snapshot_config_verificado", 0.0)
+    monkeypatch.setattr(db_helpers, "_jerarquia", None)
+    monkeypatch.setattr(db_helpers_dashboard, "_navbar_cache", {})
+    monkeypatch.setattr(db_helpers_scoring_linea, "_SCORING_LINEA_CACHE", {})
+    monkeypatch.setattr(db_helpers_scoring_modelo, "_modelos", {})
+    monkeypatch.setattr(db_helpers_scoring_lote, "_vectorizados", {})
+    monkeypatch.setattr(db_helpers_scoring_calibracion, "_calibraciones", {})
+    monkeypatch.setattr(db_helpers_scoring_multilinea, "_conjunto", None)
+    return destino
+
+
+@pytest.fixture
+def gestor(db_copia):
+    """Pool de conexiones sobre la copia de loansi.db."""
+    return database._GESTOR
+
+
+@pytest.fixture
+def versiones(db_copia):
+    """Tabla versiones_datos (snapshot de configuración y cachés de scoring)."""
+    ensure_versiones_datos()
+
+
+@pytest.fixture
+def columnas_resultado(db_copia):
+    """Columnas derivadas de `resultado`, con backfill de la copia."""
+    ensure_columnas_resultado()
+
+
+@pytest.fixture
+def rollups(db_copia):
+    """Columnas de fecha y rollups diarios, construidos sobre la copia."""
+    ensure_columnas_fecha()
+    ensure_rollups()
+
+
+@pytest.fixture
+def feed(db_copia, monkeypatch):
+    """Feed de cambios sobre la copia, con el anillo en memoria vacío."""
+    monkeypatch.setattr(db_helpers_cambios, "_anillo", deque(maxlen=db_helpers_cambios.TAMANO_ANILLO))
+    monkeypatch.setattr(db_helpers_cambios, "_ultimo_seq", 0)
+    monkeypatch.setattr(db_helpers_cambios, "_sincronizado", 0.0)
+    monkeypatch.setattr(db_helpers_cambios, "INTERVALO_SINCRONIZACION_S", 0)
+    assert ensure_feed_cambios()
+
+
+@pytest.fixture
+def cliente(feed, monkeypatch):
+    """
+    Fábrica de clientes de prueba de flask_app sobre la copia, sin CSRF.
+
+    cliente("Basesor25") devuelve un test_client con la sesión de ese
+    usuario (rol de la tabla usuarios); cliente() uno sin sesión.
+    """
+    import flask_app
+
+    # El import las corre una sola vez, sobre la copia de ese test
+    flask_app.preparar_base_datos()
+    permisos.ensure_permisos_minimos()
+    monkeypatch.setattr(permisos, "_PERMISOS_CACHE", {})
+    monkeypatch.setitem(flask_app.app.config, "TESTING", True)
+    monkeypatch.setitem(flask_app.app.config, "WTF_CSRF_ENABLED", False)
+
+    def crear(username=None):
+        cliente_prueba = flask_app.app.test_client()
+        if username is not None:
+            conn = database._GESTOR.obtener()
+            try:
+                rol = conn.execute(
+                    "SELECT rol FROM usuarios WHERE username = ?", (username,)
+                ).fetchone()[0]
+            finally:
+                conn.close()
+            with cliente_prueba.session_transaction() as sesion:
+                sesion["autorizado"] = True
+                sesion["username"] = username
+                sesion["rol"] = rol
+        return cliente_prueba
+
+    return crear
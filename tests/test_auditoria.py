@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests del registro de auditoría asíncrono (db_helpers_auditoria): los
+eventos se guardan en lotes desde el hilo escritor, la cola llena no
+pierde eventos y la consulta paginada filtra sobre índices.
+"""
+
+import json
+import queue
+
+import pytest
+
+import db_helpers_auditoria
+from db_helpers_auditoria import (
+    ensure_auditoria,
+    registrar_evento_auditoria,
+    vaciar_auditoria,
+    detener_escritor_auditoria,
+    consultar_auditoria,
+    obtener_metricas_auditoria,
+)
+from db_helpers import ensure_user_assignments_table, filtro_visibilidad_sql
+
+
+@pytest.fixture
+def gestor(gestor, monkeypatch):
+    _reiniciar_escritor(monkeypatch)
+    return gestor
+
+
+def _reiniciar_escritor(monkeypatch, max_cola=1000):
+    monkeypatch.setattr(db_helpers_auditoria, "_cola", queue.Queue(maxsize=max_cola))
+    monkeypatch.setattr(db_helpers_auditoria, "_hilo", None)
+    monkeypatch.setattr(db_helpers_auditoria, "_metricas", dict.fromkeys(
+        db_helpers_auditoria._metricas, 0))
+    assert ensure_auditoria()
+
+
+def test_eventos_se_guardan_en_lotes(gestor):
+    conn = gestor.obtener()
+    try:
+        # La base traía la FOREIGN KEY a usuarios: ya no está
+        assert conn.execute("PRAGMA foreign_key_list(auditoria)").fetchall() == []
+        antes = conn.execute("SELECT COUNT(*) FROM auditoria").fetchone()[0]
+
+        for i in range(500):
+            registrar_evento_auditoria(
+                "anónimo" if i % 2 else "admin",
+                "ACCESO_DENEGADO",
+                tabla_afectada="permisos",
+                datos_nuevos=json.dumps({"ruta": f"/r/{i}"}),
+                ip_address="10.0.0.1",
+            )
+        assert vaciar_auditoria()
+        detener_escritor_auditoria()
+
+        assert conn.execute("SELECT COUNT(*) FROM auditoria").fetchone()[0] == antes + 500
+    finally:
+        conn.close()
+
+    metricas = obtener_metricas_auditoria()
+    assert metricas["escritos"] == 500
+    assert metricas["lotes"] < 500
+    assert metricas["errores"] == 0
+
+
+def test_cola_llena_escribe_directo(gestor, monkeypatch):
+    _reiniciar_escritor(monkeypatch, max_cola=5)
+    monkeypatch.setattr(db_helpers_auditoria, "ESPERA_COLA_LLENA_S", 0.01)
+    # Escritor ocupado: nadie vacía la cola
+    monkeypatch.setattr(db_helpers_auditoria, "_asegurar_escritor", lambda: None)
+
+    for i in range(8):
+        registrar_evento_auditoria("admin", "PRUEBA_CONTRAPRESION", registro_id=i)
+
+    metricas = obtener_metricas_auditoria()
+    assert (metricas["encolados"], metricas["directos"], metricas["en_cola"]) == (5, 3, 5)
+    assert consultar_auditoria(accion="PRUEBA_CONTRAPRESION")["total"] == 3
+
+
+def test_consulta_paginada_con_alcance(gestor):
+    ensure_user_assignments_table()
+    conn = gestor.obtener()
+    try:
+        filas = [
+            (f"2026-05-0{d} 10:00:00", usuario, accion)
+            for d in range(1, 6)
+            for usuario in ("aud_a", "aud_b", "aud_c")
+            for accion in ("LOGIN", "SCORING_CONFIG_UPDATE")
+        ]
+        conn.executemany(
+            "INSERT INTO auditoria (timestamp, usuario, accion) VALUES (?, ?, ?)", filas
+        )
+        conn.execute(
+            "INSERT INTO user_assignments (manager_username, member_username) "
+            "VALUES ('aud_a', 'aud_b')"
+        )
+        conn.commit()
+
+        plan = " ".join(
+            row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM auditoria WHERE usuario = ? "
+                "AND timestamp >= ? ORDER BY timestamp DESC, id DESC",
+                ("aud_a", "2026-05-02"),
+            )
+        )
+    finally:
+        conn.close()
+    assert "idx_auditoria_usuario_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+    pagina = consultar_auditoria(
+        usuario="aud_a", desde="2026-05-02", hasta="2026-05-05", por_pagina=4
+    )
+    assert pagina["total"] == 6
+    assert [r["timestamp"][:10] for r in pagina["registros"]] == ["2026-05-04"] * 2 + ["2026-05-03"] * 2
+    assert len(consultar_auditoria(usuario="aud_a", desde="2026-05-02",
+                                   hasta="2026-05-05", pagina=2, por_pagina=4)["registros"]) == 2
+
+    # Alcance de equipo: aud_a ve lo suyo y lo de aud_b, no lo de aud_c
+    vis = {"scope": "equipo", "usernames_visibles": ["aud_b"]}
+    alcance = filtro_visibilidad_sql(vis, "aud_a", columna="usuario", incluir_propio=True)
+    equipo = consultar_auditoria(alcance, accion="LOGIN", por_pagina=500)
+    assert equipo["total"] == 10
+    assert {r["usuario"] for r in equipo["registros"]} == {"aud_a", "aud_b"}
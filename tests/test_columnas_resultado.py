@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests de las columnas derivadas de `resultado` (db_helpers.ensure_columnas_resultado):
+el backfill rellena las filas existentes y los triggers las mantienen
+iguales al JSON en cada INSERT y UPDATE.
+"""
+
+import json
+
+from db_helpers import COLUMNAS_RESULTADO, ensure_columnas_resultado
+
+COLUMNAS = list(COLUMNAS_RESULTADO)
+
+
+def _esperado(resultado):
+    """Valores de las columnas derivados del JSON en Python."""
+    try:
+        datos = json.loads(resultado)
+    except (TypeError, ValueError):
+        datos = None
+    if not isinstance(datos, dict):
+        return (None, None, None, 0, None)
+    aprobado = datos.get("aprobado")
+    return (
+        datos.get("score"),
+        datos.get("score_normalizado"),
+        datos.get("nivel"),
+        int(aprobado) if aprobado is not None else 0,
+        datos.get("rechazo_automatico"),
+    )
+
+
+def _filas(conn):
+    return conn.execute(
+        f"SELECT id, resultado, {', '.join(COLUMNAS)} FROM evaluaciones"
+    ).fetchall()
+
+
+def _assert_en_sincronia(conn):
+    filas = _filas(conn)
+    assert filas
+    for fila in filas:
+        assert tuple(fila[2:]) == _esperado(fila[1]), fila[0]
+
+
+def test_backfill_de_filas_existentes(gestor):
+    conn = gestor.obtener()
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+    finally:
+        conn.close()
+
+    # Primera vez: crea las columnas y recalcula todas las filas
+    assert ensure_columnas_resultado() == total
+    # Ya existen: no hay backfill
+    assert ensure_columnas_resultado() == 0
+
+    conn = gestor.obtener()
+    try:
+        _assert_en_sincronia(conn)
+        assert conn.execute(
+            "SELECT COUNT(*) FROM evaluaciones WHERE resultado_aprobado = 1"
+        ).fetchone()[0] > 0
+
+        # Columnas desfasadas (escritas sin triggers): rellenar=True las repara
+        conn.execute(
+            "UPDATE evaluaciones SET resultado_score = NULL, resultado_nivel = NULL, "
+            "resultado_aprobado = 0"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert ensure_columnas_resultado(rellenar=True) == total
+
+    conn = gestor.obtener()
+    try:
+        _assert_en_sincronia(conn)
+    finally:
+        conn.close()
+
+
+def test_triggers_en_insert_y_update(gestor):
+    ensure_columnas_resultado()
+
+    resultado = {
+        "score": 21.5,
+        "score_normalizado": 71.7,
+        "nivel": "Riesgo bajo",
+        "aprobado": True,
+        "rechazo_automatico": None,
+    }
+    conn = gestor.obtener()
+    try:
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado) "
+            "VALUES ('2026-10-17T09:00:00', 'Basesor25', ?)",
+            (json.dumps(resultado),),
+        )
+        conn.commit()
+
+        def derivadas():
+            return tuple(
+                conn.execute(
+                    f"SELECT {', '.join(COLUMNAS)} FROM evaluaciones "
+                    "WHERE timestamp = '2026-10-17T09:00:00'"
+                ).fetchone()
+            )
+
+        assert derivadas() == (21.5, 71.7, "Riesgo bajo", 1, None)
+
+        # UPDATE de resultado: las columnas siguen al JSON
+        resultado.update(score=8.0, nivel="Riesgo alto", aprobado=False,
+                         rechazo_automatico="Mora en telcos")
+        conn.execute(
+            "UPDATE evaluaciones SET resultado = ? "
+            "WHERE timestamp = '2026-10-17T09:00:00'",
+            (json.dumps(resultado),),
+        )
+        conn.commit()
+        assert derivadas() == (8.0, 71.7, "Riesgo alto", 0, "Mora en telcos")
+
+        # UPDATE de otra columna no las toca
+        conn.execute(
+            "UPDATE evaluaciones SET estado_comite = 'pending' "
+            "WHERE timestamp = '2026-10-17T09:00:00'"
+        )
+        conn.commit()
+        assert derivadas() == (8.0, 71.7, "Riesgo alto", 0, "Mora en telcos")
+
+        # JSON inválido: columnas vacías y no aprobado
+        conn.execute(
+            "UPDATE evaluaciones SET resultado = 'no es json' "
+            "WHERE timestamp = '2026-10-17T09:00:00'"
+        )
+        conn.commit()
+        assert derivadas() == (None, None, None, 0, None)
+
+        # UPDATE masivo de resultado: todas las filas quedan en sincronía
+        conn.execute(
+            "UPDATE evaluaciones SET resultado = json_set(resultado, '$.aprobado', 0) "
+            "WHERE json_valid(resultado) AND id % 3 = 0"
+        )
+        conn.commit()
+        _assert_en_sincronia(conn)
+    finally:
+        conn.close()
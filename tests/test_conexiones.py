@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tests del pool de conexiones SQLite (database.GestorConexiones).
+"""
+
+import sqlite3
+import threading
+
+from database import GestorConexiones
+
+
+def _gestor(tmp_path, **config):
+    return GestorConexiones(tmp_path / "pool.db", config)
+
+
+def test_reutiliza_conexion_y_aplica_pragmas(tmp_path):
+    gestor = _gestor(tmp_path)
+
+    conn = gestor.obtener()
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    conn.close()
+
+    # Segunda petición: misma conexión física, sin abrir otra
+    conn2 = gestor.obtener()
+    assert conn2 is conn
+    conn2.close()
+
+    stats = gestor.estadisticas()
+    assert stats["abiertas"] == 1
+    assert stats["reutilizadas"] == 1
+    assert stats["ociosas"] == 1
+
+
+def test_wal_solo_al_activar(tmp_path):
+    gestor = _gestor(tmp_path)
+    # Abrir conexiones no cambia el modo del archivo
+    conn = gestor.obtener()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    conn.close()
+    # DB sin tablas: todavía no se inicializó
+    assert not gestor.activar_wal()
+
+    conn = gestor.obtener()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+    assert gestor.activar_wal()
+    conn = gestor.obtener()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_prestamos_anidados_no_descartan_transaccion(tmp_path):
+    gestor = _gestor(tmp_path)
+    externa = gestor.obtener()
+    externa.execute("CREATE TABLE t (x INTEGER)")
+    externa.execute("INSERT INTO t VALUES (1)")
+
+    # Una función interna que abre y cierra su "propia" conexión
+    interna = gestor.obtener()
+    assert interna is externa
+    interna.close()
+
+    assert externa.in_transaction
+    externa.commit()
+    externa.close()
+
+    conn = gestor.obtener()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    conn.close()
+
+
+def _contar(gestor):
+    conn = gestor.obtener()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_rollback_anidado_no_borra_escritura_externa(tmp_path):
+    gestor = _gestor(tmp_path)
+    externa = gestor.obtener()
+    externa.execute("CREATE TABLE t (x INTEGER)")
+    externa.commit()
+    externa.execute("INSERT INTO t VALUES (1)")
+
+    # Un helper interno que escribe y falla
+    interna = gestor.obtener()
+    interna.execute("INSERT INTO t VALUES (2)")
+    interna.rollback()
+    interna.close()
+
+    assert externa.in_transaction
+    externa.commit()
+    externa.close()
+    assert _contar(gestor) == 1
+
+
+def test_commit_anidado_queda_en_la_transaccion_externa(tmp_path):
+    gestor = _gestor(tmp_path)
+    externa = gestor.obtener()
+    externa.execute("CREATE TABLE t (x INTEGER)")
+    externa.commit()
+    externa.execute("INSERT INTO t VALUES (1)")
+
+    interna = gestor.obtener()
+    interna.execute("INSERT INTO t VALUES (2)")
+    interna.commit()
+    interna.execute("INSERT INTO t VALUES (3)")  # Sin commit: se descarta al cerrar
+    interna.close()
+
+    # El rollback externo deshace también lo confirmado por el préstamo interno
+    externa.rollback()
+    externa.close()
+    assert _contar(gestor) == 0
+
+    externa = gestor.obtener()
+    externa.execute("INSERT INTO t VALUES (1)")
+    interna = gestor.obtener()
+    interna.execute("INSERT INTO t VALUES (2)")
+    interna.commit()
+    interna.close()
+    externa.commit()
+    externa.close()
+    assert _contar(gestor) == 2
+
+
+def test_commit_anidado_sin_transaccion_externa_persiste(tmp_path):
+    gestor = _gestor(tmp_path)
+    externa = gestor.obtener()
+    externa.execute("CREATE TABLE t (x INTEGER)")
+    externa.commit()
+
+    interna = gestor.obtener()
+    interna.execute("INSERT INTO t VALUES (1)")
+    interna.commit()
+    interna.close()
+    externa.close()
+    assert _contar(gestor) == 1
+
+
+def test_close_sin_commit_descarta_cambios(tmp_path):
+    gestor = _gestor(tmp_path)
+    conn = gestor.obtener()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+
+    conn = gestor.obtener()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    conn.close()
+
+
+def test_hilos_distintos_usan_conexiones_distintas(tmp_path):
+    gestor = _gestor(tmp_path)
+    principal = gestor.obtener()
+    vistas = []
+
+    def trabajo():
+        conn = gestor.obtener()
+        vistas.append(conn)
+        conn.close()
+
+    hilo = threading.Thread(target=trabajo)
+    hilo.start()
+    hilo.join()
+
+    assert vistas[0] is not principal
+    principal.close()
+    assert gestor.estadisticas()["abiertas"] == 2
+
+
+def test_reintenta_cuando_la_db_esta_bloqueada(tmp_path):
+    gestor = _gestor(tmp_path, busy_timeout_ms=0, backoff_base_s=0.001, max_reintentos=2)
+    conn = gestor.obtener()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+
+    # Otra conexión retiene el lock de escritura
+    bloqueadora = sqlite3.connect(str(tmp_path / "pool.db"))
+    bloqueadora.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("INSERT INTO t VALUES (1)")
+        assert False, "Se esperaba database is locked"
+    except sqlite3.OperationalError as e:
+        assert "locked" in str(e)
+    finally:
+        bloqueadora.rollback()
+        bloqueadora.close()
+        conn.close()
+
+    assert gestor.estadisticas()["reintentos_bloqueo"] == 2
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests de las consultas puntuales de evaluaciones (db_helpers): cada una
+devuelve o actualiza exactamente las filas que encontraba el recorrido de
+toda la tabla que reemplazan (leer_evaluaciones_db + filtro en Python).
+"""
+
+import pytest
+
+from db_helpers import (
+    contar_casos_nuevos_asesor,
+    listar_timestamps_pendientes_comite,
+    marcar_caso_visto_asesor,
+    normalizar_fila_evaluacion,
+    obtener_casos_comite_asesor,
+    obtener_cola_comite,
+    obtener_decisiones_recientes_comite,
+    obtener_evaluacion_completa,
+)
+
+ASESOR = "Basesor25"
+
+
+@pytest.fixture
+def gestor(gestor):
+    # Casos decididos sin ver, de dos asesores, y un par de pendientes más
+    conn = gestor.obtener()
+    try:
+        conn.execute(
+            "UPDATE evaluaciones SET visto_por_asesor = 0 WHERE id IN ("
+            "SELECT id FROM evaluaciones WHERE asesor = ? AND origen = 'Comité' "
+            "ORDER BY id LIMIT 7)",
+            (ASESOR,),
+        )
+        conn.execute(
+            "UPDATE evaluaciones SET visto_por_asesor = 0 WHERE id IN ("
+            "SELECT id FROM evaluaciones WHERE asesor = 'alexa' AND origen = 'Comité' "
+            "ORDER BY id LIMIT 3)"
+        )
+        conn.execute(
+            "UPDATE evaluaciones SET estado_comite = 'pending' WHERE id IN ("
+            "SELECT id FROM evaluaciones WHERE asesor = 'alexa' AND origen = 'Comité' "
+            "ORDER BY id DESC LIMIT 2)"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return gestor
+
+
+def _leer_todas(gestor):
+    """Recorrido completo, como leer_evaluaciones_db() de flask_app."""
+    conn = gestor.obtener()
+    try:
+        filas = conn.execute(
+            "SELECT * FROM evaluaciones ORDER BY fecha_creacion DESC"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [normalizar_fila_evaluacion(fila) for fila in filas]
+
+
+def _por_id(evaluaciones):
+    return {ev["id"]: dict(ev) for ev in evaluaciones}
+
+
+def _nuevos(evaluaciones, username):
+    return sum(
+        1
+        for c in evaluaciones
+        if c.get("asesor") == username
+        and c.get("estado_comite") in ["approved", "rejected"]
+        and not c.get("visto_por_asesor")
+    )
+
+
+def test_evaluacion_completa_igual_al_recorrido(gestor):
+    todas = _leer_todas(gestor)
+
+    for ev in todas[::25]:
+        encontrada = obtener_evaluacion_completa(ev["timestamp"])
+        assert dict(encontrada) == dict(ev)
+
+    assert obtener_evaluacion_completa("2000-01-01T00:00:00") is None
+
+
+def test_bandeja_asesor_igual_al_recorrido(gestor):
+    todas = _leer_todas(gestor)
+
+    for username in (ASESOR, "alexa", "admin", "nadie"):
+        esperadas = {
+            ev["id"]
+            for ev in todas
+            if ev.get("asesor") == username and ev.get("origen") == "Comité"
+        }
+        casos = obtener_casos_comite_asesor(username)
+        assert len(casos) == len(esperadas)
+        assert {c["id"] for c in casos} == esperadas
+
+    # Polling incremental: solo los ids pedidos que son del asesor
+    propios = sorted({c["id"] for c in obtener_casos_comite_asesor(ASESOR)})[:3]
+    ajeno = next(ev["id"] for ev in todas if ev.get("asesor") == "alexa")
+    casos = obtener_casos_comite_asesor(ASESOR, ids=propios + [ajeno])
+    assert sorted(c["id"] for c in casos) == propios
+
+
+def test_contar_nuevos_igual_al_recorrido(gestor):
+    todas = _leer_todas(gestor)
+
+    for username in (ASESOR, "alexa", "Hector Puentes ", "nadie"):
+        assert contar_casos_nuevos_asesor(username) == _nuevos(todas, username)
+    assert contar_casos_nuevos_asesor(ASESOR) == 7
+
+
+def test_cola_y_pendientes_igual_al_recorrido(gestor):
+    todas = _leer_todas(gestor)
+    pendientes = [ev for ev in todas if ev.get("estado_comite") == "pending"]
+
+    cola = obtener_cola_comite()
+    assert len(cola) == len(pendientes) == 3
+    assert {c["id"] for c in cola} == {ev["id"] for ev in pendientes}
+    assert sorted(listar_timestamps_pendientes_comite()) == sorted(
+        ev["timestamp"] for ev in pendientes
+    )
+
+
+def test_decisiones_recientes_igual_al_recorrido(gestor):
+    todas = _leer_todas(gestor)
+    decididas = [
+        ev for ev in todas if ev.get("estado_comite") in ["approved", "rejected"]
+    ]
+
+    recientes = obtener_decisiones_recientes_comite(limite=20)
+
+    assert len(recientes) == 20
+    assert all(ev["estado_comite"] in ("approved", "rejected") for ev in recientes)
+    fechas = [ev["fecha_creacion"] for ev in recientes]
+    assert fechas == sorted(fechas, reverse=True)
+    # Las mismas 20 primeras que el recorrido (salvo empates de fecha en el corte)
+    corte = fechas[-1]
+    ids = {ev["id"] for ev in recientes}
+    assert {ev["id"] for ev in decididas if ev["fecha_creacion"] > corte} <= ids
+    assert all(ev["fecha_creacion"] <= corte for ev in decididas if ev["id"] not in ids)
+
+
+def test_marcar_visto_actualiza_solo_el_caso(gestor):
+    antes = _leer_todas(gestor)
+    caso = next(
+        ev
+        for ev in antes
+        if ev.get("asesor") == ASESOR
+        and ev.get("estado_comite") in ["approved", "rejected"]
+        and not ev["visto_por_asesor"]
+    )
+
+    # Otro asesor no puede marcarlo
+    assert not marcar_caso_visto_asesor(caso["timestamp"], "alexa", "2026-10-17T10:00:00")
+    assert not marcar_caso_visto_asesor("2000-01-01T00:00:00", ASESOR, "2026-10-17T10:00:00")
+    assert _por_id(_leer_todas(gestor)) == _por_id(antes)
+
+    assert marcar_caso_visto_asesor(caso["timestamp"], ASESOR, "2026-10-17T10:00:00")
+
+    despues = {ev["id"]: ev for ev in _leer_todas(gestor)}
+    marcado = despues[caso["id"]]
+    assert marcado["visto_por_asesor"] is True
+    assert marcado["fecha_visto_asesor"] == "2026-10-17T10:00:00"
+    # El resto de filas queda igual
+    for ev in antes:
+        if ev["id"] != caso["id"]:
+            assert dict(despues[ev["id"]]) == dict(ev)
+    # El contador baja en uno, igual que el recorrido
+    assert contar_casos_nuevos_asesor(ASESOR) == _nuevos(antes, ASESOR) - 1
+    assert contar_casos_nuevos_asesor(ASESOR) == _nuevos(list(despues.values()), ASESOR)
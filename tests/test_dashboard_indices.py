@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests de los contadores del dashboard sobre las columnas de fecha indexadas
+(db_helpers.ensure_columnas_fecha) y los rollups diarios
+(db_helpers_rollups): ninguna consulta debe recorrer completas evaluaciones
+o simulaciones.
+"""
+
+from db_helpers import ensure_columnas_resultado, ensure_columnas_fecha
+from db_helpers_rollups import ensure_rollups
+import db_helpers_dashboard
+
+
+def _es_scan_completo(detalle):
+    # "SCAN evaluaciones" / "SCAN e" sin índice; "SCAN ... USING ... INDEX" es válido
+    partes = detalle.split()
+    return (
+        partes[:1] == ["SCAN"]
+        and partes[1] in ("evaluaciones", "simulaciones", "e", "s")
+        and "USING" not in partes
+    )
+
+
+def test_contadores_dashboard_usan_indices(gestor):
+    assert ensure_columnas_resultado() >= 0
+    assert ensure_columnas_fecha(rellenar=True) > 0
+    assert ensure_rollups()
+
+    conn = gestor.obtener()  # préstamo externo: las funciones reutilizan esta conexión
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        for rol, username in [
+            ("asesor", "Basesor25"),
+            ("supervisor", "supervisortest"),
+            ("comite_credito", "comitetecnico"),
+            ("auditor", "auditortest"),
+            ("gerente", "testgerente"),
+            ("admin", None),
+        ]:
+            stats = db_helpers_dashboard.obtener_estadisticas_por_rol(rol, username)
+            assert "error" not in stats, (rol, stats)
+            db_helpers_dashboard.obtener_resumen_navbar(rol, username)
+    finally:
+        conn.set_trace_callback(None)
+
+    selects = [s for s in sentencias if s.lstrip().upper().startswith("SELECT")]
+    assert selects
+
+    completos = []
+    for sql in selects:
+        for fila in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+            if _es_scan_completo(fila[3]):
+                completos.append((fila[3], sql))
+    conn.close()
+
+    assert completos == []
+
+
+def test_buckets_en_hora_colombia(gestor):
+    ensure_columnas_fecha()
+
+    conn = gestor.obtener()
+    try:
+        linea = conn.execute("SELECT nombre FROM lineas_credito LIMIT 1").fetchone()[0]
+        conn.execute(
+            "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+            "VALUES ('2026-02-01T02:30:00+00:00', 'Basesor25', 1, 1, ?)", (linea,)
+        )
+        conn.execute(
+            "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+            "VALUES ('2026-02-01T02:30:00', 'Basesor25', 1, 1, ?)", (linea,)
+        )
+        filas = conn.execute(
+            "SELECT creado_dia, creado_mes FROM simulaciones ORDER BY id DESC LIMIT 2"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    # Sin zona = hora Colombia; con zona se convierte (02:30 UTC = 21:30 del día anterior)
+    assert tuple(filas[0]) == ("2026-02-01", "2026-02")
+    assert tuple(filas[1]) == ("2026-01-31", "2026-01")
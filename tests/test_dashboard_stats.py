@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests de las estadísticas agregadas por asesor del dashboard
+(db_helpers_dashboard.obtener_stats_asesores), de las vistas de equipo
+(supervisor/gerente), que no deben consultar una vez por miembro, y del
+caché del resumen del navbar.
+"""
+
+import pytest
+
+from db_helpers import add_assignment, marcar_caso_visto_asesor
+import db_helpers_dashboard
+
+
+pytestmark = pytest.mark.usefixtures("rollups")
+
+
+def _contar_selects(conn, funcion, *args):
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        resultado = funcion(*args)
+    finally:
+        conn.set_trace_callback(None)
+    return resultado, sum(1 for s in sentencias if s.lstrip().upper().startswith("SELECT"))
+
+
+def test_lote_igual_a_individual_en_tres_consultas(gestor):
+    conn = gestor.obtener()
+    try:
+        usernames = [r[0] for r in conn.execute("SELECT username FROM usuarios")]
+        usernames.append("no_existe")
+        cursor = conn.cursor()
+
+        lote, consultas = _contar_selects(
+            conn, db_helpers_dashboard.obtener_stats_asesores, cursor, usernames
+        )
+        individuales = {
+            u: db_helpers_dashboard.obtener_stats_usuario_rapido(cursor, u)
+            for u in usernames
+        }
+    finally:
+        conn.close()
+
+    assert consultas == 3
+    assert lote == individuales
+    assert lote["no_existe"]["evaluaciones_total"] == 0
+    assert sum(s["evaluaciones_total"] for s in lote.values()) > 0
+
+
+def _crear_equipo(conn, gerente, supervisores, asesores_por_supervisor):
+    conn.execute(
+        "INSERT OR IGNORE INTO usuarios (username, password_hash, rol) VALUES (?, 'x', 'gerente')",
+        (gerente,),
+    )
+    for s in range(supervisores):
+        sup = f"{gerente}_sup{s}"
+        conn.execute(
+            "INSERT INTO usuarios (username, password_hash, rol) VALUES (?, 'x', 'supervisor')",
+            (sup,),
+        )
+        conn.execute(
+            "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+            (gerente, sup),
+        )
+        for a in range(asesores_por_supervisor):
+            asesor = f"{sup}_as{a}"
+            conn.execute(
+                "INSERT INTO usuarios (username, password_hash, rol) VALUES (?, 'x', 'asesor')",
+                (asesor,),
+            )
+            conn.execute(
+                "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+                (sup, asesor),
+            )
+    conn.commit()
+
+
+def test_consultas_de_equipo_no_crecen_con_el_tamano(gestor):
+    conn = gestor.obtener()
+    try:
+        _crear_equipo(conn, "g_chico", 1, 2)
+        _crear_equipo(conn, "g_grande", 5, 12)
+
+        consultas = {}
+        for gerente in ("g_chico", "g_grande"):
+            stats, n_gerente = _contar_selects(
+                conn, db_helpers_dashboard.obtener_estadisticas_gerente, gerente
+            )
+            _, n_supervisor = _contar_selects(
+                conn, db_helpers_dashboard.obtener_estadisticas_supervisor, f"{gerente}_sup0"
+            )
+            _, n_detalle = _contar_selects(
+                conn, db_helpers_dashboard.obtener_usuarios_asignados_detalle, gerente
+            )
+            consultas[gerente] = (n_gerente, n_supervisor, n_detalle)
+    finally:
+        conn.close()
+
+    assert stats["asesores_en_jerarquia"] == 60
+    assert len(stats["jerarquia"]["supervisores"][0]["asesores"]) == 12
+    # Sin N+1: el mismo número de consultas para 3 que para 65 usuarios
+    assert consultas["g_chico"] == consultas["g_grande"]
+    assert consultas["g_grande"][0] <= 15
+
+
+def test_resumen_navbar_cacheado_e_invalidado_por_alcance(gestor):
+    conn = gestor.obtener()
+    try:
+        _crear_equipo(conn, "g_nav", 1, 2)
+        caso = conn.execute(
+            "SELECT timestamp FROM evaluaciones WHERE asesor = 'Basesor25' LIMIT 1"
+        ).fetchone()[0]
+        sesiones = [
+            ("asesor", "Basesor25"),
+            ("asesor", "g_nav_sup0_as0"),
+            ("supervisor", "g_nav_sup0"),
+            ("gerente", "g_nav"),
+            ("admin", "admin"),
+        ]
+        for rol, username in sesiones:
+            db_helpers_dashboard.obtener_resumen_navbar(rol, username)
+
+        # Segunda visita: todo desde caché, sin consultas
+        _, consultas = _contar_selects(
+            conn,
+            lambda: [db_helpers_dashboard.obtener_resumen_navbar(*s) for s in sesiones],
+        )
+        assert consultas == 0
+
+        # Un caso visto por Basesor25 solo toca su navbar y los globales
+        assert marcar_caso_visto_asesor(caso, "Basesor25", "2026-03-03T10:00:00")
+        vigentes = set(db_helpers_dashboard._navbar_cache)
+        assert vigentes == {
+            ("asesor", "g_nav_sup0_as0"), ("supervisor", "g_nav_sup0"), ("gerente", "g_nav")
+        }
+
+        # Asignarlo al supervisor invalida supervisor y gerente de esa línea
+        assert add_assignment("g_nav_sup0", "Basesor25")
+        assert set(db_helpers_dashboard._navbar_cache) == {("asesor", "g_nav_sup0_as0")}
+    finally:
+        conn.close()
+
+    metricas = db_helpers_dashboard.obtener_metricas_cache_navbar()
+    assert metricas["hits"] >= len(sesiones)
+    assert metricas["entradas"] == 1
+
+
+def test_resumen_navbar_no_guarda_calculo_invalidado_en_curso(gestor, monkeypatch):
+    calcular = db_helpers_dashboard._calcular_resumen_navbar
+
+    def calcular_con_escritura(rol, username=None):
+        resultado = calcular(rol, username)
+        # Otra petición escribe e invalida mientras se calcula
+        db_helpers_dashboard.invalidar_resumen_navbar("Basesor25")
+        return resultado
+
+    monkeypatch.setattr(db_helpers_dashboard, "_calcular_resumen_navbar", calcular_con_escritura)
+    db_helpers_dashboard.obtener_resumen_navbar("asesor", "Basesor25")
+    assert ("asesor", "Basesor25") not in db_helpers_dashboard._navbar_cache
+
+    monkeypatch.setattr(db_helpers_dashboard, "_calcular_resumen_navbar", calcular)
+    db_helpers_dashboard.obtener_resumen_navbar("asesor", "Basesor25")
+    assert ("asesor", "Basesor25") in db_helpers_dashboard._navbar_cache
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests del registro de evaluación con JSON perezoso (db_helpers.EvaluacionRegistro).
+"""
+
+import json
+
+from db_helpers import (
+    EvaluacionRegistro,
+    JSON_EVALUACION_LISTADOS,
+    normalizar_fila_evaluacion,
+)
+
+
+def _fila(**extra):
+    fila = {
+        "timestamp": "2025-12-01T10:00:00",
+        "asesor": "asesor1",
+        "nombre_cliente": "Ana",
+        "cedula": "123",
+        "resultado": json.dumps({"score": 18.5, "aprobado": True}),
+        "criterios_evaluados": "no es json",
+        "criterios_detalle": None,
+        "valores_criterios": None,
+        "decision_admin": json.dumps({"monto_aprobado": 900000, "justificacion": "ok"}),
+        "monto_aprobado": None,
+        "nivel_riesgo_ajustado": None,
+        "justificacion_modificacion": None,
+        "tasas_nivel_riesgo": None,
+        "visto_por_asesor": 0,
+    }
+    fila.update(extra)
+    return fila
+
+
+def test_decodifica_solo_al_leer():
+    ev = EvaluacionRegistro(_fila(), JSON_EVALUACION_LISTADOS)
+
+    assert dict.__getitem__(ev, "resultado").startswith("{")
+    assert ev["resultado"]["score"] == 18.5
+    assert ev.get("criterios_evaluados") == []
+    assert ev["criterios_detalle"] == []
+    # Lo no leído sigue crudo
+    assert isinstance(dict.__getitem__(ev, "decision_admin"), str)
+
+
+def test_se_comporta_como_dict_decodificado():
+    ev = normalizar_fila_evaluacion(_fila())
+
+    assert ev["cliente"] == "Ana - CC 123"
+    assert ev["visto_por_asesor"] is False
+    assert ev["monto_aprobado"] == 900000
+    assert ev["justificacion_modificacion"] == "ok"
+
+    copia = dict(ev)
+    assert copia["resultado"] == {"score": 18.5, "aprobado": True}
+    assert json.loads(json.dumps(ev, sort_keys=True))["decision_admin"]["monto_aprobado"] == 900000
+
+
+def test_asignar_reemplaza_valor_pendiente():
+    ev = EvaluacionRegistro(_fila(), JSON_EVALUACION_LISTADOS)
+    ev["resultado"] = {"score": 1}
+    assert ev["resultado"] == {"score": 1}
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Tests del feed incremental de cambios de evaluaciones (db_helpers_cambios):
+los triggers registran los cambios relevantes, el polling sin cambios no
+consulta la tabla evaluaciones y los suscriptores SSE despiertan al
+publicarse un cambio, con un tope de suscriptores; los triggers se crean
+si faltan y se recrean si cambió su definición.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+import db_helpers_cambios
+from db_helpers_cambios import (
+    ensure_feed_cambios,
+    cursor_actual_feed,
+    obtener_cambios_desde,
+    esperar_cambios,
+    notificar_cambios,
+    suscribir,
+    desuscribir,
+)
+
+
+pytestmark = pytest.mark.usefixtures("feed")
+
+
+def test_feed_registra_solo_cambios_relevantes(gestor):
+    inicio = cursor_actual_feed()
+
+    conn = gestor.obtener()
+    try:
+        linea = conn.execute("SELECT nombre FROM lineas_credito LIMIT 1").fetchone()[0]
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, linea_credito, resultado, "
+            "origen, estado_comite) "
+            "VALUES ('2026-03-02T09:00:00-05:00', 'Basesor25', ?, '{}', 'Comité', 'pending')",
+            (linea,),
+        )
+        conn.commit()
+        despues_alta = cursor_actual_feed()
+
+        # Reescritura sin cambios (como guardar_evaluacion_db): no genera evento
+        conn.execute(
+            "UPDATE evaluaciones SET estado_comite = estado_comite, asesor = asesor "
+            "WHERE timestamp = '2026-03-02T09:00:00-05:00'"
+        )
+        conn.commit()
+        assert cursor_actual_feed() == despues_alta
+
+        # Decisión del comité
+        conn.execute(
+            "UPDATE evaluaciones SET estado_comite = 'approved', decision_admin = ? "
+            "WHERE timestamp = '2026-03-02T09:00:00-05:00'",
+            (json.dumps({"accion": "approved"}),),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    cambios = obtener_cambios_desde(inicio, asesor="Basesor25")
+    assert [ev["operacion"] for ev in cambios["eventos"]] == ["insert", "update"]
+    assert [ev["tipo"] for ev in cambios["eventos"]] == ["caso_enviado", "caso_aprobado"]
+    assert cambios["eventos"][-1]["estado_comite"] == "approved"
+    assert obtener_cambios_desde(inicio, asesor="otro")["eventos"] == []
+    assert obtener_cambios_desde(cambios["cursor"])["eventos"] == []
+
+    # Cursor de otra base (mayor que el actual): recarga completa
+    assert obtener_cambios_desde(cambios["cursor"] + 50)["eventos"] is None
+
+
+def test_borrado_publica_caso_eliminado(gestor):
+    conn = gestor.obtener()
+    try:
+        caso = conn.execute(
+            "SELECT id, timestamp FROM evaluaciones WHERE asesor = 'Basesor25' "
+            "AND origen = 'Comité' ORDER BY id LIMIT 1"
+        ).fetchone()
+        inicio = cursor_actual_feed()
+        conn.execute("DELETE FROM evaluaciones WHERE id = ?", (caso[0],))
+        conn.commit()
+    finally:
+        conn.close()
+
+    cambios = obtener_cambios_desde(inicio, asesor="Basesor25")
+    assert len(cambios["eventos"]) == 1
+    evento = cambios["eventos"][0]
+    assert evento["operacion"] == "delete"
+    assert evento["tipo"] == "caso_eliminado"
+    assert (evento["evaluacion_id"], evento["timestamp"]) == tuple(caso)
+    assert obtener_cambios_desde(inicio, asesor="alexa")["eventos"] == []
+
+
+def test_borrado_masivo_llega_al_feed(gestor):
+    conn = gestor.obtener()
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+        pendientes = conn.execute(
+            "SELECT timestamp FROM evaluaciones WHERE estado_comite = 'pending'"
+        ).fetchall()
+        inicio = cursor_actual_feed()
+        # Como /admin/limpiar-historial
+        conn.execute("DELETE FROM evaluaciones")
+        conn.commit()
+    finally:
+        conn.close()
+    notificar_cambios()
+
+    cambios = esperar_cambios(inicio, timeout=1)
+    assert len(cambios["eventos"]) == total
+    assert {ev["tipo"] for ev in cambios["eventos"]} == {"caso_eliminado"}
+    # Los pendientes borrados se distinguen (contador del comité)
+    assert sorted(
+        ev["timestamp"] for ev in cambios["eventos"] if ev["estado_comite"] == "pending"
+    ) == sorted(row[0] for row in pendientes)
+
+
+def test_polling_sin_cambios_no_toca_evaluaciones(gestor):
+    cursor_actual_feed()
+
+    conn = gestor.obtener()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        for _ in range(5):
+            cursor = cursor_actual_feed()
+            assert obtener_cambios_desde(cursor)["eventos"] == []
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+
+    assert sentencias
+    assert not any("evaluaciones" in s.replace("cambios_evaluaciones", "") for s in sentencias)
+
+
+def test_suscriptor_despierta_al_notificar(gestor, monkeypatch):
+    desde = cursor_actual_feed()
+    # Sin notificación la espera solo vería el cambio en la siguiente sincronización
+    monkeypatch.setattr(db_helpers_cambios, "INTERVALO_SINCRONIZACION_S", 60)
+
+    def decidir():
+        time.sleep(0.1)
+        conn = gestor.obtener()
+        conn.execute(
+            "UPDATE evaluaciones SET estado_final = 'desembolsado' "
+            "WHERE id = (SELECT id FROM evaluaciones WHERE estado_comite = 'approved' "
+            "AND estado_final IS NULL LIMIT 1)"
+        )
+        conn.commit()
+        conn.close()
+        notificar_cambios()
+
+    hilo = threading.Thread(target=decidir)
+    inicio = time.monotonic()
+    hilo.start()
+    cambios = esperar_cambios(desde, timeout=10)
+    hilo.join()
+
+    assert time.monotonic() - inicio < 5
+    assert [ev["tipo"] for ev in cambios["eventos"]] == ["caso_desembolsado"]
+    assert esperar_cambios(cambios["cursor"], timeout=0.1)["eventos"] == []
+
+
+def test_triggers_solo_se_crean_si_faltan(gestor):
+    sentencias = []
+    conn = gestor.obtener()
+    conn.set_trace_callback(sentencias.append)
+    conn.close()
+
+    assert ensure_feed_cambios()
+    assert not [s for s in sentencias if "CREATE TRIGGER" in s.upper() or "DROP TRIGGER" in s.upper()]
+
+    conn = gestor.obtener()
+    conn.execute("DROP TRIGGER trg_cambios_evaluaciones_delete")
+    conn.commit()
+    conn.close()
+    sentencias.clear()
+    assert ensure_feed_cambios()
+    creados = [s for s in sentencias if "CREATE TRIGGER" in s.upper()]
+    assert len(creados) == 1 and "trg_cambios_evaluaciones_delete" in creados[0]
+
+    conn = gestor.obtener()
+    conn.set_trace_callback(None)
+    triggers = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND name LIKE 'trg_cambios_evaluaciones_%'"
+        )
+    }
+    conn.close()
+    assert triggers == {
+        "trg_cambios_evaluaciones_insert",
+        "trg_cambios_evaluaciones_update",
+        "trg_cambios_evaluaciones_delete",
+    }
+
+
+def test_triggers_anteriores_a_tipo_se_recrean(gestor):
+    conn = gestor.obtener()
+    try:
+        # Trigger de alta anterior a la columna tipo (no la llena)
+        conn.execute("DROP TRIGGER trg_cambios_evaluaciones_insert")
+        conn.execute(
+            """
+            CREATE TRIGGER trg_cambios_evaluaciones_insert
+            AFTER INSERT ON evaluaciones
+            BEGIN
+                INSERT INTO cambios_evaluaciones
+                    (evaluacion_id, timestamp, asesor, origen, estado_comite, operacion)
+                VALUES (NEW.id, NEW.timestamp, NEW.asesor, NEW.origen,
+                        NEW.estado_comite, 'insert');
+            END
+        """
+        )
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado, origen, estado_comite) "
+            "VALUES ('2026-03-02T09:00:00-05:00', 'Basesor25', '{}', 'Comité', 'pending')"
+        )
+        conn.commit()
+        assert conn.execute(
+            "SELECT tipo FROM cambios_evaluaciones ORDER BY seq DESC LIMIT 1"
+        ).fetchone()[0] is None
+    finally:
+        conn.close()
+
+    assert ensure_feed_cambios()
+
+    conn = gestor.obtener()
+    try:
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado, origen, estado_comite) "
+            "VALUES ('2026-03-02T10:00:00-05:00', 'Basesor25', '{}', 'Comité', 'pending')"
+        )
+        conn.commit()
+        tipos = [
+            row[0] for row in conn.execute(
+                "SELECT tipo FROM cambios_evaluaciones ORDER BY seq DESC LIMIT 2"
+            )
+        ]
+        sin_tipo = conn.execute(
+            "SELECT COUNT(*) FROM cambios_evaluaciones WHERE tipo IS NULL"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    # El evento nuevo y el que quedó sin tipo llegan como caso_enviado
+    assert tipos == ["caso_enviado", "caso_enviado"]
+    assert sin_tipo == 0
+
+
+def test_tope_de_suscriptores(monkeypatch):
+    monkeypatch.setattr(db_helpers_cambios, "_suscriptores", {})
+    monkeypatch.setattr(db_helpers_cambios, "MAX_SUSCRIPTORES_SSE", 2)
+    ids = [suscribir("asesor1"), suscribir("asesor2")]
+    assert None not in ids
+    assert suscribir("asesor3") is None
+
+    desuscribir(ids[0])
+    assert suscribir("asesor3") is not None
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests del guardado en lote de evaluaciones y simulaciones
+(db_helpers.guardar_evaluaciones_lote / guardar_simulaciones_lote): una
+sola transacción, upsert por timestamp y todo o nada ante un error.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from db_helpers import (
+    guardar_evaluaciones_lote,
+    guardar_simulaciones_lote,
+)
+from db_helpers_rollups import verificar_rollups
+
+
+pytestmark = pytest.mark.usefixtures("rollups")
+
+
+def _evaluacion(i, **extra):
+    ev = {
+        "timestamp": f"2026-04-01T10:{i // 60:02d}:{i % 60:02d}-05:00",
+        "asesor": "Basesor25",
+        "nombre_cliente": f"Cliente Lote {i}",
+        "cedula": str(9000 + i),
+        "linea_credito": "LoansiFlex",
+        "resultado": {"aprobado": True, "nivel": "Bajo riesgo"},
+        "criterios_evaluados": [{"criterio": "edad", "puntos": 10}],
+        "monto_solicitado": 1000000 + i,
+    }
+    ev.update(extra)
+    return ev
+
+
+def test_upsert_de_lote_en_un_solo_commit(gestor):
+    conn = gestor.obtener()
+    try:
+        existente = conn.execute(
+            "SELECT id, timestamp, asesor FROM evaluaciones ORDER BY id LIMIT 1"
+        ).fetchone()
+        total_antes = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+
+        lote = [_evaluacion(i) for i in range(200)]
+        lote.append(_evaluacion(0, timestamp=existente[1], asesor=existente[2],
+                                estado_comite="pending", nombre_cliente="Actualizado"))
+
+        # Sin préstamo abierto: el helper es dueño de la transacción (la
+        # conexión del pool es la misma, así que la traza la registra)
+        sentencias = []
+        conn.set_trace_callback(sentencias.append)
+        conn.close()
+        try:
+            assert guardar_evaluaciones_lote(lote) == 201
+        finally:
+            conn = gestor.obtener()
+            conn.set_trace_callback(None)
+
+        assert sum(1 for s in sentencias if s.strip().upper() == "COMMIT") == 1
+        assert conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0] == total_antes + 200
+
+        fila = conn.execute(
+            "SELECT id, nombre_cliente, estado_comite, resultado FROM evaluaciones "
+            "WHERE timestamp = ?",
+            (existente[1],),
+        ).fetchone()
+        assert fila[0] == existente[0]  # el upsert conserva el id
+        assert tuple(fila[1:3]) == ("Actualizado", "pending")
+        assert json.loads(fila[3])["nivel"] == "Bajo riesgo"
+    finally:
+        conn.close()
+
+    assert verificar_rollups()["consistente"]
+
+
+def test_lote_con_error_no_guarda_nada(gestor):
+    conn = gestor.obtener()
+    try:
+        evals_antes = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+        sims_antes = conn.execute("SELECT COUNT(*) FROM simulaciones").fetchone()[0]
+
+        # Sin timestamp la fila viola NOT NULL
+        sims = [{"timestamp": "2026-04-01T11:00:00", "asesor": "Basesor25",
+                 "monto": 500000, "plazo": 12, "linea_credito": "LoansiFlex"}] * 50
+        assert guardar_simulaciones_lote(sims) == 50
+        with pytest.raises(sqlite3.IntegrityError):
+            guardar_simulaciones_lote(sims + [{"asesor": "Basesor25"}])
+        with pytest.raises(sqlite3.IntegrityError):
+            guardar_evaluaciones_lote([_evaluacion(1), _evaluacion(2, timestamp=None)])
+
+        assert conn.execute("SELECT COUNT(*) FROM simulaciones").fetchone()[0] == sims_antes + 50
+        assert conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0] == evals_antes
+        assert tuple(conn.execute(
+            "SELECT modalidad_desembolso, aval FROM simulaciones ORDER BY id DESC LIMIT 1"
+        ).fetchone()) == ("completo", 0)
+    finally:
+        conn.close()
+
+    assert guardar_evaluaciones_lote([]) == 0
+    assert verificar_rollups()["consistente"]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests de la paginación del historial de evaluaciones
+(db_helpers.obtener_historial_evaluaciones): el cursor keyset devuelve las
+mismas páginas que el OFFSET, sin solaparse, y la última no trae cursor.
+"""
+
+import pytest
+
+from db_helpers import obtener_historial_evaluaciones
+
+
+pytestmark = pytest.mark.usefixtures("columnas_resultado")
+
+
+def _ids(historial):
+    return [ev["id"] for ev in historial["evaluaciones"]]
+
+
+def _recorrer_con_cursor(per_page):
+    paginas = []
+    historial = obtener_historial_evaluaciones(per_page=per_page)
+    paginas.append(historial)
+    while historial["next_cursor"]:
+        historial = obtener_historial_evaluaciones(
+            per_page=per_page, cursor_token=historial["next_cursor"]
+        )
+        paginas.append(historial)
+    return paginas
+
+
+def _dejar_total_multiplo(gestor, per_page):
+    conn = gestor.obtener()
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+        sobrantes = total % per_page
+        if sobrantes:
+            conn.execute(
+                "DELETE FROM evaluaciones WHERE id IN "
+                "(SELECT id FROM evaluaciones ORDER BY id LIMIT ?)",
+                (sobrantes,),
+            )
+        conn.commit()
+        return total - sobrantes
+    finally:
+        conn.close()
+
+
+def test_primera_pagina(gestor):
+    historial = obtener_historial_evaluaciones(per_page=25)
+
+    assert historial["page"] == 1
+    assert historial["inicio"] == 0
+    assert len(historial["evaluaciones"]) == 25
+    assert historial["total_registros"] > 25
+    assert historial["next_cursor"] is not None
+
+    claves = [(ev["timestamp"], ev["id"]) for ev in historial["evaluaciones"]]
+    assert claves == sorted(claves, reverse=True)
+
+
+def test_siguiente_pagina_con_cursor_igual_a_offset(gestor):
+    primera = obtener_historial_evaluaciones(per_page=25)
+    segunda = obtener_historial_evaluaciones(
+        per_page=25, page=1, cursor_token=primera["next_cursor"]
+    )
+    por_offset = obtener_historial_evaluaciones(per_page=25, page=2)
+
+    # Con cursor, page se ignora y la posición sale de la consulta
+    assert segunda["page"] == 2
+    assert segunda["inicio"] == 25
+    assert _ids(segunda) == _ids(por_offset)
+    assert not set(_ids(primera)) & set(_ids(segunda))
+    assert segunda["next_cursor"] == por_offset["next_cursor"]
+
+
+def test_ultima_pagina_sin_cursor(gestor):
+    paginas = _recorrer_con_cursor(40)
+    total = paginas[0]["total_registros"]
+
+    ids = [ev_id for pagina in paginas for ev_id in _ids(pagina)]
+    assert len(ids) == total
+    assert len(set(ids)) == total
+    assert len(paginas) == paginas[0]["total_pages"]
+    assert paginas[-1]["page"] == paginas[-1]["total_pages"]
+    assert paginas[-1]["next_cursor"] is None
+    assert all(p["next_cursor"] for p in paginas[:-1])
+
+
+def test_ultima_pagina_exacta_sin_cursor(gestor):
+    total = _dejar_total_multiplo(gestor, 40)
+
+    paginas = _recorrer_con_cursor(40)
+
+    assert paginas[0]["total_registros"] == total
+    assert len(paginas) == total // 40
+    assert len(paginas[-1]["evaluaciones"]) == 40
+    assert paginas[-1]["next_cursor"] is None
+    ultima_offset = obtener_historial_evaluaciones(per_page=40, page=total // 40)
+    assert ultima_offset["next_cursor"] is None
+    assert _ids(ultima_offset) == _ids(paginas[-1])
+
+
+def test_cursor_respeta_filtro_de_resultado(gestor):
+    paginas = [
+        obtener_historial_evaluaciones(per_page=10, resultado="rechazado")
+    ]
+    while paginas[-1]["next_cursor"]:
+        paginas.append(
+            obtener_historial_evaluaciones(
+                per_page=10,
+                resultado="rechazado",
+                cursor_token=paginas[-1]["next_cursor"],
+            )
+        )
+
+    evaluaciones = [ev for pagina in paginas for ev in pagina["evaluaciones"]]
+    assert len(evaluaciones) == paginas[0]["total_registros"]
+    assert not any(ev["resultado"]["aprobado"] for ev in evaluaciones)
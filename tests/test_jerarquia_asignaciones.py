@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests del snapshot en memoria de la jerarquía de asignaciones
+(db_helpers.obtener_jerarquia_asignaciones), su invalidación por versión y
+el filtro de visibilidad en SQL (db_helpers.filtro_visibilidad_sql).
+"""
+
+import pytest
+
+import db_helpers
+from db_helpers import (
+    ensure_user_assignments_table,
+    ensure_versiones_datos,
+    get_assigned_usernames_recursive,
+    add_assignment,
+    remove_assignment,
+    incrementar_version_datos,
+    resolve_visible_usernames,
+    filtro_visibilidad_sql,
+    obtener_simulaciones_visibles,
+    obtener_simulaciones_por_asesores,
+)
+
+
+@pytest.fixture
+def gestor(gestor):
+    ensure_user_assignments_table()
+    ensure_versiones_datos()
+
+    conn = gestor.obtener()
+    for username, rol in [("j_gerente", "gerente"), ("j_sup", "supervisor"),
+                          ("j_as1", "asesor"), ("j_as2", "asesor")]:
+        conn.execute(
+            "INSERT INTO usuarios (username, password_hash, rol) VALUES (?, 'x', ?)",
+            (username, rol),
+        )
+    conn.commit()
+    conn.close()
+    return gestor
+
+
+def test_snapshot_transitivo_sin_consultas(gestor):
+    assert add_assignment("j_gerente", "j_sup")
+    assert add_assignment("j_sup", "j_as1")
+
+    assert get_assigned_usernames_recursive("j_gerente") == ["j_as1", "j_sup"]
+    assert get_assigned_usernames_recursive("j_gerente", max_depth=1) == ["j_sup"]
+
+    conn = gestor.obtener()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        for _ in range(20):
+            get_assigned_usernames_recursive("j_gerente")
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    assert sentencias == []
+
+    # Los cambios de este proceso se ven de inmediato
+    assert add_assignment("j_sup", "j_as2")
+    assert get_assigned_usernames_recursive("j_gerente") == ["j_as1", "j_as2", "j_sup"]
+    assert remove_assignment("j_gerente", "j_sup")
+    assert get_assigned_usernames_recursive("j_gerente") == []
+
+
+def test_cambio_de_otro_proceso_por_version(gestor, monkeypatch):
+    monkeypatch.setattr(db_helpers, "INTERVALO_VERIFICACION_JERARQUIA_S", 0)
+    assert get_assigned_usernames_recursive("j_gerente") == []
+
+    # Escritura directa (como la haría otro worker) con su bump de versión
+    conn = gestor.obtener()
+    conn.execute(
+        "INSERT INTO user_assignments (manager_username, member_username) "
+        "VALUES ('j_gerente', 'j_as1')"
+    )
+    incrementar_version_datos(conn.cursor(), "asignaciones")
+    conn.commit()
+    conn.close()
+
+    assert get_assigned_usernames_recursive("j_gerente") == ["j_as1"]
+
+
+def test_filtro_visibilidad_equivale_a_la_lista(gestor):
+    assert add_assignment("j_gerente", "j_sup")
+    assert add_assignment("j_sup", "Basesor25")
+
+    conn = gestor.obtener()
+    linea = conn.execute("SELECT nombre FROM lineas_credito LIMIT 1").fetchone()[0]
+    conn.execute(
+        "INSERT INTO simulaciones (timestamp, asesor, cedula, monto, plazo, linea_credito) "
+        "VALUES ('2026-03-02T09:05:00', 'j_sup', '123', 700000, 12, ?)",
+        (linea,),
+    )
+    conn.commit()
+    conn.close()
+
+    vis = resolve_visible_usernames("j_gerente", ["sim_hist_equipo"], "simulaciones")
+    fragmento, params = filtro_visibilidad_sql(vis, "j_gerente")
+    # Los parámetros no dependen del tamaño del equipo
+    assert len(params) == 3
+
+    equipo = obtener_simulaciones_visibles((fragmento, params))
+    assert equipo == obtener_simulaciones_por_asesores(vis["usernames_visibles"])
+    assert {s["asesor"] for s in equipo} == {"j_sup", "Basesor25"}
+    assert [s["asesor"] for s in obtener_simulaciones_visibles((fragmento, params), cedula="123")] == ["j_sup"]
+
+    ninguno = resolve_visible_usernames("j_gerente", [], "simulaciones")
+    assert obtener_simulaciones_visibles(filtro_visibilidad_sql(ninguno, "j_gerente")) == []
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests del limitador de intentos de login (db_helpers_login): bloqueo por
+ventana deslizante o fija (desde el primer fallo), conteo compartido
+entre procesos vía SQLite y limpieza periódica de intentos vencidos.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import db_helpers_login
+from db_helpers_login import ensure_intentos_login, LimitadorLogin
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1_800_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_bloqueo_por_ventana_en_memoria(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(db_helpers_login, "_ahora", reloj)
+    limitador = LimitadorLogin(3, timedelta(minutes=15), timedelta(minutes=15), persistir=False)
+
+    assert limitador.estado("1.1.1.1")["restantes"] == 3
+    for _ in range(2):
+        limitador.registrar_fallo("1.1.1.1")
+        reloj.ahora += 60
+    assert limitador.estado("1.1.1.1")["restantes"] == 1
+    limitador.registrar_fallo("1.1.1.1")
+
+    estado = limitador.estado("1.1.1.1")
+    assert estado["bloqueado"]
+    assert estado["segundos_bloqueo"] == 15 * 60 - 120
+    assert not limitador.estado("2.2.2.2")["bloqueado"]
+
+    # 15 minutos después del primer fallo se libera
+    reloj.ahora += 15 * 60 - 120
+    assert not limitador.estado("1.1.1.1")["bloqueado"]
+
+    limitador.limpiar("1.1.1.1")
+    assert limitador.estado("1.1.1.1")["restantes"] == 3
+
+
+def test_ventana_fija_limpia_todo_al_expirar(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(db_helpers_login, "_ahora", reloj)
+    limitador = LimitadorLogin(
+        3, timedelta(minutes=15), timedelta(minutes=15), persistir=False, ventana_fija=True
+    )
+
+    for _ in range(3):
+        limitador.registrar_fallo("1.1.1.1")
+        reloj.ahora += 4 * 60
+    assert limitador.estado("1.1.1.1")["bloqueado"]
+    reloj.ahora += 3 * 60
+
+    # Expirado el bloqueo (15 min desde el primer fallo) se olvidan los tres:
+    # un fallo más no vuelve a bloquear, como con login_attempts.json
+    limitador.registrar_fallo("1.1.1.1")
+    estado = limitador.estado("1.1.1.1")
+    assert not estado["bloqueado"]
+    assert estado["intentos"] == 1
+    assert estado["restantes"] == 2
+
+    # Sin bloqueo, también se reinicia a los 15 min del primer fallo
+    reloj.ahora += 10 * 60
+    limitador.registrar_fallo("1.1.1.1")
+    assert limitador.estado("1.1.1.1")["restantes"] == 1
+    reloj.ahora += 5 * 60
+    assert limitador.estado("1.1.1.1")["restantes"] == 3
+
+    # Con ventana deslizante el fallo tras el bloqueo vuelve a bloquear
+    deslizante = LimitadorLogin(3, timedelta(minutes=15), timedelta(minutes=15), persistir=False)
+    for _ in range(3):
+        deslizante.registrar_fallo("2.2.2.2")
+        reloj.ahora += 4 * 60
+    reloj.ahora += 3 * 60
+    deslizante.registrar_fallo("2.2.2.2")
+    assert deslizante.estado("2.2.2.2")["bloqueado"]
+
+
+def test_conteo_compartido_entre_workers(gestor, tmp_path, monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(db_helpers_login, "_ahora", reloj)
+    monkeypatch.setattr(db_helpers_login, "INTERVALO_SINCRONIZACION_S", 0)
+
+    # Intentos antiguos en el JSON heredado: se importan una sola vez
+    archivo = tmp_path / "login_attempts.json"
+    archivo.write_text(json.dumps({
+        "9.9.9.9": [datetime.fromtimestamp(reloj.ahora - 30).isoformat()],
+    }))
+    assert ensure_intentos_login(str(archivo))
+    assert ensure_intentos_login(str(archivo))
+
+    worker_a = LimitadorLogin(3, timedelta(minutes=15), timedelta(minutes=15))
+    worker_b = LimitadorLogin(3, timedelta(minutes=15), timedelta(minutes=15))
+    assert worker_b.estado("9.9.9.9")["intentos"] == 1
+
+    worker_a.registrar_fallo("3.3.3.3")
+    worker_b.registrar_fallo("3.3.3.3")
+    worker_a.registrar_fallo("3.3.3.3")
+    assert worker_b.estado("3.3.3.3")["bloqueado"]
+
+    # Un login exitoso en un worker libera la IP en el otro
+    worker_b.limpiar("3.3.3.3")
+    assert worker_a.estado("3.3.3.3")["restantes"] == 3
+
+    # Limpieza de vencidos: borra filas fuera de la retención
+    worker_a.registrar_fallo("4.4.4.4")
+    reloj.ahora += 16 * 60
+    assert worker_a.limpiar_expirados() >= 1
+    conn = gestor.obtener()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM intentos_login").fetchone()[0] == 0
+    finally:
+        conn.close()
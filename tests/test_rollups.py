@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests de los rollups diarios de dashboards (db_helpers_rollups): los
+triggers los mantienen iguales al agregado de las tablas crudas.
+"""
+
+import json
+
+from db_helpers import ensure_columnas_fecha
+from db_helpers_rollups import ensure_rollups, reconstruir_rollups, verificar_rollups
+
+
+def test_triggers_mantienen_rollups(gestor):
+    ensure_columnas_fecha()
+    assert ensure_rollups()
+    assert verificar_rollups()["consistente"]
+
+    conn = gestor.obtener()
+    try:
+        linea = conn.execute("SELECT nombre FROM lineas_credito LIMIT 1").fetchone()[0]
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, linea_credito, resultado, "
+            "monto_solicitado, estado_comite) "
+            "VALUES ('2026-03-02T09:00:00-05:00', 'Basesor25', ?, '{}', 500000, 'pending')",
+            (linea,),
+        )
+        conn.execute(
+            "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+            "VALUES ('2026-03-02T09:05:00', 'Basesor25', 700000, 12, ?)",
+            (linea,),
+        )
+        # Decisión del comité y luego desembolso
+        decision = json.dumps({"accion": "approved", "timestamp": "2026-03-03T11:00:00"})
+        conn.execute(
+            "UPDATE evaluaciones SET estado_comite = 'approved', decision_admin = ? "
+            "WHERE timestamp = '2026-03-02T09:00:00-05:00'",
+            (decision,),
+        )
+        conn.execute(
+            "UPDATE evaluaciones SET estado_final = 'desembolsado' "
+            "WHERE timestamp = '2026-03-02T09:00:00-05:00'"
+        )
+        conn.execute("DELETE FROM simulaciones WHERE id = (SELECT MIN(id) FROM simulaciones)")
+        conn.commit()
+
+        fila = conn.execute(
+            "SELECT total, monto_total FROM rollup_evaluaciones_dia "
+            "WHERE dia = '2026-03-02' AND asesor = 'Basesor25' "
+            "AND estado_comite = 'approved' AND estado_final = 'desembolsado'"
+        ).fetchone()
+        decisiones = conn.execute(
+            "SELECT total FROM rollup_decisiones_dia "
+            "WHERE dia = '2026-03-03' AND asesor = 'Basesor25' AND estado_comite = 'approved'"
+        ).fetchone()
+        pendientes = conn.execute(
+            "SELECT COUNT(*) FROM rollup_evaluaciones_dia "
+            "WHERE dia = '2026-03-02' AND estado_comite = 'pending'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    assert tuple(fila) == (1, 500000)
+    assert decisiones[0] == 1
+    assert pendientes == 0  # la fila que quedó en cero se elimina
+    assert verificar_rollups()["consistente"]
+
+
+def test_verificar_detecta_y_reconstruir_repara(gestor):
+    ensure_columnas_fecha()
+    ensure_rollups()
+
+    conn = gestor.obtener()
+    # Un rollup desfasado (p. ej. escritura con triggers deshabilitados)
+    conn.execute("UPDATE rollup_simulaciones_dia SET total = total + 1")
+    conn.commit()
+    conn.close()
+
+    resultado = verificar_rollups()
+    assert not resultado["consistente"]
+    assert resultado["rollups"]["rollup_simulaciones_dia"]["solo_en_rollup"] > 0
+
+    assert reconstruir_rollups() is not None
+    assert verificar_rollups()["consistente"]
+
+
+def test_filas_sin_dia_cuentan_en_los_totales(gestor):
+    ensure_columnas_fecha()
+    ensure_rollups()
+
+    conn = gestor.obtener()
+    try:
+        # Timestamp que no se puede convertir: creado_dia queda NULL
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado, "
+            "monto_solicitado, estado_comite) "
+            "VALUES ('17/10/2026 09:00', 'Basesor25', '{}', 800000, 'pending')"
+        )
+        conn.execute(
+            "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+            "VALUES ('sin fecha', 'Basesor25', 300000, 12, "
+            "(SELECT nombre FROM lineas_credito LIMIT 1))"
+        )
+        conn.commit()
+
+        assert conn.execute(
+            "SELECT creado_dia FROM evaluaciones WHERE timestamp = '17/10/2026 09:00'"
+        ).fetchone()[0] is None
+        totales = conn.execute(
+            "SELECT (SELECT SUM(total) FROM rollup_evaluaciones_dia), "
+            "(SELECT COUNT(*) FROM evaluaciones), "
+            "(SELECT SUM(total) FROM rollup_evaluaciones_dia WHERE estado_comite = 'pending'), "
+            "(SELECT COUNT(*) FROM evaluaciones WHERE estado_comite = 'pending'), "
+            "(SELECT SUM(total) FROM rollup_simulaciones_dia), "
+            "(SELECT COUNT(*) FROM simulaciones)"
+        ).fetchone()
+        sin_dia = conn.execute(
+            "SELECT total, monto_total FROM rollup_evaluaciones_dia WHERE dia = ''"
+        ).fetchone()
+
+        conn.execute("DELETE FROM evaluaciones WHERE timestamp = '17/10/2026 09:00'")
+        conn.commit()
+        quedan_sin_dia = conn.execute(
+            "SELECT COUNT(*) FROM rollup_evaluaciones_dia WHERE dia = ''"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    assert totales[0] == totales[1]
+    assert totales[2] == totales[3]
+    assert totales[4] == totales[5]
+    assert tuple(sin_dia) == (1, 800000)
+    assert quedan_sin_dia == 0
+    assert verificar_rollups()["consistente"]
+
+
+def test_trigger_con_definicion_anterior_se_recrea(gestor):
+    ensure_columnas_fecha()
+    ensure_rollups()
+
+    conn = gestor.obtener()
+    try:
+        # Trigger de una versión anterior y rollup calculado con esa regla
+        conn.execute("DROP TRIGGER trg_rollup_evaluaciones_dia_insert")
+        conn.execute(
+            "CREATE TRIGGER trg_rollup_evaluaciones_dia_insert "
+            "AFTER INSERT ON evaluaciones BEGIN SELECT 1; END"
+        )
+        conn.execute("DELETE FROM rollup_evaluaciones_dia WHERE dia >= '2025-12-01'")
+        conn.commit()
+    finally:
+        conn.close()
+    assert not verificar_rollups()["consistente"]
+
+    assert ensure_rollups()
+    assert verificar_rollups()["consistente"]
+
+    conn = gestor.obtener()
+    try:
+        conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado) "
+            "VALUES ('2026-10-17T09:00:00', 'Basesor25', '{}')"
+        )
+        conn.commit()
+        sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'trg_rollup_evaluaciones_dia_insert'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    assert "rollup_evaluaciones_dia" in sql
+    assert verificar_rollups()["consistente"]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests de las rutas de polling del comité y del asesor sobre el feed de
+cambios: /asesor/api/casos-comite/cambios (cursor, ETag y 304) y
+/api/comite/pendientes (permisos, ETag y borrados desde el cursor que
+envía el cliente).
+"""
+
+ASESOR = "Basesor25"
+
+
+def _ejecutar(gestor, sql, parametros=()):
+    conn = gestor.obtener()
+    try:
+        conn.execute(sql, parametros)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _consultar(gestor, sql, parametros=()):
+    conn = gestor.obtener()
+    try:
+        return conn.execute(sql, parametros).fetchall()
+    finally:
+        conn.close()
+
+
+def test_cambios_asesor_sin_sesion_redirige_al_login(cliente):
+    respuesta = cliente().get("/asesor/api/casos-comite/cambios")
+    assert respuesta.status_code == 302
+    assert "/login" in respuesta.headers["Location"]
+
+
+def test_cambios_asesor_cursor_y_etag(cliente, gestor):
+    asesor = cliente(ASESOR)
+
+    # Sin cursor: lista completa
+    respuesta = asesor.get("/asesor/api/casos-comite/cambios")
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["incremental"] is False
+    propios = _consultar(
+        gestor,
+        "SELECT timestamp FROM evaluaciones WHERE asesor = ? AND origen = 'Comité'",
+        (ASESOR,),
+    )
+    assert sorted(c["timestamp"] for c in datos["casos"]) == sorted(f[0] for f in propios)
+    cursor, etag = datos["cursor"], respuesta.headers["ETag"]
+
+    # Sin cambios: 304 por cursor o por If-None-Match
+    respuesta = asesor.get(f"/asesor/api/casos-comite/cambios?cursor={cursor}")
+    assert respuesta.status_code == 304
+    assert respuesta.headers["ETag"] == etag
+    respuesta = asesor.get(
+        "/asesor/api/casos-comite/cambios", headers={"If-None-Match": etag}
+    )
+    assert respuesta.status_code == 304
+
+    # Una decisión sobre un caso propio y otro borrado: solo esos dos
+    actualizado, borrado = propios[0][0], propios[1][0]
+    _ejecutar(
+        gestor,
+        "UPDATE evaluaciones SET estado_comite = 'approved', visto_por_asesor = 0 "
+        "WHERE timestamp = ?",
+        (actualizado,),
+    )
+    _ejecutar(gestor, "DELETE FROM evaluaciones WHERE timestamp = ?", (borrado,))
+
+    respuesta = asesor.get(
+        f"/asesor/api/casos-comite/cambios?cursor={cursor}",
+        headers={"If-None-Match": etag},
+    )
+    assert respuesta.status_code == 200
+    assert respuesta.headers["ETag"] != etag
+    datos = respuesta.get_json()
+    assert datos["incremental"] is True
+    assert [c["timestamp"] for c in datos["casos"]] == [actualizado]
+    assert datos["casos"][0]["estado_visual"] == "nuevos"
+    assert datos["eliminados"] == [borrado]
+    assert datos["cursor"] > cursor
+
+    # Los cambios de otro asesor no le llegan
+    ajeno = _consultar(
+        gestor, "SELECT timestamp FROM evaluaciones WHERE asesor = 'alexa' LIMIT 1"
+    )[0][0]
+    _ejecutar(gestor, "DELETE FROM evaluaciones WHERE timestamp = ?", (ajeno,))
+    datos = asesor.get(
+        f"/asesor/api/casos-comite/cambios?cursor={datos['cursor']}"
+    ).get_json()
+    assert datos["incremental"] is True
+    assert datos["casos"] == [] and datos["eliminados"] == []
+
+
+def test_pendientes_requiere_permiso_de_comite(cliente):
+    assert cliente("maicolare25").get("/api/comite/pendientes").status_code == 403
+    assert cliente().get("/api/comite/pendientes").status_code == 302
+
+
+def test_pendientes_etag_y_eliminados_desde_el_cursor(cliente, gestor):
+    comite = cliente("comitetecnico")
+
+    respuesta = comite.get("/api/comite/pendientes")
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    pendientes = _consultar(
+        gestor, "SELECT timestamp FROM evaluaciones WHERE estado_comite = 'pending'"
+    )
+    assert datos["pendientes"] == len(pendientes)
+    assert datos["eliminados"] == []
+    cursor, etag = datos["cursor"], respuesta.headers["ETag"]
+
+    respuesta = comite.get(
+        f"/api/comite/pendientes?cursor={cursor}", headers={"If-None-Match": etag}
+    )
+    assert respuesta.status_code == 304
+
+    # Borrar un pendiente: llega en `eliminados` a quien manda el cursor
+    _ejecutar(
+        gestor, "DELETE FROM evaluaciones WHERE timestamp = ?", (pendientes[0][0],)
+    )
+    respuesta = comite.get(
+        f"/api/comite/pendientes?cursor={cursor}", headers={"If-None-Match": etag}
+    )
+    assert respuesta.status_code == 200
+    assert respuesta.headers["ETag"] != etag
+    datos = respuesta.get_json()
+    assert datos["eliminados"] == [pendientes[0][0]]
+    assert datos["pendientes"] == len(pendientes) - 1
+
+    # El cursor no vive en la sesión: otra pestaña con el cursor viejo
+    # también recibe el borrado, y sin cursor no hay `eliminados`
+    with comite.session_transaction() as sesion:
+        assert "cursor_feed_pendientes" not in sesion
+    otra = comite.get(f"/api/comite/pendientes?cursor={cursor}").get_json()
+    assert otra["eliminados"] == [pendientes[0][0]]
+    assert comite.get("/api/comite/pendientes").get_json()["eliminados"] == []
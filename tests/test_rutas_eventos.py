@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests de la ruta /api/eventos/stream (SSE): desactivada por defecto (204),
+503 al llegar al tope de conexiones y, activada, eventos filtrados por
+visibilidad desde el cursor del cliente.
+"""
+
+import pytest
+
+import db_helpers_cambios
+from db_helpers_cambios import contar_suscriptores, cursor_actual_feed
+
+ASESOR = "Basesor25"
+
+
+@pytest.fixture
+def sse(cliente, monkeypatch):
+    """SSE activado, con conexiones cortas y hasta dos suscriptores."""
+    import flask_app
+
+    monkeypatch.setattr(flask_app, "SSE_HABILITADO", True)
+    monkeypatch.setattr(flask_app, "DURACION_MAX_SSE_S", 0.3)
+    monkeypatch.setattr(flask_app, "LATIDO_SSE_S", 0.1)
+    monkeypatch.setattr(db_helpers_cambios, "MAX_SUSCRIPTORES_SSE", 2)
+    monkeypatch.setattr(db_helpers_cambios, "_suscriptores", {})
+    return cliente
+
+
+def _ejecutar(gestor, sql, parametros=()):
+    conn = gestor.obtener()
+    try:
+        conn.execute(sql, parametros)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_stream_desactivado_por_defecto(cliente):
+    assert cliente().get("/api/eventos/stream").status_code == 302
+
+    respuesta = cliente(ASESOR).get("/api/eventos/stream")
+    assert respuesta.status_code == 204
+    assert contar_suscriptores() == {}
+
+
+def test_stream_con_tope_alcanzado_responde_503(sse, monkeypatch):
+    monkeypatch.setattr(db_helpers_cambios, "MAX_SUSCRIPTORES_SSE", 0)
+
+    respuesta = sse(ASESOR).get("/api/eventos/stream")
+
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"]
+    assert contar_suscriptores() == {}
+
+
+def test_stream_entrega_eventos_visibles_desde_el_cursor(sse, gestor):
+    conn = gestor.obtener()
+    try:
+        propio = conn.execute(
+            "SELECT timestamp FROM evaluaciones WHERE asesor = ? AND origen = 'Comité' "
+            "AND estado_comite != 'approved' LIMIT 1",
+            (ASESOR,),
+        ).fetchone()[0]
+        ajeno = conn.execute(
+            "SELECT timestamp FROM evaluaciones WHERE asesor = 'alexa' LIMIT 1"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    inicio = cursor_actual_feed()
+    _ejecutar(
+        gestor,
+        "UPDATE evaluaciones SET visto_por_asesor = 1 - COALESCE(visto_por_asesor, 0) "
+        "WHERE timestamp = ?",
+        (ajeno,),
+    )
+    _ejecutar(
+        gestor,
+        "UPDATE evaluaciones SET estado_comite = 'approved' WHERE timestamp = ?",
+        (propio,),
+    )
+
+    respuesta = sse(ASESOR).get(
+        "/api/eventos/stream", headers={"Last-Event-ID": str(inicio)}
+    )
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == "text/event-stream"
+    cuerpo = respuesta.get_data(as_text=True)
+    respuesta.close()
+
+    assert cuerpo.startswith("retry: ")
+    assert "event: caso_aprobado" in cuerpo
+    assert propio in cuerpo
+    assert "event: badge" in cuerpo
+    # El cambio de otro asesor no es visible para este
+    assert ajeno not in cuerpo
+    assert contar_suscriptores() == {}
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Tests de las rutas de scoring (/api/scoring/...): sesión y permisos,
+token CSRF, validación de la entrada (400) y que la respuesta sea la misma
+que la función de db_helpers_scoring_* que envuelven.
+"""
+
+import json
+import random
+
+from db_helpers_scoring_backtest import backtest_config_scoring
+from db_helpers_scoring_calibracion import obtener_calibracion_linea
+from db_helpers_scoring_lote import calcular_scoring_lote
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_multilinea import calcular_scoring_todas_lineas
+
+# X-CSRFToken: las rutas exigen el encabezado (la validación de Flask-WTF
+# está desactivada en el cliente de prueba)
+CSRF = {"X-CSRFToken": "prueba"}
+
+
+def _post(cliente_prueba, url, datos, headers=CSRF):
+    return cliente_prueba.post(url, json=datos, headers=headers)
+
+
+def _valores_aleatorios(modelo, rnd):
+    valores = {}
+    for criterio in modelo.criterios:
+        limites = criterio.tramos.limites or (0.0,)
+        valores[criterio.codigo] = rnd.uniform(min(limites), max(limites))
+    return valores
+
+
+def test_lote_permisos_y_csrf(cliente):
+    datos = {"linea_credito": "LoansiFlex", "columnas": {"score_datacredito": [700]}}
+
+    assert _post(cliente(), "/api/scoring/lote", datos).status_code == 302
+    assert _post(cliente("maicolare25"), "/api/scoring/lote", datos).status_code == 403
+    sin_token = _post(cliente("Basesor25"), "/api/scoring/lote", datos, headers={})
+    assert sin_token.status_code == 403
+    assert sin_token.get_json()["error"] == "Token CSRF requerido"
+
+
+def test_lote_entrada_invalida(cliente):
+    asesor = cliente("Basesor25")
+
+    for datos in (
+        {},
+        {"linea_credito": "LoansiFlex", "columnas": [700, 650]},
+        {"linea_credito": "LoansiFlex", "columnas": {"score_datacredito": 700}},
+        {"linea_credito": "LoansiFlex", "solicitantes": "no es lista"},
+        # Columnas de distinto largo
+        {"linea_credito": "LoansiFlex", "columnas": {"a": [1, 2], "b": [1]}},
+    ):
+        respuesta = _post(asesor, "/api/scoring/lote", datos)
+        assert respuesta.status_code == 400, datos
+        assert respuesta.get_json()["success"] is False
+
+
+def test_lote_igual_a_calcular_scoring_lote(cliente):
+    columnas = {
+        "score_datacredito": [820, 640, None, 100],
+        "dti": [10, 45, 30, ""],
+        "historial_pagos": [6, 3, 0, 4],
+        "ingresos_netos": [3000000, 1400000, None, 2500000],
+    }
+    esperado = calcular_scoring_lote(columnas, "LoansiFlex")
+    assert True in esperado["resultados"]["rechazo_automatico"]
+    assert False in esperado["resultados"]["rechazo_automatico"]
+    asesor = cliente("Basesor25")
+
+    respuesta = _post(
+        asesor, "/api/scoring/lote", {"linea_credito": "LoansiFlex", "columnas": columnas}
+    )
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos.pop("success") is True
+    assert datos == esperado
+
+    # Por filas da lo mismo
+    solicitantes = [
+        {codigo: valores[fila] for codigo, valores in columnas.items()}
+        for fila in range(4)
+    ]
+    por_filas = _post(
+        asesor,
+        "/api/scoring/lote",
+        {"linea_credito": "LoansiFlex", "solicitantes": solicitantes},
+    ).get_json()
+    assert por_filas["resultados"] == esperado["resultados"]
+
+
+def test_backtest_permisos_y_entrada_invalida(cliente):
+    url = "/api/scoring/linea/5/backtest"
+    borrador = {"config_general": {"puntaje_minimo_aprobacion": 0}}
+
+    assert _post(cliente(), url, borrador).status_code == 302
+    # Ejecutar scoring no basta: hace falta editar la configuración
+    assert _post(cliente("Basesor25"), url, borrador).status_code == 403
+
+    admin = cliente("admintecnico")
+    assert _post(admin, url, borrador, headers={}).status_code == 403
+    assert _post(admin, url, ["no", "es", "dict"]).status_code == 400
+    assert admin.post(url, data="no es json", headers=CSRF).status_code == 400
+    assert _post(admin, "/api/scoring/linea/999/backtest", borrador).status_code == 404
+
+
+def test_backtest_igual_a_backtest_config_scoring(cliente, gestor):
+    # Historial de LoansiFlex con los valores de cada criterio
+    rnd = random.Random(7)
+    modelo = obtener_modelo_scoring("LoansiFlex")
+    conn = gestor.obtener()
+    try:
+        conn.executemany(
+            "INSERT INTO evaluaciones (timestamp, asesor, tipo_credito, resultado, valores_criterios) "
+            "VALUES (?, 'admin', 'LoansiFlex', '{\"score\": 0}', ?)",
+            [
+                (f"2026-01-01T00:00:00.{i:06d}", json.dumps(_valores_aleatorios(modelo, rnd)))
+                for i in range(40)
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    borrador = {"config_general": {"puntaje_minimo_aprobacion": 0}}
+    esperado = backtest_config_scoring(borrador, "LoansiFlex")
+    assert esperado["evaluaciones"] == 40
+
+    respuesta = _post(cliente("admintecnico"), "/api/scoring/linea/5/backtest", borrador)
+
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["success"] is True
+    assert datos["linea_credito"] == "LoansiFlex"
+    assert datos["evaluaciones"] == esperado["evaluaciones"]
+    assert datos["lineas"] == esperado["lineas"]
+
+
+def test_calibracion_permisos_y_linea_inexistente(cliente):
+    assert cliente().get("/api/scoring/linea/5/calibracion").status_code == 302
+    assert cliente("Basesor25").get("/api/scoring/linea/5/calibracion").status_code == 403
+    respuesta = cliente("auditortest").get("/api/scoring/linea/999/calibracion")
+    assert respuesta.status_code == 404
+    assert respuesta.get_json()["success"] is False
+
+
+def test_calibracion_igual_a_resumen(cliente):
+    auditor = cliente("auditortest")
+
+    respuesta = auditor.get("/api/scoring/linea/5/calibracion?umbral=12")
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos.pop("success") is True
+    esperado = obtener_calibracion_linea("LoansiFlex").resumen(12)
+    assert esperado["total"] > 0
+    assert datos == json.loads(json.dumps(esperado))
+
+    # Sin umbral (o no numérico) no hay punto extra
+    assert "punto" not in auditor.get("/api/scoring/linea/5/calibracion").get_json()
+    assert "punto" not in auditor.get(
+        "/api/scoring/linea/5/calibracion?umbral=alto"
+    ).get_json()
+
+
+def test_todas_lineas_permisos_y_entrada_invalida(cliente):
+    datos = {"valores": {"score_datacredito": 700}}
+
+    assert _post(cliente(), "/api/scoring/todas-lineas", datos).status_code == 302
+    assert _post(cliente("maicolare25"), "/api/scoring/todas-lineas", datos).status_code == 403
+
+    asesor = cliente("Basesor25")
+    assert _post(asesor, "/api/scoring/todas-lineas", datos, headers={}).status_code == 403
+    for invalido in ({}, {"valores": [700]}, {"valores": "700"}):
+        respuesta = _post(asesor, "/api/scoring/todas-lineas", invalido)
+        assert respuesta.status_code == 400, invalido
+        assert respuesta.get_json()["success"] is False
+
+
+def test_todas_lineas_igual_a_calcular_scoring_todas_lineas(cliente):
+    rnd = random.Random(24)
+    valores = _valores_aleatorios(obtener_modelo_scoring("LoansiFlex"), rnd)
+    valores["score_datacredito"] = 780
+    esperado = calcular_scoring_todas_lineas(valores, 3000000)
+
+    respuesta = _post(
+        cliente("Basesor25"),
+        "/api/scoring/todas-lineas",
+        {"valores": valores, "monto_solicitado": 3000000},
+    )
+
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos.pop("success") is True
+    assert datos.pop("duracion_ms") >= 0
+    del esperado["duracion_ms"]
+    assert datos == json.loads(json.dumps(esperado))
+    assert len(datos["lineas"]) > 1
+
+
+def test_reglas_rechazo_permisos_y_linea_inexistente(cliente):
+    assert cliente().get("/api/scoring/linea/5/reglas-rechazo").status_code == 302
+    assert cliente("Basesor25").get("/api/scoring/linea/5/reglas-rechazo").status_code == 403
+    assert cliente("admintecnico").get("/api/scoring/linea/999/reglas-rechazo").status_code == 404
+
+
+def test_reglas_rechazo_cuentan_los_disparos_del_lote(cliente):
+    admin = cliente("admintecnico")
+    antes = admin.get("/api/scoring/linea/5/reglas-rechazo").get_json()
+    assert antes["linea_credito"] == "LoansiFlex"
+    assert antes["reglas"]
+    assert all(r["evaluaciones"] == 0 for r in antes["reglas"])
+
+    # Un lote por la ruta de scoring mueve los contadores de la línea
+    lote = _post(
+        cliente("Basesor25"),
+        "/api/scoring/lote",
+        {"linea_credito": "LoansiFlex", "columnas": {"dti": [10, 0, None]}},
+    ).get_json()
+    assert lote["resultados"]["rechazo_automatico"] == [True, False, False]
+
+    despues = admin.get("/api/scoring/linea/5/reglas-rechazo").get_json()
+    modelo = obtener_modelo_scoring("LoansiFlex")
+    assert despues["version"] == modelo.version
+    assert despues["reglas"] == json.loads(json.dumps(modelo.reglas_rechazo.estadisticas()))
+    assert sum(r["disparos"] for r in despues["reglas"]) == sum(
+        lote["resultados"]["rechazo_automatico"]
+    )
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests del backtest de configuración de scoring (db_helpers_scoring_backtest):
+reproduce el historial por bloques con el modelo vigente y el borrador, y
+da el mismo resultado en un solo proceso que en el pool de procesos.
+"""
+
+import json
+import random
+import sqlite3
+
+import pytest
+
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_backtest import (
+    MAX_PROCESOS_BACKTEST,
+    aplicar_borrador_scoring,
+    backtest_config_scoring,
+)
+
+
+pytestmark = pytest.mark.usefixtures("versiones")
+
+
+def _insertar_historial(destino, linea, n, rnd):
+    modelo = obtener_modelo_scoring(linea)
+    conn = sqlite3.connect(str(destino))
+    filas = []
+    for i in range(n):
+        valores = {}
+        for criterio in modelo.criterios:
+            limites = criterio.tramos.limites or (0.0,)
+            valores[criterio.codigo] = rnd.uniform(min(limites), max(limites))
+        filas.append((f"2026-01-01T00:00:00.{linea}{i:06d}", "admin", linea,
+                      '{"score": 0}', json.dumps(valores)))
+    filas.append((f"2026-01-02T00:00:00.{linea}", "admin", linea, '{"score": 0}', "no es json"))
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, tipo_credito, resultado, valores_criterios) "
+        "VALUES (?, ?, ?, ?, ?)",
+        filas,
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_backtest_en_proceso_y_en_pool(db_copia):
+    rnd = random.Random(5)
+    _insertar_historial(db_copia, "LoansiFlex", 120, rnd)
+    _insertar_historial(db_copia, "Microflex", 40, rnd)
+
+    # Sin cambios: nada cambia de decisión
+    igual = backtest_config_scoring({}, procesos=1, tamano_bloque=32)
+    assert igual["evaluaciones"] == 160 and igual["omitidas"] == 2
+    flex = igual["lineas"]["LoansiFlex"]
+    assert flex["total"] == 120
+    assert flex["aprobados_vigente"] == flex["aprobados_borrador"]
+    assert flex["casos_cambiados"] == [] and flex["cambian_nivel"] == 0
+    assert sum(flex["niveles_vigente"].values()) == 120
+
+    # Sin umbral: todos los no aprobados pasan a aprobado
+    borrador = {"config_general": {"puntaje_minimo_aprobacion": -10 ** 6}}
+    resultado = backtest_config_scoring(borrador, "LoansiFlex", procesos=1, tamano_bloque=32)
+    assert set(resultado["lineas"]) == {"LoansiFlex"}
+    flex = resultado["lineas"]["LoansiFlex"]
+    assert flex["aprobados_borrador"] == 120
+    assert flex["pasan_a_aprobado"] == 120 - flex["aprobados_vigente"] > 0
+    assert len(flex["casos_cambiados"]) == flex["pasan_a_aprobado"]
+    assert all(c["aprobado_borrador"] for c in flex["casos_cambiados"])
+
+    en_pool = backtest_config_scoring(borrador, "LoansiFlex", procesos=2, tamano_bloque=32)
+    assert en_pool["procesos"] == 2
+    assert en_pool["lineas"] == resultado["lineas"]
+
+    # Los workers por request tienen tope
+    tope = backtest_config_scoring(borrador, "LoansiFlex", procesos=64, tamano_bloque=8)
+    assert tope["procesos"] == MAX_PROCESOS_BACKTEST
+    assert tope["lineas"] == resultado["lineas"]
+
+
+def test_aplicar_borrador():
+    vigente = {
+        "criterios": [{"codigo": "a", "peso": 10, "rangos": []}],
+        "niveles_riesgo": [{"nombre": "X", "min": 0, "max": 100}],
+        "puntaje_minimo_aprobacion": 17,
+        "umbral_mora_telcos_rechazo": 200000,
+    }
+    nueva = aplicar_borrador_scoring(vigente, {
+        "niveles_riesgo": [
+            {"nombre": "Bajo", "min": 10, "max": 50, "orden": 1},
+            {"nombre": "Alto", "min": 50, "max": 100, "orden": 1},
+            {"nombre": "Inactivo", "min": 0, "max": 100, "orden": 0, "activo": False},
+        ],
+        "factores_rechazo": [{"criterio": "a", "operador": "<", "valor": 1}],
+        "config_general": {"umbral_mora_telcos": 5},
+    })
+    assert [n["nombre"] for n in nueva["niveles_riesgo"]] == ["Alto", "Bajo"]
+    assert nueva["factores_rechazo_automatico"][0]["criterio"] == "a"
+    assert nueva["umbral_mora_telcos_rechazo"] == 5
+    assert nueva["criterios"] is vigente["criterios"]
+    assert vigente["puntaje_minimo_aprobacion"] == 17
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests de la calibración de umbrales (db_helpers_scoring_calibracion): los
+puntos de las curvas coinciden con contar caso por caso y el resultado se
+reutiliza hasta que cambian las evaluaciones.
+"""
+
+import json
+import random
+import sqlite3
+
+import pytest
+
+from db_helpers_scoring_calibracion import ensure_version_evaluaciones, obtener_calibracion_linea
+
+
+pytestmark = pytest.mark.usefixtures("versiones", "columnas_resultado")
+
+
+@pytest.fixture(autouse=True)
+def version_evaluaciones(versiones):
+    ensure_version_evaluaciones()
+
+
+def _insertar(destino, filas):
+    conn = sqlite3.connect(str(destino))
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, tipo_credito, resultado) VALUES (?, 'admin', ?, ?)",
+        [(ts, linea, json.dumps(resultado)) for ts, linea, resultado in filas],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_curvas_y_cache_por_version(db_copia):
+    rnd = random.Random(3)
+    filas = []
+    for i in range(200):
+        score = round(rnd.uniform(0, 30), 1)
+        rechazo = "Mora activa" if i % 20 == 0 else None
+        filas.append((f"2026-02-01T00:00:{i:06d}", "Microflex",
+                      {"score": score, "score_normalizado": round(score * 3, 1),
+                       "aprobado": False, "rechazo_automatico": rechazo}))
+    _insertar(db_copia, filas)
+
+    calibracion = obtener_calibracion_linea("Microflex")
+    assert calibracion.total >= 200
+    assert calibracion.rechazos_factor >= 10
+    assert obtener_calibracion_linea("Microflex") is calibracion
+
+    puntajes = calibracion.puntajes
+    distancia_min = calibracion.puntaje_minimo - calibracion.comite_min
+    distancia_max = calibracion.puntaje_minimo - calibracion.comite_max
+    for umbral in [-1, 0, 5.5, 10, 14, 17, 22.3, 31]:
+        punto = calibracion.punto_umbral(umbral)
+        franja = (umbral - distancia_min, umbral - distancia_max)
+        en_comite = sum(franja[0] <= p <= franja[1] for p in puntajes)
+        aprobados = sum(p >= umbral and not franja[0] <= p <= franja[1] for p in puntajes)
+        assert (punto["aprobados"], punto["en_comite"]) == (aprobados, en_comite), umbral
+        assert punto["no_aprobados"] == calibracion.total - aprobados - en_comite
+
+    curva = calibracion.curvas["umbral"]
+    assert curva["umbral"] == sorted(curva["umbral"])
+    assert curva["tasa_aprobacion"][0] >= curva["tasa_aprobacion"][-1]
+    niveles = calibracion.curvas["niveles"]
+    assert niveles["casos_desde"][0] == len(calibracion.normalizados)
+    assert calibracion.resumen(12)["punto"] == calibracion.punto_umbral(12)
+
+    # Una evaluación nueva invalida la calibración de la línea
+    _insertar(db_copia, [("2026-02-02T00:00:00", "Microflex", {"score": 29.0, "score_normalizado": 87.0})])
+    nueva = obtener_calibracion_linea("Microflex")
+    assert nueva is not calibracion
+    assert nueva.total == calibracion.total + 1
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Tests del scoring en lote (db_helpers_scoring_lote): mismo puntaje, score,
+nivel y rechazo automático que el modelo compilado evaluado solicitante
+por solicitante, con o sin NumPy, y mismo rechazo y aprobación que la
+lógica previa de /scoring.
+"""
+
+import random
+
+import pytest
+
+import db_helpers_scoring_lote
+from db_helpers import cargar_scoring
+from db_helpers_scoring_linea import cargar_scoring_por_linea
+from db_helpers_scoring_modelo import compilar_modelo_scoring, obtener_modelo_scoring
+from db_helpers_scoring_lote import (
+    evaluar_lote,
+    calcular_scoring_lote,
+    filas_a_columnas,
+    mensaje_rechazo,
+    vectorizar_modelo,
+)
+
+
+pytestmark = pytest.mark.usefixtures("versiones")
+
+
+def _lote_aleatorio(modelo, n, rnd):
+    columnas = {}
+    for criterio in modelo.criterios:
+        limites = criterio.tramos.limites or (0.0,)
+        columnas[criterio.codigo] = [
+            rnd.choice([None, "", rnd.choice(limites), rnd.uniform(min(limites) - 5, max(limites) + 5)])
+            for _ in range(n)
+        ]
+    for factor in modelo.factores_rechazo:
+        columnas.setdefault(factor["criterio"], [rnd.uniform(-1000, 1000000) for _ in range(n)])
+    return columnas
+
+
+# Lógica previa de /scoring (flask_app.scoring), sin comité ni ajuste por
+# Telcos: puntos del primer rango, factores de rechazo y puntaje mínimo
+def _ruta_scoring_base(config, valores_criterios):
+    criterios = config.get("criterios", {})
+    if isinstance(criterios, list):
+        # Por línea los criterios vienen como lista: se indexan por código como en el modelo
+        criterios = {c["codigo"]: c for c in criterios if c.get("codigo")}
+    puntaje_minimo = config.get("puntaje_minimo_aprobacion", 20)
+
+    rechazo_automatico = None
+    sector_mora = valores_criterios.get("comportamiento_sectorial", 0)
+    monto_mora_telcos_num = valores_criterios.get("monto_mora_telcos", 0)
+    umbral_mora_telcos = config.get("umbral_mora_telcos_rechazo", 200000)
+    if int(sector_mora) == 1 and monto_mora_telcos_num > umbral_mora_telcos:
+        monto_formateado = f"${monto_mora_telcos_num:,.0f}".replace(",", ".")
+        umbral_formateado = f"${umbral_mora_telcos:,.0f}".replace(",", ".")
+        rechazo_automatico = f"Mora en Telcos superior al límite: {monto_formateado} (máximo permitido: {umbral_formateado})"
+
+    for factor in config.get("factores_rechazo_automatico", []):
+        criterio_config = factor.get("criterio", "")
+        if criterio_config == "monto_mora_telcos" or criterio_config not in valores_criterios:
+            continue
+        operador = factor.get("operador", ">=")
+        valor_limite = factor.get("valor_limite", factor.get("valor_minimo", 0))
+        try:
+            valor_actual_num = float(valores_criterios[criterio_config])
+            valor_limite_num = float(valor_limite)
+        except (ValueError, TypeError):
+            continue
+        rechazar = {
+            "<": valor_actual_num < valor_limite_num,
+            "<=": valor_actual_num <= valor_limite_num,
+            ">": valor_actual_num > valor_limite_num,
+            ">=": valor_actual_num >= valor_limite_num,
+        }.get(operador, False)
+        if rechazar and criterio_config == "creditos_cerrados_exitosos":
+            if (
+                valor_actual_num == 0
+                and float(valores_criterios.get("cupo_total_aprobado", 0)) > 0
+                and float(valores_criterios.get("historial_pagos", 0)) >= 10
+                and float(valores_criterios.get("mora_reciente", 0)) == 0
+            ):
+                rechazar = False
+        if rechazar:
+            rechazo_automatico = factor.get(
+                "mensaje", f"Factor de rechazo: {criterio_config}"
+            ).replace("{valor_actual}", str(valor_actual_num))
+            break
+
+    puntaje_total = 0.0
+    for criterio_id, valor in valores_criterios.items():
+        if criterio_id in criterios:
+            criterio = criterios[criterio_id]
+            puntos = 0
+            rangos = criterio.get("rangos", [])
+            if rangos and criterio.get("tipo_campo") == "composite":
+                puntos = rangos[0].get("puntos", 0)
+            else:
+                for rango in rangos:
+                    if float(rango.get("min", 0)) <= float(valor) <= float(rango.get("max", 999999)):
+                        puntos = rango.get("puntos", 0)
+                        break
+            puntaje_total += puntos * (criterio["peso"] / 100)
+
+    aprobado = not rechazo_automatico and float(puntaje_total) >= float(puntaje_minimo)
+    return puntaje_total, rechazo_automatico, aprobado
+
+
+def _solicitantes_ruta(modelo, n, rnd):
+    codigos = {c.codigo: c.tramos.limites or (0.0,) for c in modelo.criterios}
+    for factor in modelo.factores_rechazo:
+        limite = factor.get("valor_limite", factor.get("valor", 0))
+        if isinstance(limite, (int, float)):
+            codigos.setdefault(factor["criterio"], (limite - 1, limite, limite + 1, 0))
+    codigos.update({
+        "creditos_cerrados_exitosos": (0, 0, 1, 4),
+        "cupo_total_aprobado": (0, 2500000),
+        "historial_pagos": (0, 9, 10, 12),
+        "monto_mora_telcos": (0, 200000, 200001, 300000, 450000),
+    })
+    filas = []
+    for _ in range(n):
+        fila = {c: float(rnd.choice(v)) for c, v in codigos.items() if rnd.random() < 0.9}
+        # Sin mora el ajuste por Telcos no aplica (el lote no lo incluye)
+        fila["comportamiento_sectorial"] = rnd.choice([0, 1, 2]) if not fila.get("mora_reciente") else 0
+        filas.append(fila)
+    return filas
+
+
+def test_lote_igual_a_ruta_scoring():
+    rnd = random.Random(20)
+    sin_minimo = dict(cargar_scoring())
+    del sin_minimo["puntaje_minimo_aprobacion"]
+    configs = [cargar_scoring(), sin_minimo] + [
+        cargar_scoring_por_linea(linea) for linea in ("LoansiFlex", "LoansiMoto", "Microflex")
+    ]
+    for config in configs:
+        vectorizado = vectorizar_modelo(compilar_modelo_scoring(config))
+        filas = _solicitantes_ruta(vectorizado.modelo, 400, rnd)
+        lote = evaluar_lote(vectorizado, filas_a_columnas(filas))
+        for fila, valores in enumerate(filas):
+            puntaje, rechazo, aprobado = _ruta_scoring_base(config, valores)
+            indice = int(lote["rechazo"][fila])
+            razon = None
+            if indice >= 0:
+                criterio = vectorizado.factores[indice].criterio
+                razon = mensaje_rechazo(vectorizado, indice, valores.get(criterio))
+            assert abs(float(lote["puntaje"][fila]) - puntaje) < 1e-9
+            assert razon == rechazo, valores
+            assert bool(lote["aprobado"][fila]) == aprobado, valores
+
+
+@pytest.mark.parametrize("linea", [None, "LoansiFlex", "Microflex"])
+def test_lote_igual_a_evaluacion_individual(monkeypatch, linea):
+    rnd = random.Random(11)
+    modelo = obtener_modelo_scoring(linea)
+    columnas = _lote_aleatorio(modelo, 300, rnd)
+
+    lote = evaluar_lote(modelo, columnas)
+    resultado = calcular_scoring_lote(columnas, linea)
+    assert resultado["total"] == lote["n"] == 300
+    assert resultado["version"] == modelo.version
+
+    for fila in range(300):
+        valores = {
+            c: v[fila] for c, v in columnas.items()
+            if v[fila] not in (None, "") and c in modelo.por_codigo
+        }
+        puntaje = modelo.puntaje_total(valores)
+        score = modelo.escala_100(puntaje)
+        nivel = max(modelo.nivel_indice(score), 0) if modelo.niveles else -1
+
+        assert abs(float(lote["puntaje"][fila]) - puntaje) < 1e-9
+        assert abs(float(lote["score"][fila]) - score) < 1e-9
+        assert int(lote["nivel"][fila]) == nivel
+        rechazado = int(lote["rechazo"][fila]) >= 0
+        assert resultado["resultados"]["rechazo_automatico"][fila] == rechazado
+        assert bool(lote["aprobado"][fila]) == (not rechazado and puntaje >= modelo.puntaje_minimo)
+
+    # Formato por filas equivalente
+    filas = [{c: v[i] for c, v in columnas.items()} for i in range(300)]
+    assert calcular_scoring_lote(filas_a_columnas(filas), linea) == resultado
+
+    # Sin NumPy: evaluación fila por fila con el mismo resultado
+    monkeypatch.setattr(db_helpers_scoring_lote, "np", None)
+    sin_numpy = calcular_scoring_lote(columnas, linea)
+    assert sin_numpy["resultados"] == resultado["resultados"]
+
+    with pytest.raises(ValueError):
+        evaluar_lote(modelo, {"a": [1, 2], "b": [1]})
+
+
+def test_rechazo_automatico_de_linea():
+    modelo = obtener_modelo_scoring("LoansiFlex")
+    factor = next(f for f in modelo.factores_rechazo if f.get("operador") == "<")
+    # Como en /scoring: umbral de valor_limite / valor_minimo, 0 si no hay
+    limite = float(factor.get("valor_limite", factor.get("valor_minimo", 0)))
+
+    resultado = calcular_scoring_lote({factor["criterio"]: [limite - 1, limite, None]}, "LoansiFlex")
+    assert resultado["resultados"]["rechazo_automatico"] == [True, False, False]
+    assert resultado["resultados"]["razon_rechazo"][0]
+    assert resultado["resultados"]["aprobado"][0] is False
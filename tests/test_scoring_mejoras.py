@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests de las sugerencias de mejora (db_helpers_scoring_mejoras): cambios
+mínimos de uno o dos criterios que alcanzan la aprobación o el siguiente
+nivel, verificados contra el modelo compilado.
+"""
+
+from db_helpers_scoring_modelo import compilar_modelo_scoring
+from db_helpers_scoring_mejoras import explicar_mejoras_scoring
+
+
+CONFIG = {
+    "criterios": {
+        "datacredito": {"peso": 40, "rangos": [
+            {"min": 0, "max": 499, "puntos": 0, "descripcion": "bajo"},
+            {"min": 500, "max": 699, "puntos": 50, "descripcion": "medio"},
+            {"min": 700, "max": 999, "puntos": 100, "descripcion": "alto"},
+        ]},
+        "mora": {"peso": 40, "rangos": [
+            {"min": 0, "max": 0, "puntos": 100, "descripcion": "sin mora"},
+            {"min": 1, "max": 30, "puntos": 40},
+            {"min": 31, "max": 9999, "puntos": 0},
+        ]},
+        "antiguedad": {"peso": 20, "rangos": [
+            {"min": 0, "max": 11, "puntos": 0},
+            {"min": 12, "max": 600, "puntos": 100},
+        ]},
+    },
+    "niveles_riesgo": [
+        {"nombre": "Alto", "min": 0, "max": 49.9, "tasa_ea": 30},
+        {"nombre": "Medio", "min": 50, "max": 79.9, "tasa_ea": 26},
+        {"nombre": "Bajo", "min": 80, "max": 100, "tasa_ea": 22},
+    ],
+    "factores_rechazo_automatico": [
+        {"criterio": "mora", "operador": ">", "valor_limite": 5000, "mensaje": "Mora extrema"},
+    ],
+    "puntaje_minimo_aprobacion": 65,
+}
+
+
+def test_sugerencias_minimas_y_ordenadas():
+    modelo = compilar_modelo_scoring(CONFIG)
+    valores = {"datacredito": 520, "mora": 45, "antiguedad": 6}
+    resultado = explicar_mejoras_scoring(valores, modelo=modelo)
+
+    assert resultado["puntaje"] == 20 and not resultado["aprobado"]
+    metas = {m["tipo"]: m for m in resultado["metas"]}
+    assert metas["aprobacion"]["faltan"] == 45
+    assert metas["nivel"]["nivel"] == "Medio"
+
+    # Ningún cambio solo llega a 65: todas son pares y cada uno aprueba
+    aprobacion = metas["aprobacion"]["sugerencias"]
+    assert aprobacion and all(len(s["cambios"]) == 2 for s in aprobacion)
+    for sugerencia in aprobacion:
+        nuevos = dict(valores)
+        for cambio in sugerencia["cambios"]:
+            nuevos[cambio["criterio"]] = cambio["valor_sugerido"]
+        assert modelo.puntaje_total(nuevos) == sugerencia["puntaje"] >= 65
+        assert sugerencia["aprobado"]
+    # Menor esfuerzo primero (cambio relativo al rango de cada criterio)
+    primera = {c["criterio"]: c["valor_sugerido"] for c in aprobacion[0]["cambios"]}
+    assert primera == {"mora": 0, "antiguedad": 12}
+    assert [s["puntaje"] for s in aprobacion] == [80, 80]
+    assert aprobacion[0]["nivel"] == "Bajo" and aprobacion[0]["tasa_ea"] == 22
+
+    # Para el nivel Medio (puntaje 50) basta un cambio: los pares con ese
+    # criterio no son mínimos
+    nivel = metas["nivel"]["sugerencias"]
+    solos = {s["cambios"][0]["criterio"] for s in nivel if len(s["cambios"]) == 1}
+    assert solos == {"mora"}
+    assert any(len(s["cambios"]) == 2 for s in nivel)
+    assert all(
+        not solos & {c["criterio"] for c in s["cambios"]}
+        for s in nivel if len(s["cambios"]) == 2
+    )
+
+    # Con rechazo automático no hay meta de aprobación
+    rechazado = explicar_mejoras_scoring(dict(valores, mora=6000), modelo=modelo)
+    assert rechazado["rechazo_automatico"]
+    assert [m["tipo"] for m in rechazado["metas"]] == ["nivel"]
+
+    # Ya en el mejor nivel y aprobado: nada que sugerir
+    mejor = explicar_mejoras_scoring({"datacredito": 800, "mora": 0, "antiguedad": 24}, modelo=modelo)
+    assert mejor["metas"] == [] and mejor["candidatos_evaluados"] == 0
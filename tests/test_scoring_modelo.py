@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Tests del modelo de scoring compilado (db_helpers_scoring_modelo): mismos
+puntos, descripciones y niveles que la evaluación lineal que reemplaza, y
+recompilación solo cuando cambia la versión de configuración.
+"""
+
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+import db_helpers
+from db_helpers import cargar_scoring
+from db_helpers_scoring_linea import cargar_scoring_por_linea, guardar_config_scoring_linea
+from db_helpers_scoring_modelo import compilar_modelo_scoring, obtener_modelo_scoring
+
+
+pytestmark = pytest.mark.usefixtures("versiones")
+
+
+# Evaluación lineal previa de /scoring (flask_app.calcular_scoring)
+def _puntos_lineal(criterio, valor):
+    try:
+        valor_numerico = float(valor)
+        rangos = criterio.get("rangos", [])
+        if not rangos:
+            return 0
+        if criterio.get("tipo_campo") == "composite":
+            return rangos[0].get("puntos", 0)
+        for rango in rangos:
+            try:
+                if float(rango.get("min", 0)) <= valor_numerico <= float(rango.get("max", 999999)):
+                    return rango.get("puntos", 0)
+            except (ValueError, TypeError):
+                continue
+        return 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def _descripcion_lineal(criterio, valor):
+    try:
+        valor_numerico = float(valor)
+        if criterio.get("tipo_campo") == "composite":
+            rangos = criterio.get("rangos", [])
+            if rangos:
+                return rangos[0].get("descripcion", f"Valor: {valor_numerico}")
+            return f"Valor: {valor_numerico}"
+        for rango in criterio.get("rangos", []):
+            if float(rango.get("min", 0)) <= valor_numerico <= float(rango.get("max", 999999)):
+                return rango.get("descripcion", f"Valor: {valor_numerico}")
+        return f"Valor: {valor_numerico}"
+    except (ValueError, TypeError):
+        return f"Valor: {valor}"
+
+
+def _nivel_lineal(niveles, score):
+    for i, nivel in enumerate(niveles):
+        if nivel.get("min", 0) <= score <= nivel.get("max", 100):
+            return i
+    return -1
+
+
+def _valores_de_prueba(criterio, rnd):
+    limites = [float(r[k]) for r in criterio.get("rangos", []) for k in ("min", "max")
+               if isinstance(r.get(k), (int, float))]
+    valores = ["", "abc", None, float("nan"), -1, 0]
+    for x in limites:
+        valores += [x, x - 1, x + 1, x - 0.5, x + 0.5]
+    if limites:
+        valores += [rnd.uniform(min(limites) - 10, max(limites) + 10) for _ in range(50)]
+    return valores
+
+
+def _configs():
+    configs = [cargar_scoring()]
+    for linea in ("LoansiFlex", "Microflex", "LoansiMoto"):
+        config = cargar_scoring_por_linea(linea)
+        if config:
+            configs.append(config)
+    # Rangos solapados, invertidos, vacíos o sin límites
+    configs.append({
+        "criterios": {
+            "solapado": {"peso": 10, "rangos": [
+                {"min": 0, "max": 100, "puntos": 1, "descripcion": "amplio"},
+                {"min": 20, "max": 30, "puntos": 9, "descripcion": "nunca gana"},
+                {"min": 90, "max": 150, "puntos": 5},
+            ]},
+            "invertido": {"peso": 5, "rangos": [
+                {"min": 10, "max": 5, "puntos": 7},
+                {"max": 4, "puntos": 2},
+                {"min": 4, "puntos": -3, "descripcion": "sin max"},
+            ]},
+            "compuesto": {"peso": 3, "tipo_campo": "composite", "rangos": [
+                {"min": 50, "max": 60, "puntos": 4, "descripcion": "primero"},
+            ]},
+            "vacio": {"peso": 2, "rangos": []},
+        },
+        "niveles_riesgo": [
+            {"nombre": "A", "min": 70.1, "max": 100},
+            {"nombre": "B", "min": 30, "max": 80},
+            {"nombre": "C", "max": 29.9},
+        ],
+    })
+    return configs
+
+
+def test_paridad_con_evaluacion_lineal():
+    rnd = random.Random(7)
+
+    for config in _configs():
+        modelo = compilar_modelo_scoring(config)
+        criterios = config["criterios"]
+        if isinstance(criterios, list):
+            criterios = {c["codigo"]: c for c in criterios}
+        assert set(modelo.por_codigo) == set(criterios)
+
+        valores = {}
+        for codigo, criterio in criterios.items():
+            compilado = modelo.por_codigo[codigo]
+            for valor in _valores_de_prueba(criterio, rnd):
+                assert compilado.puntos_de(valor) == _puntos_lineal(criterio, valor), (codigo, valor)
+                esperado = _descripcion_lineal(criterio, valor)
+                if valor == valor:  # NaN formatea distinto pero no tiene rango
+                    assert compilado.descripcion_de(valor) == esperado, (codigo, valor)
+            valores[codigo] = rnd.choice(_valores_de_prueba(criterio, rnd)[6:] or [0])
+
+        esperado = sum(
+            _puntos_lineal(criterios[c], v) * (criterios[c].get("peso", 0) / 100)
+            for c, v in valores.items()
+        )
+        assert abs(modelo.puntaje_total(valores) - esperado) < 1e-9
+
+        niveles = config.get("niveles_riesgo", [])
+        for score in [x / 10 for x in range(-10, 1011)]:
+            assert modelo.nivel_indice(score) == _nivel_lineal(niveles, score), score
+
+
+def test_scoring_service_usa_modelo():
+    ruta = Path(__file__).resolve().parent.parent / "app" / "services" / "scoring_service.py"
+    spec = importlib.util.spec_from_file_location("scoring_service_prueba", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+
+    config = {
+        "criterios": {
+            "ingreso": {"peso": 60, "tipo_campo": "numerico", "rangos": [
+                {"min": 0, "max": 999, "puntaje": 10, "descripcion": "bajo"},
+                {"min": 1000, "max": 5000, "puntaje": 80, "descripcion": "medio"},
+                {"min": 900, "max": 99999, "puntaje": 100, "descripcion": "alto"},
+            ]},
+            "vivienda": {"peso": 40, "tipo_campo": "seleccion", "rangos": [
+                {"valor": "propia", "puntaje": 100}, {"valor": "arriendo", "puntaje": 50},
+            ]},
+        },
+        "niveles_riesgo": [
+            {"nombre": "Bajo", "min": 70, "max": 100},
+            {"nombre": "Medio", "min": 40, "max": 69.99},
+        ],
+        "puntaje_minimo_aprobacion": 60,
+    }
+    servicio = modulo.ScoringService(config)
+    assert servicio.evaluar_criterio("ingreso", "950", config["criterios"]["ingreso"])["detalle"] == "bajo"
+    resultado = servicio.calcular_scoring({"ingreso": "3000", "vivienda": "Arriendo"})
+    assert resultado["score_normalizado"] == 68.0
+    assert resultado["nivel"] == "Medio"
+    assert servicio.determinar_nivel_riesgo(69.995)["nombre"] == "Sin clasificar"
+    assert resultado["aprobado"]
+    assert servicio.determinar_nivel_riesgo(75)["nombre"] == "Bajo"
+
+    # Con línea: criterios en formato lista, modelo compartido del caché
+    resultado = servicio.calcular_scoring({"puntaje_datacredito": 800}, linea_credito="LoansiFlex")
+    assert [c["codigo"] for c in resultado["criterios_evaluados"]] == ["puntaje_datacredito"]
+    assert servicio.modelo is obtener_modelo_scoring("LoansiFlex")
+
+
+def test_modelo_cacheado_por_version(monkeypatch):
+    monkeypatch.setattr(db_helpers, "INTERVALO_VERIFICACION_CONFIG_S", 60)
+
+    modelo = obtener_modelo_scoring("LoansiFlex")
+    assert modelo.linea_credito == "LoansiFlex"
+    assert obtener_modelo_scoring("LoansiFlex") is modelo
+    assert obtener_modelo_scoring("No existe").linea_credito is None
+
+    assert guardar_config_scoring_linea(5, {"config_general": {"puntaje_minimo_aprobacion": 33}})
+    nuevo = obtener_modelo_scoring("LoansiFlex")
+    assert nuevo is not modelo
+    assert nuevo.version == modelo.version + 1
+    assert nuevo.puntaje_minimo == 33
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests del scoring contra todas las líneas (db_helpers_scoring_multilinea):
+cada oferta coincide con el modelo de su línea y el orden pone primero la
+mejor oferta.
+"""
+
+import pytest
+
+from db_helpers_scoring_linea import obtener_lineas_credito_scoring
+from db_helpers_scoring_modelo import obtener_modelo_scoring
+from db_helpers_scoring_multilinea import calcular_scoring_todas_lineas
+
+
+pytestmark = pytest.mark.usefixtures("versiones")
+
+
+def test_ofertas_por_linea_ordenadas():
+    lineas = obtener_lineas_credito_scoring()
+    # Valores que caen en el mejor rango de cada criterio de cada línea
+    valores = {}
+    for linea in lineas:
+        for criterio in obtener_modelo_scoring(linea["nombre"]).criterios:
+            if criterio.puntos and not criterio.compuesto:
+                mejor = criterio.puntos.index(max(criterio.puntos))
+                limites = criterio.tramos.limites
+                ganadores = criterio.tramos.ganadores
+                t = next(t for t in range(1, len(ganadores), 2) if ganadores[t] == mejor)
+                valores.setdefault(criterio.codigo, limites[t // 2])
+
+    resultado = calcular_scoring_todas_lineas(valores)
+    ofertas = resultado["lineas"]
+    assert {o["linea_credito"] for o in ofertas} == {l["nombre"] for l in lineas}
+    for oferta in ofertas:
+        modelo = obtener_modelo_scoring(oferta["linea_credito"])
+        assert oferta["puntaje"] == round(modelo.puntaje_total(valores), 2)
+        assert oferta["aprobado"] == (
+            not oferta["rechazo_automatico"] and modelo.puntaje_total(valores) >= modelo.puntaje_minimo
+        )
+
+    grupos = [0 if o["aprobado"] else 1 if not o["rechazo_automatico"] else 2 for o in ofertas]
+    assert grupos == sorted(grupos)
+    aprobadas = [o for o in ofertas if o["aprobado"]]
+    assert resultado["recomendada"] == (aprobadas[0]["linea_credito"] if aprobadas else None)
+
+    # Un monto fuera del rango de todas las líneas deja sin recomendación
+    fuera = calcular_scoring_todas_lineas(valores, monto_solicitado=10 ** 15)
+    assert fuera["recomendada"] is None
+    assert all(o["monto_en_rango"] is False for o in fuera["lineas"])
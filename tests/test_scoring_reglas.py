@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Tests del motor de reglas de rechazo (db_helpers_scoring_reglas): condiciones
+compuestas, paridad con la lógica previa de /scoring y de ScoringService
+sobre los mismos solicitantes, mismo resultado por solicitante y por máscaras
+de lote, y orden por tasa de disparo sin cambiar el resultado.
+"""
+
+import random
+
+import pytest
+
+import db_helpers_scoring_reglas
+from db_helpers_scoring_reglas import (
+    CRITERIO_MORA_TELCOS,
+    SEMANTICA_SERVICIO,
+    compilar_reglas_rechazo,
+    formato_pesos,
+)
+
+
+FACTORES = [
+    {"criterio": "puntaje_datacredito", "operador": "<", "valor_limite": 450,
+     "mensaje": "DataCrédito bajo: {valor_actual} (mínimo {valor_limite})"},
+    {"criterio": "consultas", "alguna": [
+        {"criterio": "consultas", "operador": ">=", "valor_limite": 15},
+        {"todas": [
+            {"criterio": "consultas", "operador": ">=", "valor_limite": 8},
+            {"criterio": "mora_reciente", "operador": ">", "valor_limite": 0},
+        ]},
+    ]},
+    {"criterio": "creditos_cerrados_exitosos", "operador": "<", "valor_limite": 1},
+    {"criterio": "mora_reciente", "operador": ">", "valor_limite": 30},
+    {"criterio": "sin_umbral", "operador": ">", "valor_limite": None},
+]
+CONFIG = {"umbral_mora_telcos_rechazo": 200000}
+
+# Factores como los guarda cada fuente: global (valor_limite / valor_minimo,
+# límite dinámico, "==") y por línea (valor, "=", activo)
+FACTORES_PARIDAD = [
+    {"criterio": "score_aprobacion", "operador": "<", "valor_limite_dinamico": "score_minimo_por_linea",
+     "mensaje": "Score {valor_actual} inferior al mínimo para {linea_credito}"},
+    {"criterio": "ingresos_netos", "operador": "<", "valor_limite": 1423500, "valor_minimo": 1423500,
+     "mensaje": "Ingreso mensual {valor_actual} inferior al mínimo"},
+    {"criterio": "edad", "operador": "<", "valor_minimo": 18, "mensaje": "Menor de edad: {valor_actual}"},
+    {"criterio": "edad", "operador": ">", "valor_limite": 84},
+    {"criterio": "mora_reciente", "operador": ">=", "valor_limite": 180},
+    {"criterio": "creditos_cerrados_exitosos", "operador": "<=", "valor_limite": 0,
+     "mensaje": "Sin créditos cerrados: {valor_actual}"},
+    {"criterio": "tipo_empleo", "operador": "==", "valor_exacto": "6"},
+    {"criterio": "monto_mora_telcos", "operador": ">", "valor_limite_dinamico": "umbral_mora_telcos_rechazo",
+     "mensaje": "Mora en Telcos superior al límite: ${valor_actual} (máximo permitido: ${valor_limite})"},
+    {"criterio": "score_datacredito", "operador": "<", "valor": 450.0, "activo": True,
+     "mensaje": "Score DataCrédito inferior a 450 puntos"},
+    {"criterio": "verificacion_sarlaft", "operador": "=", "valor": 1.0, "activo": True},
+    {"criterio": "consultas_3meses", "valor": 6.0, "activo": False, "mensaje": "Consultas: {valor_actual}"},
+    {"criterio": "dti", "operador": "!=", "valor_limite": 50},
+    {"criterio": "proporcion_saldo_cupo", "operador": ">=", "valor_limite": "noventa"},
+]
+
+
+def _criterio(motor, valores):
+    regla = motor.evaluar(valores)
+    return regla.criterio if regla is not None else None
+
+
+# Lógica previa de /scoring (flask_app.scoring): mora en Telcos y factores
+def _rechazo_ruta_base(factores, config, valores_criterios, requiere_comite=False):
+    sector_mora = valores_criterios.get("comportamiento_sectorial", 0)
+    monto_mora_telcos_num = valores_criterios.get("monto_mora_telcos", 0)
+    umbral_mora_telcos = config.get("umbral_mora_telcos_rechazo", 200000)
+
+    rechazo_automatico = None
+    if int(sector_mora) == 1 and monto_mora_telcos_num > umbral_mora_telcos:
+        monto_formateado = f"${monto_mora_telcos_num:,.0f}".replace(",", ".")
+        umbral_formateado = f"${umbral_mora_telcos:,.0f}".replace(",", ".")
+        rechazo_automatico = f"Mora en Telcos superior al límite: {monto_formateado} (máximo permitido: {umbral_formateado})"
+
+    if not requiere_comite and factores:
+        for factor in factores:
+            criterio_config = factor.get("criterio", "")
+            if criterio_config == "monto_mora_telcos":
+                continue
+
+            operador = factor.get("operador", ">=")
+            valor_limite = factor.get("valor_limite", factor.get("valor_minimo", 0))
+            mensaje_template = factor.get("mensaje", f"Factor de rechazo: {criterio_config}")
+
+            if criterio_config in valores_criterios:
+                valor_actual = valores_criterios[criterio_config]
+                try:
+                    valor_actual_num = float(valor_actual)
+                    valor_limite_num = float(valor_limite)
+
+                    rechazar = False
+                    if operador == "<":
+                        rechazar = valor_actual_num < valor_limite_num
+                    elif operador == "<=":
+                        rechazar = valor_actual_num <= valor_limite_num
+                    elif operador == ">":
+                        rechazar = valor_actual_num > valor_limite_num
+                    elif operador == ">=":
+                        rechazar = valor_actual_num >= valor_limite_num
+
+                    if rechazar and criterio_config == "creditos_cerrados_exitosos":
+                        cupo_total = float(valores_criterios.get("cupo_total_aprobado", 0))
+                        historial_pagos = float(valores_criterios.get("historial_pagos", 0))
+                        mora_reciente = float(valores_criterios.get("mora_reciente", 0))
+                        if (
+                            valor_actual_num == 0
+                            and cupo_total > 0
+                            and historial_pagos >= 10
+                            and mora_reciente == 0
+                        ):
+                            rechazar = False
+
+                    if rechazar:
+                        rechazo_automatico = mensaje_template.replace(
+                            "{valor_actual}", str(valor_actual_num)
+                        )
+                        break
+                except (ValueError, TypeError):
+                    pass
+    return rechazo_automatico
+
+
+# /scoring actual sobre el motor compilado
+def _rechazo_ruta_motor(motor, valores_criterios, requiere_comite=False):
+    rechazo_automatico = None
+    regla_telcos = motor.evaluar(valores_criterios, solo={CRITERIO_MORA_TELCOS})
+    if regla_telcos is not None:
+        rechazo_automatico = regla_telcos.mensaje_para(
+            formato_pesos(valores_criterios["monto_mora_telcos"]), formato_pesos(regla_telcos.limite)
+        )
+    if not requiere_comite:
+        regla = motor.evaluar(valores_criterios, excluir={CRITERIO_MORA_TELCOS})
+        if regla is not None:
+            rechazo_automatico = regla.mensaje_para(float(valores_criterios[regla.criterio]))
+    return rechazo_automatico
+
+
+# Lógica previa de ScoringService.verificar_rechazo_automatico
+def _rechazo_servicio_base(factores, valores):
+    for factor in factores:
+        criterio = factor.get("criterio")
+        operador = factor.get("operador", "<")
+        umbral = factor.get("valor", 0)
+        mensaje = factor.get("mensaje", "Rechazo automático")
+        if criterio not in valores:
+            continue
+        try:
+            valor_num = float(str(valores[criterio]).replace(",", "."))
+            umbral_num = float(umbral)
+        except (ValueError, TypeError):
+            continue
+        ops = {"<": valor_num < umbral_num, "<=": valor_num <= umbral_num,
+               ">": valor_num > umbral_num, ">=": valor_num >= umbral_num,
+               "==": valor_num == umbral_num}
+        if ops.get(operador, False):
+            return mensaje, criterio
+    return None
+
+
+def _solicitantes(rnd, n):
+    opciones = {
+        "score_aprobacion": [-1, 0, 40, 80],
+        "ingresos_netos": [900000, 1423500, 3000000],
+        "edad": [17, 18, 40, 84, 85],
+        "mora_reciente": [0, 0, 10, 179, 180, 250],
+        "creditos_cerrados_exitosos": [0, 0, 1, 3],
+        "cupo_total_aprobado": [0, 2500000],
+        "historial_pagos": [0, 9, 10, 12],
+        "tipo_empleo": [5, 6],
+        "comportamiento_sectorial": [0, 1, 1, 1.5, 2],
+        "monto_mora_telcos": [0, 150000, 200000, 200001, 350000],
+        "score_datacredito": [300, 450, 700],
+        "verificacion_sarlaft": [0, 1],
+        "consultas_3meses": [2, 6, 7],
+        "dti": [40, 50, 60],
+        "proporcion_saldo_cupo": [50, 95],
+        "puntaje_datacredito": [300, 500, 800],
+        "consultas": [0, 8, 15, 20],
+    }
+    filas = []
+    for _ in range(n):
+        # Cada criterio puede faltar, como en el formulario
+        filas.append({k: rnd.choice(v) for k, v in opciones.items() if rnd.random() < 0.85})
+    return filas
+
+
+def test_condiciones_compuestas_y_reglas_integradas():
+    motor = compilar_reglas_rechazo(FACTORES, CONFIG)
+    # Sin umbral numérico no se compila; la mora en Telcos va al final
+    assert [r.criterio for r in motor.reglas] == [
+        "puntaje_datacredito", "consultas", "creditos_cerrados_exitosos",
+        "mora_reciente", "monto_mora_telcos",
+    ]
+
+    base = {"puntaje_datacredito": 700, "consultas": 2, "creditos_cerrados_exitosos": 3,
+            "mora_reciente": 0, "cupo_total_aprobado": 0, "historial_pagos": 12}
+    assert _criterio(motor, base) is None
+
+    # /scoring solo reemplaza {valor_actual} y no acepta coma decimal
+    regla = motor.evaluar(dict(base, puntaje_datacredito=420.5))
+    assert regla.mensaje_para(420.5) == "DataCrédito bajo: 420.5 (mínimo {valor_limite})"
+    assert _criterio(motor, dict(base, puntaje_datacredito="420,5")) is None
+
+    # O / Y anidados
+    assert _criterio(motor, dict(base, consultas=9)) is None
+    assert _criterio(motor, dict(base, consultas=9, mora_reciente=5)) == "consultas"
+    assert _criterio(motor, dict(base, consultas=15)) == "consultas"
+    # Gana el primero de la lista aunque también aplique otro
+    assert _criterio(motor, dict(base, consultas=20, mora_reciente=40)) == "consultas"
+
+    # Sin créditos cerrados: rechaza salvo buen comportamiento en vigentes
+    sin_cerrados = dict(base, creditos_cerrados_exitosos=0)
+    assert _criterio(motor, sin_cerrados) == "creditos_cerrados_exitosos"
+    assert _criterio(motor, dict(sin_cerrados, cupo_total_aprobado=5000000)) is None
+    sin_historial = dict(sin_cerrados, cupo_total_aprobado=5000000)
+    del sin_historial["historial_pagos"]
+    assert _criterio(motor, sin_historial) == "creditos_cerrados_exitosos"
+    # Un indicador no numérico hace que /scoring no rechace
+    assert _criterio(motor, dict(sin_cerrados, cupo_total_aprobado="N/D")) is None
+
+    # Mora en Telcos: solo con comportamiento sectorial = Telcos
+    telcos = dict(base, monto_mora_telcos=250000)
+    assert _criterio(motor, telcos) is None
+    assert _criterio(motor, dict(telcos, comportamiento_sectorial=1)) == "monto_mora_telcos"
+    assert motor.evaluar(dict(telcos, comportamiento_sectorial=1), excluir={"monto_mora_telcos"}) is None
+
+
+def test_semantica_de_scoring():
+    motor = compilar_reglas_rechazo(FACTORES_PARIDAD, {"umbral_mora_telcos_rechazo": 300000})
+    reglas = {r.criterio: r for r in motor.reglas}
+    # Operador por defecto ">=" y umbral de valor_limite / valor_minimo (0 si no hay)
+    assert reglas["consultas_3meses"].limite == 0
+    assert reglas["score_aprobacion"].limite == 0
+    assert reglas["score_datacredito"].limite == 0
+    # "=", "==", "!=" y umbrales no numéricos nunca rechazan en /scoring
+    assert {"verificacion_sarlaft", "tipo_empleo", "dti", "proporcion_saldo_cupo"}.isdisjoint(reglas)
+    # La mora en Telcos configurada se reemplaza por la integrada, con su umbral
+    assert motor.reglas[-1].criterio == "monto_mora_telcos"
+    assert motor.reglas[-1].limite == 300000
+    assert [r.criterio for r in motor.reglas].count("monto_mora_telcos") == 1
+
+
+@pytest.mark.parametrize("requiere_comite", [False, True])
+def test_paridad_con_ruta_scoring(requiere_comite):
+    rnd = random.Random(25)
+    factores_por_config = [
+        (FACTORES_PARIDAD, CONFIG),
+        (FACTORES_PARIDAD, {"umbral_mora_telcos_rechazo": 300000.0}),
+        (FACTORES_PARIDAD[8:], {}),
+        ([], CONFIG),
+    ]
+    for factores, config in factores_por_config:
+        motor = compilar_reglas_rechazo(factores, config)
+        for valores in _solicitantes(rnd, 1500):
+            assert _rechazo_ruta_motor(motor, valores, requiere_comite) == _rechazo_ruta_base(
+                factores, config, valores, requiere_comite
+            ), valores
+
+
+def test_paridad_con_scoring_service():
+    rnd = random.Random(26)
+    motor = compilar_reglas_rechazo(FACTORES_PARIDAD, CONFIG, SEMANTICA_SERVICIO)
+    for valores in _solicitantes(rnd, 2000):
+        if rnd.random() < 0.2:
+            valores["score_datacredito"] = "449,5"
+        regla = motor.evaluar(valores)
+        obtenido = (regla.factor.get("mensaje", "Rechazo automático"), regla.criterio) if regla else None
+        assert obtenido == _rechazo_servicio_base(FACTORES_PARIDAD, valores), valores
+
+
+@pytest.mark.skipif(db_helpers_scoring_reglas.np is None, reason="requiere NumPy")
+def test_mascaras_y_orden_por_tasa(monkeypatch):
+    np = db_helpers_scoring_reglas.np
+    monkeypatch.setattr(db_helpers_scoring_reglas, "REORDENAR_CADA", 50)
+    motor = compilar_reglas_rechazo(FACTORES, CONFIG)
+    rnd = random.Random(11)
+    filas = []
+    for _ in range(400):
+        fila = {
+            "puntaje_datacredito": rnd.choice([300, 500, 800, None]),
+            "consultas": rnd.randint(0, 20),
+            "creditos_cerrados_exitosos": rnd.randint(0, 2),
+            "mora_reciente": rnd.choice([0, 0, 10, 45]),
+            "cupo_total_aprobado": rnd.choice([0, 3000000]),
+            "historial_pagos": rnd.randint(0, 12),
+            "comportamiento_sectorial": rnd.randint(0, 2),
+            "monto_mora_telcos": rnd.choice([0, 150000, 300000]),
+        }
+        filas.append({k: v for k, v in fila.items() if v is not None})
+
+    # Mismo resultado por solicitante (orden que cambia) y por lote
+    esperado = [_criterio(compilar_reglas_rechazo(FACTORES, CONFIG), f) for f in filas]
+    assert [_criterio(motor, f) for f in filas] == esperado
+    assert motor._orden != motor.reglas
+
+    codigos = {k for f in filas for k in f}
+    columnas = {
+        k: np.asarray([f.get(k, np.nan) for f in filas], dtype=float) for k in codigos
+    }
+    rechazo = motor.rechazos_lote(columnas.get, len(filas), registrar=False)
+    assert [motor.reglas[k].criterio if k >= 0 else None for k in rechazo] == esperado
+
+    # Contadores: el orden expuesto es el de evaluación
+    estadisticas = motor.estadisticas()
+    tasas = [r["tasa_disparo"] for r in estadisticas]
+    assert sum(r["disparos"] for r in estadisticas) >= sum(e is not None for e in esperado)
+    assert estadisticas[0]["evaluaciones"] > 0 and tasas[0] == max(tasas)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests del snapshot versionado de configuración
+(db_helpers.obtener_snapshot_configuracion): se reutiliza sin consultas
+mientras la versión no cambie, y todo guardado de configuración o de
+scoring por línea lo invalida, también desde otro proceso.
+"""
+
+import sqlite3
+
+import pytest
+
+import db_helpers
+from db_helpers import (
+    obtener_snapshot_configuracion,
+    guardar_configuracion,
+)
+from db_helpers_scoring_linea import obtener_config_scoring_linea, guardar_config_scoring_linea
+
+
+pytestmark = pytest.mark.usefixtures("versiones")
+
+
+def test_snapshot_se_reutiliza_hasta_que_cambia_la_version(gestor, db_copia, monkeypatch):
+    monkeypatch.setattr(db_helpers, "INTERVALO_VERIFICACION_CONFIG_S", 60)
+
+    snapshot = obtener_snapshot_configuracion()
+    assert "LoansiFlex" in snapshot.configuracion["LINEAS_CREDITO"]
+
+    conn = gestor.obtener()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        for _ in range(100):
+            assert obtener_snapshot_configuracion() is snapshot
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    assert sentencias == []
+
+    # Las copias son independientes del snapshot compartido
+    copia = snapshot.copia_configuracion()
+    copia["LINEAS_CREDITO"]["LoansiFlex"]["descripcion"] = "Editada"
+    assert snapshot.configuracion["LINEAS_CREDITO"]["LoansiFlex"]["descripcion"] != "Editada"
+
+    # Guardado local: el snapshot nuevo se ve de inmediato
+    guardar_configuracion(copia)
+    nuevo = obtener_snapshot_configuracion()
+    assert nuevo.version == snapshot.version + 1
+    assert nuevo.configuracion["LINEAS_CREDITO"]["LoansiFlex"]["descripcion"] == "Editada"
+
+    # Guardado de otro proceso: se detecta al vencer el intervalo
+    otro = sqlite3.connect(str(db_copia))
+    otro.execute(
+        "UPDATE versiones_datos SET version = version + 1 WHERE clave = 'configuracion'"
+    )
+    otro.commit()
+    otro.close()
+    assert obtener_snapshot_configuracion() is nuevo
+    monkeypatch.setattr(db_helpers, "INTERVALO_VERIFICACION_CONFIG_S", 0)
+    assert obtener_snapshot_configuracion().version == nuevo.version + 1
+
+
+def test_guardado_de_scoring_por_linea_incrementa_version(gestor, monkeypatch):
+    monkeypatch.setattr(db_helpers, "INTERVALO_VERIFICACION_CONFIG_S", 60)
+
+    antes = obtener_snapshot_configuracion()
+    config = obtener_config_scoring_linea(5)
+    assert obtener_config_scoring_linea(5) is config
+
+    cg = dict(config.get("config_general") or {}, puntaje_minimo_aprobacion=42)
+    assert guardar_config_scoring_linea(5, {"config_general": cg})
+
+    assert obtener_snapshot_configuracion().version == antes.version + 1
+    releida = obtener_config_scoring_linea(5)
+    assert releida is not config
+    assert releida["config_general"]["puntaje_minimo_aprobacion"] == 42